@@ -0,0 +1,267 @@
+"""
+Offline CPU benchmarks for the separation and mixdown hot paths.
+
+Usage:
+    python benchmarks/bench_hot_paths.py                      # full suite, writes benchmarks/results/<commit>.json
+    python benchmarks/bench_hot_paths.py --quick              # smaller grid and shorter audio
+    python benchmarks/bench_hot_paths.py --compare benchmarks/results/<old>.json
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import subprocess
+import tempfile
+from typing import Callable, Dict, Any, List, Optional
+from unittest import mock
+
+import numpy as np
+import soundfile as sf
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from fixtures import synthetic_mix, synthetic_stems, build_tiny_model  # noqa: E402
+
+SAMPLE_RATE = 44100
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+
+class BenchmarkSkipped(Exception):
+    """Raised by a benchmark when a required dependency (MSST, ffmpeg) is unavailable."""
+
+
+def _best_of(fn: Callable[[], Any], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(max(1, repeat)):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def _require_msst():
+    try:
+        import torch  # noqa: F401
+        from makeitdrumless.msst_integration.mps_patch import apply_all_patches
+        apply_all_patches()
+        import utils.model_utils  # noqa: F401
+        import utils.settings  # noqa: F401
+    except ImportError as e:
+        raise BenchmarkSkipped(f"MSST / PyTorch not importable: {e}")
+
+
+def _require_ffmpeg():
+    from makeitdrumless.ffmpeg.manager import is_ffmpeg_installed
+    if not is_ffmpeg_installed():
+        raise BenchmarkSkipped("ffmpeg not found in PATH")
+
+
+def _write_stems(stems: Dict[str, np.ndarray], out_dir: str) -> Dict[str, str]:
+    os.makedirs(out_dir, exist_ok=True)
+    paths = {}
+    for name, data in stems.items():
+        path = os.path.join(out_dir, f"{name}.wav")
+        sf.write(path, data.T, SAMPLE_RATE, subtype="PCM_16")
+        paths[name] = path
+    return paths
+
+
+def bench_demix(work_dir: str, quick: bool, repeat: int) -> Dict[str, Any]:
+    """patched_demix throughput across chunk_size / overlap / batch_size for tiny SCNet and BS-RoFormer."""
+    _require_msst()
+    import torch
+    import utils.model_utils as mu
+
+    duration = 4.0 if quick else 10.0
+    mix, _ = synthetic_mix(duration, SAMPLE_RATE)
+    chunk_sizes = [44100] if quick else [44100, 88200]
+    overlaps = [2, 4] if quick else [1, 2, 4, 8]
+    batch_sizes = [1, 2] if quick else [1, 2, 4]
+
+    results = {}
+    for model_type in ("scnet", "bs_roformer"):
+        for chunk_size in chunk_sizes:
+            model, config, _, _ = build_tiny_model(model_type, work_dir, chunk_size=chunk_size)
+            for overlap in overlaps:
+                for batch_size in batch_sizes:
+                    config.inference.num_overlap = overlap
+                    config.inference.batch_size = batch_size
+                    seconds = _best_of(
+                        lambda: mu.demix(config, model, mix, torch.device("cpu"), model_type=model_type),
+                        repeat,
+                    )
+                    key = f"demix/{model_type}/chunk{chunk_size}/overlap{overlap}/batch{batch_size}"
+                    results[key] = {
+                        "seconds": seconds,
+                        "audio_seconds": duration,
+                        "realtime_factor": seconds / duration,
+                    }
+                    print(f"  {key}: {seconds:.3f}s (RTF {seconds / duration:.3f})")
+    return results
+
+
+def bench_ensemble(work_dir: str, quick: bool, repeat: int) -> Dict[str, Any]:
+    """ensemble_stems weighted blending of two 4-stem models."""
+    from makeitdrumless.audio.processing import ensemble_stems
+
+    duration = 10.0 if quick else 60.0
+    stems_list = [
+        _write_stems(synthetic_stems(duration, SAMPLE_RATE, seed=s), os.path.join(work_dir, f"ens_model_{s}"))
+        for s in (1, 2)
+    ]
+    out_dir = os.path.join(work_dir, "ens_blend")
+    seconds = _best_of(lambda: ensemble_stems(stems_list, weights=[0.6, 0.4], output_dir=out_dir, force=True), repeat)
+    return {"ensemble_stems/2x4stems": {"seconds": seconds, "audio_seconds": duration}}
+
+
+def bench_mixdown(work_dir: str, quick: bool, repeat: int) -> Dict[str, Any]:
+    """mix_stems_without_drums from 4 WAV stems to MP3."""
+    _require_ffmpeg()
+    from makeitdrumless.audio.processing import mix_stems_without_drums
+
+    duration = 10.0 if quick else 60.0
+    stems = _write_stems(synthetic_stems(duration, SAMPLE_RATE), os.path.join(work_dir, "mix_stems"))
+    out_path = os.path.join(work_dir, "mix_out", "bench (Drumless).mp3")
+    seconds = _best_of(lambda: mix_stems_without_drums(stems, out_path), repeat)
+    return {"mix_stems_without_drums/4stems": {"seconds": seconds, "audio_seconds": duration}}
+
+
+def bench_save_waveform(work_dir: str, quick: bool, repeat: int) -> Dict[str, Any]:
+    """write_stem of a stereo (2, N) float32 stem in every stem storage format."""
+    from makeitdrumless.audio.stem_io import write_stem, STEM_FORMATS
+
+    duration = 30.0 if quick else 300.0
+    wave = synthetic_stems(duration, SAMPLE_RATE)["other"]
+    out_dir = os.path.join(work_dir, "save_waveform")
+    results = {}
+    for fmt in STEM_FORMATS:
+        seconds = _best_of(lambda: write_stem(wave, SAMPLE_RATE, out_dir, fmt, fmt=fmt, background=False), repeat)
+        key = "save_waveform/stereo" if fmt == "wav" else f"save_waveform/{fmt}"
+        results[key] = {"seconds": seconds, "audio_seconds": duration}
+    return results
+
+
+def bench_main_e2e(work_dir: str, quick: bool, repeat: int) -> Dict[str, Any]:
+    """End-to-end main() on a local WAV with a tiny SCNet; model download and upload are stubbed."""
+    _require_msst()
+    _require_ffmpeg()
+    from makeitdrumless import main as cli
+
+    duration = 4.0 if quick else 15.0
+    mix, _ = synthetic_mix(duration, SAMPLE_RATE)
+    input_wav = os.path.join(work_dir, "e2e_input", "Bench Song.wav")
+    os.makedirs(os.path.dirname(input_wav), exist_ok=True)
+    sf.write(input_wav, mix.T, SAMPLE_RATE, subtype="PCM_16")
+    _, _, config_path, checkpoint_path = build_tiny_model("scnet", os.path.join(work_dir, "e2e_model"))
+
+    def run_once():
+        out_dir = tempfile.mkdtemp(dir=work_dir, prefix="e2e_out_")
+        argv = ["makeitdrumless", input_wav, "-o", out_dir, "--device", "cpu", "--no-report"]
+        with mock.patch.object(sys, "argv", argv), \
+                mock.patch("makeitdrumless.msst_integration.inference.download_model_preset",
+                           return_value=("scnet", config_path, checkpoint_path)), \
+                mock.patch("makeitdrumless.main.upload_drumless_track", return_value=True):
+            cli.main()
+
+    seconds = _best_of(run_once, repeat)
+    return {"main/e2e_tiny_scnet": {"seconds": seconds, "audio_seconds": duration}}
+
+
+BENCHMARKS = {
+    "demix": bench_demix,
+    "ensemble": bench_ensemble,
+    "mixdown": bench_mixdown,
+    "save_waveform": bench_save_waveform,
+    "main_e2e": bench_main_e2e,
+}
+
+
+def _git_commit() -> str:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        )
+        return out.stdout.strip()
+    except Exception:
+        return "unknown"
+
+
+def compare_results(current: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """Returns human-readable regression lines for benchmarks slower than baseline by more than tolerance."""
+    regressions = []
+    for key, entry in current.get("results", {}).items():
+        old = baseline.get("results", {}).get(key)
+        if not old or not old.get("seconds"):
+            continue
+        ratio = entry["seconds"] / old["seconds"]
+        if ratio > 1.0 + tolerance:
+            regressions.append(f"{key}: {old['seconds']:.3f}s -> {entry['seconds']:.3f}s ({(ratio - 1) * 100:+.1f}%)")
+    return regressions
+
+
+def run_suite(names: List[str], quick: bool, repeat: int) -> Dict[str, Any]:
+    report = {
+        "commit": _git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "host": {
+            "platform": platform.platform(),
+            "machine": platform.machine(),
+            "python": platform.python_version(),
+            "cpu_count": os.cpu_count(),
+        },
+        "quick": quick,
+        "results": {},
+        "skipped": {},
+    }
+    with tempfile.TemporaryDirectory(prefix="makeitdrumless_bench_") as work_dir:
+        for name in names:
+            print(f"⏱️  Benchmark: {name}")
+            try:
+                report["results"].update(BENCHMARKS[name](work_dir, quick, repeat))
+            except BenchmarkSkipped as e:
+                print(f"  ⏭️  Skipped: {e}")
+                report["skipped"][name] = str(e)
+    return report
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="MakeItDrumless offline CPU benchmark suite")
+    parser.add_argument("--quick", action="store_true", help="Smaller grid and shorter fixtures.")
+    parser.add_argument("--repeat", type=int, default=3, help="Repetitions per benchmark (best time is kept).")
+    parser.add_argument("--only", help=f"Comma-separated subset of: {', '.join(BENCHMARKS)}")
+    parser.add_argument("--output", help="Result JSON path (default: benchmarks/results/<commit>.json).")
+    parser.add_argument("--compare", help="Baseline result JSON to compare against.")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="Allowed slowdown ratio before flagging (default: 0.15).")
+    args = parser.parse_args(argv)
+
+    names = [n.strip() for n in args.only.split(",")] if args.only else list(BENCHMARKS)
+    unknown = [n for n in names if n not in BENCHMARKS]
+    if unknown:
+        parser.error(f"Unknown benchmark(s): {', '.join(unknown)}")
+
+    report = run_suite(names, args.quick, args.repeat)
+
+    out_path = args.output or os.path.join(RESULTS_DIR, f"{report['commit']}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(out_path)), exist_ok=True)
+    with open(out_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"📊 Results written to {out_path}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare_results(report, baseline, args.tolerance)
+        if regressions:
+            print(f"❌ {len(regressions)} regression(s) vs {baseline.get('commit', args.compare)}:")
+            for line in regressions:
+                print(f"  - {line}")
+            return 1
+        print(f"✅ No regressions vs {baseline.get('commit', args.compare)} (tolerance {args.tolerance:.0%}).")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,115 @@
+"""
+Scaling benchmark: concurrent ensemble workers versus the sequential ensemble loop.
+
+Separates one input with every ensemble member, first one after another in this process (torch using
+all usable cores, as main() does with --ensemble-workers 1), then with 2..N concurrent pinned worker
+processes sharing the decoded input. Every run writes to a fresh folder, so nothing is served from
+the stem cache.
+
+Usage:
+    python benchmarks/ensemble_scaling.py --models scnet_large_starrytong,bs_roformer
+    python benchmarks/ensemble_scaling.py --models scnet_large_starrytong,bs_roformer,htdemucs --input song.wav --workers 1,2,3
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+from typing import Optional, List
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from fixtures import synthetic_mix  # noqa: E402
+
+from makeitdrumless.audio.stem_io import wait_for_pending_writes  # noqa: E402
+from makeitdrumless.msst_integration.ensemble_pool import (  # noqa: E402
+    SHARED_SAMPLE_RATE,
+    usable_cores,
+    plan_ensemble_workers,
+    separate_ensemble_concurrently,
+)
+
+
+def _members(models: List[str], input_path: str, out_dir: str) -> List[dict]:
+    return [
+        dict(input_audio_path=input_path, output_folder=os.path.join(out_dir, f"stems_{m}"), model_preset=m, force=True, checkpoint_interval=None)
+        for m in models
+    ]
+
+
+def _run_sequential(models: List[str], input_path: str, out_dir: str) -> float:
+    import torch
+    from makeitdrumless.msst_integration.inference import separate_stems_msst
+
+    torch.set_num_threads(len(usable_cores()))
+    start = time.perf_counter()
+    for kwargs in _members(models, input_path, out_dir):
+        separate_stems_msst(device_name="cpu", **kwargs)
+    wait_for_pending_writes()
+    return time.perf_counter() - start
+
+
+def _run_concurrent(models: List[str], input_path: str, out_dir: str, workers: int) -> float:
+    core_sets = plan_ensemble_workers(len(models), usable_cores(), max_workers=workers, min_cores=1)
+    start = time.perf_counter()
+    for _ in separate_ensemble_concurrently(input_path, _members(models, input_path, out_dir), core_sets):
+        pass
+    return time.perf_counter() - start
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Concurrent ensemble worker scaling benchmark")
+    parser.add_argument("--models", required=True, help="Comma-separated ensemble presets.")
+    parser.add_argument("--input", help="Audio file to separate (default: synthetic fixture).")
+    parser.add_argument("--duration", type=float, default=30.0, help="Synthetic fixture duration in seconds.")
+    parser.add_argument("--workers", help="Comma-separated worker counts to try (default: 2..number of models).")
+    parser.add_argument("--output", help="Optional JSON path for the results.")
+    args = parser.parse_args(argv)
+
+    models = [m.strip() for m in args.models.split(",") if m.strip()]
+    if len(models) < 2:
+        print("❌ --models needs at least two presets.")
+        return 1
+    worker_counts = [int(w) for w in args.workers.split(",")] if args.workers else list(range(2, len(models) + 1))
+
+    try:
+        import soundfile as sf
+    except ImportError as e:
+        print(f"❌ soundfile not importable: {e}")
+        return 1
+
+    cores = usable_cores()
+    rows = []
+    with tempfile.TemporaryDirectory(prefix="makeitdrumless_ensemble_scaling_") as work_dir:
+        input_path = args.input
+        if not input_path:
+            mix, _ = synthetic_mix(args.duration, SHARED_SAMPLE_RATE)
+            input_path = os.path.join(work_dir, "fixture.wav")
+            sf.write(input_path, np.ascontiguousarray(mix.T), SHARED_SAMPLE_RATE, subtype="FLOAT")
+
+        try:
+            sequential = _run_sequential(models, input_path, os.path.join(work_dir, "sequential"))
+        except ImportError as e:
+            print(f"❌ MSST / PyTorch not importable: {e}")
+            return 1
+        rows.append({"workers": 1, "mode": "sequential", "seconds": sequential, "speedup": 1.0})
+
+        for workers in worker_counts:
+            seconds = _run_concurrent(models, input_path, os.path.join(work_dir, f"workers_{workers}"), workers)
+            rows.append({"workers": workers, "mode": "concurrent", "seconds": seconds, "speedup": sequential / seconds})
+
+    print(f"\n{len(models)} members on {len(cores)} cores")
+    print(f"{'workers':>8} {'mode':<11} {'seconds':>9} {'speedup':>8}")
+    for row in rows:
+        print(f"{row['workers']:>8} {row['mode']:<11} {row['seconds']:>9.2f} {row['speedup']:>7.2f}x")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"models": models, "cores": len(cores), "rows": rows}, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,157 @@
+import os
+import sys
+from typing import Dict, Tuple
+
+import numpy as np
+
+# Ensure src/ is in sys.path
+src_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src"))
+if src_dir not in sys.path:
+    sys.path.insert(0, src_dir)
+
+
+TINY_SCNET_CONFIG = """\
+audio:
+  chunk_size: {chunk_size}
+  num_channels: 2
+  sample_rate: 44100
+  min_mean_abs: 0.0
+model:
+  sources: [drums, bass, other, vocals]
+  audio_channels: 2
+  dims: [4, 8, 16]
+  nfft: 512
+  hop_size: 128
+  win_size: 512
+  normalized: true
+  band_SR: [0.175, 0.392, 0.433]
+  band_stride: [1, 4, 16]
+  band_kernel: [3, 4, 16]
+  conv_depths: [1, 1, 1]
+  compress: 4
+  conv_kernel: 3
+  num_dplayer: 2
+  expand: 1
+training:
+  instruments: [drums, bass, other, vocals]
+  target_instrument: null
+  samplerate: 44100
+  use_amp: false
+inference:
+  batch_size: 1
+  num_overlap: 2
+  chunk_size: {chunk_size}
+"""
+
+TINY_BS_ROFORMER_CONFIG = """\
+audio:
+  chunk_size: {chunk_size}
+  dim_f: 256
+  dim_t: 256
+  hop_length: 128
+  n_fft: 512
+  num_channels: 2
+  sample_rate: 44100
+  min_mean_abs: 0.0
+model:
+  dim: 32
+  depth: 1
+  stereo: true
+  num_stems: 4
+  time_transformer_depth: 1
+  freq_transformer_depth: 1
+  linear_transformer_depth: 0
+  freqs_per_bands: [32, 32, 32, 32, 32, 32, 32, 32, 1]
+  dim_head: 16
+  heads: 2
+  attn_dropout: 0.0
+  ff_dropout: 0.0
+  flash_attn: false
+  dim_freqs_in: 257
+  stft_n_fft: 512
+  stft_hop_length: 128
+  stft_win_length: 512
+  stft_normalized: false
+  mask_estimator_depth: 1
+  multi_stft_resolution_loss_weight: 1.0
+  multi_stft_resolutions_window_sizes: [512]
+  multi_stft_hop_size: 128
+  multi_stft_normalized: false
+training:
+  instruments: [vocals, bass, drums, other]
+  target_instrument: null
+  use_amp: false
+inference:
+  batch_size: 1
+  num_overlap: 2
+  chunk_size: {chunk_size}
+"""
+
+TINY_MODEL_CONFIGS = {
+    "scnet": TINY_SCNET_CONFIG,
+    "bs_roformer": TINY_BS_ROFORMER_CONFIG,
+}
+
+
+def synthetic_stems(duration: float = 10.0, sample_rate: int = 44100, seed: int = 0) -> Dict[str, np.ndarray]:
+    """
+    Builds deterministic synthetic stereo stems (drums, bass, other, vocals) for offline benchmarks.
+
+    Returns:
+        Dict mapping stem names to float32 arrays of shape (2, samples).
+    """
+    rng = np.random.default_rng(seed)
+    n = int(duration * sample_rate)
+    t = np.arange(n, dtype=np.float32) / sample_rate
+
+    # Drums: decaying noise bursts on every beat at 120 BPM
+    drums = np.zeros(n, dtype=np.float32)
+    beat = int(0.5 * sample_rate)
+    hit_len = int(0.15 * sample_rate)
+    envelope = np.exp(-np.linspace(0.0, 8.0, hit_len)).astype(np.float32)
+    for start in range(0, n, beat):
+        end = min(n, start + hit_len)
+        drums[start:end] += 0.5 * rng.standard_normal(end - start).astype(np.float32) * envelope[:end - start]
+
+    bass = 0.3 * np.sin(2 * np.pi * 55.0 * t)
+    other = 0.15 * (np.sin(2 * np.pi * 220.0 * t) + np.sin(2 * np.pi * 277.2 * t) + np.sin(2 * np.pi * 329.6 * t))
+    vocals = 0.2 * np.sin(2 * np.pi * 440.0 * t + 2.0 * np.sin(2 * np.pi * 5.0 * t))
+
+    stems = {}
+    for name, mono in (("drums", drums), ("bass", bass), ("other", other), ("vocals", vocals)):
+        stems[name] = np.stack([mono, 0.9 * mono], axis=0).astype(np.float32)
+    return stems
+
+
+def synthetic_mix(duration: float = 10.0, sample_rate: int = 44100, seed: int = 0) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+    """Returns (mix, stems) where mix is the sum of the synthetic stems."""
+    stems = synthetic_stems(duration, sample_rate, seed)
+    mix = np.sum(np.stack(list(stems.values()), axis=0), axis=0)
+    return mix.astype(np.float32), stems
+
+
+def build_tiny_model(model_type: str, work_dir: str, chunk_size: int = 44100):
+    """
+    Builds a tiny randomly-initialized MSST model through get_model_from_config.
+
+    Returns:
+        (model, config, config_path, checkpoint_path)
+    """
+    import torch
+    from makeitdrumless.msst_integration.mps_patch import apply_all_patches
+
+    apply_all_patches()
+    from utils.settings import get_model_from_config
+
+    os.makedirs(work_dir, exist_ok=True)
+    config_path = os.path.join(work_dir, f"tiny_{model_type}.yaml")
+    with open(config_path, "w") as f:
+        f.write(TINY_MODEL_CONFIGS[model_type].format(chunk_size=chunk_size))
+
+    torch.manual_seed(0)
+    model, config = get_model_from_config(model_type, config_path)
+    model.eval()
+
+    checkpoint_path = os.path.join(work_dir, f"tiny_{model_type}.ckpt")
+    torch.save(model.state_dict(), checkpoint_path)
+    return model, config, config_path, checkpoint_path
@@ -0,0 +1,95 @@
+"""
+Per-preset compute saved by --prune-heads.
+
+Loads each BS-RoFormer-style preset, times one chunk through the model with every instrument head
+and again with only the kept heads, and prints parameters and milliseconds per chunk before and
+after pruning.
+
+Usage:
+    python benchmarks/head_pruning.py                                   # tiny random BS-RoFormer
+    python benchmarks/head_pruning.py --presets bs_roformer,bs_conformer
+    python benchmarks/head_pruning.py --presets bs_roformer --keep drums,vocals --output pruning.json
+"""
+import os
+import sys
+import json
+import argparse
+import tempfile
+from typing import Optional, List
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from fixtures import build_tiny_model  # noqa: E402
+
+from makeitdrumless.msst_integration.models import MODEL_REGISTRY, is_model_downloaded, normalize_preset_name  # noqa: E402
+from makeitdrumless.msst_integration.pruning import supports_head_pruning, measure_head_savings  # noqa: E402
+
+
+def _load_preset(preset: str):
+    import torch
+    from makeitdrumless.msst_integration.mps_patch import apply_all_patches
+    from makeitdrumless.msst_integration.inference import _resolve_model_files, _load_torch_model
+
+    apply_all_patches()
+    config_path, checkpoint_path, model_type = _resolve_model_files(preset, None, None, None)
+    model, config, _ = _load_torch_model(model_type, config_path, checkpoint_path, torch.device("cpu"), silence_threshold_db=None)
+    return model, config
+
+
+def format_pruning_table(rows: List[dict]) -> str:
+    header = f"{'PRESET':<22} {'KEPT':<14} {'PARAMS':>14} {'FULL ms':>9} {'PRUNED ms':>10} {'SAVED':>6}"
+    lines = [header, "-" * len(header)]
+    for row in rows:
+        params = f"{row['params_before'] / 1e6:.1f}M->{row['params_after'] / 1e6:.1f}M"
+        lines.append(
+            f"{row['preset']:<22} {','.join(row['kept']):<14} {params:>14} "
+            f"{row['full_ms']:>9.1f} {row['pruned_ms']:>10.1f} {row['saving']:>6.0%}"
+        )
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Compute saved by pruning unused instrument heads")
+    parser.add_argument("--presets", help="Comma-separated presets (default: downloaded prunable presets, else a tiny random model).")
+    parser.add_argument("--keep", default="drums", help="Comma-separated stems whose heads are kept (default: drums).")
+    parser.add_argument("--repeats", type=int, default=3, help="Timed forward passes per setting; the fastest counts.")
+    parser.add_argument("--output", help="Optional JSON path for the results.")
+    args = parser.parse_args(argv)
+
+    keep = [s.strip() for s in args.keep.split(",") if s.strip()]
+    if args.presets:
+        presets = [normalize_preset_name(p.strip()) for p in args.presets.split(",") if p.strip()]
+    else:
+        presets = [name for name in MODEL_REGISTRY if supports_head_pruning(name) and is_model_downloaded(name)]
+
+    try:
+        import torch
+        torch.set_num_threads(min(4, os.cpu_count() or 4))
+        rows = []
+        if not presets:
+            with tempfile.TemporaryDirectory(prefix="makeitdrumless_pruning_") as work_dir:
+                model, config, _, _ = build_tiny_model("bs_roformer", work_dir)
+                report = measure_head_savings(model, config, keep, repeats=args.repeats)
+                if report is not None:
+                    rows.append(dict(report, preset="tiny_bs_roformer"))
+        for preset in presets:
+            if not supports_head_pruning(preset):
+                print(f"⚠️  {preset} has no per-instrument heads to prune; skipped.")
+                continue
+            model, config = _load_preset(preset)
+            report = measure_head_savings(model, config, keep, repeats=args.repeats)
+            del model
+            if report is not None:
+                rows.append(dict(report, preset=preset))
+    except ImportError as e:
+        print(f"❌ MSST / PyTorch not importable: {e}")
+        return 1
+
+    print(format_pruning_table(rows))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(rows, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,122 @@
+"""
+Quality-versus-throughput table across overlap factors and window shapes.
+
+Runs the patched demix on a fixture for every (window shape, overlap) pair, measures wall time and the
+SDR of each setting against a reference, and picks the cheapest setting that meets an SDR target.
+
+Usage:
+    python benchmarks/overlap_table.py                              # tiny random SCNet, dense-overlap reference
+    python benchmarks/overlap_table.py --model scnet_small --reference stems --sdr-target 8.0
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+from typing import Optional, List
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from fixtures import synthetic_mix, build_tiny_model  # noqa: E402
+
+from makeitdrumless.audio.metrics import sdr  # noqa: E402
+from makeitdrumless.msst_integration.windowing import (  # noqa: E402
+    WINDOW_SHAPES,
+    plan_hops,
+    select_cheapest_overlap,
+    format_overlap_table,
+)
+
+
+def _load_preset_model(preset: str):
+    import torch
+    from makeitdrumless.msst_integration.mps_patch import apply_all_patches
+    from makeitdrumless.msst_integration.models import download_model_preset
+
+    apply_all_patches()
+    from utils.settings import get_model_from_config
+
+    model_type, config_path, checkpoint_path = download_model_preset(preset)
+    model, config = get_model_from_config(model_type, config_path)
+    state = torch.load(checkpoint_path, map_location="cpu", weights_only=False)
+    if isinstance(state, dict):
+        for key in ("state", "state_dict", "model_state_dict"):
+            if key in state:
+                state = state[key]
+                break
+    model.load_state_dict(state)
+    model.eval()
+    return model, config, model_type
+
+
+def _run_demix(config, model, mix, model_type, window_shape, overlap):
+    import torch
+    import utils.model_utils as mu
+
+    config.inference.num_overlap = overlap
+    config.inference.window_shape = window_shape
+    config.inference.fade_size = None
+    start = time.perf_counter()
+    out = mu.demix(config, model, mix, torch.device("cpu"), model_type=model_type)
+    return out, time.perf_counter() - start
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Overlap / window quality-versus-throughput table")
+    parser.add_argument("--model", help="Model preset to evaluate (default: tiny random SCNet).")
+    parser.add_argument("--duration", type=float, default=10.0, help="Synthetic fixture duration in seconds.")
+    parser.add_argument("--overlaps", default="1,2,4,8", help="Comma-separated overlap factors.")
+    parser.add_argument("--shapes", default=",".join(WINDOW_SHAPES), help="Comma-separated window shapes.")
+    parser.add_argument("--reference", choices=["dense", "stems"], default="dense",
+                        help="'dense': compare against the densest overlap output; 'stems': against the fixture's true stems.")
+    parser.add_argument("--sdr-target", type=float, default=30.0, help="Minimum SDR (dB) a setting must reach.")
+    parser.add_argument("--output", help="Optional JSON path for the table.")
+    args = parser.parse_args(argv)
+
+    try:
+        with tempfile.TemporaryDirectory(prefix="makeitdrumless_overlap_") as work_dir:
+            if args.model:
+                model, config, model_type = _load_preset_model(args.model)
+            else:
+                model_type = "scnet"
+                model, config, _, _ = build_tiny_model(model_type, work_dir)
+    except ImportError as e:
+        print(f"❌ MSST / PyTorch not importable: {e}")
+        return 1
+
+    mix, true_stems = synthetic_mix(args.duration, 44100)
+    overlaps = sorted(int(o) for o in args.overlaps.split(",") if o.strip())
+    shapes = [s.strip() for s in args.shapes.split(",") if s.strip()]
+    chunk_size = config.inference.chunk_size if "chunk_size" in config.inference else config.audio.chunk_size
+
+    if args.reference == "dense":
+        reference, _ = _run_demix(config, model, mix, model_type, "tukey", max(overlaps) * 2)
+    else:
+        reference = true_stems
+
+    rows = []
+    for shape in shapes:
+        for overlap in overlaps:
+            out, seconds = _run_demix(config, model, mix, model_type, shape, overlap)
+            scores = [sdr(reference[name], out[name]) for name in out if name in reference]
+            row = plan_hops(chunk_size, overlap, mix.shape[-1], window_shape=shape)
+            row["seconds"] = seconds
+            row["sdr"] = sum(scores) / len(scores) if scores else None
+            rows.append(row)
+
+    print(format_overlap_table(rows))
+    best = select_cheapest_overlap(rows, args.sdr_target)
+    if best:
+        print(f"\n✅ Cheapest setting meeting {args.sdr_target:.1f} dB: --window-shape {best['window_shape']} "
+              f"--overlap {best['num_overlap']} ({best['seconds']:.2f}s, SDR {best['sdr']:.2f} dB)")
+    else:
+        print(f"\n⚠️  No setting reached the {args.sdr_target:.1f} dB SDR target.")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"reference": args.reference, "sdr_target": args.sdr_target, "rows": rows, "best": best}, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
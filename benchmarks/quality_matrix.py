@@ -0,0 +1,98 @@
+"""
+Speed-versus-quality regression harness for the separation fast paths.
+
+Runs separate_stems_msst for every mode of a settings matrix (reduced precision, fewer overlaps,
+silence skipping, streaming accumulation, half-precision stems, ...) over reference multitrack
+fixtures, scores the stems with SDR / SI-SDR and prints a table relative to the 'reference' mode.
+Exits with status 1 when a mode falls below its quality thresholds.
+
+Fixtures are folders with one audio file per stem (drums.wav, bass.wav, ...) and optionally a
+mixture.wav; without --fixtures a synthetic mix is built from known stems.
+
+Usage:
+    python benchmarks/quality_matrix.py --model scnet_small
+    python benchmarks/quality_matrix.py --model bs_roformer --fixtures ~/musdb_excerpts --modes reference,overlap_2,silence_skip
+    python benchmarks/quality_matrix.py --model scnet_small --thresholds thresholds.json --output quality.json
+"""
+import os
+import sys
+import json
+import argparse
+import tempfile
+from typing import Optional, List
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from fixtures import synthetic_stems  # noqa: E402
+
+from makeitdrumless.msst_integration.evaluation import (  # noqa: E402
+    DEFAULT_MODES,
+    DEFAULT_MAX_SDR_DROP,
+    REFERENCE_MODE,
+    write_fixture,
+    load_fixtures,
+    evaluate_modes,
+    check_thresholds,
+    load_thresholds,
+    format_quality_table,
+)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Speed-versus-quality table for separation fast paths")
+    parser.add_argument("--model", default="scnet_small", help="Model preset to evaluate (default: scnet_small).")
+    parser.add_argument("--fixtures", help="Folder of reference multitrack fixtures (default: synthetic mix).")
+    parser.add_argument("--duration", type=float, default=30.0, help="Synthetic fixture duration in seconds.")
+    parser.add_argument("--modes", help=f"Comma-separated subset of: {', '.join(DEFAULT_MODES)}")
+    parser.add_argument("--device", default="cpu", help="Device for every mode (default: cpu).")
+    parser.add_argument("--max-sdr-drop", type=float, default=DEFAULT_MAX_SDR_DROP,
+                        help=f"Allowed mean SDR drop below '{REFERENCE_MODE}' in dB (default: {DEFAULT_MAX_SDR_DROP}).")
+    parser.add_argument("--min-sdr", type=float, help="Minimum mean SDR for every mode in dB.")
+    parser.add_argument("--thresholds", help="JSON file of per-mode thresholds ({mode: {max_sdr_drop, min_sdr, min_si_sdr, 'stem:drums'}}).")
+    parser.add_argument("--output", help="Optional JSON path for the results.")
+    args = parser.parse_args(argv)
+
+    modes = DEFAULT_MODES
+    if args.modes:
+        names = [m.strip() for m in args.modes.split(",") if m.strip()]
+        unknown = [m for m in names if m not in DEFAULT_MODES]
+        if unknown:
+            print(f"❌ Unknown modes: {', '.join(unknown)}")
+            return 1
+        if REFERENCE_MODE not in names:
+            names.insert(0, REFERENCE_MODE)
+        modes = {m: DEFAULT_MODES[m] for m in names}
+
+    with tempfile.TemporaryDirectory(prefix="makeitdrumless_quality_") as work_dir:
+        if args.fixtures:
+            fixtures = load_fixtures(os.path.expanduser(args.fixtures))
+        else:
+            fixtures = load_fixtures(write_fixture(os.path.join(work_dir, "fixtures", "synthetic"), synthetic_stems(args.duration)))
+        if not fixtures:
+            print("❌ No fixtures found.")
+            return 1
+
+        try:
+            rows = evaluate_modes(fixtures, args.model, os.path.join(work_dir, "separated"), modes=modes, device_name=args.device)
+        except ImportError as e:
+            print(f"❌ MSST / PyTorch not importable: {e}")
+            return 1
+
+    print(f"\n{args.model}: {len(fixtures)} fixture(s)")
+    print(format_quality_table(rows))
+    failures = check_thresholds(rows, load_thresholds(args.thresholds), max_sdr_drop=args.max_sdr_drop, min_sdr=args.min_sdr)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"model": args.model, "fixtures": [f["name"] for f in fixtures], "rows": rows, "failures": failures}, f, indent=2)
+
+    if failures:
+        print("\n❌ Quality thresholds not met:")
+        for failure in failures:
+            print(f"  - {failure}")
+        return 1
+    print("\n✅ Every mode meets its quality thresholds.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
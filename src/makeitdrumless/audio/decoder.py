@@ -0,0 +1,165 @@
+import os
+import shutil
+import subprocess
+from typing import Optional, Dict, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    import librosa
+except ImportError:
+    librosa = None
+
+from makeitdrumless.ffmpeg.manager import get_ffmpeg_binary, drain_stderr
+
+# Decoded PCM buffers kept for this process, keyed by (absolute source path, sample rate)
+_PCM_CACHE: Dict[Tuple[str, int], "np.ndarray"] = {}
+
+_READ_BLOCK = 1024 * 1024
+
+
+def decode_audio_pcm(
+    source: str,
+    sample_rate: int = 44100,
+    channels: int = 2,
+    http_headers: Optional[Dict[str, str]] = None,
+    keep_original_path: Optional[str] = None,
+    memmap_path: Optional[str] = None,
+) -> "np.ndarray":
+    """
+    Decodes a local file or stream URL to float32 PCM with a single ffmpeg process.
+
+    Args:
+        source: Local audio file path or direct media URL.
+        sample_rate: Output sample rate (resampled by ffmpeg).
+        channels: Output channel count.
+        http_headers: Optional HTTP headers for URL sources (e.g. yt-dlp's format headers).
+        keep_original_path: If set, the compressed audio stream is also remuxed (no transcode) to this path.
+        memmap_path: If set, PCM is streamed to this file and returned as a read-only memory map.
+
+    Returns:
+        float32 array of shape (channels, samples).
+    """
+    cmd = [get_ffmpeg_binary(), "-hide_banner", "-loglevel", "error", "-nostdin"]
+    if source.startswith(("http://", "https://")):
+        cmd += ["-reconnect", "1", "-reconnect_streamed", "1"]
+        if http_headers:
+            header_blob = "".join(f"{k}: {v}\r\n" for k, v in http_headers.items())
+            cmd += ["-headers", header_blob]
+    cmd += ["-i", source]
+    if keep_original_path:
+        os.makedirs(os.path.dirname(os.path.abspath(keep_original_path)), exist_ok=True)
+        cmd += ["-map", "0:a:0", "-c:a", "copy", "-y", keep_original_path]
+    cmd += ["-map", "0:a:0", "-f", "f32le", "-acodec", "pcm_f32le", "-ac", str(channels), "-ar", str(sample_rate), "pipe:1"]
+
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    collect_stderr = drain_stderr(proc)
+    try:
+        if memmap_path:
+            os.makedirs(os.path.dirname(os.path.abspath(memmap_path)), exist_ok=True)
+            with open(memmap_path, "wb") as f:
+                while True:
+                    block = proc.stdout.read(_READ_BLOCK)
+                    if not block:
+                        break
+                    f.write(block)
+            raw = None
+        else:
+            raw = proc.stdout.read()
+        proc.wait()
+        stderr = collect_stderr()
+    except BaseException:
+        proc.kill()
+        raise
+
+    if proc.returncode != 0:
+        raise RuntimeError(f"ffmpeg failed to decode '{source}': {stderr.decode(errors='replace').strip()}")
+
+    frame_bytes = 4 * channels
+    if memmap_path:
+        n_frames = os.path.getsize(memmap_path) // frame_bytes
+        pcm = np.memmap(memmap_path, dtype="<f4", mode="r", shape=(n_frames, channels))
+        return pcm.T
+    usable = len(raw) - (len(raw) % frame_bytes)
+    pcm = np.frombuffer(raw[:usable], dtype="<f4").reshape(-1, channels)
+    return np.ascontiguousarray(pcm.T)
+
+
+def transcode_to_wav(source: str, target_wav: str):
+    """
+    Converts an audio file to 16-bit PCM WAV with a single ffmpeg subprocess (no in-memory decode).
+
+    WAV sources are copied as-is. The output is written next to target_wav and renamed into place,
+    so an interrupted conversion never leaves a truncated file behind.
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(target_wav)), exist_ok=True)
+    partial = f"{target_wav}.part.wav"
+    if source.lower().endswith(".wav"):
+        shutil.copyfile(source, partial)
+        os.replace(partial, target_wav)
+        return
+    cmd = [
+        get_ffmpeg_binary(), "-hide_banner", "-loglevel", "error", "-nostdin", "-y",
+        "-i", source, "-map", "0:a:0", "-vn", "-c:a", "pcm_s16le", partial,
+    ]
+    result = subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    if result.returncode != 0:
+        if os.path.exists(partial):
+            os.remove(partial)
+        raise RuntimeError(f"ffmpeg failed to convert '{source}': {result.stderr.decode(errors='replace').strip()}")
+    os.replace(partial, target_wav)
+
+
+def register_pcm(path: str, sample_rate: int, pcm: "np.ndarray"):
+    """Keeps an already-decoded (channels, samples) buffer so separation can skip decoding this file."""
+    _PCM_CACHE[(os.path.abspath(path), int(sample_rate))] = pcm
+
+
+def alias_pcm(source_path: str, target_path: str):
+    """Makes buffers registered for source_path also available under target_path (e.g. after a copy)."""
+    src = os.path.abspath(source_path)
+    for (path, sr), pcm in list(_PCM_CACHE.items()):
+        if path == src:
+            _PCM_CACHE[(os.path.abspath(target_path), sr)] = pcm
+
+
+def discard_pcm(path: str):
+    """Drops every buffer registered for path once it is no longer needed."""
+    src = os.path.abspath(path)
+    for key in [k for k in _PCM_CACHE if k[0] == src]:
+        del _PCM_CACHE[key]
+
+
+def get_cached_pcm(path: str, sample_rate: int) -> Optional["np.ndarray"]:
+    return _PCM_CACHE.get((os.path.abspath(path), int(sample_rate)))
+
+
+def clear_pcm_cache():
+    _PCM_CACHE.clear()
+
+
+def load_audio_mix(path: str, sample_rate: int) -> Tuple["np.ndarray", int]:
+    """
+    Loads an audio file as a stereo float32 (channels, samples) mix at the given sample rate.
+
+    Uses a PCM buffer registered during ingestion when available, a single ffmpeg decode for
+    compressed formats, and librosa otherwise.
+    """
+    cached = get_cached_pcm(path, sample_rate)
+    if cached is not None:
+        return cached, sample_rate
+
+    ext = os.path.splitext(path)[1].lower()
+    if ext not in (".wav", ".flac") and shutil.which(get_ffmpeg_binary()):
+        try:
+            return decode_audio_pcm(path, sample_rate=sample_rate), sample_rate
+        except RuntimeError as e:
+            print(f"⚠️  ffmpeg decode failed, falling back to librosa: {e}")
+
+    mix, sr = librosa.load(path, sr=sample_rate, mono=False)
+    if len(mix.shape) == 1:
+        mix = np.stack([mix, mix], axis=0)
+    return mix, sr
@@ -1,5 +1,5 @@
 import os
-import tempfile
+import shutil
 import threading
 from pathlib import Path
 from typing import Tuple, Dict, Any, Optional
@@ -9,12 +9,19 @@ try:
 except ImportError:
     YoutubeDL = None
 
-try:
-    from pydub import AudioSegment
-except ImportError:
-    AudioSegment = None
-
 from makeitdrumless.cli_utils.spinner import spinner
+from makeitdrumless.telemetry import stage
+from makeitdrumless.audio.decoder import decode_audio_pcm, register_pcm, transcode_to_wav
+from makeitdrumless.audio.source_index import (
+    get_source_id,
+    source_id_from_info,
+    load_cached_info,
+    save_cached_info,
+)
+from makeitdrumless.library import get_library, hash_file, source_keys
+
+# Audio containers accepted as an original track (compressed originals are kept by --direct-ingest)
+AUDIO_EXTENSIONS = (".wav", ".mp3", ".flac", ".m4a", ".aac", ".ogg", ".opus", ".webm")
 
 
 def get_default_output_base() -> str:
@@ -41,15 +48,44 @@ def parse_artist_title(raw_title: str) -> Tuple[Optional[str], str]:
     return None, clean
 
 
-def get_audio_input(input_source: str, output_folder: Optional[str] = None) -> Tuple[str, Optional[Dict[str, Any]]]:
+def find_original_audio(folder: str, title: str) -> Optional[str]:
+    """Returns an existing non-empty '<title> (Original).<ext>' file in folder, preferring WAV."""
+    for ext in AUDIO_EXTENSIONS:
+        cand = os.path.join(folder, f"{title} (Original){ext}")
+        if os.path.exists(cand) and os.path.getsize(cand) > 0:
+            return cand
+    return None
+
+
+def _index_original(library, audio_path: str, info: Optional[Dict[str, Any]]):
+    """Records an original inside the output tree in the library, keyed by the info's source ID / content hash."""
+    folder = os.path.dirname(os.path.abspath(audio_path))
+    if folder != library.base_dir and folder.startswith(library.base_dir + os.sep):
+        library.record_track(folder, audio_path, info=info, keys=source_keys(info))
+
+
+def get_audio_input(
+    input_source: str,
+    output_folder: Optional[str] = None,
+    direct_pcm: bool = False,
+    sample_rate: int = 44100,
+) -> Tuple[str, Optional[Dict[str, Any]]]:
     """
     Handles fetching audio from a YouTube URL, a local audio file, or an existing track directory.
 
+    Args:
+        input_source: YouTube URL, local audio file, track directory, or track folder name.
+        output_folder: Base output directory (default: ~/Music/MakeItDrumless).
+        direct_pcm: If True, compressed inputs are kept as-is (no WAV transcode) and URLs are
+                    decoded straight to PCM while downloading.
+        sample_rate: Sample rate of the PCM buffer decoded during direct ingestion.
+
     Returns:
-        (wav_file_path, metadata_dict)
+        (audio_file_path, metadata_dict)
     """
     target_dir = os.path.abspath(output_folder or get_default_output_base())
     os.makedirs(target_dir, exist_ok=True)
+    library = get_library(target_dir)
 
     # 1. Check if input is an existing directory
     if os.path.isdir(input_source):
@@ -59,6 +95,11 @@ def get_audio_input(input_source: str, output_folder: Optional[str] = None) -> T
         artist, title = parse_artist_title(dir_name)
         safe_title = clean_audio_title(title if title else dir_name)
 
+        indexed = library.find_folder(dir_path)
+        if indexed:
+            print(f"✅ Using existing audio file: {indexed['original']}")
+            return indexed["original"], indexed["info"] or {"title": safe_title, "artist": artist}
+
         # Look for existing WAV/audio in this folder
         candidate_names = [
             f"{safe_title} (Original).wav",
@@ -70,19 +111,27 @@ def get_audio_input(input_source: str, output_folder: Optional[str] = None) -> T
             cpath = os.path.join(dir_path, cname)
             if os.path.exists(cpath) and os.path.getsize(cpath) > 0:
                 print(f"✅ Using existing audio file: {cpath}")
+                _index_original(library, cpath, {"title": safe_title, "artist": artist})
                 return cpath, {"title": safe_title, "artist": artist}
 
+        existing_original = find_original_audio(dir_path, safe_title) or find_original_audio(dir_path, dir_name)
+        if existing_original:
+            print(f"✅ Using existing audio file: {existing_original}")
+            _index_original(library, existing_original, {"title": safe_title, "artist": artist})
+            return existing_original, {"title": safe_title, "artist": artist}
+
         # Search for any audio file in the directory
         for file in sorted(os.listdir(dir_path)):
-            if file.lower().endswith((".wav", ".mp3", ".flac", ".m4a", ".aac", ".ogg")) and not file.lower().endswith("(drumless).mp3"):
+            if file.lower().endswith((".wav", ".mp3", ".flac", ".m4a", ".aac", ".ogg")) and "(drumless)" not in file.lower():
                 audio_file = os.path.join(dir_path, file)
-                if file.lower().endswith(".wav"):
+                if file.lower().endswith(".wav") or direct_pcm:
                     return audio_file, {"title": safe_title, "artist": artist}
                 # Convert to WAV
                 target_wav = os.path.join(dir_path, f"{safe_title} (Original).wav")
                 print(f"🔄 Converting {file} to WAV format: {target_wav}...")
-                seg = AudioSegment.from_file(audio_file)
-                seg.export(target_wav, format="wav")
+                with stage("ffmpeg_convert", source=file):
+                    transcode_to_wav(audio_file, target_wav)
+                _index_original(library, target_wav, {"title": safe_title, "artist": artist})
                 return target_wav, {"title": safe_title, "artist": artist}
 
     # 2. Check if input is a local file
@@ -94,38 +143,82 @@ def get_audio_input(input_source: str, output_folder: Optional[str] = None) -> T
         safe_name = clean_audio_title(title if title else base_name)
         target_wav = os.path.join(target_dir, safe_name, f"{safe_name} (Original).wav")
 
-        info_dict = {"title": safe_name, "artist": artist}
+        # The same file imported before (under any name) resolves through its content hash
+        content_hash = hash_file(input_source)
+        indexed = library.find(content_hash)
+        if indexed:
+            print(f"✅ Using existing audio file: {indexed['original']}")
+            return indexed["original"], indexed["info"] or {"title": safe_name, "artist": artist}
+
+        info_dict = {"title": safe_name, "artist": artist, "content_hash": content_hash}
         if ext == ".wav" and os.path.abspath(input_source) == os.path.abspath(target_wav):
+            _index_original(library, target_wav, info_dict)
             return os.path.abspath(input_source), info_dict
 
         # If already exists in track folder
         if os.path.exists(target_wav) and os.path.getsize(target_wav) > 0:
             print(f"✅ Using existing audio file: {target_wav}")
+            _index_original(library, target_wav, info_dict)
             return target_wav, info_dict
 
+        # Direct ingestion keeps the compressed original instead of transcoding to WAV
+        if direct_pcm and ext != ".wav":
+            target_original = os.path.join(target_dir, safe_name, f"{safe_name} (Original){ext}")
+            if os.path.abspath(input_source) != os.path.abspath(target_original) and not (
+                os.path.exists(target_original) and os.path.getsize(target_original) > 0
+            ):
+                os.makedirs(os.path.dirname(target_original), exist_ok=True)
+                shutil.copy2(input_source, target_original)
+                print(f"✅ Kept compressed original: {target_original}")
+            _index_original(library, target_original, info_dict)
+            return target_original, info_dict
+
         # Convert/copy to WAV in target directory if needed
         os.makedirs(os.path.dirname(target_wav), exist_ok=True)
         if not os.path.exists(target_wav):
             print(f"🔄 Converting {ext} to WAV format in {os.path.dirname(target_wav)}...")
-            seg = AudioSegment.from_file(input_source)
-            seg.export(target_wav, format="wav")
+            with stage("ffmpeg_convert", source=os.path.basename(input_source)):
+                transcode_to_wav(input_source, target_wav)
             print(f"✅ Saved original WAV: {target_wav}")
 
+        _index_original(library, target_wav, info_dict)
         return target_wav, info_dict
 
     # 3. Check if input_source refers to a track folder name under target_dir
     possible_track_dir = os.path.join(target_dir, input_source)
     if os.path.isdir(possible_track_dir):
-        return get_audio_input(possible_track_dir, output_folder=target_dir)
+        return get_audio_input(possible_track_dir, output_folder=target_dir, direct_pcm=direct_pcm, sample_rate=sample_rate)
 
     # 4. Treat as URL (YouTube, etc.)
-    return download_audio(input_source, output_folder=target_dir)
+    return download_audio(input_source, output_folder=target_dir, direct_pcm=direct_pcm, sample_rate=sample_rate)
 
 
-def download_audio(link: str, output_folder: Optional[str] = None) -> Tuple[str, Dict[str, Any]]:
-    """Downloads audio from YouTube/supported URL using yt-dlp with caching and anti-bot headers."""
+def download_audio(
+    link: str,
+    output_folder: Optional[str] = None,
+    direct_pcm: bool = False,
+    sample_rate: int = 44100,
+    show_spinner: bool = True,
+) -> Tuple[str, Dict[str, Any]]:
+    """
+    Downloads audio from YouTube/supported URL using yt-dlp with caching and anti-bot headers.
+
+    With direct_pcm, the best audio stream is piped through a single ffmpeg process that remuxes
+    the compressed original into the song folder and decodes float32 PCM at sample_rate in memory,
+    so separation starts without an intermediate WAV transcode, copy, or second decode.
+    show_spinner=False suppresses the progress spinner (used by concurrent playlist workers).
+    """
     target_dir = os.path.abspath(output_folder or get_default_output_base())
     os.makedirs(target_dir, exist_ok=True)
+    library = get_library(target_dir)
+
+    # Repeated URLs are answered from the library index without any network call
+    source_id = get_source_id(link)
+    if source_id:
+        indexed = library.find(source_id)
+        if indexed:
+            print(f"✅ Audio already downloaded: {indexed['original']}")
+            return indexed["original"], indexed["info"]
 
     ydl_extract_opts = {
         'quiet': True,
@@ -137,19 +230,20 @@ def download_audio(link: str, output_folder: Optional[str] = None) -> Tuple[str,
         },
         'http_headers': {
             'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36',
-        }
+        },
+        # Resolve the audio-only stream, so the same info drives both the download and direct ingestion
+        'format': 'bestaudio/best',
     }
 
-    # Extract metadata without downloading
-    try:
-        with YoutubeDL(ydl_extract_opts) as ydl:
-            info_dict = ydl.extract_info(link, download=False)
-            title = info_dict.get("title", "downloaded_track")
-    except Exception:
-        # Fallback with minimal options if extraction has quirks
-        with YoutubeDL({'quiet': True, 'no_warnings': True}) as ydl:
-            info_dict = ydl.extract_info(link, download=False)
-            title = info_dict.get("title", "downloaded_track")
+    # Resolve metadata and formats once; the download below reuses this info
+    info_dict = load_cached_info(source_id) if source_id else None
+    info_from_cache = info_dict is not None
+    if info_dict is None:
+        info_dict = _extract_info(link, ydl_extract_opts)
+        source_id = source_id or source_id_from_info(info_dict)
+        if source_id:
+            save_cached_info(source_id, info_dict)
+    title = info_dict.get("title", "downloaded_track")
 
     artist = info_dict.get("artist") or info_dict.get("uploader") or info_dict.get("channel")
     track_field = info_dict.get("track")
@@ -164,28 +258,56 @@ def download_audio(link: str, output_folder: Optional[str] = None) -> Tuple[str,
 
     raw_safe_title = "".join(c for c in title if c not in r'\/:*?"<>|').strip()
 
-    # Check potential cached locations before downloading
-    candidate_paths = [
-        os.path.join(target_dir, clean_title, f"{clean_title} (Original).wav"),
-        os.path.join(target_dir, raw_safe_title, f"{raw_safe_title} (Original).wav"),
-        os.path.join(target_dir, f"{clean_title} (Original).wav"),
-        os.path.join(target_dir, f"{raw_safe_title} (Original).wav"),
-        os.path.join(target_dir, clean_title, f"{title}.wav"),
-        os.path.join(target_dir, raw_safe_title, f"{title}.wav"),
-        os.path.join(tempfile.gettempdir(), "makeitdrumless", f"{clean_title}.wav"),
-        os.path.join(tempfile.gettempdir(), "makeitdrumless", f"{raw_safe_title}.wav"),
-    ]
-
-    for cand in candidate_paths:
-        if os.path.exists(cand) and os.path.getsize(cand) > 0:
-            print(f"✅ Audio already downloaded: {cand}")
-            return cand, info_dict
+    # Title-based fallback for tracks indexed before their source ID was known (e.g. rebuilt folders)
+    for folder in (clean_title, raw_safe_title):
+        indexed = library.find_folder(os.path.join(target_dir, folder))
+        if indexed:
+            print(f"✅ Audio already downloaded: {indexed['original']}")
+            _index_original(library, indexed["original"], info_dict)
+            return indexed["original"], info_dict
 
     # Destination file in dedicated song directory
     song_dir = os.path.join(target_dir, clean_title)
     os.makedirs(song_dir, exist_ok=True)
     expected_file = os.path.join(song_dir, f"{clean_title} (Original).wav")
 
+    if direct_pcm and info_dict.get("url"):
+        ext = info_dict.get("ext") or "m4a"
+        original_file = os.path.join(song_dir, f"{clean_title} (Original).{ext}")
+        print(f"⚙️  Streaming audio from URL straight to PCM: {link}...")
+        stop_event = threading.Event()
+        spinner_thread = threading.Thread(target=spinner, args=("Downloading audio", stop_event), daemon=True)
+        if show_spinner:
+            spinner_thread.start()
+        try:
+            with stage("download", url=link, mode="direct_pcm"):
+                try:
+                    pcm = decode_audio_pcm(
+                        info_dict["url"],
+                        sample_rate=sample_rate,
+                        http_headers=info_dict.get("http_headers"),
+                        keep_original_path=original_file,
+                    )
+                except RuntimeError:
+                    if not info_from_cache:
+                        raise
+                    # The cached stream URL expired early; resolve once more and retry
+                    info_dict = _refresh_info(link, ydl_extract_opts, source_id)
+                    pcm = decode_audio_pcm(
+                        info_dict["url"],
+                        sample_rate=sample_rate,
+                        http_headers=info_dict.get("http_headers"),
+                        keep_original_path=original_file,
+                    )
+        finally:
+            stop_event.set()
+            if show_spinner:
+                spinner_thread.join(timeout=1.0)
+        register_pcm(original_file, sample_rate, pcm)
+        _index_original(library, original_file, info_dict)
+        print(f"✅ Audio downloaded: {original_file} ({pcm.shape[-1] / sample_rate:.1f}s decoded in memory)")
+        return original_file, info_dict
+
     ydl_download_opts = {
         'format': 'bestaudio/best',
         'outtmpl': os.path.join(song_dir, f"{clean_title} (Original).%(ext)s"),
@@ -206,17 +328,47 @@ def download_audio(link: str, output_folder: Optional[str] = None) -> Tuple[str,
         'no_warnings': True,
     }
 
-    # Download
+    # Download from the already-resolved info instead of extracting the URL a second time
     print(f"⚙️  Downloading audio from URL: {link}...")
     stop_event = threading.Event()
     spinner_thread = threading.Thread(target=spinner, args=("Downloading audio", stop_event), daemon=True)
-    spinner_thread.start()
+    if show_spinner:
+        spinner_thread.start()
     try:
-        with YoutubeDL(ydl_download_opts) as ydl:
-            info = ydl.extract_info(link, download=True)
+        with stage("download", url=link):
+            with YoutubeDL(ydl_download_opts) as ydl:
+                try:
+                    ydl.process_ie_result(info_dict, download=True)
+                except Exception:
+                    if not info_from_cache:
+                        raise
+                    # The cached stream URL expired early; resolve once more and retry
+                    info_dict = _refresh_info(link, ydl_extract_opts, source_id)
+                    ydl.process_ie_result(info_dict, download=True)
     finally:
         stop_event.set()
-        spinner_thread.join(timeout=1.0)
+        if show_spinner:
+            spinner_thread.join(timeout=1.0)
 
+    _index_original(library, expected_file, info_dict)
     print(f"✅ Audio downloaded: {expected_file}")
     return expected_file, info_dict
+
+
+def _extract_info(link: str, ydl_opts: Dict[str, Any]) -> Dict[str, Any]:
+    """Resolves metadata and formats for a URL once, returning a JSON-serializable info dict."""
+    try:
+        with YoutubeDL(ydl_opts) as ydl:
+            info = ydl.extract_info(link, download=False)
+    except Exception:
+        # Fallback with minimal options if extraction has quirks
+        with YoutubeDL({'quiet': True, 'no_warnings': True, 'format': 'bestaudio/best'}) as ydl:
+            info = ydl.extract_info(link, download=False)
+    return YoutubeDL.sanitize_info(info)
+
+
+def _refresh_info(link: str, ydl_opts: Dict[str, Any], source_id: Optional[str]) -> Dict[str, Any]:
+    info = _extract_info(link, ydl_opts)
+    if source_id:
+        save_cached_info(source_id, info)
+    return info
@@ -0,0 +1,201 @@
+import os
+import threading
+import subprocess
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import Callable, Optional, Dict, Any, List
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from makeitdrumless.ffmpeg.manager import get_ffmpeg_binary, drain_stderr
+from makeitdrumless.telemetry import stage, get_active_run, bind_run
+
+# Output codecs: ffmpeg encoder, file extension, default CBR bitrate and how a VBR quality is passed
+OUTPUT_CODECS: Dict[str, Dict[str, Any]] = {
+    "mp3": {"encoder": "libmp3lame", "ext": ".mp3", "bitrate": "320k", "vbr": ["-q:a"],
+            "extra": ["-id3v2_version", "3"]},
+    "opus": {"encoder": "libopus", "ext": ".opus", "bitrate": "160k", "vbr": None,
+             "extra": ["-ar", "48000"]},
+    "aac": {"encoder": "aac", "ext": ".m4a", "bitrate": "256k", "vbr": ["-q:a"],
+            "extra": ["-movflags", "+faststart"]},
+    "flac": {"encoder": "flac", "ext": ".flac", "bitrate": None, "vbr": None,
+             "extra": ["-compression_level", "5"]},
+}
+
+# Concurrent encodes in batch mode; each one is its own ffmpeg process, so they spread across cores
+ENCODE_WORKERS = os.cpu_count() or 1
+
+_PIPE_FRAMES = 65536
+
+_encode_pool: Optional[ThreadPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def output_extension(codec: str) -> str:
+    """Returns the file extension ('.mp3', '.opus', '.m4a', '.flac') written for codec."""
+    if codec not in OUTPUT_CODECS:
+        raise ValueError(f"Unknown output codec '{codec}'. Available: {', '.join(OUTPUT_CODECS)}")
+    return OUTPUT_CODECS[codec]["ext"]
+
+
+def track_tags(info: Optional[Dict[str, Any]], model_name: str = "MSST", label: str = "Drumless") -> Dict[str, str]:
+    """Builds title / artist / comment tags for a rendered output (e.g. 'Song (Drumless)') from a track's info dict."""
+    info = info or {}
+    title = info.get("track") or info.get("title") or ""
+    artist = info.get("artist") or info.get("uploader") or info.get("channel") or ""
+    if not artist and " - " in title:
+        artist, title = title.split(" - ", 1)
+
+    tags = {
+        "title": f"{title.strip()} ({label})" if title else f"{label} Version",
+        "comment": f"{label} backing track generated by MakeItDrumless ({model_name})",
+    }
+    if artist:
+        tags["artist"] = artist.strip()
+    return tags
+
+
+def _encoder_args(codec: str, bitrate: Optional[str], vbr_quality: Optional[str]) -> List[str]:
+    spec = OUTPUT_CODECS[codec]
+    args = ["-c:a", spec["encoder"]]
+    if codec == "opus":
+        # libopus is VBR by default; a quality request keeps it, otherwise encode at a constant rate
+        args += ["-b:a", bitrate or spec["bitrate"], "-vbr", "on" if vbr_quality is not None else "off"]
+    elif vbr_quality is not None and spec["vbr"]:
+        args += spec["vbr"] + [str(vbr_quality)]
+    elif spec["bitrate"]:
+        args += ["-b:a", bitrate or spec["bitrate"]]
+    return args + spec["extra"]
+
+
+def encode_pcm(
+    audio: "np.ndarray",
+    sample_rate: int,
+    output_path: str,
+    codec: str = "mp3",
+    bitrate: Optional[str] = None,
+    vbr_quality: Optional[str] = None,
+    tags: Optional[Dict[str, str]] = None,
+    gain_db: float = 0.0,
+) -> str:
+    """
+    Encodes float PCM by streaming it to ffmpeg's stdin, writing the tags in the same pass.
+
+    Args:
+        audio: (samples, channels) float array (memory-mapped / float16 stems are converted block-wise).
+        sample_rate: Sample rate of audio in Hz.
+        output_path: Destination file; its extension should match output_extension(codec).
+        codec: One of OUTPUT_CODECS ('mp3', 'opus', 'aac', 'flac').
+        bitrate: CBR bitrate (e.g. '320k'). Defaults to the codec's entry in OUTPUT_CODECS.
+        vbr_quality: VBR quality instead of CBR (mp3: 0-9, aac: 0.1-2, opus: VBR at the bitrate target).
+        tags: Metadata tags (e.g. from track_tags()).
+        gain_db: Gain applied to each block as it is piped (e.g. the loudness normalization from render_mixes()).
+
+    Returns:
+        output_path
+    """
+    if codec not in OUTPUT_CODECS:
+        raise ValueError(f"Unknown output codec '{codec}'. Available: {', '.join(OUTPUT_CODECS)}")
+    channels = audio.shape[1] if audio.ndim == 2 else 1
+    os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+    base, ext = os.path.splitext(output_path)
+    # ffmpeg picks the container from the extension, so the temporary name keeps it
+    partial = f"{base}.part{ext}"
+
+    cmd = [
+        get_ffmpeg_binary(), "-hide_banner", "-loglevel", "error", "-nostdin", "-y",
+        "-f", "f32le", "-ar", str(sample_rate), "-ac", str(channels), "-i", "pipe:0",
+    ]
+    cmd += _encoder_args(codec, bitrate, vbr_quality)
+    for key, value in (tags or {}).items():
+        cmd += ["-metadata", f"{key}={value}"]
+    cmd.append(partial)
+
+    scale = np.float32(10 ** (gain_db / 20.0)) if gain_db else None
+    with stage("encode", codec=codec):
+        proc = subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+        collect_stderr = drain_stderr(proc)
+        try:
+            for start in range(0, len(audio), _PIPE_FRAMES):
+                block = np.ascontiguousarray(audio[start:start + _PIPE_FRAMES], dtype="<f4")
+                if scale is not None:
+                    block = block * scale
+                proc.stdin.write(block.tobytes())
+            proc.stdin.close()
+        except BrokenPipeError:
+            pass
+        except BaseException:
+            proc.kill()
+            raise
+        proc.wait()
+        stderr = collect_stderr()
+
+    if proc.returncode != 0:
+        if os.path.exists(partial):
+            os.remove(partial)
+        raise RuntimeError(f"ffmpeg failed to encode '{output_path}': {stderr.decode(errors='replace').strip()}")
+    os.replace(partial, output_path)
+    return output_path
+
+
+def submit_encode_job(fn: Callable[..., Any], *args, **kwargs) -> Future:
+    """
+    Runs fn on the shared encode pool (ENCODE_WORKERS threads, each driving its own ffmpeg process).
+
+    Stages recorded by fn go to the caller's active run.
+    """
+    global _encode_pool
+    with _pool_lock:
+        if _encode_pool is None:
+            _encode_pool = ThreadPoolExecutor(max_workers=ENCODE_WORKERS, thread_name_prefix="encode")
+    run = get_active_run()
+
+    def job():
+        if run is None:
+            return fn(*args, **kwargs)
+        with bind_run(run):
+            return fn(*args, **kwargs)
+
+    return _encode_pool.submit(job)
+
+
+def submit_encode(*args, **kwargs) -> Future:
+    """Runs encode_pcm() on the shared encode pool so several outputs encode concurrently."""
+    return submit_encode_job(encode_pcm, *args, **kwargs)
+
+
+def encode_many(jobs: Dict[str, Dict[str, Any]], **common) -> Dict[str, Any]:
+    """
+    Encodes several outputs at once, one ffmpeg process per output.
+
+    Uses its own short-lived threads (not the shared encode pool), so it is safe to call from a
+    job already running on that pool.
+
+    Args:
+        jobs: {name: encode_pcm() keyword arguments (audio, sample_rate, output_path, tags, ...)}.
+        **common: Keyword arguments shared by every job (e.g. codec, bitrate, vbr_quality).
+
+    Returns:
+        {name: output path, or the exception that encode raised}.
+    """
+    if not jobs:
+        return {}
+    run = get_active_run()
+
+    def job(kwargs):
+        if run is None:
+            return encode_pcm(**kwargs, **common)
+        with bind_run(run):
+            return encode_pcm(**kwargs, **common)
+
+    results: Dict[str, Any] = {}
+    with ThreadPoolExecutor(max_workers=min(len(jobs), ENCODE_WORKERS), thread_name_prefix="encode-mix") as pool:
+        futures = {name: pool.submit(job, kwargs) for name, kwargs in jobs.items()}
+        for name, future in futures.items():
+            try:
+                results[name] = future.result()
+            except Exception as e:
+                results[name] = e
+    return results
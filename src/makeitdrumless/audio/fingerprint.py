@@ -0,0 +1,311 @@
+import os
+from typing import Dict, Any, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    from scipy.signal import resample_poly
+except ImportError:
+    resample_poly = None
+
+from makeitdrumless.audio.stem_io import read_stem, write_stem, mark_stems_complete
+
+# Chroma analysis runs on a mono downmix at this rate; pitch content up to ~4 kHz is all it needs
+FINGERPRINT_RATE = 11025
+
+# Analysis frame and hop in samples at FINGERPRINT_RATE (~0.37 s frames every ~0.19 s)
+FRAME_SIZE = 4096
+HOP_SIZE = 2048
+
+# Frequency range folded into the 12 pitch classes
+_MIN_HZ = 65.0
+_MAX_HZ = 4000.0
+
+# Frames quieter than this (dBFS RMS) carry no pitch content and are left out of matching
+_SILENT_DB = -55.0
+
+# Landmarks chain a frame's two strongest pitch classes with a later frame's, this many frames apart,
+# and the strongest pitch class the same distance further on
+LANDMARK_DELTAS = (1, 3, 6)
+
+# Minimum mean chroma correlation over the aligned overlap for two inputs to count as one recording
+MATCH_THRESHOLD = 0.8
+
+# Landmarks that must agree on one time offset before a candidate is verified
+MIN_MATCH_VOTES = 20
+
+# Minimum normalized waveform correlation at the refined alignment (rejects other recordings of a song)
+MIN_ALIGNMENT_CORRELATION = 0.8
+
+# Input audio the matched recording may not cover (lead-in / tail silence) and still be reused
+MAX_UNCOVERED_SECONDS = 1.0
+
+# Seconds of the new input cross-correlated against the matched original to refine the offset
+_REFINE_SECONDS = 10.0
+
+
+def _mono_at_fingerprint_rate(mix: "np.ndarray", sample_rate: int) -> "np.ndarray":
+    mono = np.asarray(mix, dtype=np.float32)
+    if mono.ndim > 1:
+        mono = mono.mean(axis=0)
+    if sample_rate == FINGERPRINT_RATE:
+        return mono
+    if resample_poly is not None:
+        return resample_poly(mono, FINGERPRINT_RATE, sample_rate).astype(np.float32)
+    factor = max(1, int(round(sample_rate / FINGERPRINT_RATE)))
+    return mono[: len(mono) // factor * factor].reshape(-1, factor).mean(axis=1)
+
+
+def _pitch_class_matrix() -> "np.ndarray":
+    """(FFT bins, 12) matrix folding spectrum bins between _MIN_HZ and _MAX_HZ into pitch classes (C = 0)."""
+    freqs = np.fft.rfftfreq(FRAME_SIZE, 1.0 / FINGERPRINT_RATE)
+    matrix = np.zeros((len(freqs), 12), dtype=np.float32)
+    band = (freqs >= _MIN_HZ) & (freqs <= _MAX_HZ)
+    midi = 69.0 + 12.0 * np.log2(freqs[band] / 440.0)
+    matrix[np.nonzero(band)[0], np.round(midi).astype(int) % 12] = 1.0
+    return matrix
+
+
+def chroma_frames(mono: "np.ndarray") -> "np.ndarray":
+    """
+    Computes log-compressed chroma of a mono signal at FINGERPRINT_RATE.
+
+    Returns:
+        (frames, 12) float32 rows normalized to unit peak; silent frames are all zeros.
+    """
+    if len(mono) < FRAME_SIZE:
+        mono = np.pad(mono, (0, FRAME_SIZE - len(mono)))
+    count = 1 + (len(mono) - FRAME_SIZE) // HOP_SIZE
+    frames = np.lib.stride_tricks.as_strided(
+        mono, shape=(count, FRAME_SIZE), strides=(mono.strides[0] * HOP_SIZE, mono.strides[0]), writeable=False
+    )
+    rms = np.sqrt(np.mean(frames.astype(np.float64) ** 2, axis=1))
+    loud = 20.0 * np.log10(np.maximum(rms, 1e-10)) > _SILENT_DB
+
+    power = np.abs(np.fft.rfft(frames * np.hanning(FRAME_SIZE).astype(np.float32), axis=1)) ** 2
+    chroma = np.log1p(100.0 * (power @ _pitch_class_matrix()) / FRAME_SIZE).astype(np.float32)
+    peak = chroma.max(axis=1, keepdims=True)
+    chroma = np.where(loud[:, None] & (peak > 0), chroma / np.maximum(peak, 1e-10), 0.0)
+    return chroma.astype(np.float32)
+
+
+def landmark_hashes(chroma: "np.ndarray") -> Tuple["np.ndarray", "np.ndarray"]:
+    """
+    Builds landmark hashes from chroma frames.
+
+    Each hash combines the two strongest pitch classes of a frame with those of a frame
+    LANDMARK_DELTAS later and the strongest one of the frame after that, so it survives level
+    changes, codecs and EQ but not a different song. The third frame spreads the hashes over
+    144 * 144 * 12 values per delta, so a lookup hits a small share of a large library.
+
+    Returns:
+        (hashes, frames) int64 arrays: every landmark and the frame it starts at.
+    """
+    order = np.argsort(chroma, axis=1)
+    strongest = order[:, -1]
+    code = strongest * 12 + order[:, -2]
+    voiced = chroma.max(axis=1) > 0
+    hashes, frames = [], []
+    for index, delta in enumerate(LANDMARK_DELTAS):
+        if len(code) <= 2 * delta:
+            continue
+        start = np.nonzero(voiced[:-2 * delta] & voiced[delta:-delta] & voiced[2 * delta:])[0]
+        key = (code[start] * 144 + code[start + delta]) * 12 + strongest[start + 2 * delta]
+        hashes.append(key * len(LANDMARK_DELTAS) + index)
+        frames.append(start)
+    if not hashes:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    return np.concatenate(hashes).astype(np.int64), np.concatenate(frames).astype(np.int64)
+
+
+def compute_fingerprint(mix: "np.ndarray", sample_rate: int) -> Dict[str, Any]:
+    """
+    Fingerprints a decoded (channels, samples) mix.
+
+    Returns:
+        {'chroma': (frames, 12) uint8, 'hashes', 'frames', 'duration', 'rate', 'hop'}.
+    """
+    chroma = chroma_frames(_mono_at_fingerprint_rate(mix, sample_rate))
+    hashes, frames = landmark_hashes(chroma)
+    return {
+        "chroma": np.round(chroma * 255.0).astype(np.uint8),
+        "hashes": hashes,
+        "frames": frames,
+        "duration": np.asarray(mix).shape[-1] / float(sample_rate),
+        "rate": FINGERPRINT_RATE,
+        "hop": HOP_SIZE,
+    }
+
+
+def vote_offsets(
+    query_hashes: "np.ndarray",
+    query_frames: "np.ndarray",
+    hit_hashes: "np.ndarray",
+    hit_candidates: "np.ndarray",
+    hit_frames: "np.ndarray",
+) -> Dict[int, Tuple[int, int]]:
+    """
+    Counts landmark agreements per candidate recording and time offset.
+
+    Args:
+        query_hashes / query_frames: Landmarks of the new input.
+        hit_hashes / hit_candidates / hit_frames: Landmarks of indexed recordings (integer ids) that
+            share a hash with the query.
+
+    Returns:
+        {candidate: (best offset in frames, votes)}; an offset is where the new input starts in the
+        candidate. Votes of the neighbouring offsets count too, for frame-grid jitter.
+    """
+    order = np.argsort(query_hashes, kind="stable")
+    sorted_hashes = query_hashes[order]
+    sorted_frames = query_frames[order]
+    lo = np.searchsorted(sorted_hashes, hit_hashes, side="left")
+    counts = np.searchsorted(sorted_hashes, hit_hashes, side="right") - lo
+    total = int(counts.sum())
+    if total == 0:
+        return {}
+    # Every (indexed landmark, query landmark) pair with the same hash votes for one offset
+    firsts = np.repeat(np.cumsum(counts) - counts, counts)
+    pairs = np.repeat(lo, counts) + (np.arange(total) - firsts)
+    offsets = np.repeat(hit_frames, counts) - sorted_frames[pairs]
+    candidates = np.repeat(hit_candidates, counts)
+
+    best = {}
+    for candidate in np.unique(candidates):
+        cand_offsets = offsets[candidates == candidate]
+        base = cand_offsets.min() - 1
+        histogram = np.bincount(cand_offsets - base, minlength=int(cand_offsets.max() - base) + 2)
+        smoothed = histogram + np.roll(histogram, 1) + np.roll(histogram, -1)
+        index = int(np.argmax(smoothed))
+        best[int(candidate)] = (int(index + base), int(smoothed[index]))
+    return best
+
+
+def chroma_similarity(query: "np.ndarray", reference: "np.ndarray", offset: int) -> Tuple[float, int]:
+    """
+    Mean per-frame correlation of two chroma sequences with query frame t aligned to reference frame t + offset.
+
+    Rows are mean-centred first, so unrelated music scores near 0 and the same recording near 1.
+
+    Returns:
+        (similarity, frames compared); frames silent in either sequence are skipped.
+    """
+    query = np.asarray(query, dtype=np.float32)
+    reference = np.asarray(reference, dtype=np.float32)
+    start = max(0, -offset)
+    stop = min(len(query), len(reference) - offset)
+    if stop <= start:
+        return 0.0, 0
+    a = query[start:stop]
+    b = reference[start + offset:stop + offset]
+    voiced = (a.max(axis=1) > 0) & (b.max(axis=1) > 0)
+    if not voiced.any():
+        return 0.0, 0
+    a = a[voiced] - a[voiced].mean(axis=1, keepdims=True)
+    b = b[voiced] - b[voiced].mean(axis=1, keepdims=True)
+    corr = np.sum(a * b, axis=1) / np.maximum(np.linalg.norm(a, axis=1) * np.linalg.norm(b, axis=1), 1e-10)
+    return float(corr.mean()), int(voiced.sum())
+
+
+def refine_alignment(
+    mix: "np.ndarray",
+    reference: "np.ndarray",
+    coarse_offset: int,
+    sample_rate: int,
+    search: Optional[int] = None,
+) -> Dict[str, float]:
+    """
+    Finds the sample offset of mix inside reference by cross-correlating waveforms around a coarse offset.
+
+    Args:
+        mix: New input, (channels, samples).
+        reference: Matched recording, (channels, samples) at the same sample rate.
+        coarse_offset: Offset in samples from the chroma match (mix sample 0 = reference sample offset).
+        sample_rate: Sample rate of both signals.
+        search: Samples searched on each side of the coarse offset (default: two chroma hops).
+
+    Returns:
+        {'offset' (samples), 'correlation' (normalized peak, 1 = identical waveforms), 'gain' (mix level
+        over the reference's at the alignment)}.
+    """
+    a = np.asarray(mix, dtype=np.float32).mean(axis=0)
+    b = np.asarray(reference, dtype=np.float32).mean(axis=0)
+    if search is None:
+        search = int(2 * HOP_SIZE * sample_rate / FINGERPRINT_RATE)
+    n = min(len(a), int(_REFINE_SECONDS * sample_rate))
+    # Excerpt from the middle of the input, where intros and fades do not dominate
+    position = max(0, (len(a) - n) // 2)
+    segment = a[position:position + n].astype(np.float64)
+    lo = max(0, position + coarse_offset - search)
+    hi = min(len(b), position + coarse_offset + search + n)
+    window = b[lo:hi].astype(np.float64)
+    if len(window) < n or not np.any(segment):
+        return {"offset": coarse_offset, "correlation": 0.0, "gain": 1.0}
+
+    size = 1 << int(np.ceil(np.log2(len(window) + n)))
+    xcorr = np.fft.irfft(np.fft.rfft(window, size) * np.conj(np.fft.rfft(segment, size)), size)[: len(window) - n + 1]
+    energy = np.concatenate([[0.0], np.cumsum(window ** 2)])
+    window_norm = np.sqrt(np.maximum(energy[n:] - energy[:-n], 1e-12))
+    normalized = xcorr / (window_norm * np.linalg.norm(segment))
+    lag = int(np.argmax(normalized))
+    aligned = window[lag:lag + n]
+    return {
+        "offset": lo + lag - position,
+        "correlation": float(normalized[lag]),
+        "gain": float(np.dot(segment, aligned) / max(np.dot(aligned, aligned), 1e-12)),
+    }
+
+
+def uncovered_samples(offset: int, length: int, reference_length: int) -> int:
+    """Samples of a length-long input at offset that fall outside the reference recording."""
+    return max(0, -offset) + max(0, offset + length - reference_length)
+
+
+def align_audio(audio: "np.ndarray", offset: int, length: int, gain: float = 1.0) -> "np.ndarray":
+    """
+    Cuts (channels, samples) audio of a matched recording to the new input's timeline.
+
+    Sample n of the result is audio sample n + offset scaled by gain; samples outside the recording are silent.
+    """
+    audio = np.asarray(audio)
+    out = np.zeros(audio.shape[:-1] + (length,), dtype=np.float32)
+    src_start = max(0, offset)
+    dst_start = max(0, -offset)
+    count = min(length - dst_start, audio.shape[-1] - src_start)
+    if count > 0:
+        out[..., dst_start:dst_start + count] = audio[..., src_start:src_start + count] * gain
+    return out
+
+
+def write_aligned_stems(
+    stems: Dict[str, str],
+    output_dir: str,
+    alignment: Dict[str, Any],
+    stem_format: str = "wav",
+) -> Dict[str, str]:
+    """
+    Writes a matched recording's stems shifted, trimmed and gain-matched to a new input.
+
+    Args:
+        stems: {stem_name: path} of the matched recording.
+        output_dir: Stem folder of the new input.
+        alignment: {'offset', 'length', 'gain', 'sample_rate'}: offset and length in samples at sample_rate.
+        stem_format: Stem storage format (see stem_io.STEM_FORMATS).
+
+    Returns:
+        {stem_name: path} of the written stems; the folder is marked complete once they are on disk.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    saved = {}
+    for name, path in stems.items():
+        audio, sample_rate = read_stem(path)
+        scale = sample_rate / float(alignment["sample_rate"])
+        aligned = align_audio(
+            audio.T, int(round(alignment["offset"] * scale)), int(round(alignment["length"] * scale)), alignment["gain"]
+        )
+        saved[name] = write_stem(aligned, sample_rate, output_dir, name, fmt=stem_format)
+    mark_stems_complete(output_dir, saved)
+    return saved
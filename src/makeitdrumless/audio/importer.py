@@ -0,0 +1,126 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Optional, Dict, Any, List
+
+from makeitdrumless.audio.decoder import transcode_to_wav
+from makeitdrumless.audio.downloader import (
+    AUDIO_EXTENSIONS,
+    clean_audio_title,
+    parse_artist_title,
+    get_default_output_base,
+)
+from makeitdrumless.library import get_library, hash_file
+
+
+def find_audio_files(root: str, exclude_dir: Optional[str] = None) -> List[str]:
+    """Recursively lists importable audio files under root, skipping generated outputs and exclude_dir."""
+    exclude_dir = os.path.abspath(exclude_dir) if exclude_dir else None
+    found = []
+    for dirpath, dirnames, filenames in os.walk(os.path.abspath(root)):
+        if exclude_dir and (dirpath == exclude_dir or dirpath.startswith(exclude_dir + os.sep)):
+            dirnames[:] = []
+            continue
+        dirnames[:] = sorted(d for d in dirnames if not d.startswith("."))
+        for name in sorted(filenames):
+            lower = name.lower()
+            if lower.endswith(AUDIO_EXTENSIONS) and "(drumless)" not in lower and not lower.endswith(".part.wav"):
+                found.append(os.path.join(dirpath, name))
+    return found
+
+
+def _hash_worker(path: str) -> Optional[str]:
+    try:
+        return hash_file(path)
+    except OSError:
+        return None
+
+
+def _convert_worker(source: str, target_wav: str) -> float:
+    start = time.perf_counter()
+    transcode_to_wav(source, target_wav)
+    return time.perf_counter() - start
+
+
+def import_directory(
+    root: str,
+    output_folder: Optional[str] = None,
+    workers: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    Bulk-imports a folder tree of audio files into the track-folder layout used by main().
+
+    Every file is hashed and converted to '<Title>/<Title> (Original).wav' under the output base by
+    parallel ffmpeg subprocesses. Files whose content hash is already in the library (or that
+    duplicate another file in the same batch) are skipped.
+
+    Args:
+        root: Folder to scan recursively (MP3, FLAC, M4A, WAV, ...).
+        output_folder: Base output directory (default: ~/Music/MakeItDrumless).
+        workers: Worker processes (default: CPU count).
+
+    Returns:
+        Dict with 'imported', 'skipped' and 'failed' lists.
+    """
+    target_dir = os.path.abspath(output_folder or get_default_output_base())
+    library = get_library(target_dir)
+    sources = find_audio_files(root, exclude_dir=target_dir)
+    result = {"imported": [], "skipped": [], "failed": []}
+    if not sources:
+        print(f"⚠️  No audio files found under {root}")
+        return result
+
+    workers = workers or os.cpu_count() or 1
+    print(f"📥 Importing {len(sources)} audio files from {root} with {workers} workers...")
+    start = time.perf_counter()
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        hashes = dict(zip(sources, pool.map(_hash_worker, sources, chunksize=4)))
+
+        # Plan targets in this process so two inputs never race for the same track folder
+        jobs = {}
+        seen_hashes = set()
+        taken_folders = set()
+        for source in sources:
+            content_hash = hashes[source]
+            if content_hash is None:
+                result["failed"].append({"source": source, "error": "unreadable"})
+                continue
+            indexed = library.find(content_hash)
+            if indexed or content_hash in seen_hashes:
+                result["skipped"].append({"source": source, "original": indexed["original"] if indexed else None})
+                continue
+            seen_hashes.add(content_hash)
+
+            base_name = os.path.splitext(os.path.basename(source))[0]
+            artist, title = parse_artist_title(base_name)
+            safe_name = clean_audio_title(title if title else base_name) or "Untitled"
+            folder_name = safe_name
+            suffix = 2
+            while folder_name in taken_folders or os.path.exists(os.path.join(target_dir, folder_name)):
+                folder_name = f"{safe_name} ({suffix})"
+                suffix += 1
+            taken_folders.add(folder_name)
+
+            target_wav = os.path.join(target_dir, folder_name, f"{folder_name} (Original).wav")
+            # main() derives the track folder from the title, so a de-duplicated folder keeps its suffix
+            info = {"title": folder_name, "artist": artist, "content_hash": content_hash}
+            jobs[pool.submit(_convert_worker, source, target_wav)] = (source, target_wav, info)
+
+        for done_count, future in enumerate(as_completed(jobs), start=1):
+            source, target_wav, info = jobs[future]
+            try:
+                seconds = future.result()
+            except Exception as e:
+                print(f"  ❌ [{done_count}/{len(jobs)}] {os.path.basename(source)}: {e}")
+                result["failed"].append({"source": source, "error": str(e)})
+                continue
+            library.record_track(os.path.dirname(target_wav), target_wav, info=info, keys=[info["content_hash"]])
+            result["imported"].append({"source": source, "original": target_wav, "seconds": seconds})
+            print(f"  ✅ [{done_count}/{len(jobs)}] {os.path.basename(source)} -> {target_wav}")
+
+    print(
+        f"📥 Import finished in {time.perf_counter() - start:.1f}s: {len(result['imported'])} imported, "
+        f"{len(result['skipped'])} already in library, {len(result['failed'])} failed"
+    )
+    return result
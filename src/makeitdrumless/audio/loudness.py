@@ -0,0 +1,155 @@
+import math
+from typing import Dict, Optional, List
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    from scipy.signal import lfilter, resample_poly
+except ImportError:
+    lfilter = resample_poly = None
+
+# ITU-R BS.1770-4 K-weighting (pre-filter shelf + RLB high-pass), re-derived for any sample rate
+_SHELF_GAIN_DB = 3.999843853973347
+_SHELF_Q = 0.7071752369554196
+_SHELF_FC = 1681.974450955533
+_HIGHPASS_Q = 0.5003270373238773
+_HIGHPASS_FC = 38.13547087602444
+
+_ABSOLUTE_GATE_LUFS = -70.0
+_RELATIVE_GATE_LU = -10.0
+
+# True peak is estimated on a 4x oversampled signal; this many input samples carry over between blocks
+_TRUE_PEAK_OVERSAMPLE = 4
+_TRUE_PEAK_CONTEXT = 32
+
+_SILENCE_DB = -120.0
+
+
+def _k_weighting(sample_rate: int):
+    """Returns [(b, a), (b, a)] biquad coefficients of the two K-weighting stages."""
+    k = math.tan(math.pi * _SHELF_FC / sample_rate)
+    vh = 10 ** (_SHELF_GAIN_DB / 20.0)
+    vb = vh ** 0.4996667741545416
+    a0 = 1 + k / _SHELF_Q + k * k
+    shelf = (
+        np.array([vh + vb * k / _SHELF_Q + k * k, 2 * (k * k - vh), vh - vb * k / _SHELF_Q + k * k]) / a0,
+        np.array([a0, 2 * (k * k - 1), 1 - k / _SHELF_Q + k * k]) / a0,
+    )
+
+    k = math.tan(math.pi * _HIGHPASS_FC / sample_rate)
+    a0 = 1 + k / _HIGHPASS_Q + k * k
+    highpass = (
+        np.array([1.0, -2.0, 1.0]),
+        np.array([a0, 2 * (k * k - 1), 1 - k / _HIGHPASS_Q + k * k]) / a0,
+    )
+    return [shelf, highpass]
+
+
+def _to_db(value: float) -> float:
+    return 20 * math.log10(value) if value > 0 else _SILENCE_DB
+
+
+class LoudnessMeter:
+    """
+    Streaming EBU R128 / ITU-R BS.1770 meter: integrated loudness (LUFS), true peak and sample peak.
+
+    Feed consecutive (samples, channels) blocks of any size to update(). Only per-100 ms energies and
+    the filter states are kept, so a whole track is measured in the same pass that produces it.
+    """
+
+    def __init__(self, sample_rate: int, channels: int = 2):
+        self.sample_rate = int(sample_rate)
+        self.channels = int(channels)
+        self._filters = _k_weighting(self.sample_rate)
+        self._states = [np.zeros((max(len(a), len(b)) - 1, self.channels)) for b, a in self._filters]
+        self._step = int(round(0.1 * self.sample_rate))
+        self._pending = np.zeros((0, self.channels))
+        self._energies: List[float] = []
+        self._tail = np.zeros((0, self.channels), dtype=np.float32)
+        self.sample_peak = 0.0
+        self.true_peak = 0.0
+
+    def update(self, block: "np.ndarray"):
+        """Adds the next (samples, channels) block of audio."""
+        block = np.asarray(block, dtype=np.float32)
+        if block.ndim == 1:
+            block = block[:, None]
+        if not len(block):
+            return
+
+        self.sample_peak = max(self.sample_peak, float(np.max(np.abs(block))))
+        self._update_true_peak(block)
+
+        weighted = block.astype(np.float64)
+        for index, (b, a) in enumerate(self._filters):
+            weighted, self._states[index] = lfilter(b, a, weighted, axis=0, zi=self._states[index])
+
+        # Mean square per 100 ms step (summed over channels, all weighted 1.0 for mono/stereo)
+        squared = np.concatenate([self._pending, weighted ** 2])
+        whole = len(squared) // self._step * self._step
+        if whole:
+            steps = squared[:whole].reshape(-1, self._step, self.channels)
+            self._energies.extend(steps.mean(axis=1).sum(axis=1).tolist())
+        self._pending = squared[whole:]
+
+    def _update_true_peak(self, block: "np.ndarray"):
+        context = np.concatenate([self._tail, block])
+        upsampled = resample_poly(context, _TRUE_PEAK_OVERSAMPLE, 1, axis=0)
+        # The interpolation filter needs neighbours on both sides: measure up to half a context short of
+        # the end (the next block covers the rest) and skip what the previous block already measured
+        half = _TRUE_PEAK_CONTEXT // 2
+        start = max(len(self._tail) - half, 0) * _TRUE_PEAK_OVERSAMPLE
+        stop = max(len(context) - half, 0) * _TRUE_PEAK_OVERSAMPLE
+        if stop > start:
+            self.true_peak = max(self.true_peak, float(np.max(np.abs(upsampled[start:stop]))))
+        self.true_peak = max(self.true_peak, self.sample_peak)
+        self._tail = context[-_TRUE_PEAK_CONTEXT:]
+
+    def integrated_lufs(self) -> float:
+        """Gated integrated loudness over 400 ms blocks with 75% overlap (-70 LUFS and -10 LU gates)."""
+        energies = np.asarray(self._energies)
+        if len(energies) < 4:
+            return _SILENCE_DB
+        blocks = (energies[:-3] + energies[1:-2] + energies[2:-1] + energies[3:]) / 4.0
+        with np.errstate(divide="ignore"):
+            loudness = -0.691 + 10 * np.log10(blocks)
+        gated = blocks[loudness > _ABSOLUTE_GATE_LUFS]
+        if not len(gated):
+            return _SILENCE_DB
+        relative_gate = -0.691 + 10 * math.log10(gated.mean()) + _RELATIVE_GATE_LU
+        gated = blocks[(loudness > _ABSOLUTE_GATE_LUFS) & (loudness > relative_gate)]
+        return float(-0.691 + 10 * math.log10(gated.mean()))
+
+    def result(self) -> Dict[str, float]:
+        """Returns the measurement as {'integrated_lufs', 'true_peak_dbtp', 'sample_peak_dbfs'} (rounded)."""
+        return {
+            "integrated_lufs": round(self.integrated_lufs(), 2),
+            "true_peak_dbtp": round(_to_db(self.true_peak), 2),
+            "sample_peak_dbfs": round(_to_db(self.sample_peak), 2),
+        }
+
+
+def normalization_gain_db(
+    measurement: Dict[str, float],
+    target_lufs: Optional[float] = None,
+    true_peak_ceiling: float = -1.0,
+    peak_headroom_db: float = 0.1,
+) -> float:
+    """
+    Gain (dB) to apply at encode time.
+
+    With target_lufs, the mix is brought to that integrated loudness, limited so the true peak stays
+    at or below true_peak_ceiling dBTP. Without it, the sample peak is placed peak_headroom_db below
+    full scale (the previous peak normalization).
+    """
+    if measurement["sample_peak_dbfs"] <= _SILENCE_DB:
+        return 0.0
+    if target_lufs is None:
+        return -peak_headroom_db - measurement["sample_peak_dbfs"]
+    if measurement["integrated_lufs"] <= _SILENCE_DB:
+        return 0.0
+    gain = target_lufs - measurement["integrated_lufs"]
+    return min(gain, true_peak_ceiling - measurement["true_peak_dbtp"])
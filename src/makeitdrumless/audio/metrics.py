@@ -0,0 +1,67 @@
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+_EPS = 1e-10
+
+
+def sdr(reference, estimate) -> float:
+    """
+    Computes the signal-to-distortion ratio (dB) of an estimate against a reference signal.
+
+    Both inputs are aligned to the shorter length; any shape (mono, (channels, samples), ...) is accepted.
+    """
+    ref = np.asarray(reference, dtype=np.float64)
+    est = np.asarray(estimate, dtype=np.float64)
+    n = min(ref.shape[-1], est.shape[-1])
+    ref = ref[..., :n]
+    est = est[..., :n]
+    num = np.sum(ref ** 2)
+    den = np.sum((ref - est) ** 2)
+    return float(10.0 * np.log10((num + _EPS) / (den + _EPS)))
+
+
+def si_sdr(reference, estimate) -> float:
+    """
+    Computes the scale-invariant SDR (dB): the estimate's error after projecting it onto the reference.
+
+    Unlike sdr(), a gain change of the estimate does not lower the score. Inputs are aligned like sdr().
+    """
+    ref = np.asarray(reference, dtype=np.float64)
+    est = np.asarray(estimate, dtype=np.float64)
+    n = min(ref.shape[-1], est.shape[-1])
+    ref = ref[..., :n].ravel()
+    est = est[..., :n].ravel()
+    target = (np.dot(est, ref) / (np.dot(ref, ref) + _EPS)) * ref
+    return float(10.0 * np.log10((np.sum(target ** 2) + _EPS) / (np.sum((est - target) ** 2) + _EPS)))
+
+
+def stem_scores(references: dict, estimates: dict) -> dict:
+    """
+    Scores every stem present in both dicts with SDR and SI-SDR in one vectorized pass.
+
+    Stems are aligned to the shortest length among them and flattened over channels, then stacked so
+    the dot products for all stems run as a single einsum.
+
+    Returns:
+        Dict mapping stem name to {'sdr': dB, 'si_sdr': dB}.
+    """
+    names = [name for name in references if name in estimates]
+    if not names:
+        return {}
+    n = min(min(np.shape(references[k])[-1], np.shape(estimates[k])[-1]) for k in names)
+    ref = np.stack([np.asarray(references[k], dtype=np.float64)[..., :n].ravel() for k in names])
+    est = np.stack([np.asarray(estimates[k], dtype=np.float64)[..., :n].ravel() for k in names])
+
+    ref_energy = np.einsum("ij,ij->i", ref, ref)
+    cross = np.einsum("ij,ij->i", est, ref)
+    error = est - ref
+    sdr_db = 10.0 * np.log10((ref_energy + _EPS) / (np.einsum("ij,ij->i", error, error) + _EPS))
+
+    target = (cross / (ref_energy + _EPS))[:, None] * ref
+    residual = est - target
+    si_sdr_db = 10.0 * np.log10(
+        (np.einsum("ij,ij->i", target, target) + _EPS) / (np.einsum("ij,ij->i", residual, residual) + _EPS)
+    )
+    return {name: {"sdr": float(s), "si_sdr": float(si)} for name, s, si in zip(names, sdr_db, si_sdr_db)}
@@ -0,0 +1,202 @@
+import time
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Callable, Dict, Any, Iterator, List, Optional, Tuple
+from urllib.parse import urlparse, parse_qs
+
+try:
+    from yt_dlp import YoutubeDL
+except ImportError:
+    YoutubeDL = None
+
+from makeitdrumless.telemetry import RunTelemetry, bind_run
+
+# URL path prefixes that list many videos (playlists, channels, handles)
+_COLLECTION_PATHS = ("/playlist", "/channel/", "/c/", "/user/", "/@")
+
+
+def is_playlist_url(link: str) -> bool:
+    """
+    Returns True for playlist / channel URLs (checked offline, from the URL shape only).
+
+    A watch URL that also carries a 'list=' parameter is treated as the single video it points to.
+    """
+    parsed = urlparse(link)
+    if parsed.scheme not in ("http", "https"):
+        return False
+    query = parse_qs(parsed.query)
+    if "v" in query or parsed.netloc.lower().endswith("youtu.be"):
+        return False
+    return "list" in query or parsed.path.startswith(_COLLECTION_PATHS)
+
+
+def _entry_url(entry: Dict[str, Any]) -> Optional[str]:
+    url = entry.get("url") or entry.get("webpage_url")
+    if url and url.startswith(("http://", "https://")):
+        return url
+    if entry.get("id") and (entry.get("ie_key") or "").startswith("Youtube"):
+        return f"https://www.youtube.com/watch?v={entry['id']}"
+    return url
+
+
+def expand_playlist(link: str, _depth: int = 0) -> Dict[str, Any]:
+    """
+    Expands a playlist or channel URL with yt-dlp flat extraction (no per-video resolution).
+
+    Returns:
+        Dict with the playlist 'title' and 'entries' (each with 'url', 'id' and 'title').
+    """
+    opts = {
+        'quiet': True,
+        'no_warnings': True,
+        'extract_flat': 'in_playlist',
+        'skip_download': True,
+    }
+    with YoutubeDL(opts) as ydl:
+        info = ydl.extract_info(link, download=False)
+
+    if info.get("_type") not in ("playlist", "multi_video"):
+        return {"title": info.get("title"), "entries": [{"url": link, "id": info.get("id"), "title": info.get("title")}]}
+
+    entries: List[Dict[str, Any]] = []
+    for entry in info.get("entries") or []:
+        if not entry:
+            continue
+        url = _entry_url(entry)
+        if not url:
+            continue
+        # Channel pages list their tabs (Videos, Shorts, ...) as nested playlists
+        if entry.get("_type") == "playlist" or entry.get("ie_key") == "YoutubeTab":
+            if _depth < 1:
+                entries.extend(expand_playlist(url, _depth + 1)["entries"])
+            continue
+        entries.append({"url": url, "id": entry.get("id"), "title": entry.get("title")})
+    return {"title": info.get("title"), "entries": entries}
+
+
+class HostRateLimiter:
+    """Spaces out requests to the same host by at least min_interval seconds (thread-safe)."""
+
+    def __init__(self, min_interval: float = 1.0):
+        self.min_interval = max(0.0, float(min_interval))
+        self._next_slot: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def wait(self, url: str):
+        host = urlparse(url).netloc.lower()
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, 0.0))
+            self._next_slot[host] = slot + self.min_interval
+        delay = slot - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+
+def retry_with_backoff(
+    fn: Callable[[], Any],
+    retries: int = 3,
+    backoff: float = 2.0,
+    max_backoff: float = 60.0,
+    on_retry: Optional[Callable[[int, Exception, float], None]] = None,
+) -> Tuple[Any, int]:
+    """
+    Calls fn, retrying failures with exponential backoff and jitter.
+
+    Returns:
+        (result, attempts)
+    """
+    attempt = 0
+    while True:
+        attempt += 1
+        try:
+            return fn(), attempt
+        except Exception as e:
+            if attempt > retries:
+                raise
+            delay = min(max_backoff, backoff * (2 ** (attempt - 1))) * random.uniform(0.75, 1.25)
+            if on_retry:
+                on_retry(attempt, e, delay)
+            time.sleep(delay)
+
+
+def download_playlist(
+    entries: List[Dict[str, Any]],
+    download_fn: Callable[[str], Tuple[str, Dict[str, Any]]],
+    workers: int = 3,
+    rate_limiter: Optional[HostRateLimiter] = None,
+    retries: int = 3,
+    backoff: float = 2.0,
+    max_ahead: Optional[int] = None,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Downloads playlist entries with a bounded worker pool, yielding each one as soon as it completes.
+
+    Args:
+        entries: Playlist entries with at least a 'url' key (see expand_playlist()).
+        download_fn: Callable taking an entry URL and returning (audio_path, info_dict).
+        workers: Maximum number of concurrent downloads.
+        rate_limiter: Optional per-host limiter applied before every attempt.
+        retries: Retries per entry after the first failed attempt.
+        backoff: Base delay in seconds for exponential backoff between retries.
+        max_ahead: Completed-but-unconsumed downloads allowed beyond the running ones (default: workers),
+                   which bounds disk/memory use while the consumer is busy separating.
+
+    Yields:
+        Dicts with 'index', 'entry', 'audio_path', 'info', 'error', 'attempts', 'seconds'
+        and 'telemetry' (a RunTelemetry holding the entry's download stages).
+    """
+    workers = max(1, int(workers))
+    max_ahead = workers if max_ahead is None else max(0, int(max_ahead))
+
+    def fetch(index: int, entry: Dict[str, Any]) -> Dict[str, Any]:
+        url = entry["url"]
+        telemetry = RunTelemetry(url)
+        result = {"index": index, "entry": entry, "audio_path": None, "info": None, "error": None,
+                  "attempts": 0, "telemetry": telemetry}
+        label = entry.get("title") or url
+
+        def attempt():
+            if rate_limiter is not None:
+                rate_limiter.wait(url)
+            return download_fn(url)
+
+        def report_retry(n, err, delay):
+            print(f"⚠️  Download attempt {n} failed for '{label}': {err}. Retrying in {delay:.1f}s...")
+
+        start = time.perf_counter()
+        try:
+            with bind_run(telemetry):
+                (result["audio_path"], result["info"]), result["attempts"] = retry_with_backoff(
+                    attempt, retries=retries, backoff=backoff, on_retry=report_retry
+                )
+        except Exception as e:
+            result["error"] = e
+            result["attempts"] = retries + 1
+        result["seconds"] = time.perf_counter() - start
+        return result
+
+    executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="playlist-dl")
+    queue = iter(enumerate(entries))
+    pending = set()
+
+    def fill():
+        while len(pending) < workers + max_ahead:
+            try:
+                index, entry = next(queue)
+            except StopIteration:
+                return
+            pending.add(executor.submit(fetch, index, entry))
+
+    try:
+        fill()
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in sorted(done, key=lambda f: f.result()["index"]):
+                pending.discard(future)
+                yield future.result()
+            fill()
+    finally:
+        # Queued entries are dropped; downloads already running are allowed to finish cleanly
+        executor.shutdown(wait=True, cancel_futures=True)
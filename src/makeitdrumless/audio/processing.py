@@ -1,10 +1,10 @@
 import os
-from typing import Union, Dict, Optional
+from typing import Union, Dict, Optional, Any
 
 try:
-    from pydub import AudioSegment
+    import numpy as np
 except ImportError:
-    AudioSegment = None
+    np = None
 
 try:
     from mutagen.mp3 import MP3
@@ -13,130 +13,133 @@ except ImportError:
     MP3 = None
     ID3 = TIT2 = TPE1 = COMM = None
 
+from makeitdrumless.audio.stem_io import list_stems, read_stem, write_stem, stem_exists, stems_complete, mark_stems_complete
+from makeitdrumless.audio.encoder import encode_pcm, track_tags
+from makeitdrumless.audio.render import stem_matches, render_mixes
+
 # Stem names to exclude when creating a drumless mix
 DRUM_STEM_NAMES = {"drums", "drum", "kick", "snare", "hh", "toms", "cymbals", "percussion"}
 
 
 def is_drum_stem(name: str) -> bool:
-    clean = name.lower().replace("-", "_").replace(" ", "_")
-    if clean.startswith("no_") or "no_drum" in clean or "nodrum" in clean:
-        return False
-    for drum_word in ["drum", "kick", "snare", "hh", "toms", "cymbals", "percussion", "hihat"]:
-        if drum_word in clean:
-            return True
-    return False
+    return stem_matches("drums", name)
 
 
-def mix_stems_without_drums(
+def _collect_stem_files(stems_input: Union[str, Dict[str, str]]) -> Dict[str, str]:
+    if isinstance(stems_input, dict):
+        return stems_input
+    if os.path.isdir(stems_input):
+        return {name.lower(): path for name, path in list_stems(stems_input).items()}
+    if os.path.isfile(stems_input):
+        return {os.path.splitext(os.path.basename(stems_input))[0].lower(): stems_input}
+    return {}
+
+
+def mixdown_without_drums(
     stems_input: Union[str, Dict[str, str]],
-    output_path: str,
-) -> str:
+    loudness_target: Optional[float] = None,
+) -> Optional[Dict[str, Any]]:
     """
-    Mixes all separated stems together EXCEPT drum-related stems to produce a drumless backing track.
+    Sums all non-drum stems into a float32 (samples, channels) buffer, metering it in the same pass.
 
     Args:
-        stems_input: Either a directory containing separated stem WAV files,
-                     or a dictionary mapping stem names to WAV file paths.
-        output_path: Path where the resulting MP3 file will be saved.
+        stems_input: Either a directory containing separated stem files (WAV, FLAC or .npy),
+                     or a dictionary mapping stem names to stem file paths.
+        loudness_target: Optional integrated loudness (LUFS) for the returned gain; peak
+                         normalization with 0.1 dB headroom otherwise.
 
     Returns:
-        The output path of the generated drumless MP3.
+        A render_mixes() entry ({'audio', 'sample_rate', 'gain_db', 'loudness'}), or None if no
+        usable stem was found.
     """
-    stem_files = {}
-
-    if isinstance(stems_input, dict):
-        stem_files = stems_input
-    elif isinstance(stems_input, str):
-        if os.path.isdir(stems_input):
-            for file in os.listdir(stems_input):
-                if file.endswith(".wav"):
-                    stem_name = os.path.splitext(file)[0].lower()
-                    stem_files[stem_name] = os.path.join(stems_input, file)
-        elif os.path.isfile(stems_input):
-            stem_name = os.path.splitext(os.path.basename(stems_input))[0].lower()
-            stem_files[stem_name] = stems_input
+    stem_files = _collect_stem_files(stems_input)
 
     # Filter out drum stems
     non_drum_stems = {
         name: path for name, path in stem_files.items()
-        if not is_drum_stem(name) and os.path.exists(path)
+        if not is_drum_stem(name) and stem_exists(path)
     }
 
     if not non_drum_stems:
         print("⚠️  No non-drum stems found. Checking for fallback mix...")
         for name, path in stem_files.items():
             clean = name.lower()
-            if not ("drum" in clean and not ("no" in clean)) and os.path.exists(path):
+            if not ("drum" in clean and not ("no" in clean)) and stem_exists(path):
                 non_drum_stems[name] = path
 
     if not non_drum_stems:
         print("❌ No valid stems found to create drumless track.")
-        return ""
+        return None
 
-    # If exactly one non-drum stem exists (e.g. 2-stem model with 'other' or 'no_drums'),
-    # bypass overlay mixing and directly export the pristine backing track
     if len(non_drum_stems) == 1:
-        stem_name, file_path = next(iter(non_drum_stems.items()))
-        print(f"⚡ Single backing stem detected ('{stem_name}'). Direct conversion to MP3 (bypassing stem overlay)...")
-        try:
-            seg = AudioSegment.from_wav(file_path)
-            out_dir = os.path.dirname(os.path.abspath(output_path))
-            os.makedirs(out_dir, exist_ok=True)
-            seg = seg.normalize(headroom=0.1)
-            seg.export(output_path, format="mp3", bitrate="320k")
-            print(f"✅ Final drumless track saved to: {output_path}")
-            return output_path
-        except Exception as e:
-            print(f"⚠️ Error exporting direct stem {stem_name}: {e}")
-
-    print(f"🎚️  Mixing non-drum stems: {', '.join(non_drum_stems.keys())}...")
-    mixed = None
-    for stem_name, file_path in non_drum_stems.items():
-        try:
-            seg = AudioSegment.from_wav(file_path)
-            mixed = seg if mixed is None else mixed.overlay(seg)
-            print(f"  + Included stem: {stem_name}")
-        except Exception as e:
-            print(f"⚠️  Error loading stem {stem_name} ({file_path}): {e}")
-
-    if mixed is not None:
-        out_dir = os.path.dirname(os.path.abspath(output_path))
-        os.makedirs(out_dir, exist_ok=True)
-        # Normalize to standard commercial listening volume with 0.1dB headroom
-        mixed = mixed.normalize(headroom=0.1)
-        mixed.export(output_path, format="mp3", bitrate="320k")
-        print(f"✅ Final drumless track saved to: {output_path}")
-        return output_path
-    else:
+        # e.g. 2-stem model with 'other' or 'no_drums': the backing stem is encoded as-is
+        print(f"⚡ Single backing stem detected ('{next(iter(non_drum_stems))}'). Encoding it directly...")
+
+    # The stems are already filtered, so an empty rule list keeps every one of them at unity gain
+    spec = {"drumless": {"label": "Drumless", "rules": []}}
+    mix = render_mixes(non_drum_stems, spec, loudness_target=loudness_target).get("drumless")
+    if mix is None:
         print("❌ Failed to overlay stems.")
+    return mix
+
+
+def mix_stems_without_drums(
+    stems_input: Union[str, Dict[str, str]],
+    output_path: str,
+    codec: str = "mp3",
+    bitrate: Optional[str] = None,
+    vbr_quality: Optional[str] = None,
+    tags: Optional[Dict[str, str]] = None,
+    loudness_target: Optional[float] = None,
+) -> str:
+    """
+    Mixes all separated stems together EXCEPT drum-related stems to produce a drumless backing track.
+
+    Args:
+        stems_input: Either a directory containing separated stem files (WAV, FLAC or .npy),
+                     or a dictionary mapping stem names to stem file paths.
+        output_path: Path where the encoded track will be saved.
+        codec: Output codec (see encoder.OUTPUT_CODECS). Default: 320 kbps MP3.
+        bitrate: Optional CBR bitrate override (e.g. '256k').
+        vbr_quality: Optional VBR quality instead of CBR.
+        tags: Optional metadata tags written during the encode (see encoder.track_tags()).
+        loudness_target: Optional integrated loudness (LUFS) to normalize to instead of peak normalization.
+
+    Returns:
+        The output path of the generated drumless track, or "" on failure.
+    """
+    mix = mixdown_without_drums(stems_input, loudness_target=loudness_target)
+    if mix is None:
+        return ""
+    try:
+        encode_pcm(mix["audio"], mix["sample_rate"], output_path, codec=codec, bitrate=bitrate,
+                   vbr_quality=vbr_quality, tags=tags, gain_db=mix["gain_db"])
+    except (RuntimeError, OSError) as e:
+        print(f"❌ {e}")
         return ""
+    print(f"✅ Final drumless track saved to: {output_path}")
+    return output_path
 
 
 def set_mp3_metadata(mp3_path: str, info: Optional[dict], model_name: str = "MSST"):
-    """Set title, artist, and comment metadata on an MP3 file using mutagen."""
+    """
+    Set title, artist, and comment metadata on an existing MP3 file using mutagen.
+
+    New outputs are tagged during the encode (see encoder.track_tags()); this re-tags older files.
+    """
     if not mp3_path or not os.path.exists(mp3_path) or info is None:
         return
     try:
         audio = MP3(mp3_path, ID3=ID3)
         if audio.tags is None:
             audio.add_tags()
-        # Extract title and artist
-        title = info.get("track") or info.get("title") or ""
-        artist = info.get("artist") or info.get("uploader") or info.get("channel") or ""
-
-        if not artist and ' - ' in title:
-            parts = title.split(' - ', 1)
-            artist, title = parts[0], parts[1]
-
-        pretty_title = f"{title.strip()} (Drumless)" if title else "Drumless Version"
-        audio.tags.add(TIT2(encoding=3, text=pretty_title))
-        if artist:
-            audio.tags.add(TPE1(encoding=3, text=artist.strip()))
-
-        comment_text = f"Drumless backing track generated by MakeItDrumless ({model_name})"
-        audio.tags.add(COMM(encoding=3, lang="eng", desc="", text=comment_text))
+        tags = track_tags(info, model_name)
+        audio.tags.add(TIT2(encoding=3, text=tags["title"]))
+        if "artist" in tags:
+            audio.tags.add(TPE1(encoding=3, text=tags["artist"]))
+        audio.tags.add(COMM(encoding=3, lang="eng", desc="", text=tags["comment"]))
         audio.save()
-        print(f"✅ Metadata set: Title='{pretty_title}', Artist='{artist.strip() if artist else 'Unknown'}'")
+        print(f"✅ Metadata set: Title='{tags['title']}', Artist='{tags.get('artist', 'Unknown')}'")
     except Exception as e:
         print(f"⚠️  Could not set metadata: {e}")
 
@@ -146,15 +149,17 @@ def ensemble_stems(
     weights: Optional[list] = None,
     output_dir: str = "",
     force: bool = False,
+    stem_format: str = "wav",
 ) -> Dict[str, str]:
     """
     Combines stem outputs from multiple models via weighted linear averaging.
 
     Args:
-        stems_list: List of dictionaries mapping stem_name -> wav_file_path.
+        stems_list: List of dictionaries mapping stem_name -> stem file path (any stem storage format).
         weights: List of float weights for each model. Defaults to equal weights.
         output_dir: Output directory where the ensembled stems will be saved.
         force: If True, force re-blending even if ensembled stems exist.
+        stem_format: Storage format for the blended stems (see stem_io.STEM_FORMATS).
 
     Returns:
         Dict mapping stem names to the ensembled stem file paths.
@@ -165,20 +170,11 @@ def ensemble_stems(
     os.makedirs(output_dir, exist_ok=True)
 
     # Check if ensembled stems already exist
-    if not force and output_dir and os.path.exists(output_dir):
-        existing_wavs = [
-            f for f in os.listdir(output_dir)
-            if f.endswith(".wav") and os.path.getsize(os.path.join(output_dir, f)) > 0
-        ]
-        if len(existing_wavs) >= 1:
+    if not force and output_dir:
+        existing = list_stems(output_dir)
+        if existing and stems_complete(output_dir):
             print(f"✅ Ensembled stems already exist in {output_dir}")
-            return {
-                os.path.splitext(f)[0]: os.path.join(output_dir, f)
-                for f in existing_wavs
-            }
-
-    import soundfile as sf
-    import numpy as np
+            return existing
 
     n_models = len(stems_list)
     if weights is None:
@@ -198,9 +194,9 @@ def ensemble_stems(
         sample_rate = 44100
 
         for model_idx, stems in enumerate(stems_list):
-            if stem_name in stems and os.path.exists(stems[stem_name]):
+            if stem_name in stems and stem_exists(stems[stem_name]):
                 try:
-                    data, sr = sf.read(stems[stem_name], dtype="float32")
+                    data, sr = read_stem(stems[stem_name])
                     sample_rate = sr
                     stem_audios.append(data)
                     stem_weights.append(norm_weights[model_idx])
@@ -221,10 +217,10 @@ def ensemble_stems(
         for w, audio in zip(curr_weights, stem_audios):
             blended += w * audio[:min_len]
 
-        out_path = os.path.join(output_dir, f"{stem_name}.wav")
-        sf.write(out_path, blended, sample_rate)
+        out_path = write_stem(blended, sample_rate, output_dir, stem_name, fmt=stem_format)
         ensembled_dict[stem_name] = out_path
         print(f"  + Ensembled stem: {stem_name} -> {out_path}")
 
+    mark_stems_complete(output_dir, ensembled_dict)
     return ensembled_dict
 
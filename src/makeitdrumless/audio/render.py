@@ -0,0 +1,187 @@
+import os
+from typing import Dict, List, Optional, Tuple, Any
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from makeitdrumless.telemetry import stage
+from makeitdrumless.audio.stem_io import read_stem, stem_exists, iter_completed
+from makeitdrumless.audio.loudness import LoudnessMeter, normalization_gain_db
+
+# Gain value that removes a stem from a mix
+MUTE = None
+
+# Stem groups a gain rule can target; any other rule key matches stem names containing it
+STEM_GROUPS = {
+    "drums": ("drum", "kick", "snare", "hh", "toms", "cymbals", "percussion", "hihat"),
+    "vocals": ("vocal", "voice", "vox"),
+    "bass": ("bass",),
+    "crowd": ("crowd", "audience"),
+}
+
+# Samples mixed (and metered) per block; keeps the K-weighting filters working on cache-sized chunks
+_RENDER_BLOCK_FRAMES = 1 << 18
+
+# Built-in practice mixes: output label and ordered (stem rule, gain dB or MUTE) pairs
+MIX_PRESETS: Dict[str, Dict[str, Any]] = {
+    "drumless": {"label": "Drumless", "rules": [("drums", MUTE)]},
+    "drums-12": {"label": "Drums -12dB", "rules": [("drums", -12.0)]},
+    "drums-only": {"label": "Drums Only", "rules": [("*", MUTE), ("drums", 0.0)]},
+    "drumless-bass-boost": {"label": "Drumless Bass +6dB", "rules": [("drums", MUTE), ("bass", 6.0)]},
+}
+
+
+def stem_matches(rule: str, stem_name: str) -> bool:
+    """True if a gain rule ('*', a STEM_GROUPS key, or a name fragment) applies to stem_name."""
+    clean = stem_name.lower().replace("-", "_").replace(" ", "_")
+    rule = rule.lower()
+    if rule == "*":
+        return True
+    if rule == "drums":
+        # 'no_drums' / 'nodrums' backing stems are not drum stems
+        if clean.startswith("no_") or "no_drum" in clean or "nodrum" in clean:
+            return False
+    fragments = STEM_GROUPS.get(rule, (rule,))
+    return any(fragment in clean for fragment in fragments)
+
+
+def stem_gain(rules: List[Tuple[str, Optional[float]]], stem_name: str) -> Optional[float]:
+    """Applies rules in order (later rules win) and returns the stem's gain in dB, or MUTE."""
+    gain = 0.0
+    for rule, rule_gain in rules:
+        if stem_matches(rule, stem_name):
+            gain = rule_gain
+    return gain
+
+
+def parse_mix_specs(text: str) -> Dict[str, Dict[str, Any]]:
+    """
+    Parses a --mixes value into {name: spec}.
+
+    Entries are comma-separated preset names (see MIX_PRESETS) or custom mixes written as
+    'name:rule=gain;rule=gain', where gain is in dB or 'mute' (e.g. 'practice:drums=-9;vocals=mute').
+    """
+    specs: Dict[str, Dict[str, Any]] = {}
+    for entry in (e.strip() for e in text.split(",")):
+        if not entry:
+            continue
+        if ":" not in entry:
+            if entry not in MIX_PRESETS:
+                raise ValueError(f"Unknown mix preset '{entry}'. Available: {', '.join(MIX_PRESETS)}")
+            specs[entry] = MIX_PRESETS[entry]
+            continue
+        name, _, rule_text = entry.partition(":")
+        rules = []
+        for item in (r.strip() for r in rule_text.split(";")):
+            if not item:
+                continue
+            rule, _, value = item.partition("=")
+            value = value.strip().lower()
+            if value == "mute":
+                rules.append((rule.strip(), MUTE))
+            else:
+                try:
+                    rules.append((rule.strip(), float(value.replace("db", ""))))
+                except ValueError:
+                    raise ValueError(f"Invalid gain '{value}' in mix '{name}' (use dB like -12 or 'mute')")
+        specs[name.strip()] = {"label": name.strip(), "rules": rules}
+    if not specs:
+        raise ValueError("No mixes requested.")
+    return specs
+
+
+def render_mixes(
+    stems: Dict[str, str],
+    specs: Dict[str, Dict[str, Any]],
+    loudness_target: Optional[float] = None,
+    true_peak_ceiling: float = -1.0,
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Loads every stem once and renders all requested mixes in one vectorized pass.
+
+    Each mix is a gain vector over the stems. The stems are stacked into one float32 array and
+    combined block by block with a tensor contraction; every block is fed to a LoudnessMeter as it
+    is produced, so loudness and true peak come out of the same pass without re-reading the mix.
+    The normalization itself is not applied here but returned as gain_db for the encoder.
+    Every mix keeps the stems' length and start, so all outputs stay sample-aligned with the
+    original (e.g. a drums-only file lines up with a click track built for the song).
+
+    Args:
+        stems: {stem_name: path} in any stem storage format.
+        specs: {name: {'label', 'rules'}} from parse_mix_specs() / MIX_PRESETS.
+        loudness_target: Integrated loudness (LUFS) to normalize to. None keeps peak normalization
+            (peak 0.1 dB below full scale).
+        true_peak_ceiling: Maximum true peak (dBTP) after loudness normalization.
+
+    Returns:
+        {name: {'audio' (samples, channels), 'sample_rate', 'gain_db', 'loudness'}} for every mix with
+        at least one audible stem; 'loudness' is the LoudnessMeter.result() of the unscaled mix.
+    """
+    available = {name: path for name, path in stems.items() if stem_exists(path)}
+    gains = {}
+    for mix_name, spec in specs.items():
+        row = {stem: stem_gain(spec["rules"], stem) for stem in available}
+        audible = [stem for stem, gain in row.items() if gain is not MUTE]
+        if not audible:
+            print(f"⚠️  Mix '{mix_name}' mutes every stem ({', '.join(available) or 'none'}); skipping it.")
+            continue
+        gains[mix_name] = row
+
+    needed = [stem for stem in available if any(row[stem] is not MUTE for row in gains.values())]
+    if not needed:
+        return {}
+
+    buffers = {}
+    sample_rate = 44100
+    with stage("render_load", stems=len(needed)):
+        for stem_name, path in iter_completed({s: available[s] for s in needed}):
+            try:
+                buffers[stem_name], sample_rate = read_stem(path)
+            except Exception as e:
+                print(f"⚠️  Error loading stem {stem_name} ({path}): {e}")
+
+    order = [stem for stem in needed if stem in buffers]
+    if not order:
+        return {}
+    length = min(len(buffers[stem]) for stem in order)
+    with stage("mixdown", stems=len(order), mixes=len(gains)):
+        stacked = np.stack([np.asarray(buffers[stem][:length], dtype=np.float32) for stem in order])
+        del buffers
+        matrix = np.array(
+            [[0.0 if row[stem] is MUTE else 10 ** (row[stem] / 20.0) for stem in order] for row in gains.values()],
+            dtype=np.float32,
+        )
+        channels = stacked.shape[2]
+        rendered = np.empty((len(gains), length, channels), dtype=np.float32)
+        meters = [LoudnessMeter(sample_rate, channels) for _ in gains]
+        for start in range(0, length, _RENDER_BLOCK_FRAMES):
+            stop = min(start + _RENDER_BLOCK_FRAMES, length)
+            # (mixes, stems) x (stems, samples, channels) -> (mixes, samples, channels)
+            rendered[:, start:stop] = np.tensordot(matrix, stacked[:, start:stop], axes=(1, 0))
+            for index, meter in enumerate(meters):
+                meter.update(rendered[index, start:stop])
+        del stacked
+
+    results = {}
+    for index, mix_name in enumerate(gains):
+        audible = [stem for stem in order if gains[mix_name][stem] is not MUTE]
+        loudness = meters[index].result()
+        gain_db = round(normalization_gain_db(loudness, loudness_target, true_peak_ceiling), 2)
+        print(
+            f"🎚️  Mix '{specs[mix_name]['label']}': {', '.join(audible)} "
+            f"({loudness['integrated_lufs']} LUFS, {loudness['true_peak_dbtp']} dBTP, gain {gain_db:+.2f} dB)"
+        )
+        results[mix_name] = {
+            "audio": rendered[index],
+            "sample_rate": sample_rate,
+            "gain_db": gain_db,
+            "loudness": loudness,
+        }
+    return results
+
+
+def mix_output_path(track_dir: str, safe_title: str, spec: Dict[str, Any], extension: str) -> str:
+    """Returns '<track_dir>/<title> (<label>)<ext>' for a rendered mix."""
+    return os.path.join(track_dir, f"{safe_title} ({spec['label']}){extension}")
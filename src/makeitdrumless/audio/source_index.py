@@ -0,0 +1,75 @@
+import os
+import json
+import time
+from typing import Optional, Dict, Any
+
+try:
+    from yt_dlp.extractor import gen_extractor_classes
+except ImportError:
+    gen_extractor_classes = None
+
+# Resolved stream URLs (e.g. YouTube's signed googlevideo links) expire after roughly six hours
+INFO_CACHE_TTL = 6 * 3600
+
+_extractor_classes = None
+
+
+def get_source_id(link: str) -> Optional[str]:
+    """
+    Derives a stable '<extractor>:<video id>' key from a URL without any network access.
+
+    Uses yt-dlp's extractor URL patterns, so youtu.be, music.youtube.com and watch?v= links
+    of the same video map to the same key. Returns None for URLs only the generic extractor handles.
+    """
+    global _extractor_classes
+    if gen_extractor_classes is None:
+        return None
+    if _extractor_classes is None:
+        _extractor_classes = [ie for ie in gen_extractor_classes() if ie.ie_key() != "Generic"]
+    for ie in _extractor_classes:
+        try:
+            if ie.suitable(link):
+                video_id = ie.get_temp_id(link)
+                return f"{ie.ie_key()}:{video_id}" if video_id else None
+        except Exception:
+            continue
+    return None
+
+
+def source_id_from_info(info: Dict[str, Any]) -> Optional[str]:
+    """Builds the same key as get_source_id() from a resolved yt-dlp info dict."""
+    extractor = info.get("extractor_key") or info.get("ie_key")
+    if extractor and info.get("id"):
+        return f"{extractor}:{info['id']}"
+    return None
+
+
+def _info_cache_path(source_id: str) -> str:
+    from makeitdrumless.msst_integration.models import get_base_cache_dir
+    safe_id = "".join(c if c.isalnum() or c in ("-", "_") else "_" for c in source_id)
+    return str(get_base_cache_dir() / "ytdlp_info" / f"{safe_id}.json")
+
+
+def load_cached_info(source_id: str, ttl: float = INFO_CACHE_TTL) -> Optional[Dict[str, Any]]:
+    """Returns the resolved yt-dlp info stored for source_id if it is younger than ttl seconds."""
+    path = _info_cache_path(source_id)
+    try:
+        if time.time() - os.path.getmtime(path) > ttl:
+            return None
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def save_cached_info(source_id: str, info: Dict[str, Any]):
+    """Stores a sanitized (JSON-serializable) yt-dlp info dict for source_id."""
+    path = _info_cache_path(source_id)
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(info, f)
+        os.replace(tmp_path, path)
+    except (OSError, TypeError, ValueError) as e:
+        print(f"⚠️  Could not cache URL metadata: {e}")
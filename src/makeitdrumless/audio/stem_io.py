@@ -0,0 +1,300 @@
+import os
+import json
+import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor, Future, as_completed
+from typing import Callable, Dict, Iterator, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    import soundfile as sf
+except ImportError:
+    sf = None
+
+# Stem storage formats: 16-bit WAV (default), lossless FLAC, or raw float32 / float16 arrays (memory-mapped on read)
+STEM_FORMATS = ("wav", "flac", "f32", "f16")
+
+STEM_EXTENSIONS = {"wav": ".wav", "flac": ".flac", "f32": ".npy", "f16": ".npy"}
+
+# Per stem folder sidecar: sample rate and format of each stem (raw .npy stems carry no sample rate),
+# plus a 'complete' flag that is only set once every stem of a separation is on disk
+STEM_MANIFEST = ".stems.json"
+
+# Preferred order if a stem still exists in several formats (e.g. copied in by hand)
+_READ_ORDER = (".wav", ".flac", ".npy")
+
+# Stems are encoded and written on a small thread pool so demixing/mixing is not blocked on disk
+STEM_WRITE_WORKERS = min(4, os.cpu_count() or 1)
+
+_writer: Optional[ThreadPoolExecutor] = None
+_pending: Dict[str, Future] = {}
+_lock = threading.Lock()
+
+
+def set_stem_write_workers(workers: int):
+    """Sets the stem writer pool size (takes effect for a pool created after the call)."""
+    global STEM_WRITE_WORKERS
+    STEM_WRITE_WORKERS = max(1, int(workers))
+
+
+def _to_host(wave) -> "np.ndarray":
+    """Moves a tensor to host memory as a numpy array (done on the caller's thread, next to the device)."""
+    if hasattr(wave, "detach"):
+        wave = wave.detach().cpu().numpy()
+    return np.asarray(wave)
+
+
+def _to_frames(wave: "np.ndarray") -> "np.ndarray":
+    """Converts a (channels, samples) / (batch, channels, samples) array to (samples, channels)."""
+    if wave.ndim == 3:
+        wave = wave[0]
+    if wave.ndim == 2 and wave.shape[0] <= 2 < wave.shape[1]:
+        wave = wave.T
+    return wave
+
+
+def _update_manifest(out_dir: str, name: str, entry: Dict):
+    path = os.path.join(out_dir, STEM_MANIFEST)
+    with _lock:
+        manifest = read_manifest(out_dir)
+        manifest.setdefault("stems", {})[name] = entry
+        # A folder being (re)written is incomplete until mark_stems_complete() runs
+        manifest["complete"] = False
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp_path, path)
+
+
+def _set_complete(out_dir: str):
+    path = os.path.join(out_dir, STEM_MANIFEST)
+    with _lock:
+        manifest = read_manifest(out_dir)
+        manifest["complete"] = True
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp_path, path)
+
+
+def read_manifest(stems_dir: str) -> Dict:
+    """Returns the stem folder's sidecar manifest ({} when absent or unreadable)."""
+    try:
+        with open(os.path.join(stems_dir, STEM_MANIFEST), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_file(wave: "np.ndarray", sample_rate: int, out_path: str, fmt: str) -> str:
+    frames = _to_frames(wave)
+    # Written under a temporary name so a cache check never sees a half-written stem
+    part_path = f"{out_path}.part"
+    if fmt in ("f32", "f16"):
+        dtype = np.float16 if fmt == "f16" else np.float32
+        with open(part_path, "wb") as f:
+            np.save(f, np.ascontiguousarray(frames, dtype=dtype))
+    elif fmt == "flac":
+        sf.write(part_path, frames, sample_rate, format="FLAC", subtype="PCM_16")
+    else:
+        sf.write(part_path, frames, sample_rate, format="WAV", subtype="PCM_16")
+    os.replace(part_path, out_path)
+    return out_path
+
+
+def write_stem(
+    wave,
+    sample_rate: int,
+    out_dir: str,
+    name: str,
+    fmt: str = "wav",
+    background: bool = True,
+) -> str:
+    """
+    Writes one stem in the requested storage format.
+
+    Args:
+        wave: Audio as a numpy array or tensor, (channels, samples) or (samples, channels).
+        sample_rate: Sample rate in Hz.
+        out_dir: Stem folder.
+        name: Stem name (e.g. 'drums'); the file is '<name><ext>'.
+        fmt: One of STEM_FORMATS.
+        background: Encode and write on the stem writer pool instead of blocking. The pool job holds
+                    the only reference to the array once the caller drops its own, so the memory is
+                    released as soon as the write finishes.
+
+    Returns:
+        The stem's final path. A background write may still be in progress; read_stem() waits for it
+        and stem_future() / iter_completed() expose it.
+    """
+    if fmt not in STEM_FORMATS:
+        raise ValueError(f"Unknown stem format '{fmt}'. Available: {', '.join(STEM_FORMATS)}")
+    os.makedirs(out_dir, exist_ok=True)
+    out_path = os.path.join(out_dir, f"{name}{STEM_EXTENSIONS[fmt]}")
+    wave = _to_host(wave)
+    # A re-separation in another format must not leave the stale copy to shadow the new one
+    for ext in _READ_ORDER:
+        stale = os.path.join(out_dir, f"{name}{ext}")
+        if stale != out_path:
+            wait_for_stem(stale)
+            if os.path.exists(stale):
+                os.remove(stale)
+    _update_manifest(out_dir, name, {"file": os.path.basename(out_path), "format": fmt, "sample_rate": int(sample_rate)})
+
+    if not background:
+        return _write_file(wave, sample_rate, out_path, fmt)
+
+    global _writer
+    key = os.path.abspath(out_path)
+    with _lock:
+        if _writer is None:
+            _writer = ThreadPoolExecutor(max_workers=STEM_WRITE_WORKERS, thread_name_prefix="stem-writer")
+        future = _writer.submit(_write_file, wave, sample_rate, out_path, fmt)
+        _pending[key] = future
+    future.add_done_callback(lambda f: _pending.pop(key, None) if _pending.get(key) is f else None)
+    return out_path
+
+
+def stem_future(path: str) -> Future:
+    """Returns a future resolving to path once its stem is on disk (already done if it was not pending)."""
+    future = _pending.get(os.path.abspath(path))
+    if future is None:
+        future = Future()
+        future.set_result(path)
+    return future
+
+
+def iter_completed(stems: Dict[str, str]) -> Iterator[Tuple[str, str]]:
+    """
+    Yields (stem_name, path) in the order the stems finish writing, so consumers can start on the first one.
+
+    A failed write is yielded too; reading its path then raises in the consumer.
+    """
+    futures = {stem_future(path): (name, path) for name, path in stems.items()}
+    for future in as_completed(futures):
+        yield futures[future]
+
+
+def wait_for_stem(path: str):
+    """Blocks until a pending background write of path has finished (re-raising its error)."""
+    future = _pending.get(os.path.abspath(path))
+    if future is not None:
+        future.result()
+
+
+def mark_stems_complete(out_dir: str, stems: Dict[str, str], on_complete: Optional[Callable[[], None]] = None):
+    """
+    Flags a stem folder as complete once every stem in stems has been written.
+
+    Runs behind the queued stem writes on the writer pool, so the caller does not block. If any
+    write fails, or the process dies first, the folder stays incomplete and is separated again.
+
+    Args:
+        out_dir: Stem folder.
+        stems: {stem_name: path} produced by one separation.
+        on_complete: Called after the flag is written (e.g. to remove a demix checkpoint).
+    """
+    def finish():
+        for path in stems.values():
+            wait_for_stem(path)
+        _set_complete(out_dir)
+        if on_complete is not None:
+            on_complete()
+        return out_dir
+
+    global _writer
+    key = os.path.abspath(os.path.join(out_dir, STEM_MANIFEST))
+    with _lock:
+        if _writer is None:
+            _writer = ThreadPoolExecutor(max_workers=STEM_WRITE_WORKERS, thread_name_prefix="stem-writer")
+        # Queued after the stem writes (FIFO), so it never holds a worker the writes are waiting for
+        future = _writer.submit(finish)
+        _pending[key] = future
+    future.add_done_callback(lambda f: _pending.pop(key, None) if _pending.get(key) is f else None)
+
+
+def stems_complete(stems_dir: str) -> bool:
+    """
+    True unless the folder's manifest marks an unfinished separation.
+
+    Folders written before the flag existed (no manifest, or no 'complete' key) count as complete, as
+    does a folder whose completion is still queued behind its background writes.
+    """
+    if os.path.abspath(os.path.join(stems_dir, STEM_MANIFEST)) in _pending:
+        return True
+    return bool(read_manifest(stems_dir).get("complete", True))
+
+
+def stem_exists(path: str) -> bool:
+    """True if path exists or is still being written in the background."""
+    return os.path.abspath(path) in _pending or os.path.exists(path)
+
+
+def wait_for_pending_writes():
+    """Blocks until every queued background stem write has finished, reporting failed ones."""
+    for path, future in list(_pending.items()):
+        try:
+            future.result()
+        except Exception as e:
+            print(f"⚠️  Could not write stem {path}: {e}")
+
+
+def read_stem(path: str, dtype: str = "float32") -> Tuple["np.ndarray", int]:
+    """
+    Reads a stem in any supported format as a (samples, channels) array.
+
+    Raw .npy stems are memory-mapped and only converted to dtype when it differs from the stored
+    precision, so re-mixing float32 stems touches just the pages it reads.
+
+    Returns:
+        (audio, sample_rate)
+    """
+    wait_for_stem(path)
+    if path.lower().endswith(".npy"):
+        stems_dir = os.path.dirname(os.path.abspath(path))
+        entry = read_manifest(stems_dir).get("stems", {}).get(os.path.splitext(os.path.basename(path))[0], {})
+        data = np.load(path, mmap_mode="r")
+        if data.dtype != np.dtype(dtype):
+            data = data.astype(dtype)
+        return data, int(entry.get("sample_rate", 44100))
+    data, sr = sf.read(path, dtype=dtype, always_2d=True)
+    return data, sr
+
+
+def list_stems(stems_dir: str) -> Dict[str, str]:
+    """
+    Returns {stem_name: path} for the completed stems in a folder, whatever their storage format.
+
+    Stems still being written in the background count as present.
+    """
+    stems: Dict[str, str] = {}
+    if not os.path.isdir(stems_dir):
+        return stems
+    ranked = []
+    for file in os.listdir(stems_dir):
+        name, ext = os.path.splitext(file)
+        # Dotfiles are sidecars (e.g. demix checkpoints), never stems
+        if file.startswith("."):
+            continue
+        if ext.lower() in _READ_ORDER and os.path.getsize(os.path.join(stems_dir, file)) > 0:
+            ranked.append((_READ_ORDER.index(ext.lower()), name, file))
+    for _, name, file in sorted(ranked):
+        stems.setdefault(name, os.path.join(stems_dir, file))
+    for pending_path in list(_pending):
+        name, ext = os.path.splitext(os.path.basename(pending_path))
+        if os.path.dirname(pending_path) == os.path.abspath(stems_dir) and ext.lower() in _READ_ORDER:
+            stems.setdefault(name, pending_path)
+    return stems
+
+
+def export_stem_wav(path: str, out_wav: str) -> str:
+    """Writes a stem stored in any format to a 16-bit WAV (e.g. for the decrowded separation input)."""
+    if path.lower().endswith(".wav"):
+        shutil.copy2(path, out_wav)
+        return out_wav
+    data, sr = read_stem(path)
+    return _write_file(np.asarray(data), sr, out_wav, "wav")
@@ -1,3 +1,3 @@
-from .manager import setup_ffmpeg_binary, is_ffmpeg_installed
+from .manager import setup_ffmpeg_binary, is_ffmpeg_installed, get_ffmpeg_binary, drain_stderr, probe_duration
 
-__all__ = ["setup_ffmpeg_binary", "is_ffmpeg_installed"]
+__all__ = ["setup_ffmpeg_binary", "is_ffmpeg_installed", "get_ffmpeg_binary", "drain_stderr", "probe_duration"]
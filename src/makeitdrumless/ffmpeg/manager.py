@@ -1,4 +1,5 @@
 import os
+import shutil
 import subprocess
 import zipfile
 from urllib.request import urlretrieve
@@ -6,10 +7,64 @@ import platform
 import sys
 import threading
 from pathlib import Path
+from typing import Callable, Optional
 
 from makeitdrumless.cli_utils.spinner import spinner
 
 
+def get_ffmpeg_binary() -> str:
+    """Returns the ffmpeg executable to invoke (FFMPEG_BINARY set by setup_ffmpeg_binary, else PATH lookup)."""
+    return os.environ.get("FFMPEG_BINARY") or shutil.which("ffmpeg") or "ffmpeg"
+
+
+def get_ffprobe_binary() -> str:
+    """Returns the ffprobe executable next to the ffmpeg in use, else a PATH lookup."""
+    directory, name = os.path.split(get_ffmpeg_binary())
+    if directory:
+        candidate = os.path.join(directory, name.replace("ffmpeg", "ffprobe"))
+        if os.path.isfile(candidate):
+            return candidate
+    return shutil.which("ffprobe") or "ffprobe"
+
+
+def probe_duration(path: str) -> Optional[float]:
+    """Returns a media file's duration in seconds as reported by ffprobe, or None if it cannot be determined."""
+    cmd = [
+        get_ffprobe_binary(), "-v", "error", "-show_entries", "format=duration",
+        "-of", "default=noprint_wrappers=1:nokey=1", path,
+    ]
+    try:
+        result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, timeout=60)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    try:
+        duration = float(result.stdout.decode(errors="replace").strip())
+    except ValueError:
+        return None
+    return duration if result.returncode == 0 and duration > 0 else None
+
+
+def drain_stderr(proc: subprocess.Popen) -> Callable[[], bytes]:
+    """
+    Reads a subprocess's stderr pipe on a background thread.
+
+    ffmpeg blocks once it has logged more than the pipe buffer holds, so a caller busy writing its
+    stdin or reading its stdout to EOF would wait on it forever. Call right after Popen.
+
+    Returns:
+        A function that waits for stderr to close and returns everything written to it.
+    """
+    chunks = []
+    thread = threading.Thread(target=lambda: chunks.append(proc.stderr.read()), daemon=True)
+    thread.start()
+
+    def collect() -> bytes:
+        thread.join()
+        return b"".join(chunks)
+
+    return collect
+
+
 def is_ffmpeg_installed() -> bool:
     try:
         subprocess.run(["ffmpeg", "-version"], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
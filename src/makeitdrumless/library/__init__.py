@@ -0,0 +1,10 @@
+"""Persistent index of the MakeItDrumless output tree."""
+
+from .index import LibraryIndex, get_library, hash_file, source_keys
+
+__all__ = [
+    "LibraryIndex",
+    "get_library",
+    "hash_file",
+    "source_keys",
+]
@@ -0,0 +1,480 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from typing import Optional, Dict, Any, List
+
+# SQLite database kept at the root of the output tree
+LIBRARY_FILENAME = ".makeitdrumless_library.sqlite3"
+
+# Metadata fields kept per track (enough for titling, tagging and upload)
+_INFO_KEYS = (
+    "id", "title", "track", "artist", "uploader", "channel", "album",
+    "duration", "webpage_url", "extractor_key", "thumbnail",
+)
+
+_STEM_EXTENSIONS = (".wav", ".flac", ".npy")
+
+# Drumless output containers (see audio.encoder.OUTPUT_CODECS)
+_OUTPUT_EXTENSIONS = (".mp3", ".opus", ".m4a", ".flac")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tracks (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    folder TEXT NOT NULL UNIQUE,
+    original TEXT,
+    drumless TEXT,
+    drumless_model TEXT,
+    info TEXT,
+    loudness TEXT,
+    updated_at REAL
+);
+CREATE TABLE IF NOT EXISTS aliases (
+    key TEXT PRIMARY KEY,
+    track_id INTEGER NOT NULL REFERENCES tracks(id) ON DELETE CASCADE
+);
+CREATE TABLE IF NOT EXISTS stems (
+    track_id INTEGER NOT NULL REFERENCES tracks(id) ON DELETE CASCADE,
+    preset TEXT NOT NULL,
+    paths TEXT NOT NULL,
+    updated_at REAL,
+    PRIMARY KEY (track_id, preset)
+);
+CREATE TABLE IF NOT EXISTS fingerprints (
+    track_id INTEGER PRIMARY KEY REFERENCES tracks(id) ON DELETE CASCADE,
+    rate INTEGER NOT NULL,
+    hop INTEGER NOT NULL,
+    duration REAL,
+    chroma BLOB NOT NULL,
+    updated_at REAL
+);
+CREATE TABLE IF NOT EXISTS landmarks (
+    hash INTEGER NOT NULL,
+    track_id INTEGER NOT NULL REFERENCES tracks(id) ON DELETE CASCADE,
+    frame INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS landmarks_hash ON landmarks (hash);
+"""
+
+# Columns added after the first schema; (table, column, type) applied to older databases on open
+_MIGRATIONS = (
+    ("tracks", "loudness", "TEXT"),
+)
+
+_HASH_BLOCK = 1024 * 1024
+
+# Indexed landmarks one hash may match before it counts as too common to vote; bounds the rows a
+# lookup loads to this many per query hash, however large the library grows
+_MAX_HASH_ROWS = 64
+
+# Candidates with the most agreeing landmarks that get the full chroma comparison
+_MATCH_CANDIDATES = 3
+
+
+def hash_file(path: str) -> str:
+    """Returns a 'sha1:<hex>' content key for a file, used to recognize re-imported local audio."""
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        while True:
+            block = f.read(_HASH_BLOCK)
+            if not block:
+                break
+            digest.update(block)
+    return f"sha1:{digest.hexdigest()}"
+
+
+def source_keys(info: Optional[Dict[str, Any]]) -> List[str]:
+    """Returns the library alias keys (source ID, content hash) carried by an input's info dict."""
+    from makeitdrumless.audio.source_index import source_id_from_info
+
+    if not info:
+        return []
+    keys = []
+    source_id = source_id_from_info(info)
+    if source_id:
+        keys.append(source_id)
+    if info.get("content_hash"):
+        keys.append(info["content_hash"])
+    return keys
+
+
+def _exists(path: Optional[str]) -> bool:
+    return bool(path) and os.path.exists(path) and os.path.getsize(path) > 0
+
+
+class LibraryIndex:
+    """
+    Persistent index of the output tree (~/Music/MakeItDrumless by default).
+
+    Maps source IDs ('Youtube:<id>') and content hashes ('sha1:<hex>') to a track folder, its
+    original audio, the stems produced per preset and the drumless output. Paths are stored
+    relative to the output base so the tree can be moved. Entries whose files disappeared are
+    treated as misses. Audio fingerprints (chroma plus landmark hashes) find the same recording
+    arriving under another source or title.
+    """
+
+    def __init__(self, base_dir: str):
+        self.base_dir = os.path.abspath(base_dir)
+        os.makedirs(self.base_dir, exist_ok=True)
+        self.db_path = os.path.join(self.base_dir, LIBRARY_FILENAME)
+        created = not os.path.exists(self.db_path)
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(self.db_path, timeout=30.0, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA foreign_keys = ON")
+            self._conn.executescript(_SCHEMA)
+            for table, column, column_type in _MIGRATIONS:
+                columns = {row["name"] for row in self._conn.execute(f"PRAGMA table_info({table})")}
+                if column not in columns:
+                    self._conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {column_type}")
+        if created and self._has_track_folders():
+            # First use on an existing output tree: index what is already there (hashes every original)
+            print(f"📚 Building the library index for {self.base_dir} (first use; hashing existing originals)...")
+            self.rebuild()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def _rel(self, path: str) -> str:
+        return os.path.relpath(os.path.abspath(path), self.base_dir)
+
+    def _abs(self, rel_path: Optional[str]) -> Optional[str]:
+        return os.path.join(self.base_dir, rel_path) if rel_path else None
+
+    def _has_track_folders(self) -> bool:
+        return any(e.is_dir() and not e.name.startswith(".") for e in os.scandir(self.base_dir))
+
+    def _track_id(self, folder: str) -> Optional[int]:
+        row = self._conn.execute("SELECT id FROM tracks WHERE folder = ?", (self._rel(folder),)).fetchone()
+        return row["id"] if row else None
+
+    def _record(self, row: sqlite3.Row) -> Optional[Dict[str, Any]]:
+        original = self._abs(row["original"])
+        if not _exists(original):
+            return None
+        return {
+            "folder": self._abs(row["folder"]),
+            "original": original,
+            "drumless": self._abs(row["drumless"]) if _exists(self._abs(row["drumless"])) else None,
+            "drumless_model": row["drumless_model"],
+            "info": json.loads(row["info"]) if row["info"] else {},
+            "loudness": json.loads(row["loudness"]) if row["loudness"] else {},
+        }
+
+    def find(self, key: str) -> Optional[Dict[str, Any]]:
+        """Looks up a track by source ID or content hash."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT tracks.* FROM aliases JOIN tracks ON tracks.id = aliases.track_id WHERE aliases.key = ?",
+                (key,),
+            ).fetchone()
+        return self._record(row) if row else None
+
+    def find_folder(self, folder: str) -> Optional[Dict[str, Any]]:
+        """Looks up a track by its folder."""
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM tracks WHERE folder = ?", (self._rel(folder),)).fetchone()
+        return self._record(row) if row else None
+
+    def record_track(
+        self,
+        folder: str,
+        original: str,
+        info: Optional[Dict[str, Any]] = None,
+        keys: Optional[List[str]] = None,
+    ):
+        """
+        Adds or updates a track folder and points its alias keys at it.
+
+        Args:
+            folder: Track folder inside the output base.
+            original: Original audio file for the track.
+            info: Source metadata (only the fields in _INFO_KEYS are kept).
+            keys: Source IDs / content hashes that should resolve to this track.
+        """
+        info_json = json.dumps({k: info.get(k) for k in _INFO_KEYS if info.get(k) is not None}) if info else None
+        with self._lock, self._conn:
+            self._conn.execute(
+                """
+                INSERT INTO tracks (folder, original, info, updated_at) VALUES (?, ?, ?, ?)
+                ON CONFLICT(folder) DO UPDATE SET
+                    original = excluded.original,
+                    info = COALESCE(excluded.info, tracks.info),
+                    updated_at = excluded.updated_at
+                """,
+                (self._rel(folder), self._rel(original), info_json, time.time()),
+            )
+            track_id = self._track_id(folder)
+            for key in keys or []:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO aliases (key, track_id) VALUES (?, ?)", (key, track_id)
+                )
+
+    def get_stems(self, folder: str, preset: str) -> Optional[Dict[str, str]]:
+        """Returns {stem_name: path} recorded for a track folder and preset if every file still exists."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT stems.paths FROM stems JOIN tracks ON tracks.id = stems.track_id "
+                "WHERE tracks.folder = ? AND stems.preset = ?",
+                (self._rel(folder), preset),
+            ).fetchone()
+        if not row:
+            return None
+        stems = {name: self._abs(rel) for name, rel in json.loads(row["paths"]).items()}
+        if not stems or not all(_exists(p) for p in stems.values()):
+            return None
+        return stems
+
+    def record_stems(self, folder: str, preset: str, stems: Dict[str, str]):
+        """Records the stem files a preset produced for a track folder."""
+        paths = json.dumps({name: self._rel(p) for name, p in stems.items()})
+        with self._lock, self._conn:
+            track_id = self._track_id(folder)
+            if track_id is None:
+                return
+            self._conn.execute(
+                "INSERT OR REPLACE INTO stems (track_id, preset, paths, updated_at) VALUES (?, ?, ?, ?)",
+                (track_id, preset, paths, time.time()),
+            )
+
+    def record_drumless(self, folder: str, path: str, model: Optional[str] = None):
+        """Records the drumless output (and the model that produced it) for a track folder."""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE tracks SET drumless = ?, drumless_model = COALESCE(?, drumless_model), updated_at = ? "
+                "WHERE folder = ?",
+                (self._rel(path), model, time.time(), self._rel(folder)),
+            )
+
+    def record_loudness(self, folder: str, measurements: Dict[str, Dict[str, float]]):
+        """
+        Stores loudness measurements for a track folder, merged with the ones already recorded.
+
+        Args:
+            folder: Track folder inside the output base.
+            measurements: {mix name: {'integrated_lufs', 'true_peak_dbtp', 'sample_peak_dbfs', ...}}.
+        """
+        with self._lock, self._conn:
+            row = self._conn.execute("SELECT loudness FROM tracks WHERE folder = ?", (self._rel(folder),)).fetchone()
+            if row is None:
+                return
+            merged = json.loads(row["loudness"]) if row["loudness"] else {}
+            merged.update(measurements)
+            self._conn.execute(
+                "UPDATE tracks SET loudness = ?, updated_at = ? WHERE folder = ?",
+                (json.dumps(merged), time.time(), self._rel(folder)),
+            )
+
+    def has_fingerprint(self, folder: str) -> bool:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM fingerprints JOIN tracks ON tracks.id = fingerprints.track_id WHERE tracks.folder = ?",
+                (self._rel(folder),),
+            ).fetchone()
+        return row is not None
+
+    def record_fingerprint(self, folder: str, fingerprint: Dict[str, Any]):
+        """Stores an audio.fingerprint.compute_fingerprint() result for a track folder, replacing any earlier one."""
+        with self._lock, self._conn:
+            track_id = self._track_id(folder)
+            if track_id is None:
+                return
+            self._conn.execute("DELETE FROM landmarks WHERE track_id = ?", (track_id,))
+            self._conn.execute(
+                "INSERT OR REPLACE INTO fingerprints (track_id, rate, hop, duration, chroma, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (track_id, fingerprint["rate"], fingerprint["hop"], fingerprint["duration"],
+                 fingerprint["chroma"].tobytes(), time.time()),
+            )
+            self._conn.executemany(
+                "INSERT INTO landmarks (hash, track_id, frame) VALUES (?, ?, ?)",
+                ((h, track_id, f) for h, f in zip(fingerprint["hashes"].tolist(), fingerprint["frames"].tolist())),
+            )
+
+    def match_fingerprint(
+        self,
+        fingerprint: Dict[str, Any],
+        exclude_folder: Optional[str] = None,
+        threshold: Optional[float] = None,
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Finds an indexed track holding the same recording as a fingerprint.
+
+        Candidates are the tracks whose landmarks agree most on one time offset; the best of them
+        is kept if its chroma correlates above the threshold at that offset.
+
+        Args:
+            fingerprint: compute_fingerprint() of the new input.
+            exclude_folder: The new input's own track folder.
+            threshold: Minimum chroma similarity (default: fingerprint.MATCH_THRESHOLD).
+
+        Returns:
+            The track record (see find()) plus 'offset_seconds' (where the new input starts in the
+            matched recording), 'confidence' and 'votes', or None.
+        """
+        import numpy as np
+        from makeitdrumless.audio.fingerprint import (
+            MATCH_THRESHOLD, MIN_MATCH_VOTES, vote_offsets, chroma_similarity,
+        )
+
+        threshold = MATCH_THRESHOLD if threshold is None else threshold
+        query_hashes = fingerprint["hashes"]
+        with self._lock:
+            exclude_id = self._track_id(exclude_folder) if exclude_folder else None
+        rows = self._landmark_hits(np.unique(query_hashes).tolist(), exclude_id)
+        if not rows:
+            return None
+        hits = np.asarray([tuple(r) for r in rows], dtype=np.int64)
+        votes = vote_offsets(query_hashes, fingerprint["frames"], hits[:, 0], hits[:, 1], hits[:, 2])
+        ranked = sorted(votes.items(), key=lambda item: -item[1][1])[:_MATCH_CANDIDATES]
+
+        best = None
+        query_chroma = fingerprint["chroma"].reshape(-1, 12)
+        for track_id, (offset, count) in ranked:
+            if count < MIN_MATCH_VOTES:
+                break
+            with self._lock:
+                row = self._conn.execute(
+                    "SELECT tracks.*, fingerprints.chroma AS fp_chroma, fingerprints.hop AS fp_hop, "
+                    "fingerprints.rate AS fp_rate FROM fingerprints JOIN tracks ON tracks.id = fingerprints.track_id "
+                    "WHERE tracks.id = ?",
+                    (track_id,),
+                ).fetchone()
+            if row is None or (row["fp_hop"], row["fp_rate"]) != (fingerprint["hop"], fingerprint["rate"]):
+                continue
+            record = self._record(row)
+            if record is None:
+                continue
+            reference = np.frombuffer(row["fp_chroma"], dtype=np.uint8).reshape(-1, 12)
+            confidence, frames = chroma_similarity(query_chroma, reference, offset)
+            if confidence >= threshold and (best is None or confidence > best["confidence"]):
+                best = dict(
+                    record,
+                    offset_seconds=offset * fingerprint["hop"] / float(fingerprint["rate"]),
+                    confidence=confidence,
+                    votes=count,
+                )
+        return best
+
+    def _landmark_hits(self, hashes: List[int], exclude_id: Optional[int] = None) -> List[sqlite3.Row]:
+        """
+        Indexed landmarks sharing a hash with the query, skipping hashes held by more than
+        _MAX_HASH_ROWS landmarks (common chord changes that say little about the recording).
+        """
+        rows = []
+        with self._lock:
+            for value in hashes:
+                hits = self._conn.execute(
+                    "SELECT hash, track_id, frame FROM landmarks WHERE hash = ? AND track_id IS NOT ? LIMIT ?",
+                    (value, exclude_id, _MAX_HASH_ROWS + 1),
+                ).fetchall()
+                if len(hits) <= _MAX_HASH_ROWS:
+                    rows += hits
+        return rows
+
+    def rebuild(self, verbose: bool = True) -> Dict[str, int]:
+        """
+        Rescans the output tree and brings the index in line with what is on disk.
+
+        Each top-level folder with an '(Original)' audio file becomes a track keyed by the file's
+        content hash; 'stems_*' subfolders are recorded as stems per preset and '(Drumless).<ext>'
+        as the drumless output. Tracks already indexed (or found by content hash in a renamed
+        folder) are updated in place, so their source IDs, metadata, loudness measurements and
+        fingerprints are kept; only tracks whose folder or original is gone are dropped.
+
+        Returns:
+            Counts of indexed tracks, stem sets, drumless outputs and pruned tracks.
+        """
+        from makeitdrumless.audio.downloader import AUDIO_EXTENSIONS
+
+        counts = {"tracks": 0, "stems": 0, "drumless": 0, "pruned": 0}
+        seen = set()
+        for entry in sorted(os.scandir(self.base_dir), key=lambda e: e.name):
+            if not entry.is_dir() or entry.name.startswith("."):
+                continue
+            files = sorted(os.listdir(entry.path))
+            originals = [
+                f for f in files
+                if f.lower().endswith(AUDIO_EXTENSIONS) and "(original)" in f.lower()
+                and _exists(os.path.join(entry.path, f))
+            ]
+            if not originals:
+                continue
+            # Prefer the WAV when both a compressed original and its WAV exist
+            originals.sort(key=lambda f: not f.lower().endswith(".wav"))
+            original = os.path.join(entry.path, originals[0])
+            content_key = hash_file(original)
+            with self._lock, self._conn:
+                track_id = self._track_id(entry.path)
+                if track_id is None:
+                    # A folder renamed by hand: move the entry whose old folder is gone
+                    row = self._conn.execute(
+                        "SELECT tracks.id, tracks.folder FROM aliases JOIN tracks ON tracks.id = aliases.track_id "
+                        "WHERE aliases.key = ?",
+                        (content_key,),
+                    ).fetchone()
+                    if row is not None and not os.path.isdir(self._abs(row["folder"])):
+                        track_id = row["id"]
+                        self._conn.execute("UPDATE tracks SET folder = ? WHERE id = ?", (self._rel(entry.path), track_id))
+                # Stem sets are re-read from disk below
+                self._conn.execute("DELETE FROM stems WHERE track_id = ?", (track_id,))
+            # Indexed folders keep their source metadata; new ones are titled after the folder
+            info = {"title": entry.name} if track_id is None else None
+            self.record_track(entry.path, original, info=info, keys=[content_key])
+            seen.add(self._rel(entry.path))
+            counts["tracks"] += 1
+
+            for sub in sorted(os.scandir(entry.path), key=lambda e: e.name):
+                if not (sub.is_dir() and sub.name.startswith("stems_")):
+                    continue
+                stems = {
+                    os.path.splitext(f)[0]: os.path.join(sub.path, f)
+                    for f in sorted(os.listdir(sub.path))
+                    if f.lower().endswith(_STEM_EXTENSIONS) and not f.startswith(".")
+                }
+                if stems:
+                    self.record_stems(entry.path, sub.name, stems)
+                    counts["stems"] += 1
+
+            drumless = [
+                f for f in files
+                if os.path.splitext(f)[0].lower().endswith("(drumless)") and f.lower().endswith(_OUTPUT_EXTENSIONS)
+            ]
+            if drumless:
+                self.record_drumless(entry.path, os.path.join(entry.path, drumless[0]))
+                counts["drumless"] += 1
+
+        with self._lock, self._conn:
+            gone = [
+                row["id"] for row in self._conn.execute("SELECT id, folder FROM tracks")
+                if row["folder"] not in seen
+            ]
+            # Cascades to the pruned tracks' aliases, stems and fingerprints
+            self._conn.executemany("DELETE FROM tracks WHERE id = ?", ((track_id,) for track_id in gone))
+        counts["pruned"] = len(gone)
+
+        if verbose:
+            print(
+                f"📚 Library rebuilt: {counts['tracks']} tracks, {counts['stems']} stem sets, "
+                f"{counts['drumless']} drumless outputs, {counts['pruned']} missing tracks removed ({self.db_path})"
+            )
+        return counts
+
+
+_libraries: Dict[str, LibraryIndex] = {}
+_libraries_lock = threading.Lock()
+
+
+def get_library(base_dir: str) -> LibraryIndex:
+    """Returns the shared LibraryIndex for an output base directory."""
+    key = os.path.abspath(base_dir)
+    with _libraries_lock:
+        library = _libraries.get(key)
+        if library is None:
+            library = LibraryIndex(key)
+            _libraries[key] = library
+        return library
@@ -1,12 +1,16 @@
 import os
 import sys
+import math
 import argparse
 import time
 import shutil
 import signal
 import atexit
 import warnings
+import functools
 from pathlib import Path
+from concurrent.futures import Future
+from typing import Optional, Tuple, Dict, Any, Union, List
 
 # Silence multiprocessing resource tracker shutdown warnings during abrupt cancellation
 warnings.filterwarnings("ignore", category=UserWarning, module="multiprocessing.resource_tracker")
@@ -18,25 +22,336 @@ from makeitdrumless.msst_integration.models import (
     normalize_preset_name,
     MODEL_REGISTRY,
 )
-from makeitdrumless.msst_integration.inference import separate_stems_msst
+from makeitdrumless.msst_integration.inference import separate_stems_msst, separate_chained_msst
+from makeitdrumless.msst_integration.chain import INTERMEDIATE_STEM
+from makeitdrumless.msst_integration.pruning import supports_head_pruning
+from makeitdrumless.msst_integration.tta import parse_tta_flips
+from makeitdrumless.msst_integration.checkpoint import CHECKPOINT_INTERVAL
+from makeitdrumless.msst_integration.calibration import AUTO_MEASURE, clear_calibrations
+from makeitdrumless.msst_integration.stft_cache import SpectralFrontendCache
+from makeitdrumless.msst_integration.memory import MemoryBudgetError, parse_memory_size, available_memory_bytes, input_frames
+from makeitdrumless.msst_integration.model_benchmarks import (
+    BENCHMARK_SECONDS,
+    benchmark_models,
+    format_benchmark_table,
+    load_benchmarks,
+    choose_preset,
+    fastest_preset,
+    predicted_seconds,
+)
+from makeitdrumless.msst_integration.ensemble_pool import (
+    SHARED_SAMPLE_RATE,
+    DEFAULT_MEMORY_FRACTION,
+    usable_cores,
+    estimate_member_memory,
+    plan_ensemble_workers,
+    separate_ensemble_concurrently,
+)
 from makeitdrumless.audio.downloader import (
     get_audio_input,
+    download_audio,
     get_default_output_base,
     clean_audio_title,
     parse_artist_title,
 )
-from makeitdrumless.audio.processing import (
-    mix_stems_without_drums,
-    set_mp3_metadata,
-    ensemble_stems,
+from makeitdrumless.audio.processing import ensemble_stems
+from makeitdrumless.audio.render import MIX_PRESETS, parse_mix_specs, render_mixes, mix_output_path
+from makeitdrumless.audio.encoder import (
+    OUTPUT_CODECS,
+    encode_many,
+    output_extension,
+    track_tags,
+    submit_encode_job,
+)
+from makeitdrumless.audio.decoder import alias_pcm, discard_pcm, load_audio_mix, register_pcm
+from makeitdrumless.audio.fingerprint import (
+    MATCH_THRESHOLD,
+    MIN_ALIGNMENT_CORRELATION,
+    MAX_UNCOVERED_SECONDS,
+    compute_fingerprint,
+    refine_alignment,
+    uncovered_samples,
+    write_aligned_stems,
+)
+from makeitdrumless.audio.stem_io import (
+    STEM_FORMATS,
+    stem_exists,
+    stems_complete,
+    export_stem_wav,
+    set_stem_write_workers,
+    wait_for_pending_writes,
 )
+from makeitdrumless.audio.importer import import_directory
+from makeitdrumless.audio.playlist import is_playlist_url, expand_playlist, download_playlist, HostRateLimiter
+from makeitdrumless.library import get_library, source_keys
 from makeitdrumless.ffmpeg.manager import setup_ffmpeg_binary
 from makeitdrumless.ytmusic import upload_drumless_track, setup_ytmusic_auth
+from makeitdrumless.telemetry import (
+    RunTelemetry,
+    start_run,
+    end_run,
+    bind_run,
+    stage,
+    get_default_report_dir,
+    write_batch_report,
+)
+from makeitdrumless.msst_integration.mps_patch import DEFAULT_SILENCE_THRESHOLD_DB
+
+
+def _reuse_matched_stems(library, track_dir: str, match: Dict[str, Any], output_folder: str, stem_format: str = "wav"):
+    """Copies the matched recording's stems for this preset folder, aligned to the track's input; None if it has none."""
+    preset_key = os.path.basename(os.path.normpath(output_folder))
+    source = library.get_stems(match["folder"], preset_key)
+    if not source or not stems_complete(os.path.join(match["folder"], preset_key)):
+        return None
+    with stage("stem_reuse", preset=preset_key):
+        stems = write_aligned_stems(source, output_folder, match, stem_format=stem_format)
+    library.record_stems(track_dir, preset_key, stems)
+    print(f"🧬 Reused {preset_key} of '{os.path.basename(match['folder'])}', aligned to this input (no inference)")
+    return stems
+
+
+def _separate_indexed(
+    library, track_dir: str, force: bool, separate=separate_stems_msst, match: Optional[Dict[str, Any]] = None,
+    **separation_kwargs,
+):
+    """
+    Runs separate (separate_stems_msst by default) unless the library already holds this preset's stems for the
+    track, or for the same recording matched by fingerprint (see _match_recording).
+    """
+    preset_key = os.path.basename(os.path.normpath(separation_kwargs["output_folder"]))
+    if not force:
+        indexed = library.get_stems(track_dir, preset_key)
+        if indexed and stems_complete(separation_kwargs["output_folder"]):
+            print(f"✅ Using indexed stems: {separation_kwargs['output_folder']}")
+            return indexed
+        if match is not None:
+            reused = _reuse_matched_stems(
+                library, track_dir, match, separation_kwargs["output_folder"],
+                stem_format=separation_kwargs.get("stem_format", "wav"),
+            )
+            if reused is not None:
+                return reused
+    stems = separate(**separation_kwargs)
+    library.record_stems(track_dir, preset_key, stems)
+    return stems
+
+
+def _heads_to_keep(args, mix_specs: Dict[str, Dict[str, Any]], presets: List[str]) -> Optional[List[str]]:
+    """
+    Returns the stems whose output heads --prune-heads keeps for these presets, or None to run full models.
+
+    Drums are always kept, with the stems named in --prune-heads and every stem a mix rule adjusts on
+    its own (e.g. 'bass' for drumless-bass-boost). Ensembles prune only if every member is prunable or
+    already splits drums / other, so the blended 'other' stems mean the same thing.
+    """
+    if args.prune_heads is None or args.checkpoint:
+        return None
+    if not all(supports_head_pruning(p) or MODEL_REGISTRY.get(p, {}).get("stems") == ["drums", "other"] for p in presets):
+        print("⚠️  --prune-heads needs BS-RoFormer-style presets (see --list-models); running the full models.")
+        return None
+    if not any(supports_head_pruning(p) for p in presets):
+        return None
+    keep = ["drums"] + [s.strip() for s in args.prune_heads.split(",") if s.strip()]
+    for spec in mix_specs.values():
+        keep += [rule for rule, _ in spec["rules"] if rule not in ("*", "drums", "crowd")]
+    return list(dict.fromkeys(keep))
+
+
+def _silence_threshold(args) -> Optional[float]:
+    """Gate level for silence-aware chunk skipping, or None to run the model on every chunk (the default)."""
+    if args.silence_threshold is not None:
+        return args.silence_threshold
+    return DEFAULT_SILENCE_THRESHOLD_DB if args.silence_skip else None
+
+
+def _match_recording(library, track_dir: str, audio_path: str, args) -> Optional[Dict[str, Any]]:
+    """
+    Fingerprints a track's original into the library and looks for the same recording in another track folder.
+
+    A chroma / landmark match above --match-threshold is confirmed by cross-correlating the waveforms,
+    which also gives the exact offset and level difference between the two inputs.
+
+    Returns:
+        {'folder', 'offset', 'length', 'gain', 'sample_rate', 'confidence'} for write_aligned_stems(), or
+        None (no match, --no-fingerprint, --force, or a different recording of the same song).
+    """
+    if args.no_fingerprint:
+        return None
+    sample_rate = 44100
+    try:
+        with stage("fingerprint"):
+            mix, _ = load_audio_mix(audio_path, sample_rate)
+            # Kept decoded for the separation that follows (released with the track's other PCM)
+            register_pcm(audio_path, sample_rate, mix)
+            fingerprint = compute_fingerprint(mix, sample_rate)
+            match = None if args.force else library.match_fingerprint(
+                fingerprint, exclude_folder=track_dir, threshold=args.match_threshold
+            )
+            library.record_fingerprint(track_dir, fingerprint)
+    except Exception as e:
+        print(f"⚠️  Could not fingerprint {os.path.basename(audio_path)} ({e}); skipping duplicate detection.")
+        return None
+    if match is None:
+        return None
+
+    try:
+        reference, _ = load_audio_mix(match["original"], sample_rate)
+    except Exception as e:
+        print(f"⚠️  Could not decode the matched original {match['original']} ({e}); separating this track.")
+        return None
+    alignment = refine_alignment(mix, reference, int(round(match["offset_seconds"] * sample_rate)), sample_rate)
+    uncovered = uncovered_samples(alignment["offset"], mix.shape[-1], reference.shape[-1])
+    name = os.path.basename(match["folder"])
+    if alignment["correlation"] < MIN_ALIGNMENT_CORRELATION or alignment["gain"] <= 0:
+        print(f"🧬 Sounds like '{name}' but is a different recording; separating it.")
+        return None
+    if uncovered > MAX_UNCOVERED_SECONDS * sample_rate:
+        print(f"🧬 Same recording as '{name}' but {uncovered / sample_rate:.1f}s of this input is not in it; separating it.")
+        return None
+    print(
+        f"🧬 Same recording as '{name}' (confidence {match['confidence']:.2f}, offset {alignment['offset'] / sample_rate:+.2f}s, "
+        f"level {20.0 * math.log10(alignment['gain']):+.1f} dB)"
+    )
+    return {
+        "folder": match["folder"],
+        "offset": alignment["offset"],
+        "length": mix.shape[-1],
+        "gain": alignment["gain"],
+        "sample_rate": sample_rate,
+        "confidence": match["confidence"],
+    }
+
+
+def _budget_preset(args, audio_path: str) -> str:
+    """Returns --model, or with --max-rtf / --deadline the best benchmarked preset meeting the budget for this track."""
+    if (args.max_rtf is None and args.deadline is None) or args.checkpoint or args.ensemble:
+        return args.model
+    from makeitdrumless.msst_integration.device import get_optimal_device
+    device = get_optimal_device("auto" if args.device == AUTO_MEASURE else args.device)
+    entries = load_benchmarks("cpu" if device == "mlx" else device.type)
+    if not entries:
+        print("⚠️  --max-rtf / --deadline need this machine's preset benchmarks; run --benchmark-models first. "
+              f"Using '{args.model}'.")
+        return args.model
+
+    frames = input_frames(audio_path, 44100)
+    if frames is None:
+        print(f"⚠️  Cannot determine the length of {os.path.basename(audio_path)} for the time budget; using '{args.model}'.")
+        return args.model
+    duration = frames / 44100
+    # Every TTA transform doubles the chunks each shift pass runs
+    passes = max(1, args.shifts) * 2 ** len(args.tta)
+    deadline = args.deadline
+    if deadline is not None and args.remove_audience:
+        # The audience pass runs first and comes out of the same deadline
+        audience = entries.get(normalize_preset_name(args.audience_model))
+        if audience:
+            deadline -= predicted_seconds(audience, duration)
+    choice = choose_preset(entries, duration, max_rtf=args.max_rtf, deadline=deadline, passes=passes)
+    if choice is None:
+        fastest = fastest_preset(entries)
+        if fastest is None:
+            print(f"⚠️  No benchmarked preset separates drums; run --benchmark-models for one. Using '{args.model}'.")
+            return args.model
+        print(f"⚠️  No benchmarked preset meets the time budget for this {duration:.0f}s track; using the fastest, '{fastest}'.")
+        return fastest
+    entry = entries[choice]
+    print(f"⏱️  Time budget: '{choice}' (SDR {MODEL_REGISTRY[choice]['sdr']:.2f}, RTF {entry['rtf']:.3f}, "
+          f"~{predicted_seconds(entry, duration, passes):.0f}s predicted for {duration:.0f}s of audio)")
+    return choice
+
+
+def _ensemble_core_sets(args, members: list, input_audio_path: str) -> Tuple[list, Optional[int]]:
+    """
+    Plans worker core sets for the uncached ensemble members.
+
+    Returns:
+        (core sets, memory cap in bytes for all members together); a single core set means run
+        the members sequentially.
+    """
+    if args.ensemble_workers == 1 or len(members) < 2 or args.device not in ("auto", "cpu"):
+        return [usable_cores()], args.max_memory
+    from makeitdrumless.msst_integration.device import get_optimal_device
+    device = get_optimal_device(args.device)
+    if getattr(device, "type", device) != "cpu":
+        return [usable_cores()], args.max_memory
+
+    memory_cap = int(args.ensemble_memory_mb * 1024 * 1024) if args.ensemble_memory_mb else args.max_memory
+    if memory_cap is None:
+        available = available_memory_bytes()
+        memory_cap = int(available * DEFAULT_MEMORY_FRACTION) if available else None
+    frames = input_frames(input_audio_path, SHARED_SAMPLE_RATE)
+    if frames is None:
+        print("⚠️  Cannot determine the input length to plan concurrent ensemble members; running them one after another.")
+        return [usable_cores()], args.max_memory
+    member_bytes = 0
+    for kwargs in members:
+        _, config_path, checkpoint_path = download_model_preset(kwargs["model_preset"])
+        member_bytes = max(member_bytes, estimate_member_memory(config_path, checkpoint_path, frames))
+    core_sets = plan_ensemble_workers(
+        len(members), usable_cores(),
+        member_bytes=member_bytes,
+        memory_cap_bytes=memory_cap,
+        max_workers=args.ensemble_workers or None,
+    )
+    return core_sets, memory_cap
+
+
+def _separate_ensemble(
+    library, track_dir: str, args, members: list, input_audio_path: str, match: Optional[Dict[str, Any]] = None,
+) -> list:
+    """
+    Separates every ensemble member, concurrently in pinned CPU worker processes when the plan allows.
+
+    Members the library already holds complete stems for (for this track, or aligned from the same
+    recording matched by fingerprint) are reused; the rest run through
+    separate_ensemble_concurrently() or, with a single core set, one after another.
+
+    Returns:
+        One stems dict per member, in member order.
+    """
+    stems_list = [None] * len(members)
+    pending = []
+    for index, kwargs in enumerate(members):
+        preset_key = os.path.basename(os.path.normpath(kwargs["output_folder"]))
+        indexed = None if args.force else library.get_stems(track_dir, preset_key)
+        if indexed and stems_complete(kwargs["output_folder"]):
+            print(f"✅ Using indexed stems: {kwargs['output_folder']}")
+            stems_list[index] = indexed
+            continue
+        if match is not None and not args.force:
+            stems_list[index] = _reuse_matched_stems(
+                library, track_dir, match, kwargs["output_folder"], stem_format=kwargs.get("stem_format", "wav")
+            )
+        if stems_list[index] is None:
+            pending.append(index)
+
+    core_sets, memory_cap = _ensemble_core_sets(args, [members[i] for i in pending], input_audio_path)
+    if len(core_sets) > 1:
+        print(f"⚡ Running {len(pending)} ensemble members on {len(core_sets)} workers "
+              f"({', '.join(str(len(c)) for c in core_sets)} cores)")
+        jobs = [dict(members[i]) for i in pending]
+        if args.max_memory and memory_cap:
+            # Each concurrent member governs its own share of the cap
+            for job in jobs:
+                job["max_memory"] = memory_cap // len(core_sets)
+        with stage("ensemble_members", members=len(pending), workers=len(core_sets)):
+            results = separate_ensemble_concurrently(input_audio_path, jobs, core_sets)
+            for position, stems in results:
+                index = pending[position]
+                library.record_stems(track_dir, os.path.basename(os.path.normpath(members[index]["output_folder"])), stems)
+                stems_list[index] = stems
+    else:
+        for index in pending:
+            stems_list[index] = _separate_indexed(library, track_dir, args.force, **members[index])
+    return stems_list
 
 
 def _emergency_cleanup(signum=None, frame=None):
     """Instantly terminates the main process, resource tracker, and all child processes."""
     sys.stdout.write("\n\n⚠️  Process cancelled. Releasing all RAM and returning to terminal...\n")
+    sys.stdout.write("⏩ Separation progress up to the last checkpoint is kept; re-run the same command to resume.\n")
     sys.stdout.flush()
 
     # 1. Kill the multiprocessing resource_tracker child process (which detached to its own session)
@@ -82,6 +397,457 @@ def register_signal_handlers():
 register_signal_handlers()
 
 
+def process_track(
+    args: argparse.Namespace,
+    input_source: str,
+    prefetched: Optional[Tuple[str, Optional[Dict[str, Any]]]] = None,
+    ingest_telemetry: Optional[RunTelemetry] = None,
+    defer_encode: bool = False,
+) -> Union[Dict[str, Any], Future]:
+    """
+    Runs the full pipeline (ingest, optional audience removal, separation, mixdown, encode + tagging, upload) for one track.
+
+    Args:
+        args: Parsed command-line arguments.
+        input_source: YouTube URL, local audio file, or track directory.
+        prefetched: Optional (audio_path, info) already downloaded by a playlist worker.
+        ingest_telemetry: Optional recorder holding the prefetched download's stages.
+        defer_encode: If True, encoding, upload and the report run on the shared encode pool so
+                      several tracks encode concurrently while the next one is separated.
+
+    Returns:
+        The track's run report as a dict, or a Future of it when defer_encode is set.
+    """
+    start_total_time = time.time()
+    mix_specs = parse_mix_specs(args.mixes)
+    run_report = start_run(input_source)
+    if ingest_telemetry is not None:
+        run_report.absorb(ingest_telemetry)
+    # Shared separation settings for every separate_stems_msst call in this run
+    separation_options = dict(
+        chunk_size=args.chunk_size,
+        overlap=args.overlap,
+        shifts=args.shifts,
+        device_name=args.device,
+        force=args.force,
+        silence_threshold_db=_silence_threshold(args),
+        window_shape=args.window_shape,
+        fade_size=args.fade_size,
+        stem_format=args.stem_format,
+        checkpoint_interval=args.checkpoint_interval,
+        max_memory=args.max_memory,
+        tta=args.tta,
+        batched_shifts=not args.sequential_shifts,
+    )
+
+    # Spectral front-end cache shared by ensemble members with identical STFT settings (shift passes
+    # and TTA variants never feed the model the same chunk twice)
+    stft_cache = None
+    if args.stft_cache_mb > 0 and args.ensemble:
+        stft_cache = SpectralFrontendCache(max_bytes=args.stft_cache_mb * 1024 * 1024)
+        separation_options["stft_cache"] = stft_cache
+
+    # 6. Determine Base Output Directory (~/Music/MakeItDrumless by default)
+    base_output_dir = os.path.abspath(args.output_dir or get_default_output_base())
+    os.makedirs(base_output_dir, exist_ok=True)
+
+    # 7. Acquire Audio Input (Download or convert), unless a playlist worker already fetched it
+    if prefetched is not None:
+        initial_audio_wav, info = prefetched
+    else:
+        initial_audio_wav, info = get_audio_input(input_source, output_folder=base_output_dir, direct_pcm=args.direct_ingest)
+
+    # Extract clean track title
+    out_title = None
+    out_artist = None
+    if info:
+        out_title = info.get("track") or info.get("title")
+        out_artist = info.get("artist") or info.get("uploader") or info.get("channel")
+        if not out_artist and out_title and ' - ' in out_title:
+            out_artist, out_title = parse_artist_title(out_title)
+
+    if out_title:
+        safe_title = clean_audio_title(out_title)
+    else:
+        safe_title = clean_audio_title(initial_audio_wav)
+
+    # Create dedicated song output directory: ~/Music/MakeItDrumless/<Safe Title>/
+    track_dir = os.path.join(base_output_dir, safe_title)
+    os.makedirs(track_dir, exist_ok=True)
+
+    # Move/place original audio (WAV, or the compressed stream with --direct-ingest) inside the song's folder
+    original_ext = os.path.splitext(initial_audio_wav)[1].lower() or ".wav"
+    final_original_audio = os.path.join(track_dir, f"{safe_title} (Original){original_ext}")
+    if os.path.abspath(initial_audio_wav) != os.path.abspath(final_original_audio):
+        alias_pcm(initial_audio_wav, final_original_audio)
+        if not os.path.exists(final_original_audio) or args.force:
+            shutil.copy2(initial_audio_wav, final_original_audio)
+            if os.path.dirname(os.path.abspath(initial_audio_wav)) == base_output_dir:
+                try:
+                    os.remove(initial_audio_wav)
+                except Exception:
+                    pass
+
+    library = get_library(base_output_dir)
+    library.record_track(track_dir, final_original_audio, info=info, keys=source_keys(info))
+    model_name = _budget_preset(args, final_original_audio)
+    # The same recording may already be separated under another title or source
+    recording_match = _match_recording(library, track_dir, final_original_audio, args)
+    if recording_match is not None:
+        run_report.set("recording_match", recording_match)
+
+    # 8. Optional Audience / Crowd Removal Preprocessing
+    separation_input_wav = final_original_audio
+    isolated_crowd_stem = None
+    decrowded_wav = None
+    fused_stems = None
+    fused_stems_dir = None
+
+    if args.remove_audience:
+        norm_aud_preset = normalize_preset_name(args.audience_model)
+        aud_tag = "".join(c if c.isalnum() or c in ("-", "_") else "_" for c in norm_aud_preset)
+        crowd_stems_dir = os.path.join(track_dir, f"stems_audience_{aud_tag}")
+        decrowded_wav = os.path.join(track_dir, f"{safe_title} (Decrowded).wav")
+
+        norm_single_preset = normalize_preset_name(model_name)
+        use_fused = args.fused_audience and not args.ensemble and not args.checkpoint
+        if args.fused_audience and not use_fused:
+            print("⚠️  --fused-audience works with a single preset model; running audience removal as a separate pass.")
+
+        if use_fused:
+            # Crowd model and drum model run chunk by chunk in one pass; only the final stems are written
+            model_tag = "".join(c if c.isalnum() or c in ("-", "_") else "_" for c in norm_single_preset)
+            fused_stems_dir = os.path.join(track_dir, f"stems_chain_{aud_tag}_{model_tag}")
+            print(f"\n👥 Audience removal fused with drum separation ('{norm_aud_preset}' -> '{norm_single_preset}')...")
+            try:
+                fused_stems = _separate_indexed(
+                    library, track_dir, args.force,
+                    separate=separate_chained_msst,
+                    match=recording_match,
+                    input_audio_path=final_original_audio,
+                    output_folder=fused_stems_dir,
+                    first_preset=norm_aud_preset,
+                    second_preset=norm_single_preset,
+                    keep_intermediate=args.keep_decrowded,
+                    **separation_options,
+                )
+            except ValueError as e:
+                print(f"⚠️  Cannot fuse these models ({e}); running audience removal as a separate pass.")
+
+        if fused_stems is not None:
+            # The decrowded mix is only an intermediate here: exported on request, never mixed
+            intermediate = fused_stems.pop(INTERMEDIATE_STEM, None)
+            if intermediate and stem_exists(intermediate) and args.keep_decrowded:
+                if not os.path.exists(decrowded_wav) or args.force:
+                    export_stem_wav(intermediate, decrowded_wav)
+                print(f"  + Decrowded music: {decrowded_wav}")
+            else:
+                decrowded_wav = None
+            if "crowd" in fused_stems and stem_exists(fused_stems["crowd"]):
+                isolated_crowd_stem = fused_stems["crowd"]
+                print(f"  + Isolated crowd ambience: {isolated_crowd_stem}")
+        else:
+            print(f"\n👥 Performing Audience / Crowd Removal Preprocessing using '{norm_aud_preset}'...")
+            audience_stems = _separate_indexed(
+                library, track_dir, args.force,
+                match=recording_match,
+                input_audio_path=final_original_audio,
+                output_folder=crowd_stems_dir,
+                model_preset=norm_aud_preset,
+                **separation_options,
+            )
+
+            # Stems returned: 'crowd' (applause/cheering) and 'other' (cleaned music mix)
+            cleaned_music_path = audience_stems.get("other") or audience_stems.get("dry")
+            if not cleaned_music_path and "crowd" in audience_stems:
+                # Fallback if other stem name used
+                for k, p in audience_stems.items():
+                    if k != "crowd" and stem_exists(p):
+                        cleaned_music_path = p
+                        break
+
+            if "crowd" in audience_stems and stem_exists(audience_stems["crowd"]):
+                isolated_crowd_stem = audience_stems["crowd"]
+                print(f"  + Isolated crowd ambience: {isolated_crowd_stem}")
+
+            if cleaned_music_path and stem_exists(cleaned_music_path):
+                if os.path.abspath(cleaned_music_path) != os.path.abspath(decrowded_wav):
+                    if not os.path.exists(decrowded_wav) or args.force:
+                        export_stem_wav(cleaned_music_path, decrowded_wav)
+                separation_input_wav = decrowded_wav
+                print(f"  + Decrowded music input: {decrowded_wav}")
+            else:
+                print("⚠️  Could not find decrowded music stem. Falling back to original audio for drum separation.")
+
+    # 9. Run separation (Ensemble or Single Model), unless the fused audience chain already produced the stems
+    if fused_stems is not None:
+        stems = fused_stems
+        stems_dir = fused_stems_dir
+        model_display_name = norm_single_preset
+    elif args.ensemble:
+        ensemble_model_names = [normalize_preset_name(m.strip()) for m in args.ensemble.split(",") if m.strip()]
+        if len(ensemble_model_names) < 2:
+            print("⚠️  --ensemble requires at least 2 comma-separated models. Running in single model mode.")
+            ensemble_model_names = [ensemble_model_names[0]]
+
+        ensemble_weights = None
+        if args.ensemble_weights:
+            try:
+                ensemble_weights = [float(w.strip()) for w in args.ensemble_weights.split(",") if w.strip()]
+            except ValueError:
+                print("⚠️  Invalid --ensemble-weights. Using equal weights.")
+                ensemble_weights = None
+
+        print(f"\n🔮 Multi-Model Ensemble Separation across: {', '.join(ensemble_model_names)}")
+        keep_heads = _heads_to_keep(args, mix_specs, ensemble_model_names)
+        ensemble_members = []
+        for m_name in ensemble_model_names:
+            m_tag = "".join(c if c.isalnum() or c in ("-", "_") else "_" for c in m_name)
+            member_heads = keep_heads if supports_head_pruning(m_name) else None
+            if member_heads:
+                m_tag += "_heads_" + "_".join(member_heads)
+            ensemble_members.append(dict(
+                input_audio_path=separation_input_wav,
+                output_folder=os.path.join(track_dir, f"stems_{m_tag}"),
+                model_preset=m_name,
+                keep_heads=member_heads,
+                **separation_options,
+            ))
+        stems_list = _separate_ensemble(
+            library, track_dir, args, ensemble_members, separation_input_wav, match=recording_match
+        )
+
+        # Blend ensemble
+        ensemble_tag = "_".join("".join(c if c.isalnum() or c in ("-", "_") else "_" for c in m) for m in ensemble_model_names)
+        stems_dir = os.path.join(track_dir, f"stems_ensemble_{ensemble_tag}")
+        with stage("ensemble_blend", models=len(ensemble_model_names)):
+            stems = ensemble_stems(
+                stems_list, weights=ensemble_weights, output_dir=stems_dir, force=args.force,
+                stem_format=args.stem_format,
+            )
+        library.record_stems(track_dir, os.path.basename(stems_dir), stems)
+        model_display_name = f"Ensemble ({'+'.join(ensemble_model_names)})"
+    else:
+        # Single model path
+        norm_single_preset = normalize_preset_name(model_name)
+        model_tag = norm_single_preset if not args.checkpoint else os.path.splitext(os.path.basename(args.checkpoint))[0]
+        keep_heads = _heads_to_keep(args, mix_specs, [norm_single_preset])
+        if keep_heads:
+            # Pruned stems are a drums / other split, cached apart from the full model's stems
+            model_tag += "_heads_" + "_".join(keep_heads)
+        clean_model_tag = "".join(c if c.isalnum() or c in ("-", "_") else "_" for c in model_tag)
+        stems_dir = os.path.join(track_dir, f"stems_{clean_model_tag}")
+
+        stems = _separate_indexed(
+            library, track_dir, args.force,
+            match=recording_match,
+            input_audio_path=separation_input_wav,
+            output_folder=stems_dir,
+            model_preset=norm_single_preset,
+            config_path=args.config,
+            checkpoint_path=args.checkpoint,
+            keep_heads=keep_heads,
+            **separation_options,
+        )
+        model_display_name = norm_single_preset
+
+    if stft_cache is not None:
+        stft_cache.report()
+        run_report.set("stft_cache", stft_cache.stats())
+        stft_cache.clear()
+
+    # If audience was separated in preprocessing, re-include the crowd stem in final drumless mix
+    if isolated_crowd_stem and stem_exists(isolated_crowd_stem):
+        stems["crowd"] = isolated_crowd_stem
+        print(f"👥 Retaining crowd ambiance in drumless backing mix ({isolated_crowd_stem})")
+
+    # 10. Render every requested mix from one load of the stems; the encoder writes the tags in the same pass
+    extension = output_extension(args.codec)
+    rendered = render_mixes(
+        stems, mix_specs, loudness_target=args.loudness_target, true_peak_ceiling=args.true_peak_ceiling
+    )
+    encode_jobs = {
+        name: {
+            "audio": mix["audio"],
+            "sample_rate": mix["sample_rate"],
+            "gain_db": mix["gain_db"],
+            "output_path": mix_output_path(track_dir, safe_title, mix_specs[name], extension),
+            "tags": track_tags(info, model_name=model_display_name, label=mix_specs[name]["label"]),
+        }
+        for name, mix in rendered.items()
+    }
+    # Measured once during the mixdown; kept with the track so later runs and players can reuse it
+    loudness = {name: dict(mix["loudness"], gain_db=mix["gain_db"]) for name, mix in rendered.items()}
+    del rendered
+    # The drumless mix is the one indexed and uploaded (or the first mix when it was not requested)
+    primary_mix = "drumless" if "drumless" in mix_specs else next(iter(mix_specs))
+    out_track_path = mix_output_path(track_dir, safe_title, mix_specs[primary_mix], extension)
+    end_run()
+
+    # Decoded PCM kept from direct ingestion is no longer needed
+    discard_pcm(initial_audio_wav)
+    discard_pcm(final_original_audio)
+
+    def finish_track() -> Dict[str, Any]:
+        outputs = {}
+        for name, result in encode_many(
+            encode_jobs, codec=args.codec, bitrate=args.bitrate, vbr_quality=args.vbr_quality
+        ).items():
+            if isinstance(result, Exception):
+                print(f"❌ {result}")
+                continue
+            outputs[name] = result
+            print(f"✅ {mix_specs[name]['label']} track saved to: {result}")
+        encode_jobs.clear()
+        encoded = primary_mix in outputs
+        if encoded:
+            library.record_drumless(track_dir, out_track_path, model=model_display_name)
+        library.record_loudness(track_dir, {name: loudness[name] for name in outputs})
+
+        # 11. Upload to YouTube Music if requested
+        if args.upload_ytmusic and encoded:
+            with stage("upload"):
+                upload_drumless_track(out_track_path, auth_file=args.ytmusic_auth)
+
+        total_elapsed = time.time() - start_total_time
+
+        # 12. Write JSON run report
+        report_path = None
+        if not args.no_report:
+            run_report.set("title", safe_title)
+            run_report.set("model", model_display_name)
+            run_report.set("device", args.device)
+            run_report.set("output", out_track_path)
+            run_report.set("outputs", outputs)
+            run_report.set("loudness", loudness)
+            report_dir = args.report_dir or get_default_report_dir()
+            report_path = os.path.join(report_dir, f"{time.strftime('%Y%m%d-%H%M%S')}_{safe_title}.json")
+            try:
+                run_report.write_json(report_path)
+            except OSError as e:
+                print(f"⚠️  Could not write run report: {e}")
+                report_path = None
+        print(f"\n🎉 All done in {total_elapsed:.1f}s!")
+        print(f"📁 Track Folder: {track_dir}")
+        for name, path in outputs.items():
+            print(f"  🎵 {mix_specs[name]['label'] + ':':<16} {path}")
+        print(f"  🎙️ Original Audio:  {final_original_audio}")
+        if decrowded_wav and os.path.exists(decrowded_wav):
+            print(f"  👥 Decrowded Audio: {decrowded_wav}")
+        print(f"  🎛️ Separated Stems: {stems_dir}")
+        if report_path:
+            print(f"  📊 Run Report:      {report_path}")
+        print()
+        return run_report.to_dict()
+
+    def finish_bound() -> Dict[str, Any]:
+        with bind_run(run_report):
+            return finish_track()
+
+    if defer_encode:
+        # Batch mode: encoding overlaps with the next track's separation on the encode pool
+        return submit_encode_job(finish_bound)
+    return finish_bound()
+
+
+def _report_budget_failure(label: str, error: MemoryBudgetError):
+    """Prints why a track was skipped under --max-memory, including the estimate breakdown."""
+    print(f"❌ '{label}' does not fit the --max-memory budget; skipping it.\n{error}")
+    print("💡 Raise --max-memory, use a smaller model or a shorter chunk size, or drop --shifts / --tta.")
+
+
+def _release_memory():
+    """Releases cached allocator memory between and after tracks."""
+    import gc
+    gc.collect()
+    try:
+        import torch
+        if hasattr(torch, "mps") and torch.backends.mps.is_available():
+            torch.mps.synchronize()
+            torch.mps.empty_cache()
+    except Exception:
+        pass
+
+
+def _process_playlist(args: argparse.Namespace):
+    """Downloads playlist entries concurrently and separates each one as soon as its download completes."""
+    base_output_dir = os.path.abspath(args.output_dir or get_default_output_base())
+    os.makedirs(base_output_dir, exist_ok=True)
+    start_total_time = time.time()
+
+    print(f"📜 Expanding playlist: {args.input}")
+    playlist = expand_playlist(args.input)
+    entries = playlist["entries"]
+    if not entries:
+        print("⚠️  Playlist has no downloadable entries.")
+        return
+    print(f"📜 Playlist '{playlist.get('title') or args.input}': {len(entries)} entries "
+          f"({args.download_workers} parallel downloads)")
+
+    download_fn = functools.partial(
+        download_audio,
+        output_folder=base_output_dir,
+        direct_pcm=args.direct_ingest,
+        show_spinner=False,
+    )
+    pending_reports = []
+    failed = []
+    for done_count, item in enumerate(download_playlist(
+        entries,
+        download_fn,
+        workers=args.download_workers,
+        rate_limiter=HostRateLimiter(args.rate_limit),
+        retries=args.download_retries,
+    ), start=1):
+        label = item["entry"].get("title") or item["entry"]["url"]
+        if item["error"] is not None:
+            print(f"❌ [{done_count}/{len(entries)}] Download failed after {item['attempts']} attempts: {label} ({item['error']})")
+            failed.append(label)
+            continue
+        print(f"\n🎶 [{done_count}/{len(entries)}] {label}")
+        try:
+            pending_reports.append((label, process_track(
+                args,
+                item["entry"]["url"],
+                prefetched=(item["audio_path"], item["info"]),
+                ingest_telemetry=item["telemetry"],
+                defer_encode=True,
+            )))
+        except MemoryBudgetError as e:
+            end_run()
+            _report_budget_failure(label, e)
+            failed.append(label)
+        except Exception as e:
+            # One broken track should not abort the rest of the setlist
+            end_run()
+            print(f"❌ Failed to process '{label}': {e}")
+            failed.append(label)
+        _release_memory()
+
+    # Encodes of the last tracks may still be running on the encode pool
+    reports = []
+    for label, future in pending_reports:
+        try:
+            reports.append(future.result())
+        except Exception as e:
+            print(f"❌ Failed to finish '{label}': {e}")
+            failed.append(label)
+
+    print(f"\n📜 Playlist finished in {time.time() - start_total_time:.1f}s: "
+          f"{len(reports)}/{len(entries)} tracks processed")
+    for label in failed:
+        print(f"  ❌ {label}")
+    if not args.no_report and reports:
+        report_dir = args.report_dir or get_default_report_dir()
+        safe_name = clean_audio_title(playlist.get("title") or "playlist")
+        batch_path = os.path.join(report_dir, f"{time.strftime('%Y%m%d-%H%M%S')}_{safe_name}_batch.json")
+        try:
+            write_batch_report(reports, batch_path)
+            print(f"  📊 Batch Report: {batch_path}")
+        except OSError as e:
+            print(f"⚠️  Could not write batch report: {e}")
+
+
 def main():
     register_signal_handlers()
 
@@ -123,18 +889,66 @@ Examples:
     parser.add_argument(
         "--device", "-d",
         default="auto",
-        choices=["auto", "mps", "cuda", "cpu"],
-        help="Compute device ('auto' selects Apple Silicon MPS on Mac, CUDA on NVIDIA, or CPU)."
+        choices=["auto", AUTO_MEASURE, "mps", "cuda", "cpu"],
+        help="Compute device ('auto' selects Apple Silicon MPS on Mac, CUDA on NVIDIA, or CPU; "
+             f"'{AUTO_MEASURE}' times each available backend on the chosen model once and reuses the fastest)."
+    )
+    parser.add_argument(
+        "--recalibrate-device",
+        action="store_true",
+        help=f"Discard cached '{AUTO_MEASURE}' measurements and time the backends again."
     )
     parser.add_argument(
         "--output-dir", "-o",
         help="Custom base output directory (default: ~/Music/MakeItDrumless)."
     )
+    parser.add_argument(
+        "--rebuild-library",
+        action="store_true",
+        help="Rescan the output directory and rebuild its library index (originals, stems, drumless outputs), then exit."
+    )
+    parser.add_argument(
+        "--import-dir",
+        help="Bulk-import a folder tree of audio files (MP3, FLAC, M4A, ...) into the output directory's track folders in parallel, then exit."
+    )
+    parser.add_argument(
+        "--import-workers",
+        type=int,
+        default=None,
+        help="Worker processes for --import-dir (default: CPU count)."
+    )
     parser.add_argument(
         "--list-models", "-l",
         action="store_true",
         help="List all available model presets, descriptions, and download status."
     )
+    parser.add_argument(
+        "--benchmark-models",
+        nargs="?",
+        const="",
+        metavar="PRESETS",
+        help="Measure real-time factor, peak memory and load time of the downloaded presets (or a comma-separated "
+             "list) on this machine, store the results for --max-rtf / --deadline and exit."
+    )
+    parser.add_argument(
+        "--benchmark-seconds",
+        type=float,
+        default=BENCHMARK_SECONDS,
+        help=f"Audio length each preset separates during --benchmark-models. Default: {BENCHMARK_SECONDS:g}."
+    )
+    parser.add_argument(
+        "--max-rtf",
+        type=float,
+        help="Use the highest-SDR benchmarked preset whose real-time factor (compute seconds per audio second, "
+             "times shift passes) is at most this, instead of --model."
+    )
+    parser.add_argument(
+        "--deadline",
+        type=float,
+        metavar="SECONDS",
+        help="Use the highest-SDR benchmarked preset predicted to separate the track (model load included) "
+             "within SECONDS, instead of --model."
+    )
     parser.add_argument(
         "--download-model",
         metavar="PRESET",
@@ -158,12 +972,66 @@ Examples:
         type=int,
         help="Chunk overlap factor (e.g. 2, 4, 8). Default is defined in model config."
     )
+    parser.add_argument(
+        "--window-shape",
+        choices=["linear", "hann", "tukey"],
+        help="Overlap-add window shape. 'tukey' crossfades across the whole overlap region so lower --overlap values blend smoothly. Default: linear (MSST)."
+    )
+    parser.add_argument(
+        "--fade-size",
+        type=int,
+        help="Window fade length in samples (default depends on --window-shape)."
+    )
     parser.add_argument(
         "--shifts",
         type=int,
         default=0,
         help="Number of random time-shift passes (e.g. 1 or 2 for smoother spectrograms). Default: 0."
     )
+    parser.add_argument(
+        "--tta",
+        type=parse_tta_flips,
+        default=[],
+        metavar="TRANSFORMS",
+        help="Test-time augmentation averaged into the stems: 'channels' (stereo swap), 'polarity' (inverted input) "
+             "or 'channels,polarity'. Runs in the same model batch as the --shifts passes."
+    )
+    parser.add_argument(
+        "--sequential-shifts",
+        action="store_true",
+        help="Run --shifts as MSST's separate whole-track passes instead of batching them with the chunks."
+    )
+    parser.add_argument(
+        "--silence-skip",
+        action="store_true",
+        help="Skip model inference on silent chunks; the mix is passed through to the backing stem instead of being separated."
+    )
+    parser.add_argument(
+        "--silence-threshold",
+        type=float,
+        default=None,
+        metavar="DBFS",
+        help=f"RMS level (dBFS) below which --silence-skip treats a chunk as silent (implies --silence-skip). Default: {DEFAULT_SILENCE_THRESHOLD_DB:g}."
+    )
+    parser.add_argument(
+        "--no-fingerprint",
+        action="store_true",
+        help="Skip audio fingerprinting, which reuses the stems of the same recording already processed under another title or source."
+    )
+    parser.add_argument(
+        "--match-threshold",
+        type=float,
+        default=MATCH_THRESHOLD,
+        help=f"Minimum chroma similarity (0-1) for an input to count as an already processed recording. Default: {MATCH_THRESHOLD}."
+    )
+    parser.add_argument(
+        "--prune-heads",
+        nargs="?",
+        const="",
+        metavar="STEMS",
+        help="For BS-RoFormer / BS-Conformer / Mel-Band RoFormer presets, run only the drum output head (plus any "
+             "comma-separated STEMS, and stems the --mixes rules name) and derive the rest as 'other' = mix - kept stems."
+    )
     parser.add_argument(
         "--ensemble",
         help="Comma-separated list of models to ensemble (e.g. 'scnet_large_starrytong,bs_roformer')."
@@ -172,6 +1040,113 @@ Examples:
         "--ensemble-weights",
         help="Comma-separated weights for ensemble models (e.g. '0.6,0.4'). Defaults to equal weighting."
     )
+    parser.add_argument(
+        "--ensemble-workers",
+        type=int,
+        default=1,
+        help="Ensemble members separated concurrently on CPU, each in its own process pinned to a share of the "
+             "cores. 0 picks as many as the cores and memory cap allow. Default: 1 (one after another)."
+    )
+    parser.add_argument(
+        "--ensemble-memory-mb",
+        type=float,
+        default=0,
+        help=f"Memory cap (MB) for concurrent ensemble members together. Default: --max-memory, "
+             f"else {int(DEFAULT_MEMORY_FRACTION * 100)}%% of available RAM."
+    )
+    parser.add_argument(
+        "--stft-cache-mb",
+        type=int,
+        default=512,
+        help="Host memory budget (MB) for sharing STFT front-ends across ensemble models. 0 disables. Default: 512."
+    )
+    parser.add_argument(
+        "--mixes",
+        default="drumless",
+        help="Comma-separated mixes rendered from one load of the stems: presets "
+             f"({', '.join(MIX_PRESETS)}) or custom 'name:rule=gain;rule=gain' with gains in dB or 'mute' "
+             "(rules: drums, bass, vocals, crowd, '*' or any stem name). Default: drumless."
+    )
+    parser.add_argument(
+        "--codec",
+        default="mp3",
+        choices=list(OUTPUT_CODECS),
+        help="Codec of the drumless track: mp3, opus, aac (.m4a) or flac. Default: mp3."
+    )
+    parser.add_argument(
+        "--bitrate",
+        help="Constant bitrate of the drumless track (default: 320k for mp3, 160k for opus, 256k for aac)."
+    )
+    parser.add_argument(
+        "--vbr-quality",
+        help="Encode with variable bitrate instead: LAME quality 0-9 for mp3 (0 best), 0.1-2 for aac; for opus, VBR at --bitrate."
+    )
+    parser.add_argument(
+        "--loudness-target",
+        type=float,
+        default=None,
+        metavar="LUFS",
+        help="Normalize every mix to this integrated loudness (EBU R128, e.g. -14 for streaming, -23 for broadcast) "
+             "instead of peak-normalizing to -0.1 dBFS. Measured during the mixdown and applied as a gain at encode time."
+    )
+    parser.add_argument(
+        "--true-peak-ceiling",
+        type=float,
+        default=-1.0,
+        metavar="DBTP",
+        help="Maximum true peak after --loudness-target normalization; the gain is reduced to stay below it (default: -1.0)."
+    )
+    parser.add_argument(
+        "--stem-format",
+        default="wav",
+        choices=list(STEM_FORMATS),
+        help="Stem storage: 'wav' (16-bit PCM), 'flac' (lossless, about half the size), "
+             "'f32' or 'f16' (raw float arrays, memory-mapped for fast re-mixing). Default: wav."
+    )
+    parser.add_argument(
+        "--stem-write-workers",
+        type=int,
+        default=None,
+        help="Threads encoding and writing stems in the background while separation continues (default: min(4, CPU count))."
+    )
+    parser.add_argument(
+        "--max-memory",
+        type=parse_memory_size,
+        metavar="SIZE",
+        help="Host memory budget for a separation (e.g. 6G, 1500M). The peak is estimated before the model loads; "
+             "batch size, in-RAM accumulation and shifts are reduced to fit, or the run stops with a breakdown."
+    )
+    parser.add_argument(
+        "--checkpoint-interval",
+        type=float,
+        default=CHECKPOINT_INTERVAL,
+        metavar="SECONDS",
+        help=f"Save separation progress to the stem folder every SECONDS so a cancelled run resumes where it stopped "
+             f"(default: {CHECKPOINT_INTERVAL:g}; 0 disables)."
+    )
+    parser.add_argument(
+        "--direct-ingest",
+        action="store_true",
+        help="Stream downloads through a single ffmpeg process straight to PCM and keep the compressed original instead of a WAV (also skips WAV transcoding of local compressed files)."
+    )
+    parser.add_argument(
+        "--download-workers",
+        type=int,
+        default=3,
+        help="Parallel downloads when the input is a playlist or channel URL (default: 3)."
+    )
+    parser.add_argument(
+        "--rate-limit",
+        type=float,
+        default=1.0,
+        help="Minimum seconds between requests to the same host during playlist downloads (default: 1.0)."
+    )
+    parser.add_argument(
+        "--download-retries",
+        type=int,
+        default=3,
+        help="Retries (with exponential backoff) per playlist entry before giving up (default: 3)."
+    )
     parser.add_argument(
         "--force", "-f",
         action="store_true",
@@ -188,6 +1163,17 @@ Examples:
         default="mel_band_roformer_crowd",
         help="Model preset for audience removal preprocessing (default: 'mel_band_roformer_crowd')."
     )
+    parser.add_argument(
+        "--fused-audience",
+        action="store_true",
+        help="With --remove-audience, chain the audience model and the drum model per chunk in one pass "
+             "(one decode, one overlap-add, no intermediate decrowded file)."
+    )
+    parser.add_argument(
+        "--keep-decrowded",
+        action="store_true",
+        help="With --fused-audience, also write the decrowded intermediate as '<title> (Decrowded).wav'."
+    )
     parser.add_argument(
         "--upload-ytmusic", "-u",
         action="store_true",
@@ -198,23 +1184,47 @@ Examples:
         action="store_true",
         help="Run interactive YouTube Music authentication setup wizard and exit."
     )
+    parser.add_argument(
+        "--report-dir",
+        help="Directory for machine-readable JSON run reports (default: ~/.cache/makeitdrumless/reports)."
+    )
+    parser.add_argument(
+        "--no-report",
+        action="store_true",
+        help="Do not write a JSON run report for this track."
+    )
     parser.add_argument(
         "--ytmusic-auth",
         help="Custom path to YouTube Music authentication JSON file (default: ~/.config/makeitdrumless/ytmusic_auth.json)."
     )
 
     args = parser.parse_args()
+    try:
+        parse_mix_specs(args.mixes)
+    except ValueError as e:
+        parser.error(str(e))
 
     # 1. Handle --setup-ytmusic
     if args.setup_ytmusic:
         setup_ytmusic_auth(output_path=args.ytmusic_auth)
         return
 
-    # 2. Handle --list-models
+    # 2. Handle --list-models / --rebuild-library / --import-dir
     if args.list_models:
         list_available_models()
         return
 
+    if args.rebuild_library:
+        get_library(args.output_dir or get_default_output_base()).rebuild()
+        return
+
+    if args.import_dir:
+        setup_ffmpeg_binary()
+        result = import_directory(args.import_dir, output_folder=args.output_dir, workers=args.import_workers)
+        if result["failed"]:
+            sys.exit(1)
+        return
+
     # 3. Handle --download-model
     if args.download_model:
         model_name = args.download_model.strip()
@@ -229,8 +1239,21 @@ Examples:
             sys.exit(1)
         return
 
+    if args.benchmark_models is not None:
+        presets = [p.strip() for p in args.benchmark_models.split(",") if p.strip()]
+        device_name = "auto" if args.device == AUTO_MEASURE else args.device
+        results = benchmark_models(presets or None, device_name=device_name, seconds=args.benchmark_seconds)
+        if not results:
+            sys.exit(1)
+        print("\n" + format_benchmark_table(results))
+        return
+
     # 4. Setup FFmpeg
     setup_ffmpeg_binary()
+    if args.stem_write_workers:
+        set_stem_write_workers(args.stem_write_workers)
+    if args.recalibrate_device:
+        clear_calibrations()
 
     # 5. Validate input source
     if not args.input:
@@ -238,184 +1261,19 @@ Examples:
         print("\n❌ Error: Please provide a YouTube URL or local audio file path.\n")
         sys.exit(1)
 
-    start_total_time = time.time()
-
-    # 6. Determine Base Output Directory (~/Music/MakeItDrumless by default)
-    base_output_dir = os.path.abspath(args.output_dir or get_default_output_base())
-    os.makedirs(base_output_dir, exist_ok=True)
-
-    # 7. Acquire Audio Input (Download or convert)
-    initial_audio_wav, info = get_audio_input(args.input, output_folder=base_output_dir)
-
-    # Extract clean track title
-    out_title = None
-    out_artist = None
-    if info:
-        out_title = info.get("track") or info.get("title")
-        out_artist = info.get("artist") or info.get("uploader") or info.get("channel")
-        if not out_artist and out_title and ' - ' in out_title:
-            out_artist, out_title = parse_artist_title(out_title)
-
-    if out_title:
-        safe_title = clean_audio_title(out_title)
-    else:
-        safe_title = clean_audio_title(initial_audio_wav)
-
-    # Create dedicated song output directory: ~/Music/MakeItDrumless/<Safe Title>/
-    track_dir = os.path.join(base_output_dir, safe_title)
-    os.makedirs(track_dir, exist_ok=True)
-
-    # Move/place original WAV inside the song's folder
-    final_original_wav = os.path.join(track_dir, f"{safe_title} (Original).wav")
-    if os.path.abspath(initial_audio_wav) != os.path.abspath(final_original_wav):
-        if not os.path.exists(final_original_wav) or args.force:
-            shutil.copy2(initial_audio_wav, final_original_wav)
-            if os.path.dirname(os.path.abspath(initial_audio_wav)) == base_output_dir:
-                try:
-                    os.remove(initial_audio_wav)
-                except Exception:
-                    pass
-
-    # 8. Optional Audience / Crowd Removal Preprocessing
-    separation_input_wav = final_original_wav
-    isolated_crowd_stem = None
-    decrowded_wav = None
-
-    if args.remove_audience:
-        norm_aud_preset = normalize_preset_name(args.audience_model)
-        aud_tag = "".join(c if c.isalnum() or c in ("-", "_") else "_" for c in norm_aud_preset)
-        crowd_stems_dir = os.path.join(track_dir, f"stems_audience_{aud_tag}")
-        decrowded_wav = os.path.join(track_dir, f"{safe_title} (Decrowded).wav")
-
-        print(f"\n👥 Performing Audience / Crowd Removal Preprocessing using '{norm_aud_preset}'...")
-        audience_stems = separate_stems_msst(
-            input_audio_path=final_original_wav,
-            output_folder=crowd_stems_dir,
-            model_preset=norm_aud_preset,
-            chunk_size=args.chunk_size,
-            overlap=args.overlap,
-            shifts=args.shifts,
-            device_name=args.device,
-            force=args.force,
-        )
-
-        # Stems returned: 'crowd' (applause/cheering) and 'other' (cleaned music mix)
-        cleaned_music_path = audience_stems.get("other") or audience_stems.get("dry")
-        if not cleaned_music_path and "crowd" in audience_stems:
-            # Fallback if other stem name used
-            for k, p in audience_stems.items():
-                if k != "crowd" and os.path.exists(p):
-                    cleaned_music_path = p
-                    break
-
-        if "crowd" in audience_stems and os.path.exists(audience_stems["crowd"]):
-            isolated_crowd_stem = audience_stems["crowd"]
-            print(f"  + Isolated crowd ambience: {isolated_crowd_stem}")
-
-        if cleaned_music_path and os.path.exists(cleaned_music_path):
-            if os.path.abspath(cleaned_music_path) != os.path.abspath(decrowded_wav):
-                if not os.path.exists(decrowded_wav) or args.force:
-                    shutil.copy2(cleaned_music_path, decrowded_wav)
-            separation_input_wav = decrowded_wav
-            print(f"  + Decrowded music input: {decrowded_wav}")
-        else:
-            print("⚠️  Could not find decrowded music stem. Falling back to original audio for drum separation.")
-
-    # 9. Run separation (Ensemble or Single Model)
-    if args.ensemble:
-        ensemble_model_names = [normalize_preset_name(m.strip()) for m in args.ensemble.split(",") if m.strip()]
-        if len(ensemble_model_names) < 2:
-            print("⚠️  --ensemble requires at least 2 comma-separated models. Running in single model mode.")
-            ensemble_model_names = [ensemble_model_names[0]]
-
-        ensemble_weights = None
-        if args.ensemble_weights:
-            try:
-                ensemble_weights = [float(w.strip()) for w in args.ensemble_weights.split(",") if w.strip()]
-            except ValueError:
-                print("⚠️  Invalid --ensemble-weights. Using equal weights.")
-                ensemble_weights = None
-
-        print(f"\n🔮 Multi-Model Ensemble Separation across: {', '.join(ensemble_model_names)}")
-        stems_list = []
-
-        for m_name in ensemble_model_names:
-            m_tag = "".join(c if c.isalnum() or c in ("-", "_") else "_" for c in m_name)
-            m_stems_dir = os.path.join(track_dir, f"stems_{m_tag}")
-
-            m_stems = separate_stems_msst(
-                input_audio_path=separation_input_wav,
-                output_folder=m_stems_dir,
-                model_preset=m_name,
-                chunk_size=args.chunk_size,
-                overlap=args.overlap,
-                shifts=args.shifts,
-                device_name=args.device,
-                force=args.force,
-            )
-            stems_list.append(m_stems)
-
-        # Blend ensemble
-        ensemble_tag = "_".join("".join(c if c.isalnum() or c in ("-", "_") else "_" for c in m) for m in ensemble_model_names)
-        stems_dir = os.path.join(track_dir, f"stems_ensemble_{ensemble_tag}")
-        stems = ensemble_stems(stems_list, weights=ensemble_weights, output_dir=stems_dir, force=args.force)
-        model_display_name = f"Ensemble ({'+'.join(ensemble_model_names)})"
+    if is_playlist_url(args.input):
+        _process_playlist(args)
     else:
-        # Single model path
-        norm_single_preset = normalize_preset_name(args.model)
-        model_tag = norm_single_preset if not args.checkpoint else os.path.splitext(os.path.basename(args.checkpoint))[0]
-        clean_model_tag = "".join(c if c.isalnum() or c in ("-", "_") else "_" for c in model_tag)
-        stems_dir = os.path.join(track_dir, f"stems_{clean_model_tag}")
-
-        stems = separate_stems_msst(
-            input_audio_path=separation_input_wav,
-            output_folder=stems_dir,
-            model_preset=norm_single_preset,
-            config_path=args.config,
-            checkpoint_path=args.checkpoint,
-            chunk_size=args.chunk_size,
-            overlap=args.overlap,
-            shifts=args.shifts,
-            device_name=args.device,
-            force=args.force,
-        )
-        model_display_name = norm_single_preset
-
-    # If audience was separated in preprocessing, re-include the crowd stem in final drumless mix
-    if isolated_crowd_stem and os.path.exists(isolated_crowd_stem):
-        stems["crowd"] = isolated_crowd_stem
-        print(f"👥 Retaining crowd ambiance in drumless backing mix ({isolated_crowd_stem})")
-
-    # 10. Mix non-drum stems into drumless MP3
-    out_mp3_path = os.path.join(track_dir, f"{safe_title} (Drumless).mp3")
-
-    mix_stems_without_drums(stems, out_mp3_path)
-    set_mp3_metadata(out_mp3_path, info, model_name=model_display_name)
-
-    # 11. Upload to YouTube Music if requested
-    if args.upload_ytmusic:
-        upload_drumless_track(out_mp3_path, auth_file=args.ytmusic_auth)
-
-    total_elapsed = time.time() - start_total_time
-    print(f"\n🎉 All done in {total_elapsed:.1f}s!")
-    print(f"📁 Track Folder: {track_dir}")
-    print(f"  🎵 Drumless MP3:   {out_mp3_path}")
-    print(f"  🎙️ Original Audio:  {final_original_wav}")
-    if decrowded_wav and os.path.exists(decrowded_wav):
-        print(f"  👥 Decrowded Audio: {decrowded_wav}")
-    print(f"  🎛️ Separated Stems: {stems_dir}\n")
-
-    # Final cleanup to ensure no memory or background handles remain
-    import gc
-    gc.collect()
-    try:
-        import torch
-        if hasattr(torch, "mps") and torch.backends.mps.is_available():
-            torch.mps.synchronize()
-            torch.mps.empty_cache()
-    except Exception:
-        pass
-
+        try:
+            process_track(args, args.input)
+        except MemoryBudgetError as e:
+            end_run()
+            _report_budget_failure(args.input, e)
+            wait_for_pending_writes()
+            sys.exit(1)
+    # Stems are written in the background; let the last ones land before exiting
+    wait_for_pending_writes()
+    _release_memory()
 
 if __name__ == "__main__":
     try:
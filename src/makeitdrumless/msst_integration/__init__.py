@@ -8,7 +8,7 @@ from .models import (
     get_model_cache_dir,
     is_model_downloaded,
 )
-from .inference import separate_stems_msst
+from .inference import separate_stems_msst, separate_chained_msst
 
 __all__ = [
     "get_optimal_device",
@@ -19,4 +19,5 @@ __all__ = [
     "get_model_cache_dir",
     "is_model_downloaded",
     "separate_stems_msst",
+    "separate_chained_msst",
 ]
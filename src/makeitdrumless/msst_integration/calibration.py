@@ -0,0 +1,248 @@
+import os
+import sys
+import json
+import time
+import hashlib
+import platform
+import threading
+from typing import Dict, Any, List, Optional
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    import torch
+except ImportError:
+    torch = None
+
+from makeitdrumless.msst_integration.device import is_mlx_supported, get_optimal_device
+from makeitdrumless.msst_integration.mps_patch import apply_all_patches
+from makeitdrumless.msst_integration.models import get_base_cache_dir
+
+# --device value that picks the backend by measurement instead of the fixed priority order
+AUTO_MEASURE = "auto-measure"
+
+# Measured winners per (preset, backend set, host), kept next to the downloaded checkpoints
+CALIBRATION_FILENAME = "device_calibration.json"
+
+# Length of the calibration input, in chunks of the preset's configured chunk size
+CALIBRATION_CHUNKS = 2
+
+_lock = threading.Lock()
+
+
+def available_backends() -> List[str]:
+    """Returns the backends usable on this machine, in the fixed 'auto' priority order."""
+    backends = []
+    if is_mlx_supported():
+        backends.append("mlx")
+    if torch is not None:
+        if torch.backends.mps.is_available():
+            backends.append("mps")
+        if torch.cuda.is_available():
+            backends.append("cuda")
+        backends.append("cpu")
+    return backends
+
+
+def host_fingerprint() -> str:
+    """Short hash of the hardware and framework versions a calibration is valid for."""
+    parts = [platform.system(), platform.machine(), platform.processor(), str(os.cpu_count())]
+    if torch is not None:
+        parts.append(f"torch {torch.__version__}")
+        if torch.cuda.is_available():
+            parts.append(torch.cuda.get_device_name(0))
+    if is_mlx_supported():
+        try:
+            import mlx.core as mx
+            parts.append(f"mlx {getattr(mx, '__version__', '')}")
+        except ImportError:
+            pass
+    return hashlib.sha1("|".join(parts).encode("utf-8")).hexdigest()[:16]
+
+
+def clear_calibrations():
+    """Forgets every cached calibration, so the next auto-measure run measures again."""
+    try:
+        os.remove(_calibration_path())
+    except OSError:
+        pass
+
+
+def calibration_key(preset: str, backends: List[str]) -> str:
+    return f"{preset}|{'+'.join(backends)}|{host_fingerprint()}"
+
+
+def _calibration_path() -> str:
+    return os.path.join(str(get_base_cache_dir()), CALIBRATION_FILENAME)
+
+
+def _load_calibrations() -> Dict[str, Any]:
+    try:
+        with open(_calibration_path(), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_calibration(key: str, entry: Dict[str, Any]):
+    path = _calibration_path()
+    with _lock:
+        calibrations = _load_calibrations()
+        calibrations[key] = entry
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(calibrations, f, indent=2)
+        os.replace(tmp_path, path)
+
+
+def _chunk_size(config) -> int:
+    inference = getattr(config, "inference", None)
+    if inference is not None and "chunk_size" in inference:
+        return int(inference.chunk_size)
+    audio = getattr(config, "audio", None)
+    return int(getattr(audio, "chunk_size", 132300) if audio is not None else 132300)
+
+
+def _time_torch_backend(backend: str, model_type, config_path: str, checkpoint_path: str, threads: int) -> float:
+    from makeitdrumless.msst_integration.inference import _load_torch_model, _release_device_memory
+    import utils.model_utils as mu
+
+    device = torch.device(backend)
+    previous_threads = torch.get_num_threads()
+    if backend == "cpu":
+        torch.set_num_threads(threads)
+    try:
+        model, config, resolved_type = _load_torch_model(
+            model_type, config_path, checkpoint_path, device, silence_threshold_db=None
+        )
+        sample_rate = getattr(config.audio, "sample_rate", 44100)
+        length = _chunk_size(config) * CALIBRATION_CHUNKS
+        mix = (np.random.default_rng(0).standard_normal((2, length)) * 0.1).astype(np.float32)
+        with torch.inference_mode():
+            # The first pass pays for kernel compilation / allocator warm-up and is not counted
+            mu.demix(config, model, mix[:, : length // 2], device, model_type=resolved_type, pbar=False)
+            start = time.perf_counter()
+            mu.demix(config, model, mix, device, model_type=resolved_type, pbar=False)
+            elapsed = time.perf_counter() - start
+        del model
+        _release_device_memory(backend)
+        return elapsed / (length / sample_rate)
+    finally:
+        torch.set_num_threads(previous_threads)
+
+
+def _time_mlx_backend(model_type, config_path: str, checkpoint_path: str) -> float:
+    from utils.mlx_engine import can_run_on_mlx, load_mlx_model, bigshifts_wrapper_mlx
+
+    can_run, reason = can_run_on_mlx(model_type, config_path, checkpoint_path)
+    if not can_run:
+        raise RuntimeError(reason)
+    mlx_model, mlx_config, resolved_type = load_mlx_model(model_type, config_path, checkpoint_path)
+    audio_cfg = mlx_config.get("audio", {}) if isinstance(mlx_config, dict) else {}
+    sample_rate = audio_cfg.get("sample_rate", 44100)
+    length = int(audio_cfg.get("chunk_size", 132300)) * CALIBRATION_CHUNKS
+    mix = (np.random.default_rng(0).standard_normal((2, length)) * 0.1).astype(np.float32)
+    run = lambda audio: bigshifts_wrapper_mlx(
+        config=mlx_config, model=mlx_model, mix=audio, model_type=resolved_type, pbar=False, bigshifts=1
+    )
+    run(mix[:, : length // 2])
+    start = time.perf_counter()
+    run(mix)
+    elapsed = time.perf_counter() - start
+    del mlx_model
+    return elapsed / (length / sample_rate)
+
+
+def calibrate_device(
+    preset: str,
+    model_type: Optional[str],
+    config_path: str,
+    checkpoint_path: str,
+    backends: Optional[List[str]] = None,
+    force: bool = False,
+) -> Dict[str, Any]:
+    """
+    Times a short calibration input on every available backend for a preset and caches the fastest.
+
+    The result is stored in CALIBRATION_FILENAME under get_base_cache_dir(), keyed by preset, backend
+    set and host_fingerprint(), so later runs pick the winner without measuring again. CPU is measured
+    with every core, since that is what can beat an accelerator hampered by fallback ops.
+
+    Args:
+        preset: Model preset (or custom checkpoint name) the measurement is for.
+        model_type, config_path, checkpoint_path: The resolved model files.
+        backends: Candidates (default: available_backends()).
+        force: Measure again even if a calibration is cached.
+
+    Returns:
+        {'device': backend, 'threads': CPU threads (cpu only), 'rtf': {backend: seconds per audio second}}.
+    """
+    backends = backends or available_backends()
+    key = calibration_key(preset, backends)
+    if not force:
+        cached = _load_calibrations().get(key)
+        if cached:
+            return cached
+
+    local_msst_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..", "msst"))
+    if os.path.exists(local_msst_dir) and local_msst_dir not in sys.path:
+        sys.path.insert(0, local_msst_dir)
+    apply_all_patches()
+
+    threads = os.cpu_count() or 1
+    rtf: Dict[str, float] = {}
+    print(f"📏 Calibrating backends for '{preset}': {', '.join(backends)}...")
+    for backend in backends:
+        try:
+            if backend == "mlx":
+                rtf[backend] = _time_mlx_backend(model_type, config_path, checkpoint_path)
+            else:
+                rtf[backend] = _time_torch_backend(backend, model_type, config_path, checkpoint_path, threads)
+            print(f"  {backend:<5} {rtf[backend]:.3f}s per second of audio")
+        except Exception as e:
+            print(f"  {backend:<5} unusable for this preset ({e})")
+
+    if not rtf:
+        raise RuntimeError(f"No backend could run '{preset}' during calibration")
+    best = min(rtf, key=rtf.get)
+    entry = {
+        "device": best,
+        "threads": threads if best == "cpu" else None,
+        "rtf": {k: round(v, 4) for k, v in rtf.items()},
+        "measured_at": time.time(),
+    }
+    _save_calibration(key, entry)
+    print(f"🏁 Fastest backend for '{preset}': {best}")
+    return entry
+
+
+def measured_device(
+    preset: str,
+    model_type: Optional[str],
+    config_path: str,
+    checkpoint_path: str,
+    allow_mlx: bool = True,
+):
+    """
+    Resolves --device auto-measure: the calibrated winner for this preset, measuring it on first use.
+
+    Returns:
+        'mlx' or a torch.device, like get_optimal_device(). A CPU winner also restores the thread
+        count it was measured with.
+    """
+    backends = [b for b in available_backends() if allow_mlx or b != "mlx"]
+    if not backends:
+        return get_optimal_device("auto")
+    if len(backends) == 1:
+        choice = {"device": backends[0], "threads": None}
+    else:
+        choice = calibrate_device(preset, model_type, config_path, checkpoint_path, backends=backends)
+    if choice["device"] == "mlx":
+        return "mlx"
+    if choice["device"] == "cpu" and choice.get("threads"):
+        torch.set_num_threads(int(choice["threads"]))
+    return torch.device(choice["device"])
@@ -0,0 +1,103 @@
+import copy
+from typing import List, Tuple, Any
+
+try:
+    import torch
+    import torch.nn as nn
+except ImportError:
+    torch = None
+    nn = None
+
+# Stem name under which a chain can also emit the first model's music output (e.g. the decrowded mix)
+INTERMEDIATE_STEM = "decrowded"
+
+# Names a two-stem preprocessing model uses for the music it keeps
+_MUSIC_STEM_NAMES = ("other", "dry", "music")
+
+
+def _stem_layout(config) -> Tuple[List[str], bool]:
+    """Returns (instruments, target_only) for an MSST config."""
+    target = getattr(config.training, "target_instrument", None)
+    if target:
+        return [target], True
+    return list(config.training.instruments), False
+
+
+def _as_stems(out, x):
+    """Single-stem models return (batch, channels, samples); give every output a stem axis."""
+    return out.unsqueeze(1) if out.dim() == x.dim() else out
+
+
+class ChainedSeparator(nn.Module if nn is not None else object):
+    """
+    Runs two separation models back to back on each chunk, in memory.
+
+    The first model (e.g. audience removal) splits the chunk into its side stems (e.g. 'crowd') and the
+    music it keeps; that music goes straight into the second model (e.g. drum separation). The
+    combined output has one stem axis holding the first model's side stems, then the second model's
+    stems, so MSST's demix loop overlap-adds everything in a single pass over the decoded mix.
+    """
+
+    def __init__(self, first, first_config, second, second_config, keep_intermediate: bool = False):
+        super().__init__()
+        self.first = first
+        self.second = second
+        self.keep_intermediate = keep_intermediate
+
+        first_stems, self.first_target_only = _stem_layout(first_config)
+        if self.first_target_only:
+            # Target-only model (e.g. 'crowd'): the music is the chunk minus the target
+            self.music_index = None
+            self.side_indices = [0]
+        else:
+            music = next((s for s in first_stems if s in _MUSIC_STEM_NAMES), None)
+            if music is None:
+                music = next((s for s in first_stems if s != "crowd"), first_stems[-1])
+            self.music_index = first_stems.index(music)
+            self.side_indices = [i for i in range(len(first_stems)) if i != self.music_index]
+        self.side_stems = [first_stems[i] for i in self.side_indices]
+
+        second_stems, self.second_target_only = _stem_layout(second_config)
+        # A target-only second model also yields 'other' = music - target, as separate_stems_msst does
+        self.second_stems = second_stems + (["other"] if self.second_target_only and "other" not in second_stems else [])
+        if set(self.side_stems) & set(self.second_stems):
+            raise ValueError(
+                f"Chained models produce overlapping stem names: {sorted(set(self.side_stems) & set(self.second_stems))}"
+            )
+
+    @property
+    def instruments(self) -> List[str]:
+        """Stem names along the output's stem axis, in order."""
+        return self.side_stems + self.second_stems + ([INTERMEDIATE_STEM] if self.keep_intermediate else [])
+
+    def forward(self, x):
+        first = _as_stems(self.first(x), x)
+        if self.music_index is None:
+            music = x - first[:, 0]
+        else:
+            music = first[:, self.music_index]
+        side = first[:, self.side_indices]
+        del first
+
+        second = _as_stems(self.second(music.to(x.dtype)), x)
+        if self.second_target_only and second.shape[1] < len(self.second_stems):
+            second = torch.cat([second, (music - second[:, 0]).unsqueeze(1)], dim=1)
+
+        parts = [side.to(second.dtype), second]
+        if self.keep_intermediate:
+            parts.append(music.unsqueeze(1).to(second.dtype))
+        return torch.cat(parts, dim=1)
+
+
+def chain_config(second_config, instruments: List[str]) -> Any:
+    """
+    Returns a copy of the second model's config describing the chain's output stems.
+
+    Chunking, overlap, windowing and batching follow the second model's settings, so demix() sees
+    the chain as one model with the combined instrument list.
+    """
+    config = copy.deepcopy(second_config)
+    config.training.instruments = list(instruments)
+    if getattr(config.training, "target_instrument", None):
+        config.training.target_instrument = None
+    return config
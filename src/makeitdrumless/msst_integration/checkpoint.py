@@ -0,0 +1,153 @@
+import os
+import json
+import time
+from typing import Dict, Any, Optional
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Seconds of demix work between checkpoints (a checkpoint writes only the audio finalized since the last one)
+CHECKPOINT_INTERVAL = 30.0
+
+# Sidecar files kept in the stem folder while a separation is in progress
+_STATE_FILE = ".demix_checkpoint.json"
+_RESULT_FILE = ".demix_checkpoint.result.npy"
+_COUNTER_FILE = ".demix_checkpoint.counter.npy"
+_TAIL_FILE = ".demix_checkpoint.tail.npz"
+_FILES = (_STATE_FILE, _RESULT_FILE, _COUNTER_FILE, _TAIL_FILE)
+
+
+def mix_fingerprint(mix, chunk_size: int, step: int, instruments, extra: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Identifies one demix call: input length and a sparse checksum, chunking and output stems.
+
+    A checkpoint is only resumed when the fingerprint matches exactly, so a different model, chunk
+    setting or input (including a bigshifts roll of the same mix) starts over. Callers add every
+    other setting that changes chunk outputs (window, TTA, silence gate, pruned heads) to extra.
+    """
+    sample = mix[..., ::4099]
+    checksum = float(sample.double().sum()) if hasattr(sample, "double") else float(np.asarray(sample, dtype=np.float64).sum())
+    fingerprint = {
+        "length": int(mix.shape[-1]),
+        "channels": int(mix.shape[0]),
+        "checksum": round(checksum, 4),
+        "chunk_size": int(chunk_size),
+        "step": int(step),
+        "instruments": list(instruments),
+    }
+    fingerprint.update(extra or {})
+    return fingerprint
+
+
+def clear_demix_checkpoint(directory: str):
+    """Removes a stem folder's demix checkpoint files."""
+    for name in _FILES:
+        path = os.path.join(directory, name)
+        for candidate in (path, f"{path}.tmp"):
+            if os.path.exists(candidate):
+                try:
+                    os.remove(candidate)
+                except OSError:
+                    pass
+
+
+class DemixCheckpoint:
+    """
+    Periodic on-disk snapshot of an overlap-add demix, so an interrupted separation resumes mid-track.
+
+    Chunks are processed in order, so once the next chunk starts at sample i nothing before i changes
+    again. Each save appends that finalized region to a memory-mapped result file, stores the
+    still-accumulating region after i (one chunk long) separately, and then atomically replaces a
+    small JSON state with the next chunk position. A process killed at any point leaves the previous
+    state valid.
+    """
+
+    def __init__(self, directory: str, fingerprint: Dict[str, Any], interval: float = CHECKPOINT_INTERVAL):
+        self.directory = directory
+        self.fingerprint = fingerprint
+        self.interval = interval
+        self._final_upto = 0
+        self._last_save = time.monotonic()
+        self._result_map = None
+        self._counter_map = None
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def restore(self, result, counter) -> int:
+        """
+        Loads a matching checkpoint into the (instruments, channels, samples) result tensor and the
+        counter (same shape, or a single (samples,) row).
+
+        Returns:
+            The sample position of the next chunk to process (0 when there is nothing to resume).
+        """
+        try:
+            with open(self._path(_STATE_FILE), encoding="utf-8") as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return 0
+        if state.get("fingerprint") != self.fingerprint:
+            clear_demix_checkpoint(self.directory)
+            return 0
+        try:
+            final_upto = int(state["final_upto"])
+            result_map = np.load(self._path(_RESULT_FILE), mmap_mode="r+")
+            counter_map = np.load(self._path(_COUNTER_FILE), mmap_mode="r+")
+            tail = np.load(self._path(_TAIL_FILE))
+            result_np = result.numpy()
+            counter_np = counter.numpy()
+            result_np[..., :final_upto] = result_map[..., :final_upto]
+            counter_np[..., :final_upto] = counter_map[:final_upto]
+            tail_len = tail["result"].shape[-1]
+            result_np[..., final_upto:final_upto + tail_len] = tail["result"]
+            counter_np[..., final_upto:final_upto + tail_len] = tail["counter"]
+        except (OSError, ValueError, KeyError):
+            clear_demix_checkpoint(self.directory)
+            return 0
+        self._result_map = result_map
+        self._counter_map = counter_map
+        self._final_upto = final_upto
+        return int(state["next_index"])
+
+    def maybe_save(self, result, counter, next_index: int):
+        """Saves if CHECKPOINT_INTERVAL seconds of work have passed since the last save."""
+        if time.monotonic() - self._last_save >= self.interval:
+            self.save(result, counter, next_index)
+
+    def save(self, result, counter, next_index: int):
+        """Snapshots everything accumulated for chunks before next_index."""
+        total = result.shape[-1]
+        final_upto = min(next_index, total)
+        result_np = result.numpy()
+        counter_row = counter.numpy().reshape(-1, total)[0]
+        if self._result_map is None:
+            os.makedirs(self.directory, exist_ok=True)
+            self._result_map = np.lib.format.open_memmap(
+                self._path(_RESULT_FILE), mode="w+", dtype=np.float32, shape=tuple(result.shape)
+            )
+            # The counter is identical for every stem and channel; one row is enough
+            self._counter_map = np.lib.format.open_memmap(
+                self._path(_COUNTER_FILE), mode="w+", dtype=np.float32, shape=(total,)
+            )
+        start = self._final_upto
+        if final_upto > start:
+            self._result_map[..., start:final_upto] = result_np[..., start:final_upto]
+            self._counter_map[start:final_upto] = counter_row[start:final_upto]
+            self._result_map.flush()
+            self._counter_map.flush()
+
+        tail_stop = min(final_upto + (self.fingerprint["chunk_size"]), total)
+        tail_tmp = self._path(f"{_TAIL_FILE}.tmp")
+        with open(tail_tmp, "wb") as f:
+            np.savez(f, result=result_np[..., final_upto:tail_stop], counter=counter_row[final_upto:tail_stop])
+        os.replace(tail_tmp, self._path(_TAIL_FILE))
+
+        state_tmp = self._path(f"{_STATE_FILE}.tmp")
+        with open(state_tmp, "w", encoding="utf-8") as f:
+            json.dump({"fingerprint": self.fingerprint, "next_index": int(next_index), "final_upto": final_upto}, f)
+        os.replace(state_tmp, self._path(_STATE_FILE))
+        self._final_upto = final_upto
+        self._last_save = time.monotonic()
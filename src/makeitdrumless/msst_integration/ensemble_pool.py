@@ -0,0 +1,180 @@
+import os
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+from typing import Dict, Any, Iterator, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from makeitdrumless.msst_integration.memory import model_memory_profile, estimate_demix_memory
+
+# Fewest cores worth giving one ensemble member; below this, members run one after another
+MIN_CORES_PER_WORKER = 4
+
+# Sample rate the decoded input is shared at (every registry preset runs at 44.1 kHz; others decode their own copy)
+SHARED_SAMPLE_RATE = 44100
+
+# Share of the currently available RAM the concurrent members may use together when no cap is given
+DEFAULT_MEMORY_FRACTION = 0.8
+
+# Per-process state set up by _init_worker
+_worker_state: Dict[str, Any] = {}
+
+
+def usable_cores() -> List[int]:
+    """CPU ids this process may run on (its affinity mask where the OS exposes one)."""
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def estimate_member_memory(config_path: str, checkpoint_path: str, frames: int) -> int:
+    """
+    Estimated peak memory of one ensemble member separating a shared input of the given length.
+
+    Same as memory.estimate_demix_memory() for the preset's config, minus the decoded mix, which
+    lives in shared memory once for all members.
+    """
+    profile = model_memory_profile(config_path, checkpoint_path)
+    estimate = estimate_demix_memory(
+        frames, profile["instruments"], profile["chunk_size"],
+        batch_size=profile["batch_size"], shifts=profile["bigshifts"], checkpoint_bytes=profile["checkpoint_bytes"],
+    )
+    return estimate["total"] - estimate["mix"]
+
+
+def plan_ensemble_workers(
+    members: int,
+    cores: Sequence[int],
+    member_bytes: int = 0,
+    memory_cap_bytes: Optional[int] = None,
+    max_workers: Optional[int] = None,
+    min_cores: int = MIN_CORES_PER_WORKER,
+) -> List[List[int]]:
+    """
+    Splits the cores into disjoint sets, one per concurrently running ensemble member.
+
+    Concurrency is the smallest of the member count, the cores divided by min_cores, the memory cap
+    divided by one member's estimate and max_workers. Cores that do not divide evenly go to the
+    first sets.
+
+    Returns:
+        One core list per worker process; a single set means the members should run sequentially.
+    """
+    cores = list(cores)
+    concurrency = min(members, max(1, len(cores) // max(1, min_cores)))
+    if max_workers:
+        concurrency = min(concurrency, max_workers)
+    if memory_cap_bytes and member_bytes > 0:
+        concurrency = min(concurrency, max(1, memory_cap_bytes // member_bytes))
+    concurrency = max(1, concurrency)
+
+    base, extra = divmod(len(cores), concurrency)
+    core_sets, start = [], 0
+    for slot in range(concurrency):
+        size = base + (1 if slot < extra else 0)
+        core_sets.append(cores[start:start + size])
+        start += size
+    return core_sets
+
+
+def _init_worker(slots, core_sets, shm_name, shape, dtype, input_path, sample_rate):
+    """Pins this worker to a free core set and maps the shared input so load_audio_mix never decodes it."""
+    cores = core_sets[slots.get()]
+    if hasattr(os, "sched_setaffinity"):
+        try:
+            os.sched_setaffinity(0, cores)
+        except OSError:
+            pass
+
+    # Imported after pinning, so torch sizes its thread pool for this worker's cores
+    import torch
+    from makeitdrumless.audio.decoder import register_pcm
+    from makeitdrumless.msst_integration import inference  # noqa: F401  (its import sets a 4-thread default)
+
+    torch.set_num_threads(len(cores))
+    shm = shared_memory.SharedMemory(name=shm_name)
+    pcm = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+    pcm.flags.writeable = False
+    register_pcm(input_path, sample_rate, pcm)
+    _worker_state.update(shm=shm, cores=cores)
+
+
+def _separate_member(separation_kwargs: Dict[str, Any]) -> Tuple[Dict[str, str], List[int], Dict[str, Any]]:
+    from makeitdrumless.audio.stem_io import wait_for_pending_writes
+    from makeitdrumless.msst_integration.inference import separate_stems_msst
+    from makeitdrumless.telemetry import RunTelemetry, bind_run
+
+    # The track's report lives in the parent process; collect this member's demix stats for it
+    run = RunTelemetry(separation_kwargs.get("model_preset", "member"))
+    with bind_run(run):
+        stems = separate_stems_msst(**separation_kwargs)
+    # The folder is only marked complete by the writer pool; finish before handing the paths back
+    wait_for_pending_writes()
+    return stems, _worker_state.get("cores", []), run.metadata.get("silence_gate") or {}
+
+
+def separate_ensemble_concurrently(
+    input_audio_path: str,
+    members: List[Dict[str, Any]],
+    core_sets: List[List[int]],
+    sample_rate: int = SHARED_SAMPLE_RATE,
+) -> Iterator[Tuple[int, Dict[str, str]]]:
+    """
+    Separates ensemble members in parallel worker processes, yielding each one's stems as it finishes.
+
+    The input is decoded once in this process and placed in shared memory; every worker maps it
+    read-only instead of decoding its own copy. Each worker is pinned to one of core_sets for its
+    lifetime and runs torch with that many threads, so concurrent members never compete for cores.
+
+    Args:
+        input_audio_path: Audio file all members separate.
+        members: separate_stems_msst keyword arguments per member (the device is forced to CPU).
+        core_sets: Disjoint core lists from plan_ensemble_workers(); one worker process per set.
+        sample_rate: Rate the shared input is decoded at.
+
+    Yields:
+        (member index, stems dict) in completion order.
+    """
+    from makeitdrumless.audio.decoder import load_audio_mix
+    from makeitdrumless.msst_integration.inference import record_demix_stats
+
+    mix, _ = load_audio_mix(input_audio_path, sample_rate)
+    mix = np.ascontiguousarray(mix, dtype=np.float32)
+    shape = mix.shape
+    shm = shared_memory.SharedMemory(create=True, size=max(1, mix.nbytes))
+    try:
+        np.ndarray(shape, dtype=np.float32, buffer=shm.buf)[:] = mix
+        del mix
+
+        # spawn: forking a process that already initialized torch's thread pools is unsafe
+        ctx = multiprocessing.get_context("spawn")
+        slots = ctx.Queue()
+        for slot in range(len(core_sets)):
+            slots.put(slot)
+        init_args = (slots, core_sets, shm.name, shape, "float32", input_audio_path, sample_rate)
+
+        pool = ProcessPoolExecutor(max_workers=len(core_sets), mp_context=ctx, initializer=_init_worker, initargs=init_args)
+        try:
+            jobs = {}
+            for index, kwargs in enumerate(members):
+                # The STFT cache lives in this process's memory and cannot be shared with workers
+                job = {k: v for k, v in kwargs.items() if k != "stft_cache"}
+                job["device_name"] = "cpu"
+                jobs[pool.submit(_separate_member, job)] = index
+            for future in as_completed(jobs):
+                stems, cores, demix_stats = future.result()
+                index = jobs[future]
+                for label, stats in demix_stats.items():
+                    record_demix_stats(label, stats)
+                print(f"  ✅ {members[index].get('model_preset', index)} finished ({len(cores)} cores)")
+                yield index, stems
+        finally:
+            # A failed member (or an abandoned generator) must not leave the others running
+            pool.shutdown(wait=True, cancel_futures=True)
+    finally:
+        shm.close()
+        shm.unlink()
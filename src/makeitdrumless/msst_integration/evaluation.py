@@ -0,0 +1,251 @@
+import os
+import json
+import time
+from typing import Dict, Any, List, Optional, Callable
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    import soundfile as sf
+except ImportError:
+    sf = None
+
+from makeitdrumless.audio.metrics import stem_scores
+from makeitdrumless.audio.stem_io import read_stem, wait_for_pending_writes
+
+# File name of a fixture's mixture; any other audio file in the fixture folder is a reference stem
+MIXTURE_NAMES = ("mixture.wav", "mixture.flac")
+
+# Mode every other mode is compared against: dense overlap, full precision, every chunk through the model
+REFERENCE_MODE = "reference"
+
+# Settings matrix: separate_stems_msst keyword overrides per fast-path mode. A 'streaming' key routes
+# the overlap-add accumulator to disk as the --max-memory governor does.
+DEFAULT_MODES: Dict[str, Dict[str, Any]] = {
+    REFERENCE_MODE: {"overlap": 4, "silence_threshold_db": None, "config_overrides": {"training.use_amp": False}},
+    "default": {},
+    "reduced_precision": {"overlap": 4, "silence_threshold_db": None, "config_overrides": {"training.use_amp": True}},
+    "overlap_2": {"overlap": 2, "silence_threshold_db": None, "config_overrides": {"training.use_amp": False}},
+    "overlap_1": {"overlap": 1, "silence_threshold_db": None, "config_overrides": {"training.use_amp": False}},
+    "silence_skip": {"overlap": 4, "silence_threshold_db": -50.0, "config_overrides": {"training.use_amp": False}},
+    "streaming": {"overlap": 4, "silence_threshold_db": None, "streaming": True, "config_overrides": {"training.use_amp": False}},
+    "f16_stems": {"overlap": 4, "silence_threshold_db": None, "stem_format": "f16", "config_overrides": {"training.use_amp": False}},
+    "shifts_2_sequential": {"overlap": 4, "silence_threshold_db": None, "shifts": 2, "batched_shifts": False, "config_overrides": {"training.use_amp": False}},
+    "shifts_2_batched": {"overlap": 4, "silence_threshold_db": None, "shifts": 2, "config_overrides": {"training.use_amp": False}},
+    "tta_flips": {"overlap": 4, "silence_threshold_db": None, "tta": ["channels", "polarity"], "config_overrides": {"training.use_amp": False}},
+}
+
+# Default pass criteria: mean SDR may drop at most this many dB below the reference mode
+DEFAULT_MAX_SDR_DROP = 0.5
+
+
+def _write_wav(path: str, audio: "np.ndarray", sample_rate: int):
+    sf.write(path, np.ascontiguousarray(audio.T), sample_rate, subtype="FLOAT")
+
+
+def _as_stereo(audio: "np.ndarray") -> "np.ndarray":
+    """(samples, channels) as read_stem() returns it -> (2, samples)."""
+    audio = np.asarray(audio).T
+    return np.repeat(audio, 2, axis=0) if audio.shape[0] == 1 else audio
+
+
+def write_fixture(directory: str, stems: Dict[str, "np.ndarray"], sample_rate: int = 44100) -> str:
+    """Writes (channels, samples) reference stems and their sum as a fixture folder; returns the folder."""
+    os.makedirs(directory, exist_ok=True)
+    for name, audio in stems.items():
+        _write_wav(os.path.join(directory, f"{name}.wav"), audio, sample_rate)
+    _write_wav(os.path.join(directory, MIXTURE_NAMES[0]), np.sum(np.stack(list(stems.values())), axis=0), sample_rate)
+    return directory
+
+
+def load_fixtures(root: str) -> List[Dict[str, Any]]:
+    """
+    Loads reference multitrack fixtures: one folder per track holding a stem file per source.
+
+    A folder's mixture.wav / mixture.flac is the separation input; without one, the stems are summed
+    into a mixture.wav next to them. A root that is itself a fixture folder counts as one fixture.
+
+    Returns:
+        List of {'name', 'mixture', 'stems': {stem: (2, samples) array}, 'sample_rate'}.
+    """
+    folders = sorted(
+        os.path.join(root, d) for d in os.listdir(root)
+        if os.path.isdir(os.path.join(root, d)) and not d.startswith(".")
+    ) or [root]
+    fixtures = []
+    for folder in folders:
+        stems, sample_rate, mixture = {}, None, None
+        for name in sorted(os.listdir(folder)):
+            path = os.path.join(folder, name)
+            stem, ext = os.path.splitext(name)
+            if ext.lower() not in (".wav", ".flac") or name.startswith("."):
+                continue
+            if name.lower() in MIXTURE_NAMES:
+                mixture = path
+                continue
+            audio, sample_rate = read_stem(path)
+            stems[stem] = _as_stereo(audio)
+        if not stems:
+            continue
+        length = min(a.shape[-1] for a in stems.values())
+        stems = {k: a[:, :length] for k, a in stems.items()}
+        if mixture is None:
+            mixture = os.path.join(folder, MIXTURE_NAMES[0])
+            _write_wav(mixture, np.sum(np.stack(list(stems.values())), axis=0), sample_rate)
+        fixtures.append({"name": os.path.basename(folder), "mixture": mixture, "stems": stems, "sample_rate": sample_rate})
+    return fixtures
+
+
+def evaluate_modes(
+    fixtures: List[Dict[str, Any]],
+    model_preset: str,
+    work_dir: str,
+    modes: Optional[Dict[str, Dict[str, Any]]] = None,
+    separate: Optional[Callable[..., Dict[str, str]]] = None,
+    **separation_kwargs,
+) -> List[Dict[str, Any]]:
+    """
+    Separates every fixture under every mode and scores the stems against the references.
+
+    Each (mode, fixture) run writes to its own folder with force=True, so no stem cache is reused.
+
+    Args:
+        fixtures: load_fixtures() results.
+        model_preset: Preset all modes run.
+        work_dir: Folder for the separated stems.
+        modes: Settings matrix (default: DEFAULT_MODES).
+        separate: Separation function (default: separate_stems_msst).
+        **separation_kwargs: Settings shared by every mode (device_name, chunk_size, ...).
+
+    Returns:
+        One row per mode: {'mode', 'seconds', 'rtf', 'sdr', 'si_sdr', 'stems': {stem: {'sdr', 'si_sdr'}}},
+        scores averaged over fixtures.
+    """
+    if separate is None:
+        from makeitdrumless.msst_integration.inference import separate_stems_msst as separate
+    modes = modes or DEFAULT_MODES
+
+    rows = []
+    for mode, settings in modes.items():
+        settings = dict(settings)
+        streaming = settings.pop("streaming", False)
+        seconds = 0.0
+        audio_seconds = 0.0
+        per_stem: Dict[str, List[Dict[str, float]]] = {}
+        for fixture in fixtures:
+            out_dir = os.path.join(work_dir, mode, fixture["name"])
+            kwargs = dict(separation_kwargs)
+            kwargs.update(settings)
+            if streaming:
+                kwargs["config_overrides"] = dict(kwargs.get("config_overrides") or {}, **{"inference.accumulate_dir": out_dir})
+            start = time.perf_counter()
+            stem_paths = separate(
+                input_audio_path=fixture["mixture"], output_folder=out_dir, model_preset=model_preset,
+                force=True, checkpoint_interval=None, **kwargs,
+            )
+            wait_for_pending_writes()
+            seconds += time.perf_counter() - start
+            length = next(iter(fixture["stems"].values())).shape[-1]
+            audio_seconds += length / fixture["sample_rate"]
+
+            estimates = {}
+            for stem, path in stem_paths.items():
+                if stem in fixture["stems"]:
+                    audio, _ = read_stem(path)
+                    estimates[stem] = _as_stereo(audio)
+            for stem, scores in stem_scores(fixture["stems"], estimates).items():
+                per_stem.setdefault(stem, []).append(scores)
+
+        stems = {
+            stem: {metric: float(np.mean([s[metric] for s in scores])) for metric in ("sdr", "si_sdr")}
+            for stem, scores in per_stem.items()
+        }
+        rows.append({
+            "mode": mode,
+            "seconds": seconds,
+            "rtf": seconds / audio_seconds if audio_seconds else None,
+            "sdr": float(np.mean([s["sdr"] for s in stems.values()])) if stems else None,
+            "si_sdr": float(np.mean([s["si_sdr"] for s in stems.values()])) if stems else None,
+            "stems": stems,
+        })
+    return rows
+
+
+def check_thresholds(
+    rows: List[Dict[str, Any]],
+    thresholds: Optional[Dict[str, Dict[str, float]]] = None,
+    max_sdr_drop: float = DEFAULT_MAX_SDR_DROP,
+    min_sdr: Optional[float] = None,
+) -> List[str]:
+    """
+    Compares each mode's quality against its thresholds.
+
+    Args:
+        rows: evaluate_modes() results.
+        thresholds: Per-mode overrides: {mode: {'max_sdr_drop': dB, 'min_sdr': dB, 'min_si_sdr': dB,
+            'stem:<name>': minimum SDR of that stem}}.
+        max_sdr_drop: Default allowed drop of mean SDR below the reference mode.
+        min_sdr: Default minimum mean SDR for every mode.
+
+    Returns:
+        Failure messages (empty when every mode passes).
+    """
+    thresholds = thresholds or {}
+    reference = next((r for r in rows if r["mode"] == REFERENCE_MODE), None)
+    failures = []
+    for row in rows:
+        if row["sdr"] is None:
+            failures.append(f"{row['mode']}: no stems to score")
+            continue
+        limits = dict({"max_sdr_drop": max_sdr_drop, "min_sdr": min_sdr}, **thresholds.get(row["mode"], {}))
+        # A reference with nothing scored gives no baseline to drop from
+        if (reference is not None and reference["sdr"] is not None and row is not reference
+                and limits["max_sdr_drop"] is not None):
+            drop = reference["sdr"] - row["sdr"]
+            if drop > limits["max_sdr_drop"]:
+                failures.append(f"{row['mode']}: SDR {drop:.2f} dB below {REFERENCE_MODE} (allowed {limits['max_sdr_drop']:.2f})")
+        if limits.get("min_sdr") is not None and row["sdr"] < limits["min_sdr"]:
+            failures.append(f"{row['mode']}: SDR {row['sdr']:.2f} dB < {limits['min_sdr']:.2f}")
+        if limits.get("min_si_sdr") is not None and row["si_sdr"] < limits["min_si_sdr"]:
+            failures.append(f"{row['mode']}: SI-SDR {row['si_sdr']:.2f} dB < {limits['min_si_sdr']:.2f}")
+        for key, minimum in limits.items():
+            if key.startswith("stem:"):
+                stem = key.split(":", 1)[1]
+                score = row["stems"].get(stem, {}).get("sdr")
+                if score is None or score < minimum:
+                    failures.append(f"{row['mode']}: {stem} SDR {score if score is not None else float('nan'):.2f} dB < {minimum:.2f}")
+    return failures
+
+
+def load_thresholds(path: Optional[str]) -> Dict[str, Dict[str, float]]:
+    if not path:
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _cell(value: Optional[float], spec: str = ".2f") -> str:
+    return "-" if value is None else format(value, spec)
+
+
+def format_quality_table(rows: List[Dict[str, Any]], stems: Optional[List[str]] = None) -> str:
+    """Formats evaluate_modes() rows as a speed-versus-quality table relative to the reference mode."""
+    reference = next((r for r in rows if r["mode"] == REFERENCE_MODE), None)
+    stems = stems or sorted({s for r in rows for s in r["stems"]})
+    header = f"{'MODE':<18} {'SECONDS':>8} {'RTF':>6} {'SPEEDUP':>8} {'SDR':>7} {'SI-SDR':>7} {'dSDR':>6}"
+    header += "".join(f" {s[:8]:>8}" for s in stems)
+    lines = [header, "-" * len(header)]
+    for row in rows:
+        speedup = reference["seconds"] / row["seconds"] if reference and row["seconds"] else None
+        delta = row["sdr"] - reference["sdr"] if reference and row["sdr"] is not None else None
+        line = (
+            f"{row['mode']:<18} {row['seconds']:>8.2f} {_cell(row['rtf'], '.3f'):>6} "
+            f"{_cell(speedup) + ('x' if speedup else ''):>8} {_cell(row['sdr']):>7} "
+            f"{_cell(row['si_sdr']):>7} {_cell(delta, '+.2f'):>6}"
+        )
+        line += "".join(f" {_cell(row['stems'].get(s, {}).get('sdr')):>8}" for s in stems)
+        lines.append(line)
+    return "\n".join(lines)
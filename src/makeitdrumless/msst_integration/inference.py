@@ -3,22 +3,13 @@ import sys
 import time
 import gc
 import tempfile
-from typing import Optional, List, Dict
+from contextlib import nullcontext
+from typing import Optional, List, Dict, Tuple
 try:
     import numpy as np
 except ImportError:
     np = None
 
-try:
-    import soundfile as sf
-except ImportError:
-    sf = None
-
-try:
-    import librosa
-except ImportError:
-    librosa = None
-
 try:
     import torch
     if hasattr(torch, "set_num_threads"):
@@ -32,7 +23,240 @@ warnings.filterwarnings("ignore", category=FutureWarning)
 
 from makeitdrumless.msst_integration.device import get_optimal_device, print_device_info
 from makeitdrumless.msst_integration.models import download_model_preset, MODEL_REGISTRY, get_base_cache_dir
-from makeitdrumless.msst_integration.mps_patch import apply_all_patches
+from makeitdrumless.msst_integration.mps_patch import apply_all_patches, LAST_DEMIX_STATS
+from makeitdrumless.msst_integration.windowing import plan_hops, WINDOW_SHAPES
+from makeitdrumless.msst_integration.stft_cache import SpectralFrontendCache
+from makeitdrumless.audio.decoder import load_audio_mix
+from makeitdrumless.audio.stem_io import write_stem, list_stems, stems_complete, mark_stems_complete
+from makeitdrumless.msst_integration.checkpoint import CHECKPOINT_INTERVAL, clear_demix_checkpoint
+from makeitdrumless.msst_integration.calibration import AUTO_MEASURE, measured_device
+from makeitdrumless.msst_integration.pruning import RESIDUAL_STEM, prune_instrument_heads, derive_residual
+from makeitdrumless.msst_integration.memory import (
+    MemoryBudgetError,
+    model_memory_profile,
+    input_frames,
+    plan_memory_budget,
+    format_bytes,
+    format_memory_report,
+)
+from makeitdrumless.telemetry import stage, get_active_run
+
+
+def _resolve_model_files(
+    model_preset: str,
+    config_path: Optional[str],
+    checkpoint_path: Optional[str],
+    model_type: Optional[str],
+) -> Tuple[str, str, Optional[str]]:
+    """Downloads the preset if needed and returns (config_path, checkpoint_path, model_type)."""
+    if not config_path or not checkpoint_path:
+        preset_type, dl_config, dl_ckpt = download_model_preset(model_preset)
+        config_path = config_path or dl_config
+        checkpoint_path = checkpoint_path or dl_ckpt
+        model_type = model_type or preset_type
+
+    if not os.path.exists(config_path):
+        raise FileNotFoundError(f"Model config file not found: {config_path}")
+    if not os.path.exists(checkpoint_path):
+        raise FileNotFoundError(f"Model checkpoint file not found: {checkpoint_path}")
+    return config_path, checkpoint_path, model_type
+
+
+def _load_torch_model(
+    model_type: Optional[str],
+    config_path: str,
+    checkpoint_path: str,
+    device,
+    chunk_size: Optional[int] = None,
+    overlap: Optional[int] = None,
+    silence_threshold_db: Optional[float] = None,
+    silence_fill: str = "passthrough",
+    window_shape: Optional[str] = None,
+    fade_size: Optional[int] = None,
+):
+    """
+    Instantiates an MSST model, applies the inference overrides to its config and loads its weights.
+
+    Returns:
+        (model on device in eval mode, config, resolved model type).
+    """
+    from utils.settings import get_model_from_config
+
+    # Instantiate model and load configuration
+    if not model_type or model_type == "auto":
+        model_type = "scnet"
+
+    with stage("model_load", step="instantiate"):
+        model, config = get_model_from_config(model_type, config_path)
+
+    # Configure batch size, chunk size and overlap for memory efficiency on Apple Silicon
+    dev_type = getattr(device, "type", str(device)).strip().lower()
+    if dev_type == "mps":
+        if hasattr(config, "inference"):
+            config.inference.batch_size = 1
+
+    if chunk_size is not None:
+        if hasattr(config, "audio"):
+            config.audio.chunk_size = chunk_size
+        if hasattr(config, "inference"):
+            config.inference.chunk_size = chunk_size
+
+    if overlap is not None:
+        if hasattr(config, "inference"):
+            config.inference.num_overlap = overlap
+
+    if hasattr(config, "inference"):
+        config.inference.silence_threshold_db = silence_threshold_db
+        config.inference.silence_fill = silence_fill
+        if window_shape is not None:
+            if window_shape not in WINDOW_SHAPES:
+                raise ValueError(f"Unknown window shape '{window_shape}'. Available: {', '.join(WINDOW_SHAPES)}")
+            config.inference.window_shape = window_shape
+        if fade_size is not None:
+            config.inference.fade_size = fade_size
+
+    # Check if config specifies a more specific model_type
+    resolved_model_type = model_type
+    if hasattr(config, "training") and hasattr(config.training, "model_type"):
+        resolved_model_type = config.training.model_type
+
+    # Load checkpoint weights
+    with stage("model_load", step="weights", backend=str(device)):
+        ckpt_data = torch.load(checkpoint_path, map_location="cpu", weights_only=False)
+        if isinstance(ckpt_data, dict):
+            if "state" in ckpt_data:
+                ckpt_data = ckpt_data["state"]
+            elif "state_dict" in ckpt_data:
+                ckpt_data = ckpt_data["state_dict"]
+            elif "model_state_dict" in ckpt_data:
+                ckpt_data = ckpt_data["model_state_dict"]
+        model.load_state_dict(ckpt_data)
+        del ckpt_data
+
+        model = model.to(device)
+        model.eval()
+    return model, config, resolved_model_type
+
+
+def _configure_checkpoint(config, output_dir: str, interval: Optional[float], tag: str):
+    """Points the patched demix at the stem folder for periodic resume checkpoints (see checkpoint.py)."""
+    if not hasattr(config, "inference"):
+        return
+    config.inference.checkpoint_dir = output_dir if interval else None
+    config.inference.checkpoint_interval = interval or CHECKPOINT_INTERVAL
+    config.inference.checkpoint_tag = tag
+
+
+def _plan_memory(
+    max_memory: Optional[int],
+    input_audio_path: str,
+    profile: Dict,
+    chunk_size: Optional[int],
+    shifts: Optional[int],
+    dev_type: str,
+    cache_bytes: int = 0,
+    model_type: Optional[str] = None,
+    tta: Optional[List[str]] = None,
+    batched_shifts: bool = True,
+) -> Optional[Dict]:
+    """
+    Checks the run against the --max-memory budget before any weights are loaded.
+
+    Plans for the TTA engine _configure_tta() will set up, so reducing shifts shrinks the batched
+    variants (or the whole-track passes) the demix actually runs. The config's own model_type wins
+    over model_type, as in _load_torch_model().
+
+    Returns:
+        The plan_memory_budget() result, or None without a budget. Raises MemoryBudgetError when
+        nothing fits.
+    """
+    if not max_memory:
+        return None
+    profile = dict(profile, chunk_size=chunk_size or profile["chunk_size"])
+    frames = input_frames(input_audio_path, profile["sample_rate"])
+    if frames is None:
+        raise MemoryBudgetError(
+            f"Cannot determine the length of '{os.path.basename(input_audio_path)}' to check it against "
+            f"the {format_bytes(max_memory)} --max-memory budget."
+        )
+    batch_size = 1 if dev_type == "mps" else None
+    flips, batched = _tta_engine(profile.get("model_type") or model_type, tta, batched_shifts)
+    # CUDA keeps weights and activations in device memory; MPS shares host RAM
+    plan = plan_memory_budget(
+        max_memory, frames, profile, batch_size=batch_size, shifts=shifts,
+        on_accelerator=dev_type == "cuda", cache_bytes=cache_bytes, flips=flips, batched_shifts=batched,
+    )
+    print(f"🧮 Estimated peak memory {format_bytes(plan['estimate']['total'])} of {format_bytes(max_memory)} budget")
+    if plan["changes"]:
+        print(f"  Reduced to fit: {', '.join(plan['changes'])}")
+        print(format_memory_report(plan["estimate"]))
+    return plan
+
+
+def _apply_memory_plan(config, plan: Optional[Dict], output_dir: str, shifts_val):
+    """Applies a _plan_memory() result to the loaded config; returns the bigshifts count to run."""
+    if plan is None or not hasattr(config, "inference"):
+        return shifts_val
+    config.inference.batch_size = plan["batch_size"]
+    config.inference.accumulate_dir = output_dir if plan["streaming"] else None
+    return min(shifts_val, plan["shifts"]) if shifts_val else shifts_val
+
+
+def _apply_config_overrides(config, overrides: Optional[Dict]):
+    """Sets dotted config keys (e.g. 'training.use_amp', 'inference.batch_size') on a loaded MSST config."""
+    for dotted, value in (overrides or {}).items():
+        section, _, key = dotted.rpartition(".")
+        target = config
+        for part in section.split(".") if section else []:
+            target = getattr(target, part)
+        setattr(target, key, value)
+
+
+def _tta_engine(model_type: Optional[str], tta: Optional[List[str]], batched_shifts: bool) -> Tuple[List[str], bool]:
+    """(flips, whether shifts are batched) the patched demix runs for a model type; HTDemucs runs neither."""
+    if model_type == "htdemucs":
+        return [], False
+    return list(tta or []), batched_shifts
+
+
+def _configure_tta(config, model_type: str, shifts_val, tta: Optional[List[str]], batched_shifts: bool):
+    """
+    Moves shift passes and flip TTA into the patched demix's batched engine (see tta.plan_variants).
+
+    Returns:
+        The bigshifts count left for MSST's bigshifts_wrapper: 1 when the demix batches the shifts,
+        else shifts_val (HTDemucs segment models, or batched_shifts off).
+    """
+    if model_type == "htdemucs" or not hasattr(config, "inference"):
+        if tta:
+            print("ℹ️  Channel / polarity TTA is not available for HTDemucs models; running without it.")
+        return shifts_val
+    config.inference.tta_flips, batched = _tta_engine(model_type, tta, batched_shifts)
+    if not batched:
+        config.inference.tta_shifts = 1
+        return shifts_val
+    config.inference.tta_shifts = max(1, int(shifts_val or 1))
+    return 1
+
+
+def record_demix_stats(label: str, stats: Dict):
+    """Adds one model's demix stats (chunks, silence-gate skips, TTA variants) to the bound run's report."""
+    run = get_active_run()
+    if run is not None and stats:
+        run.set("silence_gate", dict(run.metadata.get("silence_gate") or {}, **{label: dict(stats)}))
+
+
+def _release_device_memory(dev_type: str):
+    gc.collect()
+    try:
+        if dev_type == "mps" and hasattr(torch, "mps"):
+            torch.mps.synchronize()
+            torch.mps.empty_cache()
+        elif dev_type == "cuda" and hasattr(torch, "cuda"):
+            torch.cuda.synchronize()
+            torch.cuda.empty_cache()
+    except Exception:
+        pass
 
 
 def separate_stems_msst(
@@ -47,6 +271,18 @@ def separate_stems_msst(
     shifts: Optional[int] = None,
     device_name: str = "auto",
     force: bool = False,
+    silence_threshold_db: Optional[float] = None,
+    silence_fill: str = "passthrough",
+    window_shape: Optional[str] = None,
+    fade_size: Optional[int] = None,
+    stft_cache: Optional[SpectralFrontendCache] = None,
+    stem_format: str = "wav",
+    checkpoint_interval: Optional[float] = CHECKPOINT_INTERVAL,
+    max_memory: Optional[int] = None,
+    config_overrides: Optional[Dict] = None,
+    keep_heads: Optional[List[str]] = None,
+    tta: Optional[List[str]] = None,
+    batched_shifts: bool = True,
 ) -> Dict[str, str]:
     """
     Separates an audio file into musical stems using MSST (Music-Source-Separation-Training).
@@ -60,12 +296,35 @@ def separate_stems_msst(
         model_type: Architecture type (scnet, bs_roformer, mel_band_roformer, htdemucs, etc.).
         chunk_size: Custom chunk size in samples (e.g. 132300 for 3s, 264600 for 6s).
         overlap: Overlap factor for chunk blending (e.g. 2 or 4).
-        device_name: 'auto', 'mps', 'cuda', or 'cpu'.
+        device_name: 'auto', 'mps', 'cuda', 'cpu', or 'auto-measure' (fastest backend measured for this preset, cached).
         force: If True, forces re-separation even if stems exist for this model.
+        silence_threshold_db: RMS level (dBFS) below which a chunk skips model execution. None disables the gate.
+        silence_fill: Output for skipped chunks: 'passthrough' routes the mix to the 'other' stem, 'zeros' writes silence.
+        window_shape: Overlap-add window ('linear', 'hann' or 'tukey'). Defaults to MSST's linear fades.
+        fade_size: Window fade length in samples. Defaults to a per-shape value (see windowing.default_fade_size).
+        stft_cache: Optional spectral front-end cache shared across ensemble members.
+        stem_format: Stem storage format: 'wav', 'flac', 'f32' or 'f16' (raw .npy arrays).
+        checkpoint_interval: Seconds between demix checkpoints in the stem folder; an interrupted run
+            resumes from the last one. None or 0 disables checkpointing.
+        max_memory: Host memory budget in bytes. The peak is estimated before loading the model and
+            the batch size, result accumulation (RAM or disk) and shifts are reduced until it fits;
+            memory.MemoryBudgetError is raised if nothing does. None disables the check.
+        config_overrides: Dotted MSST config keys set after the model loads (e.g. {'training.use_amp':
+            False}); used by the evaluation harness to toggle fast paths. PyTorch backends only.
+        keep_heads: Stems whose output heads to keep (e.g. ['drums']). The other per-instrument heads of
+            BS-RoFormer-style models are dropped at load time and come back as one 'other' stem (mix
+            minus the kept stems). Ignored for architectures without per-instrument heads and on MLX.
+        tta: Test-time augmentations ('channels', 'polarity') averaged with every shift pass. PyTorch only.
+        batched_shifts: Run shift passes as offset chunk grids batched with the TTA variants in one demix
+            (see tta.plan_variants) instead of MSST's whole-track bigshifts loop. HTDemucs always loops.
 
     Returns:
-        Dict mapping stem names (e.g. 'vocals', 'drums', 'bass', 'other') to their saved file paths.
+        Dict mapping stem names (e.g. 'vocals', 'drums', 'bass', 'other') to their file paths. Stems are
+        written in the background; stem_io.read_stem() waits for a pending stem and
+        stem_io.iter_completed() yields them as they land on disk.
     """
+    checkpoint_path_overridden = bool(checkpoint_path)
+
     # 0. Early check if stems are already separated in output directory
     if output_folder:
         track_output_dir = os.path.abspath(output_folder)
@@ -75,18 +334,13 @@ def separate_stems_msst(
         track_name = os.path.splitext(os.path.basename(input_audio_path))[0].replace(" (Original)", "")
         track_output_dir = os.path.join(tempfile.gettempdir(), "makeitdrumless", "separated", f"{track_name}_{clean_model_tag}")
 
-    existing_stems = {}
-    if not force and os.path.exists(track_output_dir):
-        wav_files = [
-            f for f in os.listdir(track_output_dir)
-            if f.endswith(".wav") and os.path.getsize(os.path.join(track_output_dir, f)) > 0
-        ]
-        if len(wav_files) >= 1:
+    if not force:
+        existing_stems = list_stems(track_output_dir)
+        if existing_stems and stems_complete(track_output_dir):
             print(f"✅ Stems already separated with {model_preset} in {track_output_dir}")
-            for wav in wav_files:
-                stem_name = os.path.splitext(wav)[0]
-                existing_stems[stem_name] = os.path.join(track_output_dir, wav)
             return existing_stems
+        if existing_stems:
+            print(f"⚠️  Separation in {track_output_dir} did not finish; running it again (resuming from its checkpoint if any).")
 
     # 1. Ensure local msst directory is prioritized if available in repo
     local_msst_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..", "msst"))
@@ -98,7 +352,6 @@ def separate_stems_msst(
 
     # 3. Try importing MSST utils
     try:
-        from utils.settings import get_model_from_config
         from utils.model_utils import prefer_target_instrument, bigshifts_wrapper
         from utils.audio_utils import normalize_audio, denormalize_audio
     except ImportError as e:
@@ -107,21 +360,16 @@ def separate_stems_msst(
             "Please ensure music-source-separation-training is installed."
         ) from e
 
-    # 3. Resolve Device (Apple Silicon MLX / MPS / CUDA / CPU)
-    device = get_optimal_device(device_name)
-    print_device_info(device)
-
-    # 4. Resolve Model Checkpoint and Config
-    if not config_path or not checkpoint_path:
-        preset_type, dl_config, dl_ckpt = download_model_preset(model_preset)
-        config_path = config_path or dl_config
-        checkpoint_path = checkpoint_path or dl_ckpt
-        model_type = model_type or preset_type
+    # 3. Resolve Model Checkpoint and Config
+    config_path, checkpoint_path, model_type = _resolve_model_files(model_preset, config_path, checkpoint_path, model_type)
 
-    if not os.path.exists(config_path):
-        raise FileNotFoundError(f"Model config file not found: {config_path}")
-    if not os.path.exists(checkpoint_path):
-        raise FileNotFoundError(f"Model checkpoint file not found: {checkpoint_path}")
+    # 4. Resolve Device (Apple Silicon MLX / MPS / CUDA / CPU), measured per preset with 'auto-measure'
+    if (device_name or "").strip().lower() == AUTO_MEASURE:
+        calibration_name = model_preset if not checkpoint_path_overridden else os.path.basename(checkpoint_path)
+        device = measured_device(calibration_name, model_type, config_path, checkpoint_path)
+    else:
+        device = get_optimal_device(device_name)
+    print_device_info(device)
 
     os.makedirs(track_output_dir, exist_ok=True)
 
@@ -142,10 +390,15 @@ def separate_stems_msst(
                 device = torch.device("cpu") if torch else "cpu"
 
     if use_mlx:
+        if keep_heads:
+            print("ℹ️  Head pruning runs on PyTorch backends only; MLX runs every head.")
+        if tta:
+            print("ℹ️  Channel / polarity TTA runs on PyTorch backends only; MLX runs without it.")
         try:
             print(f"\n🎛️  Running MSST Separation using model: {os.path.basename(checkpoint_path)} (MLX Metal Accelerated)")
             start_time = time.time()
-            mlx_model, mlx_config, resolved_mtype = load_mlx_model(model_type, config_path, checkpoint_path)
+            with stage("model_load", backend="mlx"):
+                mlx_model, mlx_config, resolved_mtype = load_mlx_model(model_type, config_path, checkpoint_path)
             sample_rate = getattr(mlx_config.get("audio", {}), "sample_rate", 44100) if isinstance(mlx_config, dict) else 44100
             
             training_cfg = mlx_config.get("training", {}) if isinstance(mlx_config, dict) else {}
@@ -153,9 +406,8 @@ def separate_stems_msst(
             instruments = [target_instr] if target_instr else training_cfg.get("instruments", ["vocals", "bass", "drums", "other"])[:]
 
             print(f"🎵 Loading audio '{os.path.basename(input_audio_path)}' (Sample rate: {sample_rate}Hz)...")
-            mix, sr = librosa.load(input_audio_path, sr=sample_rate, mono=False)
-            if len(mix.shape) == 1:
-                mix = np.stack([mix, mix], axis=0)
+            with stage("decode_resample"):
+                mix, sr = load_audio_mix(input_audio_path, sample_rate)
 
             print(f"⏳ Separating stems on Apple Silicon GPU (MLX Metal)... (Instruments: {', '.join(instruments)})")
 
@@ -165,16 +417,17 @@ def separate_stems_msst(
                     mix, norm_params = normalize_audio(mix)
 
             shifts_val = shifts if shifts is not None else getattr(mlx_config.get("inference", {}), "bigshifts", 1)
-            waveforms = bigshifts_wrapper_mlx(
-                config=mlx_config,
-                model=mlx_model,
-                mix=mix,
-                model_type=resolved_mtype,
-                pbar=True,
-                bigshifts=shifts_val,
-                chunk_size=chunk_size,
-                overlap=overlap,
-            )
+            with stage("demix", backend="mlx", model=model_preset):
+                waveforms = bigshifts_wrapper_mlx(
+                    config=mlx_config,
+                    model=mlx_model,
+                    mix=mix,
+                    model_type=resolved_mtype,
+                    pbar=True,
+                    bigshifts=shifts_val,
+                    chunk_size=chunk_size,
+                    overlap=overlap,
+                )
 
             # If model only extracted a target instrument (e.g. drums), compute 'other' = mix - target
             if target_instr and len(instruments) == 1 and target_instr in waveforms and "other" not in waveforms:
@@ -183,17 +436,21 @@ def separate_stems_msst(
 
             # Save output stems
             saved_stems = {}
-            for inst_name in instruments:
-                if inst_name in waveforms:
-                    estimates = waveforms[inst_name]
-                    if norm_params is not None and "normalize" in getattr(mlx_config, "inference", {}):
-                        if mlx_config["inference"]["normalize"] is True:
-                            estimates = denormalize_audio(estimates, norm_params)
-
-                    out_file = os.path.join(track_output_dir, f"{inst_name}.wav")
-                    _save_waveform(estimates, sample_rate, out_file)
-                    saved_stems[inst_name] = out_file
-
+            with stage("stem_write"):
+                for inst_name in instruments:
+                    if inst_name in waveforms:
+                        # Popped so the writer job holds the only reference and frees the array after writing
+                        estimates = waveforms.pop(inst_name)
+                        if norm_params is not None and "normalize" in getattr(mlx_config, "inference", {}):
+                            if mlx_config["inference"]["normalize"] is True:
+                                estimates = denormalize_audio(estimates, norm_params)
+
+                        saved_stems[inst_name] = write_stem(
+                            estimates, sample_rate, track_output_dir, inst_name, fmt=stem_format
+                        )
+                        del estimates
+
+            mark_stems_complete(track_output_dir, saved_stems)
             del mlx_model
             del waveforms
             del mix
@@ -223,57 +480,76 @@ def separate_stems_msst(
     os.environ["PYTORCH_ENABLE_MPS_FALLBACK"] = "1"
     os.makedirs(mpl_dir, exist_ok=True)
 
-    # Instantiate model and load configuration
-    if not model_type or model_type == "auto":
-        model_type = "scnet"
-
-    model, config = get_model_from_config(model_type, config_path)
-
-    # Configure batch size, chunk size and overlap for memory efficiency on Apple Silicon
+    memory_plan = _plan_memory(
+        max_memory, input_audio_path, model_memory_profile(config_path, checkpoint_path),
+        chunk_size, shifts, getattr(device, "type", str(device)).strip().lower(),
+        cache_bytes=stft_cache.max_bytes if stft_cache is not None else 0,
+        model_type=model_type, tta=tta, batched_shifts=batched_shifts,
+    )
+
+    model, config, resolved_model_type = _load_torch_model(
+        model_type, config_path, checkpoint_path, device,
+        chunk_size=chunk_size,
+        overlap=overlap,
+        silence_threshold_db=silence_threshold_db,
+        silence_fill=silence_fill,
+        window_shape=window_shape,
+        fade_size=fade_size,
+    )
     dev_type = getattr(device, "type", str(device)).strip().lower()
-    if dev_type == "mps":
-        if hasattr(config, "inference"):
-            config.inference.batch_size = 1
-
-    if chunk_size is not None:
-        if hasattr(config, "audio"):
-            config.audio.chunk_size = chunk_size
-        if hasattr(config, "inference"):
-            config.inference.chunk_size = chunk_size
-
-    if overlap is not None:
-        if hasattr(config, "inference"):
-            config.inference.num_overlap = overlap
-
-    # Check if config specifies a more specific model_type
-    resolved_model_type = model_type
-    if hasattr(config, "training") and hasattr(config.training, "model_type"):
-        resolved_model_type = config.training.model_type
-
-    # Load checkpoint weights
-    ckpt_data = torch.load(checkpoint_path, map_location="cpu", weights_only=False)
-    if isinstance(ckpt_data, dict):
-        if "state" in ckpt_data:
-            ckpt_data = ckpt_data["state"]
-        elif "state_dict" in ckpt_data:
-            ckpt_data = ckpt_data["state_dict"]
-        elif "model_state_dict" in ckpt_data:
-            ckpt_data = ckpt_data["model_state_dict"]
-    model.load_state_dict(ckpt_data)
-
-    model = model.to(device)
-    model.eval()
+    checkpoint_tag = model_preset if not checkpoint_path else os.path.basename(checkpoint_path)
+    if keep_heads:
+        checkpoint_tag += f"|heads={','.join(keep_heads)}"
+    _configure_checkpoint(config, track_output_dir, checkpoint_interval, tag=checkpoint_tag)
+
+    pruning = None
+    if keep_heads:
+        pruning = prune_instrument_heads(model, config, keep_heads)
+        if pruning is None:
+            print(f"ℹ️  {model_preset} has no per-instrument heads to prune; running the full model.")
+        else:
+            # Part of the demix checkpoint key: a resume must not mix chunks from the full model
+            config.inference.pruned_heads = list(pruning["kept"])
+            saved = 1.0 - pruning["params_after"] / pruning["params_before"]
+            print(
+                f"✂️  Pruned output heads: keeping {', '.join(pruning['kept'])}, dropped {', '.join(pruning['dropped'])} "
+                f"({pruning['params_before'] / 1e6:.1f}M -> {pruning['params_after'] / 1e6:.1f}M parameters, -{saved:.0%})"
+            )
+            run = get_active_run()
+            if run is not None:
+                run.set("head_pruning", pruning)
 
     sample_rate = getattr(config.audio, "sample_rate", 44100)
     instruments = prefer_target_instrument(config)[:]
 
     print(f"🎵 Loading audio '{os.path.basename(input_audio_path)}' (Sample rate: {sample_rate}Hz)...")
-    mix, sr = librosa.load(input_audio_path, sr=sample_rate, mono=False)
-    if len(mix.shape) == 1:
-        mix = np.stack([mix, mix], axis=0)
+    with stage("decode_resample"):
+        mix, sr = load_audio_mix(input_audio_path, sample_rate)
 
     print(f"⏳ Separating stems on {dev_type.upper()}... (Instruments: {', '.join(instruments)})")
 
+    # Report the overlap-add plan and its effective compute multiplier
+    if resolved_model_type != "htdemucs" and hasattr(config, "inference"):
+        if "chunk_size" in config.inference:
+            plan_chunk = config.inference.chunk_size
+        else:
+            plan_chunk = getattr(getattr(config, "audio", None), "chunk_size", 132300)
+        hop_plan = plan_hops(
+            plan_chunk,
+            getattr(config.inference, "num_overlap", 2),
+            mix.shape[-1],
+            window_shape=getattr(config.inference, "window_shape", "linear") or "linear",
+            fade_size=getattr(config.inference, "fade_size", None),
+        )
+        print(
+            f"🪟 Overlap-add: {hop_plan['window_shape']} window (fade {hop_plan['fade_size']} samples), "
+            f"overlap {hop_plan['num_overlap']} -> {hop_plan['num_chunks']} chunks, "
+            f"{hop_plan['compute_multiplier']:.2f}x compute"
+        )
+        run = get_active_run()
+        if run is not None:
+            run.set("hop_plan", hop_plan)
+
     # Normalize audio if requested in config
     norm_params = None
     if "normalize" in getattr(config, "inference", {}):
@@ -282,50 +558,56 @@ def separate_stems_msst(
 
     # Perform separation using MSST bigshifts_wrapper
     shifts_val = shifts if shifts is not None else getattr(config.inference, "bigshifts", 1)
-    with torch.inference_mode():
-        waveforms = bigshifts_wrapper(
-            config,
-            model,
-            mix,
-            device,
-            model_type=resolved_model_type,
-            pbar=True,
-            bigshifts=shifts_val
-        )
+    shifts_val = _apply_memory_plan(config, memory_plan, track_output_dir, shifts_val)
+    shifts_val = _configure_tta(config, resolved_model_type, shifts_val, tta, batched_shifts)
+    _apply_config_overrides(config, config_overrides)
+    stft_ctx = stft_cache.activate(model) if stft_cache is not None else nullcontext()
+    LAST_DEMIX_STATS.clear()
+    with torch.inference_mode(), stft_ctx:
+        with stage("demix", backend=dev_type, model=model_preset):
+            waveforms = bigshifts_wrapper(
+                config,
+                model,
+                mix,
+                device,
+                model_type=resolved_model_type,
+                pbar=True,
+                bigshifts=shifts_val
+            )
+        # Snapshot now: the module-level stats belong to whichever demix ran last
+        record_demix_stats(model_preset, LAST_DEMIX_STATS)
 
+        # Pruned heads: everything that was dropped comes back as 'other' = mix - kept stems
+        if pruning is not None and all(name in waveforms for name in instruments):
+            waveforms[RESIDUAL_STEM] = derive_residual(mix, waveforms, instruments)
+            instruments.append(RESIDUAL_STEM)
         # If model only extracted a target instrument (e.g. drums), compute 'other' = mix - target
-        if getattr(config.training, "target_instrument", None) and len(instruments) == 1 and instruments[0] in waveforms and "other" not in waveforms:
+        elif getattr(config.training, "target_instrument", None) and len(instruments) == 1 and instruments[0] in waveforms and "other" not in waveforms:
             waveforms["other"] = mix - waveforms[instruments[0]]
             instruments.append("other")
 
         # Save output stems
         saved_stems = {}
-        for inst_name in instruments:
-            if inst_name in waveforms:
-                estimates = waveforms[inst_name]
-                if norm_params is not None and "normalize" in getattr(config, "inference", {}):
-                    if config.inference["normalize"] is True:
-                        estimates = denormalize_audio(estimates, norm_params)
+        with stage("stem_write"):
+            for inst_name in instruments:
+                if inst_name in waveforms:
+                    estimates = waveforms.pop(inst_name)
+                    if norm_params is not None and "normalize" in getattr(config, "inference", {}):
+                        if config.inference["normalize"] is True:
+                            estimates = denormalize_audio(estimates, norm_params)
 
-                out_file = os.path.join(track_output_dir, f"{inst_name}.wav")
-                _save_waveform(estimates, sample_rate, out_file)
-                saved_stems[inst_name] = out_file
+                    saved_stems[inst_name] = write_stem(
+                        estimates, sample_rate, track_output_dir, inst_name, fmt=stem_format
+                    )
+                    del estimates
+        # The folder counts as cached only once every stem is on disk; the demix checkpoint goes with it
+        mark_stems_complete(track_output_dir, saved_stems, on_complete=lambda: clear_demix_checkpoint(track_output_dir))
 
     # Explicit teardown of heavy tensors and model graph to immediately reclaim RAM
-    try:
-        del model
-        del ckpt_data
-        del waveforms
-        del mix
-        gc.collect()
-        if dev_type == "mps" and hasattr(torch, "mps"):
-            torch.mps.synchronize()
-            torch.mps.empty_cache()
-        elif dev_type == "cuda" and hasattr(torch, "cuda"):
-            torch.cuda.synchronize()
-            torch.cuda.empty_cache()
-    except Exception:
-        pass
+    del model
+    del waveforms
+    del mix
+    _release_device_memory(dev_type)
 
     elapsed = time.time() - start_time
     print(f"⏱️  Separation finished in {elapsed:.2f} seconds.")
@@ -335,12 +617,179 @@ def separate_stems_msst(
     return saved_stems
 
 
-def _save_waveform(wave, sample_rate: int, out_path: str):
-    """Saves a 1D or 2D audio waveform numpy array / tensor to WAV file."""
-    if isinstance(wave, torch.Tensor):
-        wave = wave.detach().cpu().numpy()
-    if len(wave.shape) == 2 and wave.shape[0] == 2:
-        wave = wave.T
-    elif len(wave.shape) == 3:
-        wave = wave[0].T
-    sf.write(out_path, wave, sample_rate, subtype="PCM_16")
+def separate_chained_msst(
+    input_audio_path: str,
+    output_folder: str,
+    first_preset: str = "mel_band_roformer_crowd",
+    second_preset: str = "scnet_large_starrytong",
+    keep_intermediate: bool = False,
+    chunk_size: Optional[int] = None,
+    overlap: Optional[int] = None,
+    shifts: Optional[int] = None,
+    device_name: str = "auto",
+    force: bool = False,
+    silence_threshold_db: Optional[float] = None,
+    silence_fill: str = "passthrough",
+    window_shape: Optional[str] = None,
+    fade_size: Optional[int] = None,
+    stft_cache: Optional[SpectralFrontendCache] = None,
+    stem_format: str = "wav",
+    checkpoint_interval: Optional[float] = CHECKPOINT_INTERVAL,
+    max_memory: Optional[int] = None,
+    tta: Optional[List[str]] = None,
+    batched_shifts: bool = True,
+) -> Dict[str, str]:
+    """
+    Runs two models as one chain (e.g. audience removal, then drum separation) in a single demix pass.
+
+    Each chunk goes through the first model and its music output goes straight into the second
+    model in memory (see chain.ChainedSeparator), so the input is decoded once, overlap-added once,
+    and only the final stems are written: the first model's side stems (e.g. 'crowd') plus the
+    second model's stems. Chunking, overlap and windowing follow the second model's config.
+
+    Args:
+        input_audio_path: Path to input WAV/audio file.
+        output_folder: Output directory for the chain's stems.
+        first_preset: Preprocessing model preset (e.g. 'mel_band_roformer_crowd').
+        second_preset: Separation model preset run on the first model's music output.
+        keep_intermediate: Also write the first model's music output as the 'decrowded' stem.
+        stem_format: Stem storage format: 'wav', 'flac', 'f32' or 'f16' (raw .npy arrays).
+        checkpoint_interval: Seconds between demix checkpoints in the stem folder; an interrupted run
+            resumes from the last one. None or 0 disables checkpointing.
+        max_memory: Host memory budget in bytes, covering both models (see separate_stems_msst).
+        tta / batched_shifts: Batched test-time augmentation of the chain (see separate_stems_msst).
+        (Other arguments as in separate_stems_msst; chunk_size / overlap apply to both models.)
+
+    Returns:
+        Dict mapping stem names (e.g. 'crowd', 'drums', 'other', 'decrowded') to their file paths.
+
+    Raises:
+        ValueError: If the models cannot be chained (HTDemucs segment models, differing sample rates
+            or overlapping stem names).
+    """
+    from makeitdrumless.msst_integration.chain import ChainedSeparator, chain_config
+
+    track_output_dir = os.path.abspath(output_folder)
+    if not force:
+        existing_stems = list_stems(track_output_dir)
+        if existing_stems and stems_complete(track_output_dir):
+            print(f"✅ Stems already separated with {first_preset} -> {second_preset} in {track_output_dir}")
+            return existing_stems
+        if existing_stems:
+            print(f"⚠️  Separation in {track_output_dir} did not finish; running it again (resuming from its checkpoint if any).")
+
+    local_msst_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..", "msst"))
+    if os.path.exists(local_msst_dir) and local_msst_dir not in sys.path:
+        sys.path.insert(0, local_msst_dir)
+    apply_all_patches()
+    try:
+        from utils.model_utils import bigshifts_wrapper
+        from utils.audio_utils import normalize_audio, denormalize_audio
+    except ImportError as e:
+        raise ImportError(
+            "Music-Source-Separation-Training (MSST) package is not found. "
+            "Please ensure music-source-separation-training is installed."
+        ) from e
+
+    model_files = [_resolve_model_files(preset, None, None, None) for preset in (first_preset, second_preset)]
+    if (device_name or "").strip().lower() == AUTO_MEASURE:
+        # Measured on the chain's second (drum) model, which sets the chunking; MLX cannot run the chain
+        config_path, checkpoint_path, model_type = model_files[1]
+        device = measured_device(second_preset, model_type, config_path, checkpoint_path, allow_mlx=False)
+    else:
+        device = get_optimal_device(device_name)
+    if str(device).lower() == "mlx":
+        # The chain is a PyTorch module; MLX runs single models only
+        device = torch.device("mps") if torch.backends.mps.is_available() else torch.device("cpu")
+    print_device_info(device)
+    dev_type = getattr(device, "type", str(device)).strip().lower()
+
+    # Both models' weights are resident; the chain outputs roughly the stems of both
+    profiles = [model_memory_profile(config_path, checkpoint_path) for config_path, checkpoint_path, _ in model_files]
+    chain_profile = dict(
+        profiles[1],
+        instruments=profiles[0]["instruments"] + profiles[1]["instruments"] + (1 if keep_intermediate else 0),
+        checkpoint_bytes=profiles[0]["checkpoint_bytes"] + profiles[1]["checkpoint_bytes"],
+    )
+    memory_plan = _plan_memory(
+        max_memory, input_audio_path, chain_profile, chunk_size, shifts, dev_type,
+        cache_bytes=stft_cache.max_bytes if stft_cache is not None else 0,
+        model_type=model_files[1][2], tta=tta, batched_shifts=batched_shifts,
+    )
+
+    overrides = dict(
+        chunk_size=chunk_size,
+        overlap=overlap,
+        silence_threshold_db=silence_threshold_db,
+        silence_fill=silence_fill,
+        window_shape=window_shape,
+        fade_size=fade_size,
+    )
+    loaded = []
+    for preset, (config_path, checkpoint_path, model_type) in zip((first_preset, second_preset), model_files):
+        if model_type == "htdemucs":
+            raise ValueError(f"'{preset}' is an HTDemucs segment model and cannot be chained")
+        loaded.append(_load_torch_model(model_type, config_path, checkpoint_path, device, **overrides))
+    (first, first_config, _), (second, second_config, second_type) = loaded
+    del loaded
+
+    sample_rate = getattr(second_config.audio, "sample_rate", 44100)
+    if getattr(first_config.audio, "sample_rate", 44100) != sample_rate:
+        raise ValueError(f"'{first_preset}' and '{second_preset}' run at different sample rates")
+
+    chain = ChainedSeparator(first, first_config, second, second_config, keep_intermediate=keep_intermediate).eval()
+    config = chain_config(second_config, chain.instruments)
+    _configure_checkpoint(config, track_output_dir, checkpoint_interval, tag=f"{first_preset}+{second_preset}")
+    os.makedirs(track_output_dir, exist_ok=True)
+
+    print(f"\n🎛️  Running chained MSST separation: {first_preset} -> {second_preset} (one pass)")
+    start_time = time.time()
+    print(f"🎵 Loading audio '{os.path.basename(input_audio_path)}' (Sample rate: {sample_rate}Hz)...")
+    with stage("decode_resample"):
+        mix, sr = load_audio_mix(input_audio_path, sample_rate)
+
+    print(f"⏳ Separating stems on {dev_type.upper()}... (Stems: {', '.join(chain.instruments)})")
+    normalize = any(
+        "normalize" in getattr(c, "inference", {}) and c.inference["normalize"] is True
+        for c in (first_config, second_config)
+    )
+    norm_params = None
+    if normalize:
+        mix, norm_params = normalize_audio(mix)
+
+    shifts_val = shifts if shifts is not None else getattr(second_config.inference, "bigshifts", 1)
+    shifts_val = _apply_memory_plan(config, memory_plan, track_output_dir, shifts_val)
+    shifts_val = _configure_tta(config, second_type, shifts_val, tta, batched_shifts)
+    stft_ctx = stft_cache.activate(chain) if stft_cache is not None else nullcontext()
+    LAST_DEMIX_STATS.clear()
+    with torch.inference_mode(), stft_ctx:
+        with stage("demix", backend=dev_type, model=f"{first_preset}+{second_preset}"):
+            waveforms = bigshifts_wrapper(
+                config,
+                chain,
+                mix,
+                device,
+                model_type=second_type,
+                pbar=True,
+                bigshifts=shifts_val
+            )
+        record_demix_stats(f"{first_preset}+{second_preset}", LAST_DEMIX_STATS)
+
+    saved_stems = {}
+    with stage("stem_write"):
+        for inst_name in chain.instruments:
+            if inst_name in waveforms:
+                estimates = waveforms.pop(inst_name)
+                if norm_params is not None:
+                    estimates = denormalize_audio(estimates, norm_params)
+                saved_stems[inst_name] = write_stem(estimates, sample_rate, track_output_dir, inst_name, fmt=stem_format)
+                del estimates
+    mark_stems_complete(track_output_dir, saved_stems, on_complete=lambda: clear_demix_checkpoint(track_output_dir))
+
+    del chain, first, second, waveforms, mix
+    _release_device_memory(dev_type)
+
+    elapsed = time.time() - start_time
+    print(f"⏱️  Chained separation finished in {elapsed:.2f} seconds.")
+    print(f"📁 Separated stems saved to: {track_output_dir}")
+    return saved_stems
@@ -0,0 +1,253 @@
+import os
+from typing import Dict, Any, Optional, Sequence
+
+try:
+    import yaml
+except ImportError:
+    yaml = None
+
+try:
+    import soundfile as sf
+except ImportError:
+    sf = None
+
+from makeitdrumless.msst_integration.tta import plan_variants
+
+# Host memory kept free for the interpreter, torch runtime, audio I/O buffers and the stem writer
+RUNTIME_OVERHEAD_BYTES = 768 * 1024 * 1024
+
+# Peak activation memory of one chunk in the model, as a multiple of the chunk's stem output size.
+# A rough upper figure across the SCNet / RoFormer / Demucs presets on CPU.
+ACTIVATION_FACTOR = 24
+
+_UNITS = {"k": 1024, "m": 1024 ** 2, "g": 1024 ** 3, "t": 1024 ** 4}
+
+
+class MemoryBudgetError(RuntimeError):
+    """Raised when no separation configuration fits the --max-memory budget."""
+
+
+def parse_memory_size(text: str) -> int:
+    """Parses '6G', '512M', '1.5g' or a plain byte count into bytes."""
+    value = str(text).strip().lower().rstrip("b")
+    unit = _UNITS.get(value[-1:], None)
+    number = value[:-1] if unit else value
+    try:
+        return int(float(number) * (unit or 1))
+    except ValueError:
+        raise ValueError(f"Invalid memory size '{text}' (expected e.g. 6G, 512M or a byte count)")
+
+
+def format_bytes(size: float) -> str:
+    if size < 1024 ** 3:
+        return f"{size / 1024 ** 2:.0f} MB"
+    return f"{size / 1024 ** 3:.2f} GB"
+
+
+def available_memory_bytes() -> Optional[int]:
+    """Currently available physical memory, or None where the OS does not report it."""
+    try:
+        return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_AVPHYS_PAGES")
+    except (ValueError, OSError, AttributeError):
+        return None
+
+
+def input_frames(path: str, sample_rate: int = 44100) -> Optional[int]:
+    """
+    Length of an input in frames at sample_rate, without decoding it.
+
+    Uses the decoded PCM cache, then libsndfile, then ffprobe (for the m4a / webm streams
+    --direct-ingest keeps). Returns None when the length cannot be determined; callers must not
+    plan a budget on a guessed length.
+    """
+    from makeitdrumless.audio.decoder import get_cached_pcm
+    from makeitdrumless.ffmpeg.manager import probe_duration
+
+    cached = get_cached_pcm(path, sample_rate)
+    if cached is not None:
+        return int(cached.shape[-1])
+    if sf is not None:
+        try:
+            return int(sf.info(path).duration * sample_rate)
+        except Exception:
+            pass
+    duration = probe_duration(path)
+    return int(duration * sample_rate) if duration else None
+
+
+def model_memory_profile(config_path: str, checkpoint_path: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Reads what the memory estimate needs from an MSST config without instantiating the model.
+
+    Returns:
+        Dict with 'sample_rate', 'chunk_size', 'instruments', 'batch_size', 'bigshifts',
+        'checkpoint_bytes' and 'model_type' (None when the config does not name it).
+    """
+    config: Dict[str, Any] = {}
+    if yaml is not None:
+        try:
+            with open(config_path, encoding="utf-8") as f:
+                config = yaml.load(f, Loader=yaml.FullLoader) or {}
+        except (OSError, yaml.YAMLError):
+            config = {}
+    audio = config.get("audio") or {}
+    inference = config.get("inference") or {}
+    training = config.get("training") or {}
+
+    target = training.get("target_instrument")
+    instruments = 1 if target else len(training.get("instruments") or ["vocals", "bass", "drums", "other"])
+    if "samplerate" in training and "segment" in training:
+        chunk_size = int(training["samplerate"] * training["segment"])
+    else:
+        chunk_size = int(inference.get("chunk_size") or audio.get("chunk_size") or 132300)
+    try:
+        checkpoint_bytes = os.path.getsize(checkpoint_path) if checkpoint_path else 0
+    except OSError:
+        checkpoint_bytes = 0
+    return {
+        "sample_rate": int(audio.get("sample_rate") or training.get("samplerate") or 44100),
+        "chunk_size": chunk_size,
+        "instruments": instruments,
+        "batch_size": int(inference.get("batch_size") or 1),
+        "bigshifts": int(inference.get("bigshifts") or 1),
+        "checkpoint_bytes": checkpoint_bytes,
+        "model_type": training.get("model_type"),
+    }
+
+
+def estimate_demix_memory(
+    frames: int,
+    instruments: int,
+    chunk_size: int,
+    batch_size: int = 1,
+    shifts: int = 1,
+    checkpoint_bytes: int = 0,
+    channels: int = 2,
+    streaming: bool = False,
+    on_accelerator: bool = False,
+    cache_bytes: int = 0,
+    tta_variants: int = 1,
+) -> Dict[str, int]:
+    """
+    Estimates peak host memory of one separate_stems_msst run, component by component.
+
+    Mirrors the buffers mps_patch.demix keeps alive together: the decoded mix, its padded tensor
+    copy, the (instruments, channels, samples) result accumulator (on disk when streaming), the
+    one-row overlap counter, the model weights and one batch of chunk activations. A model batch
+    holds batch_size chunk positions times every batched TTA variant. Whole-track shifts > 1
+    (MSST's bigshifts loop) add the rolled mix copy and a second full-length result being
+    averaged into; batched shifts count as variants instead.
+
+    Args:
+        frames: Track length in samples at the model's sample rate.
+        instruments: Stems the model outputs.
+        chunk_size: Samples per chunk.
+        batch_size: Chunks run through the model at once.
+        shifts: Whole-track bigshifts passes (1 when the demix batches the shifts).
+        checkpoint_bytes: Size of the weights file.
+        channels: Audio channels.
+        streaming: Accumulate the result in a disk-backed memory map instead of RAM.
+        on_accelerator: Weights and activations live in device memory, not host RAM.
+        cache_bytes: Host memory the STFT front-end cache may fill (see stft_cache).
+        tta_variants: Variants run for every chunk position in one batch (see tta.plan_variants).
+
+    Returns:
+        Dict of byte counts per component plus 'total'.
+    """
+    sample_bytes = 4
+    track = frames * channels * sample_bytes
+    padded = (frames + 2 * chunk_size) * channels * sample_bytes
+    stems = instruments * padded
+    estimate = {
+        "mix": track,
+        "mix_tensor": padded,
+        "result": 0 if streaming else stems,
+        "counter": (frames + 2 * chunk_size) * sample_bytes,
+        # The state dict and the model's parameters coexist while the weights load
+        "weights": checkpoint_bytes * (1 if on_accelerator else 2),
+        "activations": 0 if on_accelerator else batch_size * tta_variants * chunk_size * channels * instruments * sample_bytes * ACTIVATION_FACTOR,
+        "shifts": (track + instruments * track) if shifts > 1 else 0,
+        "stft_cache": cache_bytes,
+        "runtime": RUNTIME_OVERHEAD_BYTES,
+    }
+    estimate["total"] = sum(estimate.values())
+    return estimate
+
+
+def plan_memory_budget(
+    budget_bytes: int,
+    frames: int,
+    profile: Dict[str, Any],
+    batch_size: Optional[int] = None,
+    shifts: Optional[int] = None,
+    on_accelerator: bool = False,
+    cache_bytes: int = 0,
+    flips: Sequence[str] = (),
+    batched_shifts: bool = False,
+) -> Dict[str, Any]:
+    """
+    Picks the least degraded separation configuration whose estimated peak fits the budget.
+
+    Tries, in order: the requested configuration, smaller batches (halving down to 1), streaming
+    accumulation to disk, and fewer shift passes (down to 1). Output quality only changes
+    in the last step. Batched shifts multiply the chunks in every model batch, so dropping them
+    shrinks the activations; whole-track shifts drop the copies of the track instead.
+
+    Args:
+        budget_bytes: --max-memory in bytes.
+        frames: Track length in samples at the model's sample rate.
+        profile: model_memory_profile() of the model.
+        batch_size: Requested batch size (default: the config's).
+        shifts: Requested shift passes (default: the config's bigshifts).
+        on_accelerator: See estimate_demix_memory().
+        cache_bytes: See estimate_demix_memory().
+        flips: TTA transforms batched with every chunk (see tta.plan_variants).
+        batched_shifts: The demix runs the shift passes as batched chunk grids, not whole-track passes.
+
+    Returns:
+        Dict with 'batch_size', 'shifts', 'streaming', 'estimate' and 'changes' (descriptions of
+        what was reduced).
+
+    Raises:
+        MemoryBudgetError: Even the smallest configuration does not fit; the message holds the report.
+    """
+    batch = max(1, int(batch_size if batch_size is not None else profile["batch_size"]))
+    passes = max(1, int(shifts if shifts is not None else profile["bigshifts"]))
+    instruments = profile["instruments"]
+
+    def estimate(b, s, streaming):
+        # The hop only dedupes grid offsets shorter than the shift count; the chunk size bounds it
+        variants = len(plan_variants(profile["chunk_size"], s if batched_shifts else 1, flips))
+        return estimate_demix_memory(
+            frames, instruments, profile["chunk_size"], batch_size=b, shifts=1 if batched_shifts else s,
+            checkpoint_bytes=profile["checkpoint_bytes"], streaming=streaming, on_accelerator=on_accelerator,
+            cache_bytes=cache_bytes, tta_variants=variants,
+        )
+
+    candidates = [(batch, passes, False, [])]
+    b = batch
+    while b > 1:
+        b //= 2
+        candidates.append((b, passes, False, [f"batch size {batch} -> {b}"]))
+    candidates.append((b, passes, True, candidates[-1][3] + ["streaming accumulation"]))
+    if passes > 1:
+        candidates.append((b, 1, True, candidates[-1][3] + [f"shifts {passes} -> 1"]))
+
+    for b, s, streaming, changes in candidates:
+        result = estimate(b, s, streaming)
+        if result["total"] <= budget_bytes:
+            return {"batch_size": b, "shifts": s, "streaming": streaming, "estimate": result, "changes": changes}
+
+    smallest = estimate(*candidates[-1][:3])
+    raise MemoryBudgetError(
+        f"Separation needs about {format_bytes(smallest['total'])} even with batch size 1, streaming "
+        f"accumulation and no shifts, over the {format_bytes(budget_bytes)} budget.\n"
+        + format_memory_report(smallest)
+    )
+
+
+def format_memory_report(estimate: Dict[str, int]) -> str:
+    """Formats an estimate_demix_memory() result as an aligned component table."""
+    lines = [f"  {name:<12} {format_bytes(size):>10}" for name, size in estimate.items() if name != "total" and size]
+    lines.append(f"  {'total':<12} {format_bytes(estimate['total']):>10}")
+    return "\n".join(lines)
@@ -0,0 +1,232 @@
+import os
+import sys
+import json
+import time
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Any, List, Optional
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from makeitdrumless.msst_integration.calibration import host_fingerprint
+from makeitdrumless.msst_integration.models import (
+    MODEL_REGISTRY,
+    get_base_cache_dir,
+    is_model_downloaded,
+    normalize_preset_name,
+)
+
+# Per-host measurements of every benchmarked preset, kept next to the downloaded checkpoints
+BENCHMARKS_FILENAME = "model_benchmarks.json"
+
+# Seconds of audio each preset separates while being timed
+BENCHMARK_SECONDS = 20.0
+
+_lock = threading.Lock()
+
+
+def _benchmarks_path() -> str:
+    return os.path.join(str(get_base_cache_dir()), BENCHMARKS_FILENAME)
+
+
+def benchmark_key(preset: str, device: str) -> str:
+    return f"{preset}|{device}|{host_fingerprint()}"
+
+
+def load_benchmarks(device: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+    """
+    Returns this host's stored preset measurements, keyed by preset.
+
+    Args:
+        device: Only entries measured on this backend ('cpu', 'cuda', 'mps'); None returns all, keyed
+            by the full benchmark_key().
+    """
+    try:
+        with open(_benchmarks_path(), encoding="utf-8") as f:
+            stored = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if device is None:
+        return stored
+    host = host_fingerprint()
+    return {
+        entry["preset"]: entry for key, entry in stored.items()
+        if entry.get("device") == device and key.endswith(f"|{host}")
+    }
+
+
+def _save_benchmark(key: str, entry: Dict[str, Any]):
+    path = _benchmarks_path()
+    with _lock:
+        stored = load_benchmarks()
+        stored[key] = entry
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(stored, f, indent=2)
+        os.replace(tmp_path, path)
+
+
+def _benchmark_worker(preset: str, device_name: str, seconds: float) -> Dict[str, Any]:
+    """Measures one preset in a fresh process, so its peak RSS is not mixed up with other models'."""
+    local_msst_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..", "msst"))
+    if os.path.exists(local_msst_dir) and local_msst_dir not in sys.path:
+        sys.path.insert(0, local_msst_dir)
+
+    import torch
+    from makeitdrumless.msst_integration.mps_patch import apply_all_patches
+    from makeitdrumless.msst_integration.device import get_optimal_device
+    from makeitdrumless.msst_integration.inference import _resolve_model_files, _load_torch_model
+    from makeitdrumless.telemetry.recorder import peak_rss_bytes, device_memory_bytes
+
+    apply_all_patches()
+    import utils.model_utils as mu
+
+    device = get_optimal_device(device_name)
+    if device == "mlx":
+        device = torch.device("cpu")
+    config_path, checkpoint_path, model_type = _resolve_model_files(preset, None, None, None)
+
+    start = time.perf_counter()
+    model, config, resolved_type = _load_torch_model(model_type, config_path, checkpoint_path, device, silence_threshold_db=None)
+    load_seconds = time.perf_counter() - start
+
+    sample_rate = getattr(config.audio, "sample_rate", 44100)
+    length = int(seconds * sample_rate)
+    mix = (np.random.default_rng(0).standard_normal((2, length)) * 0.1).astype(np.float32)
+    with torch.inference_mode():
+        # Warm-up pass (kernel compilation / allocator growth) on the first few seconds, not counted
+        mu.demix(config, model, mix[:, : min(length, 5 * sample_rate)], device, model_type=resolved_type, pbar=False)
+        start = time.perf_counter()
+        mu.demix(config, model, mix, device, model_type=resolved_type, pbar=False)
+        elapsed = time.perf_counter() - start
+
+    return {
+        "preset": preset,
+        "device": device.type,
+        "threads": torch.get_num_threads() if device.type == "cpu" else None,
+        "rtf": round(elapsed / seconds, 4),
+        "load_seconds": round(load_seconds, 3),
+        "peak_rss_mb": round(peak_rss_bytes() / 1024 ** 2, 1),
+        "peak_device_mb": round(device_memory_bytes() / 1024 ** 2, 1),
+        "sdr": MODEL_REGISTRY.get(preset, {}).get("sdr"),
+        "audio_seconds": seconds,
+        "measured_at": time.time(),
+    }
+
+
+def benchmark_models(
+    presets: Optional[List[str]] = None,
+    device_name: str = "auto",
+    seconds: float = BENCHMARK_SECONDS,
+) -> List[Dict[str, Any]]:
+    """
+    Measures real-time factor, peak memory and load time of each preset on this host and stores them.
+
+    Each preset runs in its own spawned process on a noise clip of the given length. Results go to
+    BENCHMARKS_FILENAME under get_base_cache_dir(), keyed by preset, backend and host_fingerprint(),
+    where choose_preset() reads them.
+
+    Args:
+        presets: Presets to measure (default: every downloaded registry preset).
+        device_name: Device as for --device ('auto', 'cpu', 'cuda', 'mps').
+        seconds: Length of the timed clip in seconds.
+
+    Returns:
+        The measurements, one dict per preset that ran.
+    """
+    if presets:
+        presets = [normalize_preset_name(p) for p in presets]
+    else:
+        presets = [name for name in MODEL_REGISTRY if is_model_downloaded(name)]
+    if not presets:
+        print("⚠️  No downloaded presets to benchmark. Download some with --download-model first.")
+        return []
+
+    print(f"📏 Benchmarking {len(presets)} presets on {seconds:g}s of audio each...")
+    results = []
+    ctx = multiprocessing.get_context("spawn")
+    for preset in presets:
+        try:
+            with ProcessPoolExecutor(max_workers=1, mp_context=ctx) as pool:
+                entry = pool.submit(_benchmark_worker, preset, device_name, seconds).result()
+        except Exception as e:
+            print(f"  {preset:<25} failed ({e})")
+            continue
+        _save_benchmark(benchmark_key(preset, entry["device"]), entry)
+        results.append(entry)
+        print(f"  {preset:<25} RTF {entry['rtf']:.3f}  load {entry['load_seconds']:.1f}s  peak {entry['peak_rss_mb']:.0f} MB")
+    return results
+
+
+def format_benchmark_table(entries: List[Dict[str, Any]]) -> str:
+    """Formats benchmark entries as a table sorted by SDR."""
+    header = f"{'PRESET':<25} {'SDR':>6} {'RTF':>7} {'LOAD':>7} {'PEAK MB':>8}  DEVICE"
+    rows = [header, "-" * len(header)]
+    for entry in sorted(entries, key=lambda e: -(e.get("sdr") or 0.0)):
+        sdr = f"{entry['sdr']:.2f}" if entry.get("sdr") is not None else "-"
+        rows.append(
+            f"{entry['preset']:<25} {sdr:>6} {entry['rtf']:>7.3f} {entry['load_seconds']:>6.1f}s "
+            f"{entry['peak_rss_mb']:>8.0f}  {entry['device']}"
+        )
+    return "\n".join(rows)
+
+
+def predicted_seconds(entry: Dict[str, Any], duration: float, passes: int = 1) -> float:
+    """Wall time a benchmarked preset needs for a track: model load plus RTF x duration x passes."""
+    return entry["load_seconds"] + entry["rtf"] * duration * max(1, passes)
+
+
+def _eligible(entries: Dict[str, Dict[str, Any]], stem: str):
+    """Yields (preset, entry, sdr) for benchmarked presets with a published SDR that output stem."""
+    for preset, entry in entries.items():
+        sdr = MODEL_REGISTRY.get(preset, {}).get("sdr", entry.get("sdr"))
+        if sdr is None or stem not in MODEL_REGISTRY.get(preset, {}).get("stems", [stem]):
+            continue
+        yield preset, entry, sdr
+
+
+def choose_preset(
+    entries: Dict[str, Dict[str, Any]],
+    duration: float,
+    max_rtf: Optional[float] = None,
+    deadline: Optional[float] = None,
+    passes: int = 1,
+    stem: str = "drums",
+) -> Optional[str]:
+    """
+    Picks the highest-SDR benchmarked preset that meets the time budget for a track.
+
+    Args:
+        entries: load_benchmarks(device) results.
+        duration: Track length in seconds.
+        max_rtf: Highest allowed real-time factor (seconds of compute per second of audio).
+        deadline: Wall-clock seconds the whole separation (load included) must finish within.
+        passes: Shift passes the run will make; RTF scales with them.
+        stem: Stem the preset must output.
+
+    Returns:
+        The preset name, or None if no benchmarked preset with a published SDR meets the budget.
+    """
+    best, best_sdr = None, None
+    for preset, entry, sdr in _eligible(entries, stem):
+        if max_rtf is not None and entry["rtf"] * max(1, passes) > max_rtf:
+            continue
+        if deadline is not None and predicted_seconds(entry, duration, passes) > deadline:
+            continue
+        if best_sdr is None or sdr > best_sdr:
+            best, best_sdr = preset, sdr
+    return best
+
+
+def fastest_preset(entries: Dict[str, Dict[str, Any]], stem: str = "drums") -> Optional[str]:
+    """
+    Returns the lowest-RTF benchmarked preset that choose_preset() could pick (published SDR,
+    outputs stem), as the fallback when none meets the budget; None if there is no such preset.
+    """
+    eligible = [(entry["rtf"], preset) for preset, entry, _ in _eligible(entries, stem)]
+    return min(eligible)[1] if eligible else None
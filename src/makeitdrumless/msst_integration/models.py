@@ -3,12 +3,14 @@ import sys
 from pathlib import Path
 from typing import Dict, Any, Optional, Tuple
 
-# Built-in curated registry of high quality multi-stem models for drum isolation
+# Built-in curated registry of high quality multi-stem models for drum isolation.
+# 'sdr' is the published average SDR (dB) of the checkpoint, None where none was published.
 MODEL_REGISTRY: Dict[str, Dict[str, Any]] = {
     # --- SCNet Architectures ---
     "scnet_large_starrytong": {
         "description": "SCNet Large by starrytong (4 stems) - High quality SDR 9.70",
         "model_type": "scnet",
+        "sdr": 9.70,
         "stems": ["vocals", "bass", "drums", "other"],
         "config_url": "https://github.com/ZFTurbo/Music-Source-Separation-Training/releases/download/v1.0.9/config_musdb18_scnet_large_starrytong.yaml",
         "checkpoint_url": "https://github.com/ZFTurbo/Music-Source-Separation-Training/releases/download/v1.0.9/SCNet-large_starrytong_fixed.ckpt",
@@ -17,6 +19,7 @@ MODEL_REGISTRY: Dict[str, Dict[str, Any]] = {
     "scnet_xl": {
         "description": "SCNet XL IHF (4 stems) - State-of-the-Art quality, SDR 10.08",
         "model_type": "scnet",
+        "sdr": 10.08,
         "stems": ["vocals", "bass", "drums", "other"],
         "config_url": "https://github.com/ZFTurbo/Music-Source-Separation-Training/releases/download/v1.0.15/config_musdb18_scnet_xl_more_wide_v5.yaml",
         "checkpoint_url": "https://github.com/ZFTurbo/Music-Source-Separation-Training/releases/download/v1.0.15/model_scnet_ep_36_sdr_10.0891.ckpt",
@@ -24,6 +27,7 @@ MODEL_REGISTRY: Dict[str, Dict[str, Any]] = {
     "scnet_masked_xl": {
         "description": "SCNet Masked XL IHF (4 stems) - Noise reduction mask, SDR 9.82",
         "model_type": "scnet_masked",
+        "sdr": 9.82,
         "stems": ["vocals", "bass", "drums", "other"],
         "config_url": "https://github.com/ZFTurbo/Music-Source-Separation-Training/releases/download/v1.0.17/config_musdb18_scnet_xl_ihf.yaml",
         "checkpoint_url": "https://github.com/ZFTurbo/Music-Source-Separation-Training/releases/download/v1.0.17/model_scnet_masked_ep_111_sdr_9.8286.ckpt",
@@ -31,6 +35,7 @@ MODEL_REGISTRY: Dict[str, Dict[str, Any]] = {
     "scnet_large": {
         "description": "SCNet Large (4 stems) - SDR 9.32",
         "model_type": "scnet",
+        "sdr": 9.32,
         "stems": ["vocals", "bass", "drums", "other"],
         "config_url": "https://github.com/ZFTurbo/Music-Source-Separation-Training/releases/download/v1.0.8/config_musdb18_scnet_large.yaml",
         "checkpoint_url": "https://github.com/ZFTurbo/Music-Source-Separation-Training/releases/download/v1.0.8/model_scnet_sdr_9.3244.ckpt",
@@ -38,6 +43,7 @@ MODEL_REGISTRY: Dict[str, Dict[str, Any]] = {
     "scnet_small_starrytong": {
         "description": "SCNet Small by starrytong (4 stems) - SDR 9.03",
         "model_type": "scnet",
+        "sdr": 9.03,
         "stems": ["vocals", "bass", "drums", "other"],
         "config_url": "https://github.com/ZFTurbo/Music-Source-Separation-Training/releases/download/v.1.0.6/config_musdb18_scnet.yaml",
         "checkpoint_url": "https://github.com/ZFTurbo/Music-Source-Separation-Training/releases/download/v.1.0.6/scnet_checkpoint_musdb18.ckpt",
@@ -45,6 +51,7 @@ MODEL_REGISTRY: Dict[str, Dict[str, Any]] = {
     "scnet_tran_small": {
         "description": "SCNet Transformer Small (4 stems) - SDR 8.92",
         "model_type": "scnet_tran",
+        "sdr": 8.92,
         "stems": ["vocals", "bass", "drums", "other"],
         "config_url": "https://github.com/ZFTurbo/Music-Source-Separation-Training/releases/download/v1.0.14/config_musdb18_scnet_tran.yaml",
         "checkpoint_url": "https://github.com/ZFTurbo/Music-Source-Separation-Training/releases/download/v1.0.14/model_scnet_tran_sdr_8.9272.ckpt",
@@ -52,6 +59,7 @@ MODEL_REGISTRY: Dict[str, Dict[str, Any]] = {
     "scnet_small": {
         "description": "SCNet Masked Small (4 stems) - Fast & lightweight checkpoint (~42MB), SDR 8.81",
         "model_type": "scnet_masked",
+        "sdr": 8.81,
         "stems": ["vocals", "bass", "drums", "other"],
         "config_url": "https://github.com/ZFTurbo/Music-Source-Separation-Training/releases/download/v1.0.16/config_musdb18_scnet_small.yaml",
         "checkpoint_url": "https://github.com/ZFTurbo/Music-Source-Separation-Training/releases/download/v1.0.16/model_scnet_masked_ep_156_sdr_8.8149.ckpt",
@@ -61,6 +69,7 @@ MODEL_REGISTRY: Dict[str, Dict[str, Any]] = {
     "bs_mega_53stem_drums": {
         "description": "BS-RoFormer Mega 53-stem Drums (2 stems: drums, other) - MVSep SOTA drum extraction",
         "model_type": "bs_roformer",
+        "sdr": None,
         "stems": ["drums", "other"],
         "config_url": "https://huggingface.co/noblebarkrr/BS-Roformer-MVSep-Mega-53-stems/resolve/main/v1/bs_mega_53stem_drums_mvsep_config.yaml",
         "checkpoint_url": "https://huggingface.co/noblebarkrr/BS-Roformer-MVSep-Mega-53-stems/resolve/main/v1/bs_mega_53stem_drums_mvsep.ckpt",
@@ -68,6 +77,7 @@ MODEL_REGISTRY: Dict[str, Dict[str, Any]] = {
     "bs_drums2_xlancer": {
         "description": "BS-RoFormer Drums v2 by Xlance (2 stems: drums, other) - Punchy transient isolation",
         "model_type": "bs_roformer",
+        "sdr": None,
         "stems": ["drums", "other"],
         "config_url": "https://huggingface.co/noblebarkrr/mvsepless_resources/resolve/main/bs_roformer/bs_drums2_xlancer_config.yaml",
         "checkpoint_url": "https://huggingface.co/noblebarkrr/mvsepless_resources/resolve/main/bs_roformer/bs_drums2_xlancer.ckpt",
@@ -75,6 +85,7 @@ MODEL_REGISTRY: Dict[str, Dict[str, Any]] = {
     "bs_drums_gilliaaan": {
         "description": "BS-RoFormer Drums Duality by Gilliaaan (2 stems: drums, other) - High cymbal/hihat precision",
         "model_type": "bs_roformer",
+        "sdr": None,
         "stems": ["drums", "other"],
         "config_url": "https://huggingface.co/noblebarkrr/mvsepless_resources/resolve/main/bs_roformer/bs_drums_gilliaaan_config.yaml",
         "checkpoint_url": "https://huggingface.co/noblebarkrr/mvsepless_resources/resolve/main/bs_roformer/bs_drums_gilliaaan.ckpt",
@@ -82,6 +93,7 @@ MODEL_REGISTRY: Dict[str, Dict[str, Any]] = {
     "bs_roformer": {
         "description": "Band-Split RoFormer (4 stems: vocals, bass, drums, other) - SDR 9.65",
         "model_type": "bs_roformer",
+        "sdr": 9.65,
         "stems": ["vocals", "bass", "drums", "other"],
         "config_url": "https://github.com/ZFTurbo/Music-Source-Separation-Training/releases/download/v1.0.12/config_bs_roformer_384_8_2_485100.yaml",
         "checkpoint_url": "https://github.com/ZFTurbo/Music-Source-Separation-Training/releases/download/v1.0.12/model_bs_roformer_ep_17_sdr_9.6568.ckpt",
@@ -89,6 +101,7 @@ MODEL_REGISTRY: Dict[str, Dict[str, Any]] = {
     "bs_conformer": {
         "description": "BS Conformer Medium (4 stems: vocals, bass, drums, other) - SDR 9.18",
         "model_type": "bs_conformer",
+        "sdr": 9.18,
         "stems": ["vocals", "bass", "drums", "other"],
         "config_url": "https://github.com/ZFTurbo/Music-Source-Separation-Training/releases/download/v1.0.18/config_musdb18_bs_conformer_infer.yaml",
         "checkpoint_url": "https://github.com/ZFTurbo/Music-Source-Separation-Training/releases/download/v1.0.18/fused_model_bs_conformer_sdr_9.18.ckpt",
@@ -98,6 +111,7 @@ MODEL_REGISTRY: Dict[str, Dict[str, Any]] = {
     "mel_band_roformer_crowd": {
         "description": "Mel-Band RoFormer Crowd by aufr33 & viperx (2 stems: crowd, other) - SOTA Audience & Live Ambience isolation",
         "model_type": "mel_band_roformer",
+        "sdr": 8.71,
         "stems": ["crowd", "other"],
         "config_url": "https://github.com/ZFTurbo/Music-Source-Separation-Training/releases/download/v.1.0.4/model_mel_band_roformer_crowd.yaml",
         "checkpoint_url": "https://github.com/ZFTurbo/Music-Source-Separation-Training/releases/download/v.1.0.4/mel_band_roformer_crowd_aufr33_viperx_sdr_8.7144.ckpt",
@@ -107,6 +121,7 @@ MODEL_REGISTRY: Dict[str, Dict[str, Any]] = {
     "htdemucs": {
         "description": "HTDemucs4 Hybrid Transformer (4 stems: vocals, bass, drums, other) - SDR 9.16",
         "model_type": "htdemucs",
+        "sdr": 9.16,
         "stems": ["vocals", "bass", "drums", "other"],
         "config_url": "https://raw.githubusercontent.com/ZFTurbo/Music-Source-Separation-Training/main/configs/config_musdb18_htdemucs.yaml",
         "checkpoint_url": "https://dl.fbaipublicfiles.com/demucs/hybrid_transformer/955717e8-8726e21a.th",
@@ -114,6 +129,7 @@ MODEL_REGISTRY: Dict[str, Dict[str, Any]] = {
     "htdemucs_ft": {
         "description": "HTDemucs4 Hybrid Transformer (4 stems: vocals, bass, drums, other) - SDR 9.16",
         "model_type": "htdemucs",
+        "sdr": 9.16,
         "stems": ["vocals", "bass", "drums", "other"],
         "config_url": "https://raw.githubusercontent.com/ZFTurbo/Music-Source-Separation-Training/main/configs/config_musdb18_htdemucs.yaml",
         "checkpoint_url": "https://dl.fbaipublicfiles.com/demucs/hybrid_transformer/955717e8-8726e21a.th",
@@ -121,6 +137,7 @@ MODEL_REGISTRY: Dict[str, Dict[str, Any]] = {
     "htdemucs4": {
         "description": "HTDemucs4 Hybrid Transformer (4 stems: vocals, bass, drums, other) - SDR 9.16",
         "model_type": "htdemucs",
+        "sdr": 9.16,
         "stems": ["vocals", "bass", "drums", "other"],
         "config_url": "https://raw.githubusercontent.com/ZFTurbo/Music-Source-Separation-Training/main/configs/config_musdb18_htdemucs.yaml",
         "checkpoint_url": "https://dl.fbaipublicfiles.com/demucs/hybrid_transformer/955717e8-8726e21a.th",
@@ -128,6 +145,7 @@ MODEL_REGISTRY: Dict[str, Dict[str, Any]] = {
     "htdemucs4_6s": {
         "description": "HTDemucs4 (6 stems: vocals, bass, drums, other, piano, guitar)",
         "model_type": "htdemucs",
+        "sdr": None,
         "stems": ["vocals", "bass", "drums", "other", "piano", "guitar"],
         "config_url": "https://raw.githubusercontent.com/ZFTurbo/Music-Source-Separation-Training/main/configs/config_htdemucs_6stems.yaml",
         "checkpoint_url": "https://dl.fbaipublicfiles.com/demucs/hybrid_transformer/5c90dfd2-34c22ccb.th",
@@ -135,6 +153,7 @@ MODEL_REGISTRY: Dict[str, Dict[str, Any]] = {
     "htdemucs_6s": {
         "description": "HTDemucs4 (6 stems: vocals, bass, drums, other, piano, guitar)",
         "model_type": "htdemucs",
+        "sdr": None,
         "stems": ["vocals", "bass", "drums", "other", "piano", "guitar"],
         "config_url": "https://raw.githubusercontent.com/ZFTurbo/Music-Source-Separation-Training/main/configs/config_htdemucs_6stems.yaml",
         "checkpoint_url": "https://dl.fbaipublicfiles.com/demucs/hybrid_transformer/5c90dfd2-34c22ccb.th",
@@ -142,6 +161,7 @@ MODEL_REGISTRY: Dict[str, Dict[str, Any]] = {
     "demucs3_mmi": {
         "description": "Demucs3 MMI (4 stems: vocals, bass, drums, other) - SDR 8.88",
         "model_type": "htdemucs",
+        "sdr": 8.88,
         "stems": ["vocals", "bass", "drums", "other"],
         "config_url": "https://raw.githubusercontent.com/ZFTurbo/Music-Source-Separation-Training/main/configs/config_musdb18_demucs3_mmi.yaml",
         "checkpoint_url": "https://dl.fbaipublicfiles.com/demucs/hybrid_transformer/75fc33f5-1941ce65.th",
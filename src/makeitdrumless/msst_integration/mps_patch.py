@@ -1,5 +1,11 @@
 import os
+import time
 import inspect
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
 try:
     import torch
     import torch.nn as nn
@@ -7,6 +13,21 @@ except ImportError:
     torch = None
     nn = None
 
+from makeitdrumless.telemetry import record_batch_time
+from makeitdrumless.msst_integration.windowing import get_window, default_fade_size
+from makeitdrumless.msst_integration.checkpoint import DemixCheckpoint, mix_fingerprint, CHECKPOINT_INTERVAL
+from makeitdrumless.msst_integration.tta import plan_variants, apply_flips
+
+# Statistics of the most recent patched demix call (chunk counts, silence skips, timing)
+LAST_DEMIX_STATS = {}
+
+# Gate level used by --silence-skip when no --silence-threshold is given. The gate is off unless
+# requested: skipped chunks pass the mix through to 'other' instead of separating it, which changes the stems
+DEFAULT_SILENCE_THRESHOLD_DB = -60.0
+
+# Disk-backed result buffer used by streaming accumulation (config.inference.accumulate_dir)
+ACCUMULATOR_FILE = ".demix_accumulator.npy"
+
 
 def apply_all_patches():
     """Applies all Apple Silicon MPS and stability optimizations to MSST modules in memory."""
@@ -99,168 +120,322 @@ def patch_dualpath_rnn():
         pass
 
 
-def patch_demix_mps():
-    """Patches MSST demix function with standalone CPU accumulation, adaptive precision, and throttled cache clearing."""
+def _chunk_rms_db(part):
+    """Returns the RMS level of an audio chunk tensor in dBFS."""
+    if part.numel() == 0:
+        return float("-inf")
+    rms = float(torch.sqrt(torch.mean(part.float() ** 2)))
+    if rms <= 0.0:
+        return float("-inf")
+    return 20.0 * float(np.log10(rms))
+
+
+def _silent_chunk_estimate(part, instruments, fill_mode):
+    """Builds the stand-in model output for a skipped silent chunk (zeros or mix passthrough)."""
+    estimate = torch.zeros((len(instruments),) + tuple(part.shape), dtype=torch.float32)
+    if fill_mode == "passthrough" and "other" in instruments:
+        estimate[instruments.index("other")] = part
+    return estimate
+
+
+def _accumulator(shape, directory=None):
+    """
+    Zeroed float32 overlap-add result buffer.
+
+    With a directory (the memory governor's streaming accumulation) the buffer is a memory-mapped
+    file there, so the kernel writes its pages back to disk under memory pressure instead of the
+    process running out of RAM. The file is unlinked right away where the OS allows it.
+    """
+    if not directory:
+        return torch.zeros(shape, dtype=torch.float32, device="cpu")
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, ACCUMULATOR_FILE)
+    array = np.lib.format.open_memmap(path, mode="w+", dtype=np.float32, shape=tuple(shape))
     try:
-        import utils.model_utils as mu
-        import numpy as np
-        from tqdm.auto import tqdm
+        os.remove(path)
+    except OSError:
+        pass
+    return torch.from_numpy(array)
 
-        if getattr(mu, "_makeitdrumless_patched", False):
-            return
 
-        def patched_demix(config, model, mix, device, model_type='scnet', pbar=False):
-            should_print = True
-            try:
-                import torch.distributed as dist
-                should_print = not dist.is_initialized() or dist.get_rank() == 0
-            except Exception:
-                pass
+def _edge_window(windows, base, fade_size, lead, trail):
+    """Chunk window with its leading / trailing fade replaced by ones at the ends of the track (cached per edge case)."""
+    key = (lead, trail)
+    if key not in windows:
+        window = base.clone()
+        if lead:
+            window[:fade_size] = 1
+        if trail:
+            window[-fade_size:] = 1
+        windows[key] = window
+    return windows[key]
 
-            mix_tensor = torch.tensor(mix, dtype=torch.float32)
 
-            if model_type == 'htdemucs':
-                mode = 'demucs'
-            else:
-                mode = 'generic'
+def _target_instruments(config) -> list:
+    """Stems the model outputs: its target_instrument alone if set (as MSST's prefer_target_instrument)."""
+    target = getattr(config.training, "target_instrument", None)
+    return [target] if target else list(config.training.instruments)
 
-            if mode == 'demucs':
-                chunk_size = config.training.samplerate * config.training.segment
-                num_instruments = len(config.training.instruments)
-                num_overlap = getattr(config.inference, "num_overlap", 2)
-                step = chunk_size // num_overlap
-            else:
-                if hasattr(config, "inference") and 'chunk_size' in config.inference:
-                    chunk_size = config.inference.chunk_size
-                else:
-                    chunk_size = getattr(getattr(config, "audio", None), "chunk_size", 132300)
-                num_instruments = len(mu.prefer_target_instrument(config))
-                num_overlap = getattr(config.inference, "num_overlap", 2)
-
-                fade_size = chunk_size // 10
-                step = chunk_size // num_overlap
-                border = chunk_size - step
-                length_init = mix_tensor.shape[-1]
-                windowing_array = mu._getWindowingArray(chunk_size, fade_size)
-                if length_init > 2 * border and border > 0:
-                    mix_tensor = nn.functional.pad(mix_tensor, (border, border), mode="reflect")
-
-            dev_type = getattr(device, "type", str(device)).split(":")[0]
-            use_amp = getattr(getattr(config, "training", {}), "use_amp", True) if hasattr(config, "training") else True
-
-            # For sequential LSTMs (SCNet), batch_size=1 minimizes Python loop overhead.
-            # For parallel Transformers (RoFormer), batch_size=2 allows GPU saturation.
-            is_rnn = any(k in str(model_type).lower() for k in ["scnet", "bandit", "demucs"])
-            if dev_type == "mps":
-                batch_size = getattr(getattr(config, "inference", None), "batch_size", 1)
-                if is_rnn:
-                    autocast_ctx = torch.autocast(device_type="cpu", enabled=False)
-                elif use_amp:
-                    autocast_ctx = torch.autocast(device_type="mps", dtype=torch.float16, enabled=True)
-                else:
-                    autocast_ctx = torch.autocast(device_type="cpu", enabled=False)
-            elif dev_type in ["cuda", "cpu"]:
-                batch_size = getattr(getattr(config, "inference", None), "batch_size", 1)
-                amp_dtype = torch.float16 if dev_type == "cuda" else torch.bfloat16
-                autocast_ctx = torch.autocast(device_type=dev_type, dtype=amp_dtype, enabled=use_amp)
+
+def demix(config, model, mix, device, model_type='scnet', pbar=False):
+    """
+    Chunked overlap-add demix installed in place of MSST's utils.model_utils.demix.
+
+    Accumulates on the CPU with adaptive precision and throttled cache clearing, and adds the
+    silence gate, window shapes, batched TTA, checkpoints and streaming accumulation configured
+    under config.inference. Only the model's forward pass is called, so it runs without MSST.
+    """
+    should_print = True
+    try:
+        import torch.distributed as dist
+        should_print = not dist.is_initialized() or dist.get_rank() == 0
+    except Exception:
+        pass
+
+    mix_tensor = torch.tensor(mix, dtype=torch.float32)
+
+    if model_type == 'htdemucs':
+        mode = 'demucs'
+    else:
+        mode = 'generic'
+
+    if mode == 'demucs':
+        instruments = list(config.training.instruments)
+        chunk_size = config.training.samplerate * config.training.segment
+        num_instruments = len(config.training.instruments)
+        num_overlap = getattr(config.inference, "num_overlap", 2)
+        step = chunk_size // num_overlap
+    else:
+        if hasattr(config, "inference") and 'chunk_size' in config.inference:
+            chunk_size = config.inference.chunk_size
+        else:
+            chunk_size = getattr(getattr(config, "audio", None), "chunk_size", 132300)
+        instruments = _target_instruments(config)
+        num_instruments = len(instruments)
+        num_overlap = getattr(config.inference, "num_overlap", 2)
+
+        window_shape = getattr(config.inference, "window_shape", "linear") or "linear"
+        fade_size = getattr(config.inference, "fade_size", None) or default_fade_size(chunk_size, num_overlap, window_shape)
+        fade_size = max(1, min(int(fade_size), chunk_size // 2))
+        step = chunk_size // num_overlap
+        border = chunk_size - step
+        length_init = mix_tensor.shape[-1]
+        # 'linear' builds the same ramps as MSST's _getWindowingArray
+        windowing_array = get_window(window_shape, chunk_size, fade_size)
+        if length_init > 2 * border and border > 0:
+            mix_tensor = nn.functional.pad(mix_tensor, (border, border), mode="reflect")
+
+    dev_type = getattr(device, "type", str(device)).split(":")[0]
+    use_amp = getattr(getattr(config, "training", {}), "use_amp", True) if hasattr(config, "training") else True
+
+    # For sequential LSTMs (SCNet), batch_size=1 minimizes Python loop overhead.
+    # For parallel Transformers (RoFormer), batch_size=2 allows GPU saturation.
+    is_rnn = any(k in str(model_type).lower() for k in ["scnet", "bandit", "demucs"])
+    if dev_type == "mps":
+        batch_size = getattr(getattr(config, "inference", None), "batch_size", 1)
+        if is_rnn:
+            autocast_ctx = torch.autocast(device_type="cpu", enabled=False)
+        elif use_amp:
+            autocast_ctx = torch.autocast(device_type="mps", dtype=torch.float16, enabled=True)
+        else:
+            autocast_ctx = torch.autocast(device_type="cpu", enabled=False)
+    elif dev_type in ["cuda", "cpu"]:
+        batch_size = getattr(getattr(config, "inference", None), "batch_size", 1)
+        amp_dtype = torch.float16 if dev_type == "cuda" else torch.bfloat16
+        autocast_ctx = torch.autocast(device_type=dev_type, dtype=amp_dtype, enabled=use_amp)
+    else:
+        batch_size = 1
+        autocast_ctx = torch.autocast(device_type="cpu", enabled=False)
+
+    # Energy gate: chunks quieter than the threshold skip model execution entirely
+    silence_threshold_db = getattr(getattr(config, "inference", None), "silence_threshold_db", None)
+    silence_fill = getattr(getattr(config, "inference", None), "silence_fill", "passthrough")
+    total_chunks = 0
+    skipped_chunks = 0
+    model_time = 0.0
+    model_chunks = 0
+
+    # Batched test-time augmentation: shift offsets and channel / polarity flips of each chunk
+    # position run in the same model batch and are undone before overlap-adding
+    if mode == "generic":
+        variants = plan_variants(
+            step,
+            shifts=getattr(getattr(config, "inference", None), "tta_shifts", 1),
+            flips=getattr(getattr(config, "inference", None), "tta_flips", None) or (),
+            channels=mix_tensor.shape[0],
+        )
+        windows = {}
+    else:
+        variants = [(0, ())]
+    if len(variants) > 1 and should_print:
+        print(f"🔁 Batched TTA: {len(variants)} variants per chunk position in one model batch")
+
+    with autocast_ctx:
+        with torch.inference_mode():
+            req_shape = (num_instruments,) + mix_tensor.shape
+            result = _accumulator(req_shape, getattr(getattr(config, "inference", None), "accumulate_dir", None))
+            # Every stem and channel gets the same window weights; one row is enough
+            counter = torch.zeros(mix_tensor.shape[-1], dtype=torch.float32, device="cpu")
+
+            # Periodic checkpoints in the stem folder let an interrupted run resume mid-track
+            checkpoint = None
+            i = 0
+            checkpoint_dir = getattr(getattr(config, "inference", None), "checkpoint_dir", None)
+            if checkpoint_dir:
+                fingerprint = mix_fingerprint(mix_tensor, chunk_size, step, instruments, {
+                    "model": getattr(config.inference, "checkpoint_tag", None),
+                    "mode": mode,
+                    "window": None if mode == "demucs" else [window_shape, fade_size],
+                    "tta": [[offset, list(flips)] for offset, flips in variants],
+                    "silence": None if silence_threshold_db is None else [float(silence_threshold_db), silence_fill],
+                    "heads": list(getattr(config.inference, "pruned_heads", None) or []) or None,
+                })
+                checkpoint = DemixCheckpoint(
+                    checkpoint_dir, fingerprint,
+                    interval=getattr(config.inference, "checkpoint_interval", None) or CHECKPOINT_INTERVAL,
+                )
+                i = checkpoint.restore(result, counter)
+                if i and should_print:
+                    pct = 100.0 * min(i, mix_tensor.shape[1]) / mix_tensor.shape[1]
+                    print(f"⏩ Resuming separation from checkpoint ({pct:.0f}% already done)")
+            batch_count = 0
+            batch_data = []
+            batch_locations = []
+            batch_silent = []
+            if pbar and should_print:
+                from tqdm.auto import tqdm
+                progress_bar = tqdm(
+                    total=mix_tensor.shape[1], initial=min(i, mix_tensor.shape[1]),
+                    desc="Processing audio chunks", leave=False
+                )
             else:
-                batch_size = 1
-                autocast_ctx = torch.autocast(device_type="cpu", enabled=False)
-
-            with autocast_ctx:
-                with torch.inference_mode():
-                    req_shape = (num_instruments,) + mix_tensor.shape
-                    result = torch.zeros(req_shape, dtype=torch.float32, device="cpu")
-                    counter = torch.zeros(req_shape, dtype=torch.float32, device="cpu")
-
-                    i = 0
-                    batch_count = 0
-                    batch_data = []
-                    batch_locations = []
-                    if pbar and should_print:
-                        progress_bar = tqdm(
-                            total=mix_tensor.shape[1], desc="Processing audio chunks", leave=False
-                        )
+                progress_bar = None
+
+            while i < mix_tensor.shape[1]:
+                for offset, flips in variants:
+                    start = i + offset
+                    if start >= mix_tensor.shape[1]:
+                        continue
+                    part = mix_tensor[:, start:start + chunk_size]
+                    chunk_len = part.shape[-1]
+                    is_silent = silence_threshold_db is not None and _chunk_rms_db(part) < silence_threshold_db
+                    if mode == "generic" and chunk_len > chunk_size // 2:
+                        pad_mode = "reflect"
                     else:
-                        progress_bar = None
-
-                    while i < mix_tensor.shape[1]:
-                        part = mix_tensor[:, i:i + chunk_size]
-                        chunk_len = part.shape[-1]
-                        if mode == "generic" and chunk_len > chunk_size // 2:
-                            pad_mode = "reflect"
+                        pad_mode = "constant"
+                    part = nn.functional.pad(part, (0, chunk_size - chunk_len), mode=pad_mode, value=0)
+
+                    batch_data.append(apply_flips(part, flips) if flips else part)
+                    batch_locations.append((start, chunk_len, flips))
+                    batch_silent.append(is_silent)
+                i += step
+
+                if len(batch_data) >= batch_size * len(variants) or i >= mix_tensor.shape[1]:
+                    active = [j for j, silent in enumerate(batch_silent) if not silent]
+                    outputs = [None] * len(batch_data)
+                    if active:
+                        model_start = time.perf_counter()
+                        arr = torch.stack([batch_data[j] for j in active], dim=0).to(device, non_blocking=True)
+                        x = model(arr)
+                        out_cpu = x.detach().cpu()
+                        batch_time = time.perf_counter() - model_start
+                        model_time += batch_time
+                        model_chunks += len(active)
+                        record_batch_time(batch_time, len(active))
+                        for k, j in enumerate(active):
+                            outputs[j] = out_cpu[k]
+                        del arr
+                        del x
+                        del out_cpu
+                    for j, silent in enumerate(batch_silent):
+                        if silent:
+                            outputs[j] = _silent_chunk_estimate(batch_data[j], instruments, silence_fill)
+                    total_chunks += len(batch_data)
+                    skipped_chunks += len(batch_data) - len(active)
+
+                    for j, (start, seg_len, flips) in enumerate(batch_locations):
+                        out = apply_flips(outputs[j], flips, channel_axis=-2) if flips else outputs[j]
+                        if mode == "generic":
+                            # Every grid (pass) fades in at its first chunk only if it starts the track, out at its last
+                            window = _edge_window(
+                                windows, windowing_array, fade_size,
+                                lead=start == 0, trail=start + step >= mix_tensor.shape[1],
+                            )
+                            result[..., start:start + seg_len] += out[..., :seg_len] * window[..., :seg_len]
+                            counter[start:start + seg_len] += window[..., :seg_len]
                         else:
-                            pad_mode = "constant"
-                        part = nn.functional.pad(part, (0, chunk_size - chunk_len), mode=pad_mode, value=0)
-
-                        batch_data.append(part)
-                        batch_locations.append((i, chunk_len))
-                        i += step
-
-                        if len(batch_data) >= batch_size or i >= mix_tensor.shape[1]:
-                            arr = torch.stack(batch_data, dim=0).to(device, non_blocking=True)
-                            x = model(arr)
-                            out_cpu = x.detach().cpu()
-
-                            if mode == "generic":
-                                window = windowing_array.clone()
-                                if i - step == 0:
-                                    window[:fade_size] = 1
-                                elif i >= mix_tensor.shape[1]:
-                                    window[-fade_size:] = 1
-
-                            for j, (start, seg_len) in enumerate(batch_locations):
-                                if mode == "generic":
-                                    result[..., start:start + seg_len] += out_cpu[j, ..., :seg_len] * window[..., :seg_len]
-                                    counter[..., start:start + seg_len] += window[..., :seg_len]
-                                else:
-                                    result[..., start:start + seg_len] += out_cpu[j, ..., :seg_len]
-                                    counter[..., start:start + seg_len] += 1.0
-
-                            batch_data.clear()
-                            batch_locations.clear()
-                            del arr
-                            del x
-                            del out_cpu
-                            batch_count += 1
-                            if batch_count % 16 == 0:
-                                if dev_type == "mps" and hasattr(torch.mps, "empty_cache"):
-                                    torch.mps.empty_cache()
-                                elif dev_type == "cuda" and hasattr(torch.cuda, "empty_cache"):
-                                    torch.cuda.empty_cache()
-
-                        if progress_bar:
-                            progress_bar.update(step)
-
-                    if progress_bar:
-                        progress_bar.close()
-
-                    if dev_type == "mps" and hasattr(torch.mps, "empty_cache"):
-                        torch.mps.empty_cache()
-                    elif dev_type == "cuda" and hasattr(torch.cuda, "empty_cache"):
-                        torch.cuda.empty_cache()
-
-                    estimated_sources = result / counter
-                    estimated_sources = estimated_sources.cpu().numpy()
-                    np.nan_to_num(estimated_sources, copy=False, nan=0.0)
-
-                    if mode == "generic":
-                        if length_init > 2 * border and border > 0:
-                            estimated_sources = estimated_sources[..., border:-border]
-
-            if mode == "demucs":
-                instruments = config.training.instruments
-            else:
-                instruments = mu.prefer_target_instrument(config)
+                            result[..., start:start + seg_len] += out[..., :seg_len]
+                            counter[start:start + seg_len] += 1.0
+
+                    batch_data.clear()
+                    batch_locations.clear()
+                    batch_silent.clear()
+                    del outputs
+                    batch_count += 1
+                    if batch_count % 16 == 0:
+                        if dev_type == "mps" and hasattr(torch.mps, "empty_cache"):
+                            torch.mps.empty_cache()
+                        elif dev_type == "cuda" and hasattr(torch.cuda, "empty_cache"):
+                            torch.cuda.empty_cache()
+                    if checkpoint is not None:
+                        checkpoint.maybe_save(result, counter, i)
+
+                if progress_bar:
+                    progress_bar.update(step)
+
+            if progress_bar:
+                progress_bar.close()
+            if checkpoint is not None:
+                # Kept until the stems are on disk, so a crash while writing them skips the demix
+                checkpoint.save(result, counter, i)
+
+            if dev_type == "mps" and hasattr(torch.mps, "empty_cache"):
+                torch.mps.empty_cache()
+            elif dev_type == "cuda" and hasattr(torch.cuda, "empty_cache"):
+                torch.cuda.empty_cache()
+
+            # Normalized in place: the accumulator becomes the output without a second full-length copy
+            result.div_(counter)
+            estimated_sources = result.numpy()
+            np.nan_to_num(estimated_sources, copy=False, nan=0.0)
+
+            if mode == "generic":
+                if length_init > 2 * border and border > 0:
+                    estimated_sources = estimated_sources[..., border:-border]
+
+    avg_chunk_time = model_time / model_chunks if model_chunks else 0.0
+    LAST_DEMIX_STATS.clear()
+    LAST_DEMIX_STATS.update({
+        "total_chunks": total_chunks,
+        "skipped_chunks": skipped_chunks,
+        "model_time": model_time,
+        "time_saved": avg_chunk_time * skipped_chunks,
+        "tta_variants": len(variants),
+    })
+    if skipped_chunks and should_print:
+        pct = 100.0 * skipped_chunks / max(total_chunks, 1)
+        print(
+            f"🔇 Silence gate: skipped {skipped_chunks}/{total_chunks} chunks ({pct:.1f}%) "
+            f"below {silence_threshold_db:.1f} dBFS, ~{LAST_DEMIX_STATS['time_saved']:.1f}s of model time saved."
+        )
+
+    ret_data = {k: v for k, v in zip(instruments, estimated_sources)}
+
+    if mode == "demucs" and num_instruments <= 1:
+        return estimated_sources
+    else:
+        return ret_data
 
-            ret_data = {k: v for k, v in zip(instruments, estimated_sources)}
 
-            if mode == "demucs" and num_instruments <= 1:
-                return estimated_sources
-            else:
-                return ret_data
+def patch_demix_mps():
+    """Patches MSST demix function with standalone CPU accumulation, adaptive precision, and throttled cache clearing."""
+    try:
+        import utils.model_utils as mu
+
+        if getattr(mu, "_makeitdrumless_patched", False):
+            return
 
-        mu.demix = patched_demix
+        mu.demix = demix
         mu._makeitdrumless_patched = True
     except Exception:
         pass
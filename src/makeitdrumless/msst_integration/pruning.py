@@ -0,0 +1,144 @@
+import time
+from typing import Dict, Any, List, Optional
+
+try:
+    import torch
+    import torch.nn as nn
+except ImportError:
+    torch = None
+    nn = None
+
+# Model attributes holding one output head per config.training.instruments entry, in that order
+# (BS-RoFormer / Mel-Band RoFormer / BS-Conformer mask estimators). SCNet, Demucs and HTDemucs
+# decode all sources through shared layers and have nothing per instrument to drop.
+HEAD_ATTRIBUTES = ("mask_estimators",)
+
+# Registry model types built with per-instrument heads
+PRUNABLE_MODEL_TYPES = ("bs_roformer", "bs_conformer", "mel_band_roformer")
+
+# Stem derived from the mix minus every kept head; the drumless backing track when only drums are kept
+RESIDUAL_STEM = "other"
+
+
+def supports_head_pruning(preset: str) -> bool:
+    """True if a registry preset has per-instrument heads and more than a drums / other split."""
+    from makeitdrumless.msst_integration.models import MODEL_REGISTRY
+
+    info = MODEL_REGISTRY.get(preset, {})
+    return info.get("model_type") in PRUNABLE_MODEL_TYPES and len(info.get("stems", [])) > 2
+
+
+def _head_attribute(model) -> Optional[str]:
+    for name in HEAD_ATTRIBUTES:
+        heads = getattr(model, name, None)
+        if isinstance(heads, nn.ModuleList) and len(heads) > 1:
+            return name
+    return None
+
+
+def _parameter_count(module) -> int:
+    return sum(p.numel() for p in module.parameters())
+
+
+def resolve_heads(instruments: List[str], keep: List[str]) -> List[str]:
+    """
+    Maps requested stems onto a model's instrument list, keeping the model's order.
+
+    The residual stem is never kept as a head: it is rebuilt from the mix. Requested stems the
+    model does not output are ignored.
+    """
+    wanted = {k.strip().lower() for k in keep if k and k.strip()}
+    return [name for name in instruments if name.lower() in wanted and name != RESIDUAL_STEM]
+
+
+def prune_instrument_heads(model, config, keep: List[str]) -> Optional[Dict[str, Any]]:
+    """
+    Drops the output heads of instruments that are not needed, in place.
+
+    The model keeps computing its shared band-split / transformer trunk once per chunk, but only
+    runs the mask estimators of the kept instruments. config.training.instruments is narrowed to
+    match (to a target_instrument when one head remains), so demix() allocates and overlap-adds
+    only those stems. The other instruments come back as one residual stem (see derive_residual).
+
+    Args:
+        model: Loaded MSST model.
+        config: Its config; modified in place.
+        keep: Stems whose heads to keep (e.g. ['drums'] or ['drums', 'vocals']).
+
+    Returns:
+        {'kept', 'dropped', 'params_before', 'params_after'}, or None if the architecture has no
+        per-instrument heads, is already single-target, or nothing would be dropped.
+
+    Raises:
+        ValueError: None of the requested stems is an output of the model.
+    """
+    attribute = _head_attribute(model)
+    if attribute is None or getattr(config.training, "target_instrument", None):
+        return None
+    instruments = list(config.training.instruments)
+    heads = getattr(model, attribute)
+    if len(heads) != len(instruments):
+        return None
+
+    kept = resolve_heads(instruments, keep)
+    if not kept:
+        raise ValueError(f"None of {', '.join(keep)} is an output of this model (outputs: {', '.join(instruments)})")
+    if len(kept) == len(instruments):
+        return None
+
+    params_before = _parameter_count(model)
+    setattr(model, attribute, nn.ModuleList([heads[instruments.index(name)] for name in kept]))
+    if hasattr(model, "num_stems"):
+        model.num_stems = len(kept)
+
+    config.training.instruments = kept
+    if len(kept) == 1:
+        config.training.target_instrument = kept[0]
+    return {
+        "kept": kept,
+        "dropped": [name for name in instruments if name not in kept],
+        "params_before": params_before,
+        "params_after": _parameter_count(model),
+    }
+
+
+def derive_residual(mix, waveforms: Dict[str, Any], kept: List[str]):
+    """Returns mix minus the sum of the kept stems' estimates, as the residual stem."""
+    residual = mix.copy()
+    for name in kept:
+        residual -= waveforms[name]
+    return residual
+
+
+def measure_head_savings(model, config, keep: List[str], device=None, repeats: int = 3) -> Optional[Dict[str, Any]]:
+    """
+    Times one chunk through the model with all heads, then pruned to keep, and reports the saving.
+
+    The model is pruned in place by the second measurement.
+
+    Returns:
+        The prune_instrument_heads() report plus 'full_ms', 'pruned_ms' and 'saving' (fraction of
+        per-chunk compute saved), or None if nothing can be pruned.
+    """
+    device = device or torch.device("cpu")
+    chunk_size = getattr(config.inference, "chunk_size", None) or getattr(config.audio, "chunk_size", 132300)
+    channels = getattr(config.audio, "num_channels", 2)
+    x = torch.randn(1, channels, chunk_size, device=device) * 0.1
+
+    def timed() -> float:
+        with torch.inference_mode():
+            model(x)
+            best = None
+            for _ in range(max(1, repeats)):
+                start = time.perf_counter()
+                model(x)
+                elapsed = time.perf_counter() - start
+                best = elapsed if best is None else min(best, elapsed)
+        return best * 1000.0
+
+    full_ms = timed()
+    report = prune_instrument_heads(model, config, keep)
+    if report is None:
+        return None
+    pruned_ms = timed()
+    return dict(report, full_ms=full_ms, pruned_ms=pruned_ms, saving=1.0 - pruned_ms / full_ms if full_ms else 0.0)
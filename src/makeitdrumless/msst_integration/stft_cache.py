@@ -0,0 +1,159 @@
+import sys
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict, Any, Optional, Tuple
+
+try:
+    import torch
+except ImportError:
+    torch = None
+
+# Positional parameter order of torch.stft after (input, n_fft)
+_STFT_PARAMS = ("hop_length", "win_length", "window", "center", "pad_mode", "normalized", "onesided", "return_complex")
+
+
+def _content_hash(x) -> str:
+    """Exact hash of a tensor's values; any change (including swapped channels or batch rows) changes it."""
+    data = x.detach().contiguous().cpu()
+    return hashlib.blake2b(data.view(torch.uint8).numpy().tobytes(), digest_size=16).hexdigest()
+
+
+class _TorchProxy:
+    """Stands in for the torch module inside a model's source modules, routing torch.stft through a cache."""
+
+    def __init__(self, cache: "SpectralFrontendCache"):
+        self._cache = cache
+
+    def __getattr__(self, name):
+        return getattr(torch, name)
+
+    def stft(self, *args, **kwargs):
+        return self._cache._cached_stft(*args, **kwargs)
+
+
+class SpectralFrontendCache:
+    """
+    Shares complex spectrograms between models that run the same STFT on the same audio chunk.
+
+    While active for a model, the modules its layers are defined in see a torch whose stft is
+    cached: each call is keyed by its STFT parameters (n_fft, hop, window, ...) plus an exact hash
+    of the input, so an ensemble member whose config declares the same STFT front-end as an earlier
+    member reuses the stored spectrogram instead of recomputing it. Entries live in host memory and
+    are admitted until max_bytes is reached; since ensemble members scan a track in the same order,
+    keeping the earliest chunks (rather than LRU eviction) maximizes reuse.
+    """
+
+    def __init__(self, max_bytes: int = 512 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Tuple, Any]" = OrderedDict()
+        self.bytes_used = 0
+        self.hits = 0
+        self.misses = 0
+        self.rejected = 0
+        self._miss_time = 0.0
+        self._thread = None
+
+    def _key(self, x, n_fft: int, params: Dict[str, Any]) -> Tuple:
+        window = params.get("window")
+        window_key = None
+        if window is not None:
+            window_key = (tuple(window.shape), window.dtype, _content_hash(window))
+        param_key = tuple(
+            (name, params.get(name)) for name in _STFT_PARAMS if name != "window"
+        )
+        return (n_fft, param_key, window_key, tuple(x.shape), x.dtype, _content_hash(x))
+
+    def _synchronize(self, device):
+        dev_type = getattr(device, "type", str(device))
+        if dev_type == "cuda":
+            torch.cuda.synchronize()
+        elif dev_type == "mps" and hasattr(torch, "mps"):
+            torch.mps.synchronize()
+
+    def _cached_stft(self, input, n_fft, *args, **kwargs):
+        # Other threads running the same model classes (e.g. a concurrent demix) are not cached
+        if threading.get_ident() != self._thread:
+            return torch.stft(input, n_fft, *args, **kwargs)
+        params = dict(zip(_STFT_PARAMS, args))
+        params.update(kwargs)
+        key = self._key(input, n_fft, params)
+
+        cached = self._entries.get(key)
+        if cached is not None:
+            self.hits += 1
+            return cached.to(input.device, copy=True)
+
+        self.misses += 1
+        start = time.perf_counter()
+        out = torch.stft(input, n_fft, *args, **kwargs)
+        self._synchronize(input.device)
+        self._miss_time += time.perf_counter() - start
+
+        size = out.element_size() * out.nelement()
+        if self.bytes_used + size <= self.max_bytes:
+            self._entries[key] = out.detach().to("cpu", copy=True)
+            self.bytes_used += size
+        else:
+            self.rejected += 1
+        return out
+
+    @contextmanager
+    def activate(self, model):
+        """
+        Routes the model's torch.stft calls through the cache for the duration of the block.
+
+        Only the source modules of the model's layers are patched (their global 'torch' name), and
+        only calls from the activating thread are cached; torch itself is left untouched.
+        """
+        if torch is None or self._thread is not None:
+            yield self
+            return
+        proxy = _TorchProxy(self)
+        patched = []
+        for name in {type(m).__module__ for m in model.modules()}:
+            if name == "torch" or name.startswith("torch."):
+                continue
+            namespace = getattr(sys.modules.get(name), "__dict__", {})
+            if namespace.get("torch") is torch:
+                namespace["torch"] = proxy
+                patched.append(namespace)
+        self._thread = threading.get_ident()
+        try:
+            yield self
+        finally:
+            for namespace in patched:
+                namespace["torch"] = torch
+            self._thread = None
+
+    def clear(self):
+        self._entries.clear()
+        self.bytes_used = 0
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        avg_miss = self._miss_time / self.misses if self.misses else 0.0
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": len(self._entries),
+            "bytes_used": self.bytes_used,
+            "rejected": self.rejected,
+            "stft_time": self._miss_time,
+            "time_saved": avg_miss * self.hits,
+        }
+
+    def report(self, label: Optional[str] = None):
+        """Prints cache hit rate and estimated STFT time saved."""
+        s = self.stats()
+        lookups = s["hits"] + s["misses"]
+        if not lookups:
+            return
+        prefix = f" ({label})" if label else ""
+        print(
+            f"🧮 STFT cache{prefix}: {s['hits']}/{lookups} hits ({s['hit_rate'] * 100:.1f}%), "
+            f"~{s['time_saved']:.2f}s saved, {s['bytes_used'] / (1024 * 1024):.0f} MB cached"
+        )
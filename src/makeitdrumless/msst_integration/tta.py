@@ -0,0 +1,48 @@
+from itertools import combinations
+from typing import List, Tuple, Sequence
+
+# Input transforms the model's output can be mapped back through: swapping the stereo channels and
+# inverting polarity. Both are their own inverse.
+TTA_FLIPS = ("channels", "polarity")
+
+
+def parse_tta_flips(text: str) -> List[str]:
+    """Parses a --tta value ('channels', 'polarity', 'channels,polarity' or 'none')."""
+    flips = [f.strip().lower() for f in (text or "").split(",") if f.strip() and f.strip().lower() != "none"]
+    unknown = [f for f in flips if f not in TTA_FLIPS]
+    if unknown:
+        raise ValueError(f"Unknown TTA transform '{unknown[0]}'. Available: {', '.join(TTA_FLIPS)}")
+    return list(dict.fromkeys(flips))
+
+
+def plan_variants(step: int, shifts: int = 1, flips: Sequence[str] = (), channels: int = 2) -> List[Tuple[int, Tuple[str, ...]]]:
+    """
+    Lists the (grid offset, transforms) variants run for every chunk position of a batched TTA demix.
+
+    Shift passes become chunk grids offset by an even fraction of the hop, so every pass sees the
+    music cut at different chunk boundaries without a shifted copy of the whole track. Each offset
+    is combined with every subset of the flips (a channel swap needs stereo input).
+
+    Args:
+        step: Hop between chunk positions in samples.
+        shifts: Shift passes (1 keeps the single grid).
+        flips: Transforms from TTA_FLIPS.
+        channels: Input channels.
+
+    Returns:
+        List of (offset in samples, tuple of transforms); the first entry is always (0, ()).
+    """
+    shifts = max(1, int(shifts or 1))
+    offsets = list(dict.fromkeys((s * step) // shifts for s in range(shifts)))
+    usable = [f for f in TTA_FLIPS if f in flips and (f != "channels" or channels == 2)]
+    subsets = [combo for n in range(len(usable) + 1) for combo in combinations(usable, n)]
+    return [(offset, subset) for offset in offsets for subset in subsets]
+
+
+def apply_flips(x, flips: Sequence[str], channel_axis: int = 0):
+    """Applies (or, being self-inverse, undoes) the transforms on an audio tensor."""
+    if "channels" in flips:
+        x = x.flip(channel_axis)
+    if "polarity" in flips:
+        x = -x
+    return x
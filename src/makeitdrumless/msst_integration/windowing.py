@@ -0,0 +1,133 @@
+import math
+from typing import Optional, Dict, Any, List
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    import torch
+except ImportError:
+    torch = None
+
+# Supported overlap-add window shapes for chunked demixing
+WINDOW_SHAPES = ("linear", "hann", "tukey")
+
+
+def default_fade_size(chunk_size: int, num_overlap: int, window_shape: str = "linear") -> int:
+    """
+    Returns the fade length (in samples) used for a window shape.
+
+    'linear' keeps MSST's fixed chunk_size // 10 ramps. 'tukey' fades over one hop, which keeps a
+    flat top while making the summed windows constant (constant overlap-add), so a low overlap factor
+    blends as smoothly as a high one. 'hann' fades over half a chunk.
+    """
+    if window_shape == "hann":
+        return chunk_size // 2
+    if window_shape == "tukey":
+        if num_overlap <= 1:
+            return chunk_size // 10
+        return max(1, min(chunk_size // num_overlap, chunk_size // 2))
+    return chunk_size // 10
+
+
+def get_window(window_shape: str, chunk_size: int, fade_size: int) -> "torch.Tensor":
+    """Builds a (chunk_size,) overlap-add window with fade-in/fade-out ramps of fade_size samples."""
+    if window_shape not in WINDOW_SHAPES:
+        raise ValueError(f"Unknown window shape '{window_shape}'. Available: {', '.join(WINDOW_SHAPES)}")
+    fade_size = max(1, min(int(fade_size), chunk_size // 2))
+    window = torch.ones(chunk_size, dtype=torch.float32)
+    if window_shape == "linear":
+        fadein = torch.linspace(0, 1, fade_size)
+    else:
+        # Raised-cosine ramp: sin^2 fade-ins sum to one with the mirrored fade-outs
+        phase = (torch.arange(fade_size, dtype=torch.float32) + 0.5) / fade_size
+        fadein = torch.sin(0.5 * math.pi * phase) ** 2
+    window[:fade_size] = fadein
+    window[-fade_size:] = torch.flip(fadein, dims=[0])
+    return window
+
+
+def plan_hops(
+    chunk_size: int,
+    num_overlap: int,
+    length: int,
+    window_shape: str = "linear",
+    fade_size: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    Plans chunk hops for a track and reports the compute cost of an overlap/window setting.
+
+    Args:
+        chunk_size: Model chunk size in samples.
+        num_overlap: Overlap factor (step = chunk_size // num_overlap).
+        length: Track length in samples.
+        window_shape: One of WINDOW_SHAPES.
+        fade_size: Fade length in samples. Defaults to default_fade_size().
+
+    Returns:
+        Dict with step, border, chunk count, compute multiplier (model samples processed per track sample)
+        and the ripple of the summed windows in the track interior (0.0 means perfectly flat blending).
+    """
+    num_overlap = max(1, int(num_overlap))
+    if fade_size is None:
+        fade_size = default_fade_size(chunk_size, num_overlap, window_shape)
+    step = max(1, chunk_size // num_overlap)
+    border = chunk_size - step
+    padded = length + 2 * border if (length > 2 * border and border > 0) else length
+    num_chunks = max(1, math.ceil(padded / step))
+
+    # Sum the windows over a few periods to measure blending ripple away from the edges
+    window = get_window(window_shape, chunk_size, fade_size).numpy()
+    span = chunk_size + step * (num_overlap + 2)
+    coverage = np.zeros(span, dtype=np.float64)
+    for start in range(0, span - chunk_size + 1, step):
+        coverage[start:start + chunk_size] += window
+    interior = coverage[chunk_size:span - chunk_size] if span > 2 * chunk_size else coverage
+    peak = float(interior.max()) if interior.size else 1.0
+    ripple = float((interior.max() - interior.min()) / peak) if interior.size and peak > 0 else 1.0
+
+    return {
+        "window_shape": window_shape,
+        "fade_size": int(fade_size),
+        "num_overlap": num_overlap,
+        "step": step,
+        "border": border,
+        "num_chunks": num_chunks,
+        "compute_multiplier": num_chunks * chunk_size / max(1, length),
+        "window_mean": float(window.mean()),
+        "ripple": ripple,
+    }
+
+
+def select_cheapest_overlap(rows: List[Dict[str, Any]], sdr_target: float) -> Optional[Dict[str, Any]]:
+    """
+    Picks the cheapest setting from a quality-versus-throughput table that meets an SDR target.
+
+    Args:
+        rows: Table rows with at least 'sdr' and 'seconds' (or 'compute_multiplier') keys.
+        sdr_target: Minimum acceptable SDR in dB.
+
+    Returns:
+        The qualifying row with the lowest cost, or None if no setting meets the target.
+    """
+    passing = [r for r in rows if r.get("sdr") is not None and r["sdr"] >= sdr_target]
+    if not passing:
+        return None
+    return min(passing, key=lambda r: (r.get("seconds", r.get("compute_multiplier", 0.0)), -r["sdr"]))
+
+
+def format_overlap_table(rows: List[Dict[str, Any]]) -> str:
+    """Formats quality-versus-throughput rows as a fixed-width text table."""
+    lines = [
+        f"{'WINDOW':<8} | {'OVERLAP':>7} | {'FADE':>7} | {'COMPUTE':>7} | {'RIPPLE':>6} | {'TIME (s)':>8} | {'SDR (dB)':>8}",
+        "-" * 70,
+    ]
+    for r in rows:
+        sdr_str = f"{r['sdr']:.2f}" if r.get("sdr") is not None else "-"
+        lines.append(
+            f"{r['window_shape']:<8} | {r['num_overlap']:>7} | {r['fade_size']:>7} | "
+            f"{r['compute_multiplier']:>6.2f}x | {r['ripple']:>6.3f} | {r.get('seconds', 0.0):>8.2f} | {sdr_str:>8}"
+        )
+    return "\n".join(lines)
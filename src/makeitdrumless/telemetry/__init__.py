@@ -0,0 +1,23 @@
+from .recorder import (
+    RunTelemetry,
+    start_run,
+    end_run,
+    get_active_run,
+    bind_run,
+    stage,
+    record_batch_time,
+    write_batch_report,
+    get_default_report_dir,
+)
+
+__all__ = [
+    "RunTelemetry",
+    "start_run",
+    "end_run",
+    "get_active_run",
+    "bind_run",
+    "stage",
+    "record_batch_time",
+    "write_batch_report",
+    "get_default_report_dir",
+]
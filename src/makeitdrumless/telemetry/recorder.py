@@ -0,0 +1,241 @@
+import os
+import sys
+import json
+import time
+import platform
+import threading
+from contextlib import contextmanager
+from typing import Optional, List, Dict, Any
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+try:
+    import torch
+except ImportError:
+    torch = None
+
+
+# Currently active run recorder (None when telemetry is not being collected)
+_ACTIVE_RUN: Optional["RunTelemetry"] = None
+
+# Per-thread recorder override (e.g. background download workers recording their own stages)
+_THREAD_STATE = threading.local()
+
+
+def get_default_report_dir() -> str:
+    """Returns the default directory for JSON run reports (~/.cache/makeitdrumless/reports)."""
+    from makeitdrumless.msst_integration.models import get_base_cache_dir
+    return str(get_base_cache_dir() / "reports")
+
+
+def peak_rss_bytes() -> int:
+    """Returns the peak resident set size of this process (and finished children) in bytes."""
+    if resource is None:
+        return 0
+    # ru_maxrss is reported in bytes on macOS and in kilobytes on Linux
+    scale = 1 if sys.platform == "darwin" else 1024
+    usage_self = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    usage_children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return int(max(usage_self, usage_children) * scale)
+
+
+def device_memory_bytes() -> int:
+    """Returns the accelerator memory currently (MPS) or at peak (CUDA) allocated by PyTorch in bytes."""
+    if torch is None:
+        return 0
+    try:
+        if torch.cuda.is_available():
+            return int(torch.cuda.max_memory_allocated())
+        if hasattr(torch, "mps") and torch.backends.mps.is_available():
+            return int(torch.mps.driver_allocated_memory())
+    except Exception:
+        pass
+    return 0
+
+
+def _percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    idx = min(len(sorted_values) - 1, max(0, int(round(pct / 100.0 * (len(sorted_values) - 1)))))
+    return sorted_values[idx]
+
+
+def summarize_durations(values: List[float]) -> Dict[str, float]:
+    """Summarizes a list of durations (seconds) into count, mean, and p50/p90/p99/max percentiles."""
+    ordered = sorted(values)
+    count = len(ordered)
+    return {
+        "count": count,
+        "total": float(sum(ordered)),
+        "mean": float(sum(ordered) / count) if count else 0.0,
+        "p50": _percentile(ordered, 50),
+        "p90": _percentile(ordered, 90),
+        "p99": _percentile(ordered, 99),
+        "max": ordered[-1] if ordered else 0.0,
+    }
+
+
+class RunTelemetry:
+    """Collects per-stage timings, per-batch demix timings and peak memory for a single track run."""
+
+    def __init__(self, label: str):
+        self.label = label
+        self.started_at = time.strftime("%Y-%m-%dT%H:%M:%S%z")
+        self._start = time.perf_counter()
+        self.stages: List[Dict[str, Any]] = []
+        self.batch_times: List[float] = []
+        self.batch_chunks = 0
+        self.metadata: Dict[str, Any] = {}
+        self.peak_device_memory = 0
+        # Names of the stages open on each thread, innermost last
+        self._open = threading.local()
+
+    def sample_memory(self) -> Dict[str, int]:
+        """Samples process RSS and device memory, keeping the running device peak."""
+        device_mem = device_memory_bytes()
+        self.peak_device_memory = max(self.peak_device_memory, device_mem)
+        return {"rss_peak_bytes": peak_rss_bytes(), "device_memory_bytes": device_mem}
+
+    @contextmanager
+    def stage(self, name: str, **meta):
+        """
+        Times the wrapped block as a named pipeline stage.
+
+        A stage opened inside another one on the same thread records it as 'parent'; both appear
+        in stage_totals, so nested time is counted under each enclosing stage as well.
+        """
+        open_stages = self._open.__dict__.setdefault("names", [])
+        parent = open_stages[-1] if open_stages else None
+        open_stages.append(name)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            open_stages.pop()
+            entry = {"name": name, "seconds": time.perf_counter() - start}
+            if parent is not None:
+                entry["parent"] = parent
+            entry.update(self.sample_memory())
+            if meta:
+                entry["meta"] = meta
+            self.stages.append(entry)
+
+    def record_batch(self, seconds: float, chunks: int = 1):
+        self.batch_times.append(float(seconds))
+        self.batch_chunks += int(chunks)
+
+    def set(self, key: str, value: Any):
+        self.metadata[key] = value
+
+    def absorb(self, other: "RunTelemetry"):
+        """Prepends another recorder's stages and batch timings (e.g. a download done ahead of this run)."""
+        self.stages = other.stages + self.stages
+        self.batch_times = other.batch_times + self.batch_times
+        self.batch_chunks += other.batch_chunks
+
+    def to_dict(self) -> Dict[str, Any]:
+        stage_totals: Dict[str, float] = {}
+        for entry in self.stages:
+            stage_totals[entry["name"]] = stage_totals.get(entry["name"], 0.0) + entry["seconds"]
+        memory = self.sample_memory()
+        return {
+            "schema_version": 2,
+            "label": self.label,
+            "started_at": self.started_at,
+            "total_seconds": time.perf_counter() - self._start,
+            "host": {
+                "platform": platform.platform(),
+                "machine": platform.machine(),
+                "python": platform.python_version(),
+                "cpu_count": os.cpu_count(),
+            },
+            "metadata": self.metadata,
+            "stages": self.stages,
+            "stage_totals": stage_totals,
+            # Percentiles are over model batches: one forward pass runs several chunks at once
+            "demix_batches": dict(
+                summarize_durations(self.batch_times),
+                chunks=self.batch_chunks,
+                seconds_per_chunk=sum(self.batch_times) / self.batch_chunks if self.batch_chunks else 0.0,
+            ),
+            "peak_rss_bytes": memory["rss_peak_bytes"],
+            "peak_device_memory_bytes": self.peak_device_memory,
+        }
+
+    def write_json(self, path: str) -> str:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, indent=2, default=str)
+        return path
+
+
+def start_run(label: str) -> RunTelemetry:
+    """Starts collecting telemetry for a new track run and makes it the active recorder."""
+    global _ACTIVE_RUN
+    _ACTIVE_RUN = RunTelemetry(label)
+    return _ACTIVE_RUN
+
+
+def end_run() -> Optional[RunTelemetry]:
+    """Stops the active recorder and returns it."""
+    global _ACTIVE_RUN
+    run, _ACTIVE_RUN = _ACTIVE_RUN, None
+    return run
+
+
+def get_active_run() -> Optional[RunTelemetry]:
+    return getattr(_THREAD_STATE, "run", None) or _ACTIVE_RUN
+
+
+@contextmanager
+def bind_run(run: RunTelemetry):
+    """Routes stage() and record_batch_time() calls made by the current thread to run."""
+    previous = getattr(_THREAD_STATE, "run", None)
+    _THREAD_STATE.run = run
+    try:
+        yield run
+    finally:
+        _THREAD_STATE.run = previous
+
+
+@contextmanager
+def stage(name: str, **meta):
+    """Times a pipeline stage on the active recorder (no-op when telemetry is inactive)."""
+    run = get_active_run()
+    if run is None:
+        yield
+        return
+    with run.stage(name, **meta):
+        yield
+
+
+def record_batch_time(seconds: float, chunks: int = 1):
+    """Records the model execution time of one demix batch of chunks on the active recorder."""
+    run = get_active_run()
+    if run is not None:
+        run.record_batch(seconds, chunks)
+
+
+def write_batch_report(reports: List[Dict[str, Any]], path: str) -> str:
+    """Writes an aggregate JSON report for a batch of track runs (per-stage totals and peak memory)."""
+    stage_totals: Dict[str, float] = {}
+    for report in reports:
+        for name, seconds in report.get("stage_totals", {}).items():
+            stage_totals[name] = stage_totals.get(name, 0.0) + seconds
+
+    batch = {
+        "schema_version": 2,
+        "track_count": len(reports),
+        "total_seconds": sum(r.get("total_seconds", 0.0) for r in reports),
+        "stage_totals": stage_totals,
+        "peak_rss_bytes": max((r.get("peak_rss_bytes", 0) for r in reports), default=0),
+        "peak_device_memory_bytes": max((r.get("peak_device_memory_bytes", 0) for r in reports), default=0),
+        "tracks": reports,
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(batch, f, indent=2, default=str)
+    return path
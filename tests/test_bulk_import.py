@@ -0,0 +1,57 @@
+import os
+import sys
+import tempfile
+import unittest
+
+# Ensure src/ is in sys.path
+src_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src"))
+if src_dir not in sys.path:
+    sys.path.insert(0, src_dir)
+
+from test_ensemble_caching import write_dummy_wav
+from makeitdrumless.audio.importer import find_audio_files, import_directory
+from makeitdrumless.library import get_library, hash_file
+
+
+class TestBulkImport(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.inbox = os.path.join(self.temp_dir.name, "inbox")
+        self.base_dir = os.path.join(self.temp_dir.name, "MakeItDrumless")
+        write_dummy_wav(os.path.join(self.inbox, "Band - First Song.wav"), duration_samples=1000)
+        write_dummy_wav(os.path.join(self.inbox, "live", "Second Song.wav"), duration_samples=2000)
+        write_dummy_wav(os.path.join(self.inbox, "live", "Second Song (Drumless).wav"), duration_samples=3000)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_find_audio_files_skips_outputs(self):
+        names = [os.path.basename(p) for p in find_audio_files(self.inbox)]
+        self.assertEqual(names, ["Band - First Song.wav", "Second Song.wav"])
+
+    def test_already_imported_files_are_skipped(self):
+        # Index both inputs as if imported before: nothing is converted (and ffmpeg is not needed)
+        library = get_library(self.base_dir)
+        for source in find_audio_files(self.inbox):
+            folder = os.path.join(self.base_dir, os.path.splitext(os.path.basename(source))[0])
+            original = os.path.join(folder, "x (Original).wav")
+            write_dummy_wav(original)
+            library.record_track(folder, original, keys=[hash_file(source)])
+
+        result = import_directory(self.inbox, output_folder=self.base_dir, workers=2)
+        self.assertEqual(len(result["skipped"]), 2)
+        self.assertEqual(result["imported"], [])
+
+    def test_import_lays_out_track_folders(self):
+        result = import_directory(self.inbox, output_folder=self.base_dir, workers=2)
+        self.assertEqual(len(result["imported"]), 2)
+        self.assertTrue(os.path.exists(os.path.join(self.base_dir, "First Song", "First Song (Original).wav")))
+        self.assertTrue(os.path.exists(os.path.join(self.base_dir, "Second Song", "Second Song (Original).wav")))
+
+        again = import_directory(self.inbox, output_folder=self.base_dir, workers=2)
+        self.assertEqual(len(again["skipped"]), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,139 @@
+import os
+import sys
+import shutil
+import tempfile
+import threading
+import subprocess
+import unittest
+
+import numpy as np
+import soundfile as sf
+
+# Ensure src/ is in sys.path
+src_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src"))
+if src_dir not in sys.path:
+    sys.path.insert(0, src_dir)
+
+from makeitdrumless.ffmpeg.manager import drain_stderr
+from makeitdrumless.audio.decoder import (
+    decode_audio_pcm,
+    register_pcm,
+    alias_pcm,
+    discard_pcm,
+    get_cached_pcm,
+    clear_pcm_cache,
+    load_audio_mix,
+)
+
+SR = 44100
+
+
+def _ffmpeg(*args):
+    subprocess.run(["ffmpeg", "-hide_banner", "-loglevel", "error", "-nostdin", "-y", *args], check=True)
+
+
+class TestPcmCache(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.pcm = np.random.default_rng(0).standard_normal((2, SR)).astype(np.float32)
+
+    def tearDown(self):
+        clear_pcm_cache()
+        self.temp_dir.cleanup()
+
+    def test_register_alias_discard_lifecycle(self):
+        download = os.path.join(self.temp_dir.name, "download.m4a")
+        original = os.path.join(self.temp_dir.name, "Song", "Song (Original).m4a")
+
+        register_pcm(download, SR, self.pcm)
+        self.assertIs(get_cached_pcm(download, SR), self.pcm)
+        self.assertIsNone(get_cached_pcm(download, 48000))
+
+        # The moved original reuses the buffer; neither file has to exist to be served from the cache
+        alias_pcm(download, original)
+        mix, sr = load_audio_mix(original, SR)
+        self.assertIs(mix, self.pcm)
+        self.assertEqual(sr, SR)
+
+        discard_pcm(download)
+        self.assertIsNone(get_cached_pcm(download, SR))
+        self.assertIs(get_cached_pcm(original, SR), self.pcm)
+        discard_pcm(original)
+        self.assertIsNone(get_cached_pcm(original, SR))
+
+    def test_relative_and_absolute_paths_share_entries(self):
+        path = os.path.join(self.temp_dir.name, "a.wav")
+        register_pcm(os.path.relpath(path), SR, self.pcm)
+        self.assertIs(get_cached_pcm(path, SR), self.pcm)
+
+    def test_stderr_is_drained_while_stdout_is_read(self):
+        # Writes far more to stderr than a pipe buffer holds before producing any stdout
+        script = "import sys; sys.stderr.write('x' * 4000000); sys.stderr.flush(); sys.stdout.write('done')"
+        proc = subprocess.Popen([sys.executable, "-c", script], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        watchdog = threading.Timer(30.0, proc.kill)
+        watchdog.start()
+        try:
+            collect = drain_stderr(proc)
+            out = proc.stdout.read()
+            proc.wait()
+        finally:
+            watchdog.cancel()
+        self.assertEqual(out, b"done")
+        self.assertEqual(len(collect()), 4000000)
+
+
+@unittest.skipUnless(shutil.which("ffmpeg"), "ffmpeg not installed")
+class TestDirectDecode(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        t = np.arange(2 * SR) / SR
+        self.audio = np.stack([0.5 * np.sin(2 * np.pi * 440 * t), 0.25 * np.sin(2 * np.pi * 660 * t)]).astype(np.float32)
+        self.wav = os.path.join(self.temp_dir.name, "source.wav")
+        sf.write(self.wav, self.audio.T, SR, subtype="FLOAT")
+        self.flac = os.path.join(self.temp_dir.name, "source.flac")
+        _ffmpeg("-i", self.wav, "-c:a", "flac", "-sample_fmt", "s32", self.flac)
+
+    def tearDown(self):
+        clear_pcm_cache()
+        self.temp_dir.cleanup()
+
+    def test_decodes_flac_to_float_pcm(self):
+        pcm = decode_audio_pcm(self.flac, sample_rate=SR)
+        self.assertEqual(pcm.dtype, np.float32)
+        self.assertEqual(pcm.shape, self.audio.shape)
+        np.testing.assert_allclose(pcm, self.audio, atol=1e-4)
+
+    def test_resamples_and_streams_to_memmap(self):
+        memmap_path = os.path.join(self.temp_dir.name, "pcm", "song.f32")
+        pcm = decode_audio_pcm(self.wav, sample_rate=22050, memmap_path=memmap_path)
+        self.assertIsInstance(pcm, np.memmap)
+        self.assertEqual(pcm.shape[0], 2)
+        self.assertAlmostEqual(pcm.shape[1], SR, delta=64)
+        self.assertEqual(os.path.getsize(memmap_path), pcm.shape[1] * 2 * 4)
+
+    def test_keeps_the_compressed_stream_while_decoding(self):
+        kept = os.path.join(self.temp_dir.name, "Song", "Song (Original).flac")
+        pcm = decode_audio_pcm(self.flac, sample_rate=SR, keep_original_path=kept)
+        self.assertTrue(os.path.getsize(kept) > 0)
+        np.testing.assert_allclose(decode_audio_pcm(kept, sample_rate=SR), pcm, atol=1e-6)
+
+    def test_load_audio_mix_decodes_containers_with_ffmpeg(self):
+        mka = os.path.join(self.temp_dir.name, "source.mka")
+        _ffmpeg("-i", self.wav, "-c:a", "flac", mka)
+        mix, sr = load_audio_mix(mka, SR)
+        self.assertEqual(sr, SR)
+        np.testing.assert_allclose(mix, self.audio, atol=1e-4)
+
+    def test_failure_reports_ffmpeg_error(self):
+        broken = os.path.join(self.temp_dir.name, "broken.m4a")
+        with open(broken, "wb") as f:
+            f.write(b"not audio" * 1000)
+        with self.assertRaises(RuntimeError) as ctx:
+            decode_audio_pcm(broken)
+        self.assertIn("broken.m4a", str(ctx.exception))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,117 @@
+import os
+import sys
+import tempfile
+import unittest
+
+import numpy as np
+
+# Ensure src/ is in sys.path
+src_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src"))
+if src_dir not in sys.path:
+    sys.path.insert(0, src_dir)
+
+try:
+    import torch
+    from ml_collections import ConfigDict
+except ImportError:
+    torch = None
+
+from makeitdrumless.msst_integration.checkpoint import DemixCheckpoint, mix_fingerprint, clear_demix_checkpoint
+from makeitdrumless.msst_integration.mps_patch import demix
+
+CHUNK = 2048
+
+
+class _Interrupted(Exception):
+    """Stands in for the process being killed mid-separation."""
+
+
+class _Split(torch.nn.Module if torch else object):
+    """Stand-in 2-stem model (0.3x / 0.7x, slightly non-linear) that can be made to fail after some batches."""
+
+    def __init__(self, fail_after=None):
+        super().__init__()
+        self.fail_after = fail_after
+        self.calls = 0
+
+    def forward(self, x):
+        if self.fail_after is not None and self.calls >= self.fail_after:
+            raise _Interrupted()
+        self.calls += 1
+        return torch.stack([0.3 * x, 0.7 * torch.tanh(x)], dim=1)
+
+
+def _config(checkpoint_dir=None, silence_threshold_db=None):
+    return ConfigDict({
+        "training": {"instruments": ["drums", "other"], "target_instrument": None, "use_amp": False},
+        "inference": {
+            "chunk_size": CHUNK, "num_overlap": 4, "batch_size": 2, "window_shape": "hann",
+            "silence_threshold_db": silence_threshold_db, "silence_fill": "passthrough",
+            # Save after every batch
+            "checkpoint_dir": checkpoint_dir, "checkpoint_interval": 1e-9, "checkpoint_tag": "test",
+        },
+    })
+
+
+@unittest.skipIf(torch is None, "torch / ml_collections not installed")
+class TestDemixCheckpoint(unittest.TestCase):
+
+    def setUp(self):
+        self.mix = (0.2 * np.random.default_rng(0).standard_normal((2, 30000))).astype(np.float32)
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.stems_dir = os.path.join(self.temp_dir.name, "stems_test")
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def _demix(self, model, **config):
+        return demix(_config(**config), model, self.mix, torch.device("cpu"), model_type="bs_roformer")
+
+    def _interrupt(self, after, **config):
+        with self.assertRaises(_Interrupted):
+            self._demix(_Split(fail_after=after), checkpoint_dir=self.stems_dir, **config)
+
+    def test_resume_matches_uninterrupted_run(self):
+        full_model = _Split()
+        full = self._demix(full_model)
+
+        self._interrupt(after=5)
+        resumed_model = _Split()
+        resumed = self._demix(resumed_model, checkpoint_dir=self.stems_dir)
+
+        # Only the chunks after the last checkpoint ran again
+        self.assertEqual(resumed_model.calls, full_model.calls - 5)
+        for stem in ("drums", "other"):
+            np.testing.assert_allclose(resumed[stem], full[stem], atol=1e-6)
+
+    def test_changed_silence_gate_starts_over(self):
+        full_model = _Split()
+        self._demix(full_model)
+
+        self._interrupt(after=5)
+        model = _Split()
+        self._demix(model, checkpoint_dir=self.stems_dir, silence_threshold_db=-60.0)
+        self.assertEqual(model.calls, full_model.calls)
+
+    def test_stale_checkpoint_is_discarded(self):
+        shape = (2, 2, 5000)
+        mix = torch.randn(2, 5000)
+        fingerprint = mix_fingerprint(mix, CHUNK, CHUNK // 2, ["drums", "other"], {"model": "test"})
+        checkpoint = DemixCheckpoint(self.stems_dir, fingerprint)
+        result, counter = torch.rand(shape), torch.ones(5000)
+        checkpoint.save(result, counter, CHUNK)
+
+        restored = torch.zeros(shape)
+        self.assertEqual(DemixCheckpoint(self.stems_dir, fingerprint).restore(restored, torch.zeros(5000)), CHUNK)
+        self.assertTrue(torch.equal(restored[..., :CHUNK], result[..., :CHUNK]))
+
+        # A different input or model never resumes a stale checkpoint
+        other = mix_fingerprint(mix * 0.5, CHUNK, CHUNK // 2, ["drums", "other"], {"model": "test"})
+        self.assertEqual(DemixCheckpoint(self.stems_dir, other).restore(torch.zeros(shape), torch.zeros(5000)), 0)
+
+        clear_demix_checkpoint(self.stems_dir)
+        self.assertEqual(os.listdir(self.stems_dir), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,66 @@
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+# Ensure src/ is in sys.path
+src_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src"))
+if src_dir not in sys.path:
+    sys.path.insert(0, src_dir)
+
+from makeitdrumless.msst_integration import calibration
+
+
+class TestDeviceCalibration(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        patcher = mock.patch.dict(os.environ, {"MAKEITDRUMLESS_CACHE_DIR": self.temp_dir.name})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self.temp_dir.cleanup)
+
+    def test_fastest_backend_is_measured_once_and_cached(self):
+        timings = {"mps": 0.40, "cpu": 0.25}
+        calls = []
+
+        def fake_time(backend, *args):
+            calls.append(backend)
+            return timings[backend]
+
+        with mock.patch.object(calibration, "_time_torch_backend", fake_time), \
+                mock.patch.object(calibration, "apply_all_patches"):
+            first = calibration.calibrate_device("scnet_xl", "scnet", "cfg.yaml", "model.ckpt", backends=["mps", "cpu"])
+            again = calibration.calibrate_device("scnet_xl", "scnet", "cfg.yaml", "model.ckpt", backends=["mps", "cpu"])
+
+        self.assertEqual(first["device"], "cpu")
+        self.assertEqual(first["threads"], os.cpu_count() or 1)
+        self.assertEqual(again["device"], "cpu")
+        self.assertEqual(calls, ["mps", "cpu"])
+        self.assertTrue(os.path.exists(os.path.join(self.temp_dir.name, calibration.CALIBRATION_FILENAME)))
+
+        # Another backend set (or host) is a different calibration
+        self.assertNotEqual(
+            calibration.calibration_key("scnet_xl", ["mps", "cpu"]),
+            calibration.calibration_key("scnet_xl", ["cpu"]),
+        )
+
+    def test_failing_backend_is_skipped(self):
+        def fake_time(backend, *args):
+            if backend == "mps":
+                raise RuntimeError("op not implemented for MPS")
+            return 0.5
+
+        with mock.patch.object(calibration, "_time_torch_backend", fake_time), \
+                mock.patch.object(calibration, "apply_all_patches"):
+            result = calibration.calibrate_device("bs_roformer", "bs_roformer", "c", "m", backends=["mps", "cpu"])
+        self.assertEqual(result["device"], "cpu")
+        self.assertEqual(list(result["rtf"]), ["cpu"])
+
+        calibration.clear_calibrations()
+        self.assertFalse(os.path.exists(os.path.join(self.temp_dir.name, calibration.CALIBRATION_FILENAME)))
+
+
+if __name__ == "__main__":
+    unittest.main()
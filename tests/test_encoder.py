@@ -0,0 +1,99 @@
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+# Ensure src/ is in sys.path
+src_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src"))
+if src_dir not in sys.path:
+    sys.path.insert(0, src_dir)
+
+from makeitdrumless.audio.encoder import (
+    OUTPUT_CODECS,
+    output_extension,
+    track_tags,
+    encode_pcm,
+    submit_encode,
+    _encoder_args,
+)
+
+
+class TestEncoder(unittest.TestCase):
+
+    def test_track_tags(self):
+        tags = track_tags({"title": "Queen - Bohemian Rhapsody"}, model_name="bs_roformer")
+        self.assertEqual(tags["title"], "Bohemian Rhapsody (Drumless)")
+        self.assertEqual(tags["artist"], "Queen")
+        self.assertIn("bs_roformer", tags["comment"])
+        self.assertEqual(track_tags(None)["title"], "Drumless Version")
+
+    def test_encoder_arguments(self):
+        self.assertEqual(_encoder_args("mp3", None, None)[:4], ["-c:a", "libmp3lame", "-b:a", "320k"])
+        self.assertEqual(_encoder_args("mp3", None, "2")[:4], ["-c:a", "libmp3lame", "-q:a", "2"])
+        self.assertIn("on", _encoder_args("opus", "128k", "1"))
+        self.assertNotIn("-b:a", _encoder_args("flac", "320k", None))
+        self.assertEqual(output_extension("aac"), ".m4a")
+        with self.assertRaises(ValueError):
+            output_extension("wma")
+
+    @unittest.skipUnless(shutil.which("ffmpeg"), "ffmpeg not installed")
+    def test_parallel_encodes(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            t = np.arange(44100) / 44100
+            audio = np.stack([np.sin(2 * np.pi * 440 * t)] * 2, axis=1).astype(np.float32) * 0.5
+            futures = [
+                submit_encode(audio, 44100, os.path.join(tmp, f"out{OUTPUT_CODECS[c]['ext']}"), codec=c,
+                              tags={"title": "Test (Drumless)"})
+                for c in OUTPUT_CODECS
+            ]
+            for future in futures:
+                path = future.result()
+                self.assertTrue(os.path.getsize(path) > 0)
+            self.assertFalse(any(".part" in f for f in os.listdir(tmp)))
+
+    def test_missing_encoder_leaves_no_partial_file(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            out = os.path.join(tmp, "out.mp3")
+            os.environ["FFMPEG_BINARY"] = os.path.join(tmp, "no-such-ffmpeg")
+            try:
+                with self.assertRaises(OSError):
+                    encode_pcm(np.zeros((100, 2), dtype=np.float32), 44100, out)
+            finally:
+                del os.environ["FFMPEG_BINARY"]
+            self.assertEqual(os.listdir(tmp), [])
+
+    @unittest.skipIf(os.name == "nt", "needs an executable script as the ffmpeg stand-in")
+    def test_verbose_ffmpeg_does_not_block_the_pipe(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            # Logs more than a pipe buffer holds before it reads any input, then fails if asked to
+            fake = os.path.join(tmp, "ffmpeg")
+            with open(fake, "w") as f:
+                f.write(
+                    f"#!{sys.executable}\n"
+                    "import sys\n"
+                    "sys.stderr.write('warning: ' * 200000)\n"
+                    "sys.stderr.flush()\n"
+                    "data = sys.stdin.buffer.read()\n"
+                    "if 'fail' in sys.argv[-1]:\n"
+                    "    sys.stderr.write('Unknown encoder')\n"
+                    "    sys.exit(1)\n"
+                    "open(sys.argv[-1], 'wb').write(data)\n"
+                )
+            os.chmod(fake, 0o755)
+            audio = np.zeros((44100 * 5, 2), dtype=np.float32)
+            os.environ["FFMPEG_BINARY"] = fake
+            try:
+                out = encode_pcm(audio, 44100, os.path.join(tmp, "out.mp3"))
+                self.assertEqual(os.path.getsize(out), audio.nbytes)
+                with self.assertRaises(RuntimeError) as ctx:
+                    encode_pcm(audio, 44100, os.path.join(tmp, "fail.mp3"))
+                self.assertIn("Unknown encoder", str(ctx.exception))
+            finally:
+                del os.environ["FFMPEG_BINARY"]
+
+
+if __name__ == "__main__":
+    unittest.main()
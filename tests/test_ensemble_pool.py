@@ -0,0 +1,66 @@
+import os
+import sys
+import unittest
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+# Ensure src/ is in sys.path
+src_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src"))
+if src_dir not in sys.path:
+    sys.path.insert(0, src_dir)
+
+from makeitdrumless.msst_integration import ensemble_pool
+from makeitdrumless.msst_integration.ensemble_pool import plan_ensemble_workers, estimate_member_memory
+from makeitdrumless.msst_integration.memory import estimate_demix_memory
+
+
+def _read_shared_input(path, sample_rate):
+    from makeitdrumless.audio.decoder import load_audio_mix
+
+    mix, _ = load_audio_mix(path, sample_rate)
+    return float(mix.sum()), mix.shape, ensemble_pool._worker_state["cores"]
+
+
+class TestEnsemblePool(unittest.TestCase):
+
+    def test_cores_split_into_disjoint_sets(self):
+        core_sets = plan_ensemble_workers(3, range(32))
+        self.assertEqual([len(c) for c in core_sets], [11, 11, 10])
+        self.assertEqual(sorted(sum(core_sets, [])), list(range(32)))
+
+    def test_concurrency_limited_by_cores_and_memory(self):
+        self.assertEqual(len(plan_ensemble_workers(3, range(6))), 1)
+        self.assertEqual(len(plan_ensemble_workers(3, range(32), member_bytes=3 << 30, memory_cap_bytes=7 << 30)), 2)
+        self.assertEqual(len(plan_ensemble_workers(3, range(32), max_workers=2)), 2)
+        self.assertEqual(len(plan_ensemble_workers(2, range(32), member_bytes=8 << 30, memory_cap_bytes=1 << 30)), 1)
+
+    def test_member_estimate_excludes_shared_input(self):
+        frames = 44100 * 60
+        full = estimate_demix_memory(frames, 4, 132300)
+        self.assertEqual(estimate_member_memory("/nonexistent.yaml", "/nonexistent.ckpt", frames), full["total"] - frames * 2 * 4)
+
+    def test_worker_reads_shared_input_without_decoding(self):
+        mix = np.random.default_rng(0).standard_normal((2, 4096)).astype(np.float32)
+        shm = shared_memory.SharedMemory(create=True, size=mix.nbytes)
+        try:
+            np.ndarray(mix.shape, dtype=np.float32, buffer=shm.buf)[:] = mix
+            ctx = multiprocessing.get_context("spawn")
+            slots = ctx.Queue()
+            slots.put(0)
+            path = "/nonexistent/song.flac"
+            init_args = (slots, [[0]], shm.name, mix.shape, "float32", path, 44100)
+            with ProcessPoolExecutor(1, mp_context=ctx, initializer=ensemble_pool._init_worker, initargs=init_args) as pool:
+                total, shape, cores = pool.submit(_read_shared_input, path, 44100).result()
+        finally:
+            shm.close()
+            shm.unlink()
+        self.assertAlmostEqual(total, float(mix.sum()), places=3)
+        self.assertEqual(tuple(shape), mix.shape)
+        self.assertEqual(cores, [0])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,87 @@
+import os
+import sys
+import tempfile
+import unittest
+
+import numpy as np
+
+# Ensure src/ is in sys.path
+src_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src"))
+if src_dir not in sys.path:
+    sys.path.insert(0, src_dir)
+
+from makeitdrumless.audio.metrics import sdr, si_sdr, stem_scores
+from makeitdrumless.audio.stem_io import write_stem, mark_stems_complete
+from makeitdrumless.msst_integration.evaluation import (
+    write_fixture,
+    load_fixtures,
+    evaluate_modes,
+    check_thresholds,
+    format_quality_table,
+)
+
+
+def _stems(n=44100):
+    rng = np.random.default_rng(1)
+    return {name: (0.2 * rng.standard_normal((2, n))).astype(np.float32) for name in ("drums", "bass", "other")}
+
+
+class TestEvaluation(unittest.TestCase):
+
+    def test_vectorized_scores_match_scalar_metrics(self):
+        refs = _stems()
+        rng = np.random.default_rng(2)
+        ests = {k: v + 0.05 * rng.standard_normal(v.shape).astype(np.float32) for k, v in refs.items()}
+        scores = stem_scores(refs, ests)
+        for name in refs:
+            self.assertAlmostEqual(scores[name]["sdr"], sdr(refs[name], ests[name]), places=6)
+            self.assertAlmostEqual(scores[name]["si_sdr"], si_sdr(refs[name], ests[name]), places=6)
+
+    def test_si_sdr_ignores_gain(self):
+        ref = _stems()["drums"]
+        est = ref + 0.01 * np.random.default_rng(3).standard_normal(ref.shape)
+        self.assertAlmostEqual(si_sdr(ref, 0.5 * est), si_sdr(ref, est), places=6)
+        self.assertLess(sdr(ref, 0.5 * est), sdr(ref, est))
+
+    def test_modes_scored_and_thresholds_enforced(self):
+        noise = {"reference": 0.001, "fast": 0.002, "broken": 0.2}
+
+        def fake_separate(input_audio_path, output_folder, model_preset, force, checkpoint_interval, noise_level=0.0, **kw):
+            rng = np.random.default_rng(4)
+            paths = {}
+            for name, audio in fixture_stems.items():
+                est = audio + noise_level * rng.standard_normal(audio.shape).astype(np.float32)
+                paths[name] = write_stem(est, 44100, output_folder, name)
+            mark_stems_complete(output_folder, paths)
+            return paths
+
+        with tempfile.TemporaryDirectory() as tmp:
+            fixture_stems = _stems()
+            write_fixture(os.path.join(tmp, "fixtures", "one"), fixture_stems)
+            fixtures = load_fixtures(os.path.join(tmp, "fixtures"))
+            self.assertEqual(len(fixtures), 1)
+            self.assertTrue(os.path.exists(fixtures[0]["mixture"]))
+            self.assertEqual(sorted(fixtures[0]["stems"]), ["bass", "drums", "other"])
+
+            modes = {name: {"noise_level": level} for name, level in noise.items()}
+            rows = evaluate_modes(fixtures, "fake", os.path.join(tmp, "out"), modes=modes, separate=fake_separate)
+
+        by_mode = {r["mode"]: r for r in rows}
+        self.assertGreater(by_mode["reference"]["sdr"], by_mode["fast"]["sdr"])
+        self.assertGreater(by_mode["fast"]["sdr"], by_mode["broken"]["sdr"])
+
+        failures = check_thresholds(rows, max_sdr_drop=10.0)
+        self.assertEqual(len(failures), 1)
+        self.assertTrue(failures[0].startswith("broken:"))
+        failures = check_thresholds(rows, {"fast": {"max_sdr_drop": 1.0, "stem:drums": 100.0}}, max_sdr_drop=10.0)
+        self.assertEqual(sorted(f.split(":")[0] for f in failures), ["broken", "fast", "fast"])
+        self.assertIn("broken", format_quality_table(rows))
+
+        # An unscored reference fails on its own and leaves no baseline for the drop check
+        rows[[r["mode"] for r in rows].index("reference")] = dict(by_mode["reference"], sdr=None, si_sdr=None)
+        failures = check_thresholds(rows, max_sdr_drop=10.0)
+        self.assertEqual(sorted(f.split(":")[0] for f in failures), ["reference"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,139 @@
+import os
+import sys
+import tempfile
+import unittest
+
+import numpy as np
+import soundfile as sf
+
+# Ensure src/ is in sys.path
+src_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src"))
+if src_dir not in sys.path:
+    sys.path.insert(0, src_dir)
+
+from makeitdrumless.library import LibraryIndex
+from makeitdrumless.library.index import _MAX_HASH_ROWS
+from makeitdrumless.audio.stem_io import read_stem, stems_complete
+from makeitdrumless.audio.fingerprint import (
+    compute_fingerprint,
+    refine_alignment,
+    uncovered_samples,
+    align_audio,
+    write_aligned_stems,
+)
+
+SR = 44100
+
+
+def synthetic_song(seed: int, seconds: float = 30.0) -> np.ndarray:
+    """Stereo chord sequence with a click on every beat, different for every seed."""
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(seconds * SR)) / SR
+    out = np.zeros_like(t)
+    beat = int(0.5 * SR)
+    for start in range(0, len(t), beat):
+        end = min(start + beat, len(t))
+        for note in rng.choice(np.arange(36, 80), 3, replace=False):
+            out[start:end] += 0.1 * np.sin(2 * np.pi * 440.0 * 2 ** ((note - 69) / 12) * t[start:end])
+        click = min(2000, end - start)
+        out[start:start + click] += 0.3 * rng.standard_normal(click) * np.exp(-np.linspace(0, 6, click))
+    return np.stack([out, 0.9 * out]).astype(np.float32)
+
+
+class TestRecordingFingerprint(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.base_dir = os.path.join(self.temp_dir.name, "MakeItDrumless")
+        os.makedirs(self.base_dir)
+        self.library = LibraryIndex(self.base_dir)
+
+    def tearDown(self):
+        self.library.close()
+        self.temp_dir.cleanup()
+
+    def _index(self, title: str, mix: np.ndarray) -> str:
+        track_dir = os.path.join(self.base_dir, title)
+        os.makedirs(track_dir)
+        original = os.path.join(track_dir, f"{title} (Original).wav")
+        sf.write(original, mix.T, SR)
+        self.library.record_track(track_dir, original)
+        self.library.record_fingerprint(track_dir, compute_fingerprint(mix, SR))
+        return track_dir
+
+    def test_trimmed_quieter_upload_matches_with_offset(self):
+        song = synthetic_song(1)
+        song_dir = self._index("Song", song)
+        self._index("Other Song", synthetic_song(2))
+        self.assertTrue(self.library.has_fingerprint(song_dir))
+
+        trim = int(2.5 * SR)
+        upload = 0.7 * song[:, trim:trim + 20 * SR]
+        match = self.library.match_fingerprint(compute_fingerprint(upload, SR))
+        self.assertIsNotNone(match)
+        self.assertEqual(match["folder"], song_dir)
+        self.assertAlmostEqual(match["offset_seconds"], 2.5, delta=0.25)
+
+        alignment = refine_alignment(upload, song, int(round(match["offset_seconds"] * SR)), SR)
+        self.assertLessEqual(abs(alignment["offset"] - trim), 8)
+        self.assertGreater(alignment["correlation"], 0.95)
+        self.assertAlmostEqual(alignment["gain"], 0.7, delta=0.05)
+        self.assertEqual(uncovered_samples(alignment["offset"], upload.shape[-1], song.shape[-1]), 0)
+
+    def test_unrelated_song_and_own_folder_do_not_match(self):
+        song_dir = self._index("Song", synthetic_song(1))
+        self.assertIsNone(self.library.match_fingerprint(compute_fingerprint(synthetic_song(3, 15.0), SR)))
+        own = compute_fingerprint(synthetic_song(1), SR)
+        self.assertIsNone(self.library.match_fingerprint(own, exclude_folder=song_dir))
+
+    def test_lookup_stays_bounded_in_a_large_library(self):
+        song = synthetic_song(1)
+        song_dir = self._index("Song", song)
+        query = compute_fingerprint(song[:, 2 * SR:22 * SR], SR)
+        # Unrelated tracks that all share a slice of the query's hashes, as common chord changes do
+        common = np.unique(query["hashes"])[:40]
+        rng = np.random.default_rng(0)
+        for n in range(300):
+            folder = os.path.join(self.base_dir, f"Unrelated {n}")
+            self.library.record_track(folder, os.path.join(folder, "missing (Original).wav"))
+            self.library.record_fingerprint(folder, {
+                "rate": query["rate"], "hop": query["hop"], "duration": 30.0,
+                "chroma": np.zeros((160, 12), dtype=np.uint8),
+                "hashes": np.concatenate([common, rng.integers(0, 2 ** 40, 400)]),
+                "frames": rng.integers(0, 160, len(common) + 400),
+            })
+
+        unique = np.unique(query["hashes"]).tolist()
+        hits = self.library._landmark_hits(unique)
+        self.assertLessEqual(len(hits), len(unique) * _MAX_HASH_ROWS)
+        self.assertFalse({row["hash"] for row in hits} & set(common.tolist()))
+        # Only the song's own landmarks are left to vote, not 300 x the shared ones
+        self.assertEqual(len({row["track_id"] for row in hits}), 1)
+        self.assertEqual(self.library.match_fingerprint(query)["folder"], song_dir)
+
+    def test_align_audio_pads_and_trims(self):
+        audio = np.arange(10, dtype=np.float32)[None, :]
+        np.testing.assert_array_equal(align_audio(audio, 3, 4), [[3, 4, 5, 6]])
+        np.testing.assert_array_equal(align_audio(audio, -2, 4, gain=2.0), [[0, 0, 0, 2]])
+        np.testing.assert_array_equal(align_audio(audio, 8, 4), [[8, 9, 0, 0]])
+        self.assertEqual(uncovered_samples(-2, 4, 10) + uncovered_samples(8, 4, 10), 4)
+
+    def test_write_aligned_stems_follow_new_timeline(self):
+        stems_dir = os.path.join(self.temp_dir.name, "old", "stems_scnet_large")
+        os.makedirs(stems_dir)
+        drums = (0.1 * np.sin(np.linspace(0, 200, 2 * SR))).astype(np.float32)
+        source = {"drums": os.path.join(stems_dir, "drums.wav")}
+        sf.write(source["drums"], np.stack([drums, drums]).T, SR)
+
+        out_dir = os.path.join(self.temp_dir.name, "new", "stems_scnet_large")
+        alignment = {"offset": 1000, "length": SR, "gain": 0.5, "sample_rate": SR}
+        saved = write_aligned_stems(source, out_dir, alignment)
+        audio, sample_rate = read_stem(saved["drums"])
+        self.assertEqual(sample_rate, SR)
+        self.assertEqual(audio.shape, (SR, 2))
+        np.testing.assert_allclose(audio[:, 0], 0.5 * drums[1000:1000 + SR], atol=1e-4)
+        self.assertTrue(stems_complete(out_dir))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,71 @@
+import os
+import sys
+import unittest
+
+# Ensure src/ is in sys.path
+src_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src"))
+if src_dir not in sys.path:
+    sys.path.insert(0, src_dir)
+
+try:
+    import torch
+    from ml_collections import ConfigDict
+except ImportError:
+    torch = None
+
+from makeitdrumless.msst_integration.chain import ChainedSeparator, chain_config, INTERMEDIATE_STEM
+
+
+class _Scale(torch.nn.Module if torch else object):
+    """Stand-in model: every stem is the input scaled by a fixed factor."""
+
+    def __init__(self, factors):
+        super().__init__()
+        self.factors = factors
+
+    def forward(self, x):
+        if len(self.factors) == 1:
+            return x * self.factors[0]
+        return torch.stack([x * f for f in self.factors], dim=1)
+
+
+@unittest.skipIf(torch is None, "torch / ml_collections not installed")
+class TestFusedChain(unittest.TestCase):
+
+    def test_crowd_then_drums_in_one_pass(self):
+        crowd_config = ConfigDict({"training": {"instruments": ["crowd", "other"], "target_instrument": "crowd"}})
+        drum_config = ConfigDict({"training": {"instruments": ["drums", "other"], "target_instrument": "drums"},
+                                  "inference": {"num_overlap": 2}})
+        chain = ChainedSeparator(_Scale([0.25]), crowd_config, _Scale([0.5]), drum_config, keep_intermediate=True)
+        self.assertEqual(chain.instruments, ["crowd", "drums", "other", INTERMEDIATE_STEM])
+
+        x = torch.randn(2, 2, 1000)
+        out = chain(x)
+        self.assertEqual(tuple(out.shape), (2, 4, 2, 1000))
+        crowd, drums, other, decrowded = out.unbind(dim=1)
+        self.assertTrue(torch.allclose(crowd, 0.25 * x, atol=1e-6))
+        self.assertTrue(torch.allclose(decrowded, 0.75 * x, atol=1e-6))
+        self.assertTrue(torch.allclose(drums, 0.375 * x, atol=1e-6))
+        # Crowd + drums + remaining music reconstruct the input
+        self.assertTrue(torch.allclose(crowd + drums + other, x, atol=1e-5))
+
+        config = chain_config(drum_config, chain.instruments)
+        self.assertEqual(list(config.training.instruments), chain.instruments)
+        self.assertFalse(config.training.target_instrument)
+        self.assertEqual(drum_config.training.target_instrument, "drums")
+
+    def test_multi_stem_models(self):
+        crowd_config = ConfigDict({"training": {"instruments": ["crowd", "other"], "target_instrument": None}})
+        drum_config = ConfigDict({"training": {"instruments": ["drums", "bass", "other"], "target_instrument": None}})
+        chain = ChainedSeparator(_Scale([0.1, 0.9]), crowd_config, _Scale([0.2, 0.3, 0.5]), drum_config)
+        self.assertEqual(chain.instruments, ["crowd", "drums", "bass", "other"])
+        x = torch.randn(1, 2, 500)
+        out = chain(x)
+        self.assertTrue(torch.allclose(out[:, 1], 0.18 * x, atol=1e-6))
+
+        with self.assertRaises(ValueError):
+            ChainedSeparator(_Scale([0.1, 0.9]), crowd_config, _Scale([0.1, 0.9]), crowd_config)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,108 @@
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+# Ensure src/ is in sys.path
+src_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src"))
+if src_dir not in sys.path:
+    sys.path.insert(0, src_dir)
+
+from test_ensemble_caching import write_dummy_wav
+from makeitdrumless.library import LibraryIndex, hash_file
+from makeitdrumless.audio.downloader import get_audio_input
+
+
+class TestLibraryIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.base_dir = os.path.join(self.temp_dir.name, "MakeItDrumless")
+        os.makedirs(self.base_dir)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def _make_track(self, title, stems_preset="stems_scnet_large"):
+        track_dir = os.path.join(self.base_dir, title)
+        original = os.path.join(track_dir, f"{title} (Original).wav")
+        write_dummy_wav(original)
+        for name in ("drums", "bass", "other", "vocals"):
+            write_dummy_wav(os.path.join(track_dir, stems_preset, f"{name}.wav"))
+        with open(os.path.join(track_dir, f"{title} (Drumless).mp3"), "wb") as f:
+            f.write(b"ID3")
+        return track_dir, original
+
+    def test_first_use_indexes_existing_tree(self):
+        track_dir, original = self._make_track("Song A")
+        library = LibraryIndex(self.base_dir)
+
+        record = library.find(hash_file(original))
+        self.assertEqual(record["folder"], track_dir)
+        self.assertEqual(record["original"], original)
+        self.assertTrue(record["drumless"].endswith("(Drumless).mp3"))
+        self.assertEqual(set(library.get_stems(track_dir, "stems_scnet_large")), {"drums", "bass", "other", "vocals"})
+        library.close()
+
+    def test_rebuild_and_missing_files(self):
+        library = LibraryIndex(self.base_dir)
+        track_dir, original = self._make_track("Song B")
+        self.assertIsNone(library.find_folder(track_dir))
+
+        counts = library.rebuild(verbose=False)
+        self.assertEqual(counts, {"tracks": 1, "stems": 1, "drumless": 1, "pruned": 0})
+        self.assertIsNotNone(library.find_folder(track_dir))
+
+        # Deleted stems are reported as a miss instead of stale paths
+        os.remove(os.path.join(track_dir, "stems_scnet_large", "drums.wav"))
+        self.assertIsNone(library.get_stems(track_dir, "stems_scnet_large"))
+        library.close()
+
+    def test_rebuild_keeps_what_the_scan_cannot_recreate(self):
+        track_dir, original = self._make_track("Song C")
+        gone_dir, _ = self._make_track("Song D")
+        library = LibraryIndex(self.base_dir)
+        library.record_track(track_dir, original, info={"title": "Song C", "id": "abc"}, keys=["Youtube:abc"])
+        library.record_loudness(track_dir, {"drumless": {"integrated_lufs": -14.0}})
+        library.record_fingerprint(track_dir, {
+            "rate": 11025, "hop": 2048, "duration": 1.0, "chroma": np.zeros((4, 12), dtype=np.uint8),
+            "hashes": np.arange(3), "frames": np.arange(3),
+        })
+        shutil.rmtree(gone_dir)
+        shutil.rmtree(os.path.join(track_dir, "stems_scnet_large"))
+
+        counts = library.rebuild(verbose=False)
+        self.assertEqual(counts, {"tracks": 1, "stems": 0, "drumless": 1, "pruned": 1})
+        record = library.find("Youtube:abc")
+        self.assertEqual(record["folder"], track_dir)
+        self.assertEqual(record["info"]["id"], "abc")
+        self.assertEqual(record["loudness"]["drumless"]["integrated_lufs"], -14.0)
+        self.assertTrue(library.has_fingerprint(track_dir))
+        self.assertIsNone(library.get_stems(track_dir, "stems_scnet_large"))
+        self.assertIsNone(library.find_folder(gone_dir))
+
+        # A folder renamed by hand keeps its entry
+        renamed_dir = os.path.join(self.base_dir, "Song C (live)")
+        os.rename(track_dir, renamed_dir)
+        self.assertEqual(library.rebuild(verbose=False)["pruned"], 0)
+        self.assertEqual(library.find("Youtube:abc")["folder"], renamed_dir)
+        self.assertTrue(library.has_fingerprint(renamed_dir))
+        library.close()
+
+    def test_renamed_local_file_resolves_by_content_hash(self):
+        source = os.path.join(self.temp_dir.name, "inbox", "Artist - Tune.wav")
+        write_dummy_wav(source, duration_samples=2000)
+        first_path, _ = get_audio_input(source, output_folder=self.base_dir)
+
+        renamed = os.path.join(self.temp_dir.name, "inbox", "tune copy.wav")
+        shutil.copy2(source, renamed)
+        second_path, _ = get_audio_input(renamed, output_folder=self.base_dir)
+        self.assertEqual(second_path, first_path)
+        self.assertFalse(os.path.exists(os.path.join(self.base_dir, "tune copy")))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,76 @@
+import os
+import sys
+import tempfile
+import unittest
+
+import numpy as np
+
+# Ensure src/ is in sys.path
+src_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src"))
+if src_dir not in sys.path:
+    sys.path.insert(0, src_dir)
+
+from makeitdrumless.audio.loudness import LoudnessMeter, normalization_gain_db
+from makeitdrumless.library.index import LibraryIndex
+
+
+def _sine(sample_rate, seconds, amplitude, frequency=997.0):
+    t = np.arange(int(sample_rate * seconds)) / sample_rate
+    return np.stack([amplitude * np.sin(2 * np.pi * frequency * t)] * 2, axis=1).astype(np.float32)
+
+
+class TestLoudness(unittest.TestCase):
+
+    def test_reference_sine(self):
+        # BS.1770: a stereo 997 Hz sine at -20 dBFS measures -20 LUFS, whatever the block sizes fed in
+        for sample_rate in (44100, 48000):
+            audio = _sine(sample_rate, 5, 0.1)
+            meter = LoudnessMeter(sample_rate, 2)
+            for start in range(0, len(audio), 12345):
+                meter.update(audio[start:start + 12345])
+            result = meter.result()
+            self.assertAlmostEqual(result["integrated_lufs"], -20.0, delta=0.05)
+            self.assertAlmostEqual(result["sample_peak_dbfs"], -20.0, delta=0.05)
+            self.assertAlmostEqual(result["true_peak_dbtp"], -20.0, delta=0.1)
+
+    def test_gates_ignore_silence(self):
+        audio = _sine(48000, 5, 0.1)
+        meter = LoudnessMeter(48000, 2)
+        meter.update(np.concatenate([audio, np.zeros((48000 * 20, 2), dtype=np.float32)]))
+        self.assertAlmostEqual(meter.integrated_lufs(), -20.0, delta=0.3)
+
+    def test_true_peak_between_samples(self):
+        # fs/4 sine sampled at +-45 degrees: samples peak at -3 dBFS, the waveform at 0 dBFS
+        n = np.arange(48000)
+        audio = np.sin(2 * np.pi * n / 4 + np.pi / 4)[:, None]
+        meter = LoudnessMeter(48000, 1)
+        for start in range(0, len(audio), 1000):
+            meter.update(audio[start:start + 1000])
+        result = meter.result()
+        self.assertAlmostEqual(result["sample_peak_dbfs"], -3.01, delta=0.05)
+        self.assertGreater(result["true_peak_dbtp"], -0.5)
+
+    def test_gain_respects_true_peak_ceiling(self):
+        measured = {"integrated_lufs": -20.0, "true_peak_dbtp": -3.0, "sample_peak_dbfs": -3.5}
+        self.assertAlmostEqual(normalization_gain_db(measured, target_lufs=-23.0), -3.0)
+        self.assertAlmostEqual(normalization_gain_db(measured, target_lufs=-14.0), 2.0)
+        self.assertAlmostEqual(normalization_gain_db(measured), 3.4)
+
+    def test_library_keeps_measurements(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            folder = os.path.join(tmp, "Song")
+            os.makedirs(folder)
+            original = os.path.join(folder, "Song.wav")
+            with open(original, "wb") as f:
+                f.write(b"RIFF")
+            library = LibraryIndex(tmp)
+            library.record_track(folder, original)
+            library.record_loudness(folder, {"drumless": {"integrated_lufs": -14.2}})
+            library.record_loudness(folder, {"drums-only": {"integrated_lufs": -18.0}})
+            loudness = library.find_folder(folder)["loudness"]
+            self.assertEqual(set(loudness), {"drumless", "drums-only"})
+            library.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,148 @@
+import os
+import sys
+import tempfile
+import unittest
+
+import torch
+
+# Ensure src/ is in sys.path
+src_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src"))
+if src_dir not in sys.path:
+    sys.path.insert(0, src_dir)
+
+from makeitdrumless.audio.decoder import register_pcm, discard_pcm
+from makeitdrumless.msst_integration.inference import _plan_memory
+from makeitdrumless.msst_integration.memory import (
+    MemoryBudgetError,
+    estimate_demix_memory,
+    input_frames,
+    model_memory_profile,
+    parse_memory_size,
+    plan_memory_budget,
+)
+from makeitdrumless.msst_integration.mps_patch import _accumulator, ACCUMULATOR_FILE
+
+GB = 1024 ** 3
+
+
+class TestMemoryBudget(unittest.TestCase):
+
+    def setUp(self):
+        self.frames = 44100 * 60 * 20
+        self.profile = {
+            "sample_rate": 44100,
+            "chunk_size": 485100,
+            "instruments": 4,
+            "batch_size": 4,
+            "bigshifts": 3,
+            "checkpoint_bytes": 300 * 1024 ** 2,
+        }
+
+    def _total(self, **kw):
+        options = dict(batch_size=4, shifts=3, checkpoint_bytes=self.profile["checkpoint_bytes"])
+        options.update(kw)
+        return estimate_demix_memory(self.frames, 4, 485100, **options)["total"]
+
+    def test_requested_configuration_kept_when_it_fits(self):
+        plan = plan_memory_budget(64 * GB, self.frames, self.profile)
+        self.assertEqual((plan["batch_size"], plan["shifts"], plan["streaming"]), (4, 3, False))
+        self.assertEqual(plan["changes"], [])
+
+    def test_reductions_applied_in_order(self):
+        budget = self._total(batch_size=1) + 1
+        plan = plan_memory_budget(budget, self.frames, self.profile)
+        self.assertEqual((plan["batch_size"], plan["shifts"], plan["streaming"]), (1, 3, False))
+
+        budget = self._total(batch_size=1, streaming=True) + 1
+        plan = plan_memory_budget(budget, self.frames, self.profile)
+        self.assertEqual((plan["batch_size"], plan["shifts"], plan["streaming"]), (1, 3, True))
+
+        budget = self._total(batch_size=1, shifts=1, streaming=True) + 1
+        plan = plan_memory_budget(budget, self.frames, self.profile)
+        self.assertEqual((plan["batch_size"], plan["shifts"], plan["streaming"]), (1, 1, True))
+        self.assertLessEqual(plan["estimate"]["total"], budget)
+
+    def test_batched_shifts_scale_activations_instead_of_copying_the_track(self):
+        estimate = estimate_demix_memory(self.frames, 4, 485100, batch_size=1, tta_variants=3 * 4)
+        self.assertEqual(estimate["shifts"], 0)
+        self.assertEqual(estimate["activations"], 12 * self._single_chunk_activations())
+
+        # 3 batched shifts x 2 flips: only dropping the shifts brings one batch under the budget
+        budget = estimate_demix_memory(
+            self.frames, 4, 485100, batch_size=1, tta_variants=4, streaming=True,
+            checkpoint_bytes=self.profile["checkpoint_bytes"],
+        )["total"] + 1
+        plan = plan_memory_budget(budget, self.frames, self.profile, flips=["channels", "polarity"], batched_shifts=True)
+        self.assertEqual((plan["batch_size"], plan["shifts"], plan["streaming"]), (1, 1, True))
+        self.assertEqual(plan["changes"][-1], "shifts 3 -> 1")
+        self.assertEqual(plan["estimate"]["activations"], 4 * self._single_chunk_activations())
+
+    def _single_chunk_activations(self):
+        return estimate_demix_memory(self.frames, 4, 485100)["activations"]
+
+    def test_refuses_with_breakdown_when_nothing_fits(self):
+        with self.assertRaises(MemoryBudgetError) as ctx:
+            plan_memory_budget(256 * 1024 ** 2, self.frames, self.profile)
+        self.assertIn("weights", str(ctx.exception))
+        self.assertIn("total", str(ctx.exception))
+
+    def test_parse_memory_size(self):
+        self.assertEqual(parse_memory_size("6G"), 6 * GB)
+        self.assertEqual(parse_memory_size("1500m"), 1500 * 1024 ** 2)
+        self.assertEqual(parse_memory_size("2.5GB"), int(2.5 * GB))
+        with self.assertRaises(ValueError):
+            parse_memory_size("lots")
+
+    def test_profile_read_from_config(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            config_path = os.path.join(tmp, "config.yaml")
+            with open(config_path, "w") as f:
+                f.write("audio:\n  chunk_size: 264600\n  sample_rate: 44100\n"
+                        "training:\n  instruments: [drums, other]\n  target_instrument: null\n"
+                        "inference:\n  batch_size: 2\n")
+            checkpoint_path = os.path.join(tmp, "model.ckpt")
+            with open(checkpoint_path, "wb") as f:
+                f.write(b"\0" * 1000)
+            profile = model_memory_profile(config_path, checkpoint_path)
+        self.assertEqual(profile["chunk_size"], 264600)
+        self.assertEqual(profile["instruments"], 2)
+        self.assertEqual(profile["batch_size"], 2)
+        self.assertEqual(profile["checkpoint_bytes"], 1000)
+
+    def test_streaming_accumulator_is_disk_backed(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            result = _accumulator((2, 2, 1000), tmp)
+            result[..., 100:200] += 1.5
+            result.div_(torch.full((1000,), 3.0))
+            self.assertAlmostEqual(float(result.sum()), 2 * 2 * 100 * 0.5, places=4)
+            self.assertFalse(os.path.exists(os.path.join(tmp, ACCUMULATOR_FILE)))
+
+    def test_unknown_input_length_refuses_to_plan(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            # Not readable by libsndfile, and not a stream ffprobe can size either
+            stream = os.path.join(tmp, "Song (Original).webm")
+            with open(stream, "wb") as f:
+                f.write(b"not audio" * 100)
+            self.assertIsNone(input_frames(stream))
+            with self.assertRaises(MemoryBudgetError):
+                _plan_memory(64 * GB, stream, self.profile, None, None, "cpu")
+
+            # A buffer decoded during ingestion gives the length without probing the file
+            register_pcm(stream, 44100, torch.zeros(2, 44100 * 3).numpy())
+            try:
+                self.assertEqual(input_frames(stream), 44100 * 3)
+                self.assertIsNotNone(_plan_memory(64 * GB, stream, self.profile, None, None, "cpu"))
+
+                # Planned for the engine the run will use: batched TTA variants, or HTDemucs' whole-track passes
+                batched = _plan_memory(64 * GB, stream, self.profile, None, None, "cpu", tta=["polarity"])
+                self.assertEqual(batched["estimate"]["activations"], 4 * 3 * 2 * self._single_chunk_activations())
+                self.assertEqual(batched["estimate"]["shifts"], 0)
+                looped = _plan_memory(64 * GB, stream, self.profile, None, None, "cpu", model_type="htdemucs", tta=["polarity"])
+                self.assertEqual(looped["estimate"]["activations"], 4 * self._single_chunk_activations())
+                self.assertGreater(looped["estimate"]["shifts"], 0)
+            finally:
+                discard_pcm(stream)
+
+
+if __name__ == "__main__":
+    unittest.main()
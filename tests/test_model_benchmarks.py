@@ -0,0 +1,59 @@
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+# Ensure src/ is in sys.path
+src_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src"))
+if src_dir not in sys.path:
+    sys.path.insert(0, src_dir)
+
+from makeitdrumless.msst_integration import model_benchmarks
+from makeitdrumless.msst_integration.model_benchmarks import choose_preset, fastest_preset, load_benchmarks, benchmark_key
+
+
+def _entry(preset, rtf, load_seconds=2.0, device="cpu"):
+    return {"preset": preset, "device": device, "rtf": rtf, "load_seconds": load_seconds, "peak_rss_mb": 1000.0}
+
+
+class TestModelBenchmarks(unittest.TestCase):
+
+    def setUp(self):
+        self.entries = {
+            "scnet_small": _entry("scnet_small", 0.10),                        # SDR 8.81
+            "scnet_large_starrytong": _entry("scnet_large_starrytong", 0.40),  # SDR 9.70
+            "scnet_xl": _entry("scnet_xl", 1.20, load_seconds=6.0),            # SDR 10.08
+            "mel_band_roformer_crowd": _entry("mel_band_roformer_crowd", 0.05),
+            "bs_mega_53stem_drums": _entry("bs_mega_53stem_drums", 0.05),      # no published SDR
+        }
+
+    def test_highest_sdr_within_max_rtf(self):
+        self.assertEqual(choose_preset(self.entries, 240, max_rtf=2.0), "scnet_xl")
+        self.assertEqual(choose_preset(self.entries, 240, max_rtf=0.5), "scnet_large_starrytong")
+        self.assertEqual(choose_preset(self.entries, 240, max_rtf=0.5, passes=2), "scnet_small")
+        self.assertIsNone(choose_preset(self.entries, 240, max_rtf=0.01))
+
+    def test_deadline_counts_load_time_and_track_length(self):
+        # scnet_xl: 6 + 1.2 * 240 = 294s; scnet_large_starrytong: 2 + 0.4 * 240 = 98s
+        self.assertEqual(choose_preset(self.entries, 240, deadline=300), "scnet_xl")
+        self.assertEqual(choose_preset(self.entries, 240, deadline=290), "scnet_large_starrytong")
+        self.assertEqual(choose_preset(self.entries, 3600, deadline=600), "scnet_small")
+
+    def test_fastest_fallback_only_considers_drum_presets(self):
+        # The crowd model and the unscored 53-stem model are faster, but neither can be the drum model
+        self.assertEqual(fastest_preset(self.entries), "scnet_small")
+        self.assertIsNone(fastest_preset({"mel_band_roformer_crowd": _entry("mel_band_roformer_crowd", 0.05)}))
+
+    def test_results_stored_per_device_and_host(self):
+        with tempfile.TemporaryDirectory() as tmp, mock.patch.dict(os.environ, {"MAKEITDRUMLESS_CACHE_DIR": tmp}):
+            model_benchmarks._save_benchmark(benchmark_key("scnet_small", "cpu"), _entry("scnet_small", 0.1))
+            model_benchmarks._save_benchmark(benchmark_key("scnet_small", "cuda"), _entry("scnet_small", 0.01, device="cuda"))
+            model_benchmarks._save_benchmark("scnet_xl|cpu|otherhost", _entry("scnet_xl", 0.3))
+            cpu = load_benchmarks("cpu")
+        self.assertEqual(list(cpu), ["scnet_small"])
+        self.assertEqual(cpu["scnet_small"]["rtf"], 0.1)
+
+
+if __name__ == "__main__":
+    unittest.main()
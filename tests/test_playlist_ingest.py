@@ -0,0 +1,137 @@
+import os
+import sys
+import time
+import tempfile
+import threading
+import unittest
+import urllib.request
+from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
+
+# Ensure src/ is in sys.path
+src_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src"))
+if src_dir not in sys.path:
+    sys.path.insert(0, src_dir)
+
+from test_ensemble_caching import write_dummy_wav
+from makeitdrumless.audio.playlist import is_playlist_url, download_playlist, HostRateLimiter
+
+
+class FixtureMediaServer:
+    """Local HTTP stand-in serving fixture media, with a flaky path and request timestamps."""
+
+    def __init__(self, root: str, delay: float = 0.05):
+        self.request_times = []
+        self.flaky_failures = {"/flaky.wav": 1}
+        lock = threading.Lock()
+        server = self
+
+        class Handler(SimpleHTTPRequestHandler):
+            def __init__(self, *args, **kwargs):
+                super().__init__(*args, directory=root, **kwargs)
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                with lock:
+                    server.request_times.append(time.monotonic())
+                    fail = server.flaky_failures.get(self.path, 0) > 0
+                    if fail:
+                        server.flaky_failures[self.path] -= 1
+                time.sleep(delay)
+                if fail:
+                    self.send_error(503)
+                    return
+                super().do_GET()
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.base_url = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+class TestPlaylistIngest(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.media_dir = os.path.join(self.temp_dir.name, "media")
+        self.out_dir = os.path.join(self.temp_dir.name, "out")
+        os.makedirs(self.out_dir)
+        self.names = [f"track{i}" for i in range(6)] + ["flaky"]
+        for name in self.names:
+            write_dummy_wav(os.path.join(self.media_dir, f"{name}.wav"))
+        self.lock = threading.Lock()
+        self.active = 0
+        self.max_active = 0
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def _download(self, url):
+        name = os.path.splitext(os.path.basename(url))[0]
+        path = os.path.join(self.out_dir, f"{name} (Original).wav")
+        with self.lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        try:
+            with urllib.request.urlopen(url, timeout=10) as resp, open(path, "wb") as f:
+                f.write(resp.read())
+        finally:
+            with self.lock:
+                self.active -= 1
+        return path, {"title": name}
+
+    def test_playlist_url_detection(self):
+        self.assertTrue(is_playlist_url("https://www.youtube.com/playlist?list=PL123"))
+        self.assertTrue(is_playlist_url("https://www.youtube.com/@SomeBand/videos"))
+        self.assertFalse(is_playlist_url("https://www.youtube.com/watch?v=dQw4w9WgXcQ&list=PL123"))
+        self.assertFalse(is_playlist_url("https://youtu.be/dQw4w9WgXcQ"))
+        self.assertFalse(is_playlist_url("/path/to/song.mp3"))
+
+    def test_bounded_parallel_download_with_retry(self):
+        with FixtureMediaServer(self.media_dir) as server:
+            entries = [{"url": f"{server.base_url}/{n}.wav", "title": n} for n in self.names]
+            entries.append({"url": f"{server.base_url}/missing.wav", "title": "missing"})
+            results = list(download_playlist(entries, self._download, workers=2, retries=2, backoff=0.01))
+
+        self.assertEqual(len(results), len(entries))
+        self.assertLessEqual(self.max_active, 2)
+        by_title = {r["entry"]["title"]: r for r in results}
+        for name in self.names:
+            self.assertIsNone(by_title[name]["error"])
+            self.assertTrue(os.path.getsize(by_title[name]["audio_path"]) > 0)
+        self.assertEqual(by_title["flaky"]["attempts"], 2)
+        self.assertIsNotNone(by_title["missing"]["error"])
+        self.assertEqual(by_title["missing"]["attempts"], 3)
+
+    def test_per_host_rate_limit(self):
+        interval = 0.1
+        with FixtureMediaServer(self.media_dir, delay=0.0) as server:
+            entries = [{"url": f"{server.base_url}/track{i}.wav"} for i in range(4)]
+            list(download_playlist(entries, self._download, workers=4, rate_limiter=HostRateLimiter(interval)))
+
+        gaps = [b - a for a, b in zip(server.request_times, server.request_times[1:])]
+        self.assertTrue(all(gap >= interval * 0.8 for gap in gaps), gaps)
+
+    def test_results_are_yielded_before_all_downloads_finish(self):
+        with FixtureMediaServer(self.media_dir, delay=0.2) as server:
+            entries = [{"url": f"{server.base_url}/{n}.wav"} for n in self.names[:6]]
+            started = time.monotonic()
+            downloads = download_playlist(entries, self._download, workers=2)
+            first = next(downloads)
+            first_latency = time.monotonic() - started
+            downloads.close()
+        # Six 0.2s downloads on two workers take ~0.6s; the first one is handed over after ~0.2s
+        self.assertLess(first_latency, 0.5)
+        self.assertIsNone(first["error"])
+
+
+if __name__ == "__main__":
+    unittest.main()
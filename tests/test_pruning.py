@@ -0,0 +1,114 @@
+import os
+import sys
+import unittest
+from types import SimpleNamespace
+
+import numpy as np
+
+# Ensure src/ is in sys.path
+src_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src"))
+if src_dir not in sys.path:
+    sys.path.insert(0, src_dir)
+
+try:
+    import torch
+    import torch.nn as nn
+except ImportError:
+    torch = None
+
+from makeitdrumless.msst_integration.pruning import (
+    prune_instrument_heads,
+    derive_residual,
+    measure_head_savings,
+    supports_head_pruning,
+)
+
+
+def _config(instruments):
+    return SimpleNamespace(
+        training=SimpleNamespace(instruments=list(instruments), target_instrument=None),
+        inference=SimpleNamespace(chunk_size=2048),
+        audio=SimpleNamespace(num_channels=2),
+    )
+
+
+if torch is not None:
+    class _HeadModel(nn.Module):
+        """Shared trunk plus one output head per stem, as BS-RoFormer's mask estimators."""
+
+        def __init__(self, stems=4):
+            super().__init__()
+            self.num_stems = stems
+            self.trunk = nn.Linear(2, 64)
+            self.mask_estimators = nn.ModuleList(
+                nn.Sequential(nn.Linear(64, 256), nn.Tanh(), nn.Linear(256, 2)) for _ in range(stems)
+            )
+
+        def forward(self, x):
+            h = self.trunk(x.transpose(1, 2))
+            out = torch.stack([head(h).transpose(1, 2) for head in self.mask_estimators], dim=1)
+            return out[:, 0] if out.shape[1] == 1 else out
+
+
+@unittest.skipIf(torch is None, "PyTorch not installed")
+class TestHeadPruning(unittest.TestCase):
+
+    def test_keeps_requested_heads_in_model_order(self):
+        model = _HeadModel()
+        config = _config(["vocals", "bass", "drums", "other"])
+        drums_head = model.mask_estimators[2]
+        vocals_head = model.mask_estimators[0]
+
+        report = prune_instrument_heads(model, config, ["drums", "vocals", "other", "guitar"])
+
+        self.assertEqual(report["kept"], ["vocals", "drums"])
+        self.assertEqual(report["dropped"], ["bass", "other"])
+        self.assertLess(report["params_after"], report["params_before"])
+        self.assertIs(model.mask_estimators[0], vocals_head)
+        self.assertIs(model.mask_estimators[1], drums_head)
+        self.assertEqual(model.num_stems, 2)
+        self.assertEqual(config.training.instruments, ["vocals", "drums"])
+        self.assertIsNone(config.training.target_instrument)
+
+    def test_single_head_becomes_target_instrument(self):
+        model = _HeadModel()
+        config = _config(["vocals", "bass", "drums", "other"])
+        x = torch.randn(1, 2, 64)
+        with torch.inference_mode():
+            full = model(x)
+            prune_instrument_heads(model, config, ["drums"])
+            pruned = model(x)
+        self.assertEqual(config.training.target_instrument, "drums")
+        self.assertEqual(tuple(pruned.shape), (1, 2, 64))
+        self.assertTrue(torch.allclose(pruned, full[:, 2]))
+
+    def test_nothing_to_prune(self):
+        self.assertIsNone(prune_instrument_heads(_HeadModel(3), _config(["vocals", "bass", "drums"]),
+                                                 ["vocals", "bass", "drums"]))
+        self.assertIsNone(prune_instrument_heads(nn.Linear(2, 2), _config(["drums", "other"]), ["drums"]))
+        with self.assertRaises(ValueError):
+            prune_instrument_heads(_HeadModel(), _config(["vocals", "bass", "drums", "other"]), ["guitar"])
+
+    def test_residual_is_mix_minus_kept_stems(self):
+        rng = np.random.default_rng(0)
+        stems = {name: rng.standard_normal((2, 100)).astype(np.float32) for name in ("vocals", "bass", "drums", "other")}
+        mix = sum(stems.values())
+        residual = derive_residual(mix, {"drums": stems["drums"]}, ["drums"])
+        np.testing.assert_allclose(residual, stems["vocals"] + stems["bass"] + stems["other"], atol=1e-5)
+        np.testing.assert_allclose(mix, sum(stems.values()))
+
+    def test_measured_savings(self):
+        report = measure_head_savings(_HeadModel(), _config(["vocals", "bass", "drums", "other"]), ["drums"], repeats=1)
+        self.assertEqual(report["kept"], ["drums"])
+        self.assertGreater(report["full_ms"], 0.0)
+        self.assertIn("saving", report)
+
+    def test_registry_presets(self):
+        self.assertTrue(supports_head_pruning("bs_roformer"))
+        self.assertTrue(supports_head_pruning("bs_conformer"))
+        self.assertFalse(supports_head_pruning("bs_drums2_xlancer"))
+        self.assertFalse(supports_head_pruning("scnet_xl"))
+
+
+if __name__ == "__main__":
+    unittest.main()
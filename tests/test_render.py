@@ -0,0 +1,76 @@
+import os
+import sys
+import tempfile
+import unittest
+
+import numpy as np
+
+# Ensure src/ is in sys.path
+src_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src"))
+if src_dir not in sys.path:
+    sys.path.insert(0, src_dir)
+
+from makeitdrumless.audio.stem_io import write_stem, wait_for_pending_writes
+from makeitdrumless.audio.render import MUTE, parse_mix_specs, render_mixes, stem_gain
+from makeitdrumless.audio.processing import is_drum_stem
+
+
+class TestRender(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        stems_dir = os.path.join(self.temp_dir.name, "stems_test")
+        # Each stem plays alone in its own 1000-sample slot, so a mix's slots expose the per-stem gains
+        self.slots = {"drums": 0, "bass": 1, "vocals": 2, "other": 3}
+        self.stems = {}
+        for name, slot in self.slots.items():
+            wave = np.zeros((2, 4000), dtype=np.float32)
+            wave[:, slot * 1000:(slot + 1) * 1000] = 0.5
+            self.stems[name] = write_stem(wave, 44100, stems_dir, name, fmt="f32")
+
+    def slot_levels(self, audio):
+        return {name: float(audio[slot * 1000 + 500, 0]) for name, slot in self.slots.items()}
+
+    def tearDown(self):
+        wait_for_pending_writes()
+        self.temp_dir.cleanup()
+
+    def test_gain_rules(self):
+        self.assertTrue(is_drum_stem("Drums"))
+        self.assertFalse(is_drum_stem("no_drums"))
+        rules = parse_mix_specs("practice:drums=-6;vocals=mute;bass=+3dB")["practice"]["rules"]
+        self.assertEqual(stem_gain(rules, "drums"), -6.0)
+        self.assertIs(stem_gain(rules, "vocals"), MUTE)
+        self.assertEqual(stem_gain(rules, "bass"), 3.0)
+        self.assertEqual(stem_gain(rules, "other"), 0.0)
+        with self.assertRaises(ValueError):
+            parse_mix_specs("drums-15")
+
+    def test_render_presets_in_one_pass(self):
+        specs = parse_mix_specs("drumless,drums-12,drums-only,drumless-bass-boost")
+        mixes = render_mixes(self.stems, specs)
+        self.assertEqual(set(mixes), set(specs))
+        for mix in mixes.values():
+            # Same length and start as the stems: outputs stay sample-aligned with the original
+            self.assertEqual(mix["audio"].shape, (4000, 2))
+            self.assertEqual(mix["sample_rate"], 44100)
+            # Peak normalization is returned as an encode-time gain, not applied to the buffer
+            peak = float(np.max(np.abs(mix["audio"]))) * 10 ** (mix["gain_db"] / 20.0)
+            self.assertAlmostEqual(peak, 10 ** (-0.1 / 20.0), places=3)
+
+        drumless = self.slot_levels(mixes["drumless"]["audio"])
+        self.assertEqual(drumless["drums"], 0.0)
+        self.assertAlmostEqual(drumless["bass"], drumless["other"], places=5)
+
+        drums12 = self.slot_levels(mixes["drums-12"]["audio"])
+        self.assertAlmostEqual(drums12["drums"] / drums12["bass"], 10 ** (-12 / 20.0), places=4)
+
+        drums_only = self.slot_levels(mixes["drums-only"]["audio"])
+        self.assertEqual([drums_only[s] for s in ("bass", "vocals", "other")], [0.0, 0.0, 0.0])
+
+        boost = self.slot_levels(mixes["drumless-bass-boost"]["audio"])
+        self.assertAlmostEqual(boost["bass"] / boost["vocals"], 10 ** (6 / 20.0), places=4)
+
+
+if __name__ == "__main__":
+    unittest.main()
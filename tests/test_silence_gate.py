@@ -0,0 +1,106 @@
+import os
+import sys
+import unittest
+
+import numpy as np
+
+# Ensure src/ is in sys.path
+src_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src"))
+if src_dir not in sys.path:
+    sys.path.insert(0, src_dir)
+
+try:
+    import torch
+    from ml_collections import ConfigDict
+except ImportError:
+    torch = None
+
+from makeitdrumless.msst_integration.mps_patch import demix, LAST_DEMIX_STATS
+from makeitdrumless.msst_integration.inference import record_demix_stats
+from makeitdrumless.telemetry import RunTelemetry, bind_run
+
+SR = 44100
+CHUNK = 4096
+STEP = CHUNK // 2
+
+
+class _Split(torch.nn.Module if torch else object):
+    """Stand-in model: 'drums' is a quarter of the input, 'other' the rest."""
+
+    def forward(self, x):
+        return torch.stack([0.25 * x, 0.75 * x], dim=1)
+
+
+def _config(silence_threshold_db=None):
+    return ConfigDict({
+        "training": {"instruments": ["drums", "other"], "target_instrument": None, "use_amp": False},
+        "inference": {
+            "chunk_size": CHUNK, "num_overlap": 2, "batch_size": 2,
+            "silence_threshold_db": silence_threshold_db, "silence_fill": "passthrough",
+        },
+    })
+
+
+@unittest.skipIf(torch is None, "torch / ml_collections not installed")
+class TestSilenceGate(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.mix = (0.1 * rng.standard_normal((2, 3 * SR))).astype(np.float32)
+        # One second of near-silence (-120 dBFS) in the middle
+        self.silent = (SR, 2 * SR)
+        self.mix[:, self.silent[0]:self.silent[1]] = 1e-6 * rng.standard_normal((2, SR))
+
+    def _run(self, threshold):
+        return demix(_config(threshold), _Split(), self.mix, torch.device("cpu"), model_type="bs_roformer")
+
+    def test_skips_only_chunks_inside_the_silence(self):
+        self._run(-60.0)
+        # Chunks cover [start - border, start - border + CHUNK) of the reflect-padded track
+        border = CHUNK - STEP
+        expected = sum(
+            1 for start in range(0, self.mix.shape[1] + 2 * border, STEP)
+            if start - border >= self.silent[0] and start - border + CHUNK <= self.silent[1]
+        )
+        self.assertGreater(expected, 0)
+        self.assertEqual(LAST_DEMIX_STATS["skipped_chunks"], expected)
+
+        self._run(None)
+        self.assertEqual(LAST_DEMIX_STATS["skipped_chunks"], 0)
+
+    def test_gated_output_matches_ungated_at_the_boundaries(self):
+        gated = self._run(-60.0)
+        dense = self._run(None)
+        for stem in ("drums", "other"):
+            self.assertEqual(gated[stem].shape, self.mix.shape)
+            for edge in self.silent:
+                window = slice(edge - CHUNK, edge + CHUNK)
+                np.testing.assert_allclose(gated[stem][:, window], dense[stem][:, window], atol=1e-5)
+            np.testing.assert_allclose(gated[stem], dense[stem], atol=1e-5)
+        # The model split still reconstructs the mix outside the silence
+        np.testing.assert_allclose(gated["drums"][:, :SR], 0.25 * self.mix[:, :SR], atol=1e-5)
+
+    def test_each_track_report_keeps_its_own_stats(self):
+        first, second = RunTelemetry("first"), RunTelemetry("second")
+        with bind_run(first):
+            self._run(-60.0)
+            record_demix_stats("bs_roformer", LAST_DEMIX_STATS)
+        with bind_run(second):
+            self._run(None)
+            record_demix_stats("bs_roformer", LAST_DEMIX_STATS)
+            record_demix_stats("scnet", {"skipped_chunks": 1})
+
+        # The next track's demix does not rewrite a report already snapshotted
+        self.assertGreater(first.metadata["silence_gate"]["bs_roformer"]["skipped_chunks"], 0)
+        self.assertEqual(second.metadata["silence_gate"]["bs_roformer"]["skipped_chunks"], 0)
+        self.assertEqual(sorted(second.metadata["silence_gate"]), ["bs_roformer", "scnet"])
+
+        # Cached stems: no demix ran, nothing is reported
+        cached = RunTelemetry("cached")
+        with bind_run(cached):
+            record_demix_stats("bs_roformer", {})
+        self.assertNotIn("silence_gate", cached.metadata)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,96 @@
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+# Ensure src/ is in sys.path
+src_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src"))
+if src_dir not in sys.path:
+    sys.path.insert(0, src_dir)
+
+from makeitdrumless.audio import downloader
+from makeitdrumless.audio.source_index import (
+    get_source_id,
+    load_cached_info,
+    save_cached_info,
+)
+from makeitdrumless.library import get_library
+
+VIDEO_URL = "https://www.youtube.com/watch?v=dQw4w9WgXcQ"
+
+
+class FakeYoutubeDL:
+    """Stands in for yt_dlp.YoutubeDL and counts metadata extractions."""
+    extract_calls = 0
+    process_calls = 0
+
+    def __init__(self, params=None):
+        self.params = params or {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def extract_info(self, link, download=False):
+        FakeYoutubeDL.extract_calls += 1
+        return {"id": "dQw4w9WgXcQ", "extractor_key": "Youtube", "title": "Rick Astley - Never Gonna Give You Up"}
+
+    def process_ie_result(self, info, download=True):
+        FakeYoutubeDL.process_calls += 1
+        out_path = self.params["outtmpl"].replace("%(ext)s", "wav")
+        with open(out_path, "wb") as f:
+            f.write(b"RIFF0000WAVE")
+        return info
+
+    @staticmethod
+    def sanitize_info(info):
+        return dict(info)
+
+
+class TestSourceIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.output_dir = os.path.join(self.temp_dir.name, "out")
+        env = mock.patch.dict(os.environ, {"MAKEITDRUMLESS_CACHE_DIR": os.path.join(self.temp_dir.name, "cache")})
+        env.start()
+        self.addCleanup(env.stop)
+        FakeYoutubeDL.extract_calls = 0
+        FakeYoutubeDL.process_calls = 0
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_source_id_is_offline_and_url_form_independent(self):
+        self.assertEqual(get_source_id(VIDEO_URL), "Youtube:dQw4w9WgXcQ")
+        self.assertEqual(get_source_id("https://youtu.be/dQw4w9WgXcQ?t=42"), "Youtube:dQw4w9WgXcQ")
+
+    def test_info_cache_ttl(self):
+        save_cached_info("Youtube:abc", {"title": "Song"})
+        self.assertEqual(load_cached_info("Youtube:abc")["title"], "Song")
+        self.assertIsNone(load_cached_info("Youtube:abc", ttl=-1))
+
+    def test_download_extracts_once_and_repeat_is_offline(self):
+        with mock.patch.object(downloader, "YoutubeDL", FakeYoutubeDL):
+            path, info = downloader.download_audio(VIDEO_URL, output_folder=self.output_dir)
+            self.assertTrue(os.path.exists(path))
+            self.assertEqual(FakeYoutubeDL.extract_calls, 1)
+            self.assertEqual(FakeYoutubeDL.process_calls, 1)
+
+            # Same video through a different URL form: answered from the index
+            again_path, again_info = downloader.download_audio(
+                "https://youtu.be/dQw4w9WgXcQ", output_folder=self.output_dir
+            )
+            self.assertEqual(again_path, path)
+            self.assertEqual(again_info["title"], info["title"])
+            self.assertEqual(FakeYoutubeDL.extract_calls, 1)
+            self.assertEqual(FakeYoutubeDL.process_calls, 1)
+
+        self.assertIsNotNone(get_library(self.output_dir).find("Youtube:dQw4w9WgXcQ"))
+
+
+if __name__ == "__main__":
+    unittest.main()
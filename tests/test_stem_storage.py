@@ -0,0 +1,135 @@
+import os
+import sys
+import tempfile
+import threading
+import unittest
+from unittest import mock
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+# Ensure src/ is in sys.path
+src_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src"))
+if src_dir not in sys.path:
+    sys.path.insert(0, src_dir)
+
+from test_ensemble_caching import write_dummy_wav
+from makeitdrumless.audio import stem_io
+from makeitdrumless.audio.stem_io import (
+    write_stem,
+    read_stem,
+    list_stems,
+    iter_completed,
+    stem_future,
+    stems_complete,
+    mark_stems_complete,
+    wait_for_pending_writes,
+)
+from makeitdrumless.audio.processing import ensemble_stems
+from makeitdrumless.msst_integration.inference import separate_stems_msst
+
+
+def make_wave(seconds=0.5, sample_rate=44100):
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    tone = 0.5 * np.sin(2 * np.pi * 220.0 * t)
+    return np.stack([tone, -tone]).astype(np.float32)
+
+
+class TestStemStorage(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.stems_dir = os.path.join(self.temp_dir.name, "stems_test")
+
+    def tearDown(self):
+        wait_for_pending_writes()
+        self.temp_dir.cleanup()
+
+    def test_round_trip_every_format(self):
+        wave = make_wave()
+        for fmt, tolerance in (("wav", 1e-3), ("flac", 1e-3), ("f32", 1e-7), ("f16", 1e-3)):
+            path = write_stem(wave, 44100, os.path.join(self.stems_dir, fmt), "other", fmt=fmt)
+            data, sr = read_stem(path)
+            self.assertEqual(sr, 44100)
+            self.assertEqual(data.shape, (wave.shape[1], 2))
+            self.assertLess(float(np.max(np.abs(data - wave.T))), tolerance, fmt)
+
+    def test_compact_formats_are_smaller(self):
+        wave = make_wave(seconds=2.0)
+        sizes = {
+            fmt: os.path.getsize(write_stem(wave, 44100, os.path.join(self.stems_dir, fmt), "other", fmt=fmt, background=False))
+            for fmt in ("wav", "flac", "f16")
+        }
+        self.assertLess(sizes["flac"], sizes["wav"])
+        self.assertLessEqual(sizes["f16"], sizes["wav"] + 256)
+
+    def test_reformat_replaces_stale_stem(self):
+        write_stem(make_wave(), 44100, self.stems_dir, "drums", fmt="wav")
+        write_stem(make_wave(), 44100, self.stems_dir, "drums", fmt="flac")
+        wait_for_pending_writes()
+        self.assertEqual(list_stems(self.stems_dir), {"drums": os.path.join(self.stems_dir, "drums.flac")})
+
+    def test_consumers_read_mixed_formats(self):
+        stems = {
+            "drums": write_stem(make_wave(), 44100, self.stems_dir, "drums", fmt="flac"),
+            "other": write_stem(make_wave(), 44100, self.stems_dir, "other", fmt="f16"),
+        }
+        mark_stems_complete(self.stems_dir, stems)
+
+        # Cache check recognizes FLAC / .npy stems, including one still compressing
+        song = os.path.join(self.temp_dir.name, "song.wav")
+        write_dummy_wav(song)
+        cached = separate_stems_msst(input_audio_path=song, output_folder=self.stems_dir, model_preset="bs_roformer")
+        self.assertEqual(set(cached), {"drums", "other"})
+
+        blended = ensemble_stems(
+            [cached, cached], output_dir=os.path.join(self.temp_dir.name, "stems_ensemble"), stem_format="f32"
+        )
+        self.assertTrue(blended["other"].endswith(".npy"))
+        data, _ = read_stem(blended["other"])
+        self.assertLess(float(np.max(np.abs(data - make_wave().T))), 1e-3)
+
+    def test_unfinished_separation_is_not_a_cache_hit(self):
+        # Stems of an interrupted run are on disk, but the folder was never marked complete
+        write_stem(make_wave(), 44100, self.stems_dir, "drums", fmt="wav", background=False)
+        self.assertFalse(stems_complete(self.stems_dir))
+        song = os.path.join(self.temp_dir.name, "song.wav")
+        write_dummy_wav(song)
+        with self.assertRaises(ImportError):
+            # Gets past the cache check and on to loading MSST (not installed here)
+            separate_stems_msst(input_audio_path=song, output_folder=self.stems_dir, model_preset="bs_roformer")
+
+        mark_stems_complete(self.stems_dir, {"drums": os.path.join(self.stems_dir, "drums.wav")})
+        wait_for_pending_writes()
+        self.assertTrue(stems_complete(self.stems_dir))
+        # Folders from before the flag existed stay valid
+        self.assertTrue(stems_complete(os.path.join(self.temp_dir.name, "legacy")))
+
+    def test_background_writes_are_yielded_as_they_finish(self):
+        release_drums = threading.Event()
+        real_write = stem_io._write_file
+
+        def slow_drums(wave, sample_rate, out_path, fmt):
+            if os.path.basename(out_path).startswith("drums"):
+                release_drums.wait(5)
+            return real_write(wave, sample_rate, out_path, fmt)
+
+        pool = ThreadPoolExecutor(max_workers=3)
+        self.addCleanup(pool.shutdown)
+        with mock.patch.object(stem_io, "_write_file", slow_drums), mock.patch.object(stem_io, "_writer", pool):
+            stems = {name: write_stem(make_wave(), 44100, self.stems_dir, name, fmt="flac")
+                     for name in ("drums", "bass", "other")}
+            self.assertFalse(stem_future(stems["drums"]).done())
+
+            completed = iter_completed(stems)
+            first_two = {next(completed)[0], next(completed)[0]}
+            self.assertEqual(first_two, {"bass", "other"})
+            release_drums.set()
+            self.assertEqual(next(completed)[0], "drums")
+
+        self.assertEqual(set(list_stems(self.stems_dir)), {"drums", "bass", "other"})
+        self.assertTrue(stem_future(stems["drums"]).done())
+
+
+if __name__ == "__main__":
+    unittest.main()
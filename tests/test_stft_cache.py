@@ -0,0 +1,93 @@
+import os
+import sys
+import threading
+import unittest
+
+# Ensure src/ is in sys.path
+src_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src"))
+if src_dir not in sys.path:
+    sys.path.insert(0, src_dir)
+
+try:
+    import torch
+except ImportError:
+    torch = None
+
+from makeitdrumless.msst_integration.stft_cache import SpectralFrontendCache
+
+N_FFT = 512
+HOP = 128
+
+
+class _Frontend(torch.nn.Module if torch else object):
+    """Stand-in model: the magnitude of its STFT front-end, as the MSST spectrogram models compute it."""
+
+    def forward(self, x):
+        window = torch.hann_window(N_FFT)
+        spec = torch.stft(x.reshape(-1, x.shape[-1]), N_FFT, hop_length=HOP, window=window, return_complex=True)
+        return spec.abs()
+
+
+@unittest.skipIf(torch is None, "torch not installed")
+class TestSpectralFrontendCache(unittest.TestCase):
+
+    def setUp(self):
+        self.chunk = torch.randn(1, 2, 8192)
+        self.cache = SpectralFrontendCache()
+
+    def test_second_model_hits_and_gets_the_same_spectrogram(self):
+        first, second = _Frontend(), _Frontend()
+        with self.cache.activate(first):
+            expected = first(self.chunk)
+        with self.cache.activate(second):
+            shared = second(self.chunk)
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 1))
+        self.assertTrue(torch.equal(shared, expected))
+        self.assertTrue(all(entry.device.type == "cpu" for entry in self.cache._entries.values()))
+        self.assertGreater(self.cache.stats()["bytes_used"], 0)
+
+    def test_different_audio_or_settings_miss(self):
+        model = _Frontend()
+        with self.cache.activate(model):
+            model(self.chunk)
+            model(self.chunk + 1e-3)
+            model(self.chunk[..., :4096])
+        self.assertEqual((self.cache.hits, self.cache.misses), (0, 3))
+
+    def test_swapped_channels_and_rows_never_hit(self):
+        model = _Frontend()
+        pair = torch.randn(2, 2, 8192)
+        with self.cache.activate(model):
+            model(pair)
+            swapped = model(pair.flip(1))
+            reordered = model(pair.flip(0))
+            flipped = model(-pair)
+        self.assertEqual(self.cache.hits, 0)
+        self.assertTrue(torch.equal(swapped, _Frontend()(pair.flip(1))))
+        self.assertTrue(torch.equal(reordered, _Frontend()(pair.flip(0))))
+        self.assertTrue(torch.equal(flipped, _Frontend()(-pair)))
+
+    def test_only_the_model_on_the_activating_thread_is_cached(self):
+        model = _Frontend()
+        original = torch.stft
+        with self.cache.activate(model):
+            # This module's 'torch' is patched while active; the torch module itself is not
+            self.assertIs(sys.modules["torch"].stft, original)
+            worker = threading.Thread(target=model, args=(self.chunk,))
+            worker.start()
+            worker.join()
+            self.assertEqual(self.cache.misses + self.cache.hits, 0)
+        model(self.chunk)
+        self.assertEqual(self.cache.misses + self.cache.hits, 0)
+
+    def test_budget_limits_entries(self):
+        cache = SpectralFrontendCache(max_bytes=1)
+        model = _Frontend()
+        with cache.activate(model):
+            model(self.chunk)
+            model(self.chunk)
+        self.assertEqual((cache.hits, cache.misses, cache.rejected), (0, 2, 2))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,78 @@
+import os
+import sys
+import json
+import tempfile
+import unittest
+
+# Ensure src/ is in sys.path
+src_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src"))
+if src_dir not in sys.path:
+    sys.path.insert(0, src_dir)
+
+from makeitdrumless.telemetry import start_run, end_run, stage, record_batch_time, write_batch_report
+
+
+class TestRunTelemetry(unittest.TestCase):
+
+    def tearDown(self):
+        end_run()
+
+    def test_nested_stages_record_their_parent(self):
+        run = start_run("song")
+        with stage("separation", model="scnet"):
+            with stage("model_load"):
+                pass
+            with stage("demix"):
+                pass
+        with stage("encode"):
+            pass
+
+        by_name = {entry["name"]: entry for entry in run.stages}
+        self.assertEqual(by_name["model_load"]["parent"], "separation")
+        self.assertEqual(by_name["demix"]["parent"], "separation")
+        self.assertNotIn("parent", by_name["separation"])
+        self.assertNotIn("parent", by_name["encode"])
+        self.assertEqual(by_name["separation"]["meta"], {"model": "scnet"})
+        self.assertGreaterEqual(
+            by_name["separation"]["seconds"], by_name["model_load"]["seconds"] + by_name["demix"]["seconds"]
+        )
+
+    def test_stage_is_a_no_op_without_a_run(self):
+        with stage("orphan"):
+            pass
+        record_batch_time(1.0, 4)
+
+    def test_json_report_schema(self):
+        run = start_run("song")
+        with stage("demix"):
+            for seconds in (0.4, 0.2, 0.6):
+                record_batch_time(seconds, 2)
+        run.set("model", "scnet_large")
+
+        with tempfile.TemporaryDirectory() as tmp:
+            with open(run.write_json(os.path.join(tmp, "run.json")), encoding="utf-8") as f:
+                report = json.load(f)
+            batch_path = write_batch_report([report, report], os.path.join(tmp, "batch.json"))
+            with open(batch_path, encoding="utf-8") as f:
+                batch = json.load(f)
+
+        self.assertEqual(report["schema_version"], 2)
+        for key in ("label", "started_at", "total_seconds", "host", "metadata", "stages",
+                    "stage_totals", "demix_batches", "peak_rss_bytes", "peak_device_memory_bytes"):
+            self.assertIn(key, report)
+        self.assertEqual(report["metadata"], {"model": "scnet_large"})
+        batches = report["demix_batches"]
+        self.assertEqual(batches["count"], 3)
+        self.assertEqual(batches["chunks"], 6)
+        self.assertAlmostEqual(batches["total"], 1.2)
+        self.assertAlmostEqual(batches["p50"], 0.4)
+        self.assertAlmostEqual(batches["max"], 0.6)
+        self.assertAlmostEqual(batches["seconds_per_chunk"], 0.2)
+
+        self.assertEqual(batch["track_count"], 2)
+        self.assertAlmostEqual(batch["stage_totals"]["demix"], 2 * report["stage_totals"]["demix"])
+        self.assertEqual(len(batch["tracks"]), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
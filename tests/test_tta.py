@@ -0,0 +1,109 @@
+import os
+import sys
+import unittest
+
+import numpy as np
+
+# Ensure src/ is in sys.path
+src_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src"))
+if src_dir not in sys.path:
+    sys.path.insert(0, src_dir)
+
+try:
+    import torch
+    from ml_collections import ConfigDict
+except ImportError:
+    torch = None
+
+from makeitdrumless.msst_integration.tta import plan_variants, apply_flips, parse_tta_flips
+from makeitdrumless.msst_integration.mps_patch import demix, LAST_DEMIX_STATS
+
+CHUNK = 2048
+BATCH = 2
+
+
+class _Linear(torch.nn.Module if torch else object):
+    """Stand-in linear model that mixes the channels symmetrically; records the chunks per batch."""
+
+    def __init__(self):
+        super().__init__()
+        self.batches = []
+
+    def forward(self, x):
+        self.batches.append(x.shape[0])
+        drums = 0.3 * x + 0.1 * x.flip(1)
+        return torch.stack([drums, x - drums], dim=1)
+
+
+def _config(shifts=1, flips=()):
+    return ConfigDict({
+        "training": {"instruments": ["drums", "other"], "target_instrument": None, "use_amp": False},
+        "inference": {
+            # The linear ramps start at zero: a chunk that misses its edge fade leaves a hole at the track ends
+            "chunk_size": CHUNK, "num_overlap": 4, "batch_size": BATCH, "window_shape": "linear",
+            "tta_shifts": shifts, "tta_flips": list(flips),
+        },
+    })
+
+
+class TestBatchedTTA(unittest.TestCase):
+
+    def test_shift_offsets_spread_over_one_hop(self):
+        self.assertEqual(plan_variants(1000), [(0, ())])
+        self.assertEqual([o for o, _ in plan_variants(1000, shifts=4)], [0, 250, 500, 750])
+        self.assertEqual(len(plan_variants(1000, shifts=2, flips=["channels", "polarity"])), 8)
+        # A mono input has no channels to swap
+        self.assertEqual(plan_variants(1000, flips=["channels", "polarity"], channels=1), [(0, ()), (0, ("polarity",))])
+
+    def test_parse_flips(self):
+        self.assertEqual(parse_tta_flips("polarity, channels"), ["polarity", "channels"])
+        self.assertEqual(parse_tta_flips("none"), [])
+        with self.assertRaises(ValueError):
+            parse_tta_flips("pitch")
+
+    @unittest.skipIf(torch is None, "torch not installed")
+    def test_flips_undo_on_stem_outputs(self):
+        x = torch.randn(2, 64)
+        # Stand-in model with a DC offset and a left-channel bias: not channel or polarity symmetric
+        model = lambda a: torch.stack([0.5 * a + 0.1, 0.5 * a * torch.tensor([[1.2], [1.0]])])
+        variants = plan_variants(64, flips=["channels", "polarity"])
+        estimates = [apply_flips(model(apply_flips(x, flips)), flips, channel_axis=-2) for _, flips in variants]
+        average = torch.stack(estimates).mean(dim=0)
+        # The polarity pairs cancel the offset, the channel pairs split the bias between both sides
+        self.assertTrue(torch.allclose(average[0], 0.5 * x, atol=1e-6))
+        self.assertTrue(torch.allclose(average[1], 0.55 * x, atol=1e-6))
+
+
+@unittest.skipIf(torch is None, "torch / ml_collections not installed")
+class TestBatchedTTADemix(unittest.TestCase):
+
+    def _demix(self, mix, model, **config):
+        return demix(_config(**config), model, mix, torch.device("cpu"), model_type="bs_roformer")
+
+    def test_variants_reproduce_the_single_grid(self):
+        rng = np.random.default_rng(0)
+        step = CHUNK // 4
+        # A whole number of hops, a ragged tail, and a track too short for the reflect border
+        for length in (40 * step, 40 * step + 333, 3000):
+            with self.subTest(length=length):
+                mix = (0.2 * rng.standard_normal((2, length))).astype(np.float32)
+                single = self._demix(mix, _Linear())
+
+                model = _Linear()
+                batched = self._demix(mix, model, shifts=3, flips=["channels", "polarity"])
+                variants = len(plan_variants(step, shifts=3, flips=["channels", "polarity"]))
+                self.assertEqual(LAST_DEMIX_STATS["tta_variants"], variants)
+                # Every chunk position's variants share a batch of BATCH positions
+                self.assertEqual(max(model.batches), BATCH * variants)
+                self.assertEqual(sum(model.batches), LAST_DEMIX_STATS["total_chunks"])
+
+                for stem in ("drums", "other"):
+                    self.assertEqual(batched[stem].shape, mix.shape)
+                    np.testing.assert_allclose(batched[stem], single[stem], atol=1e-5)
+                # The model is pointwise, so both reconstruct it exactly up to the track edges
+                np.testing.assert_allclose(batched["drums"], 0.3 * mix + 0.1 * mix[::-1], atol=1e-5)
+                np.testing.assert_allclose(batched["other"], 0.7 * mix - 0.1 * mix[::-1], atol=1e-5)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,102 @@
+import os
+import sys
+import math
+import unittest
+
+import numpy as np
+
+# Ensure src/ is in sys.path
+src_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src"))
+if src_dir not in sys.path:
+    sys.path.insert(0, src_dir)
+
+try:
+    import torch
+    from ml_collections import ConfigDict
+except ImportError:
+    torch = None
+
+from makeitdrumless.msst_integration.windowing import (
+    get_window,
+    default_fade_size,
+    plan_hops,
+    select_cheapest_overlap,
+)
+
+CHUNK = 4096
+
+
+def summed_windows(window: "np.ndarray", step: int, periods: int = 4) -> "np.ndarray":
+    """Overlap-adds copies of window every step samples and returns the fully covered interior."""
+    chunk = len(window)
+    total = 2 * chunk + step * periods
+    coverage = np.zeros(total)
+    for start in range(0, total - chunk + 1, step):
+        coverage[start:start + chunk] += window
+    return coverage[chunk:total - chunk]
+
+
+@unittest.skipIf(torch is None, "torch / ml_collections not installed")
+class TestWindowing(unittest.TestCase):
+
+    def test_constant_overlap_add_shapes(self):
+        for shape, overlap in (("tukey", 2), ("tukey", 4), ("tukey", 8), ("hann", 2)):
+            fade = default_fade_size(CHUNK, overlap, shape)
+            window = get_window(shape, CHUNK, fade).numpy().astype(np.float64)
+            interior = summed_windows(window, CHUNK // overlap)
+            np.testing.assert_allclose(interior, interior[0], rtol=1e-5, err_msg=f"{shape} x{overlap}")
+            self.assertLess(plan_hops(CHUNK, overlap, 10 * CHUNK, shape)["ripple"], 1e-5)
+
+        # MSST's short linear ramps do not sum to a constant, and plan_hops reports it
+        self.assertGreater(plan_hops(CHUNK, 2, 10 * CHUNK, "linear")["ripple"], 0.05)
+
+    def test_window_edges(self):
+        window = get_window("tukey", CHUNK, 1024)
+        self.assertEqual(window.shape, (CHUNK,))
+        self.assertTrue(torch.all(window[1024:-1024] == 1))
+        self.assertTrue(torch.allclose(window[:1024], torch.flip(window[-1024:], dims=[0])))
+        with self.assertRaises(ValueError):
+            get_window("boxcar", CHUNK, 1024)
+
+    def test_chunk_count_at_edge_lengths(self):
+        step = CHUNK // 2
+        border = CHUNK - step
+        for length in (1, CHUNK - 1, CHUNK, 2 * border, 2 * border + 1, 10 * CHUNK + 7):
+            plan = plan_hops(CHUNK, 2, length)
+            padded = length + 2 * border if length > 2 * border else length
+            self.assertEqual(plan["step"], step)
+            self.assertEqual(plan["border"], border)
+            self.assertEqual(plan["num_chunks"], math.ceil(padded / step), length)
+            self.assertAlmostEqual(plan["compute_multiplier"], plan["num_chunks"] * CHUNK / length)
+
+        self.assertEqual(plan_hops(CHUNK, 1, 3 * CHUNK)["num_chunks"], 3)
+        self.assertAlmostEqual(plan_hops(CHUNK, 1, 3 * CHUNK)["compute_multiplier"], 1.0)
+
+    def test_chunk_count_matches_demix(self):
+        from makeitdrumless.msst_integration.mps_patch import demix, LAST_DEMIX_STATS
+
+        config = ConfigDict({
+            "training": {"instruments": ["drums", "other"], "target_instrument": None, "use_amp": False},
+            "inference": {"chunk_size": CHUNK, "num_overlap": 4, "batch_size": 1, "window_shape": "tukey"},
+        })
+        model = lambda x: torch.stack([0.5 * x, 0.5 * x], dim=1)
+        for length in (CHUNK - 1, 2 * (CHUNK - CHUNK // 4) + 1, 5 * CHUNK + 3):
+            mix = np.random.default_rng(length).standard_normal((2, length)).astype(np.float32)
+            out = demix(config, model, mix, torch.device("cpu"), model_type="bs_roformer")
+            self.assertEqual(LAST_DEMIX_STATS["total_chunks"], plan_hops(CHUNK, 4, length, "tukey")["num_chunks"])
+            np.testing.assert_allclose(out["drums"], 0.5 * mix, atol=1e-5)
+
+    def test_select_cheapest_overlap(self):
+        rows = [
+            {"num_overlap": 1, "sdr": 8.9, "seconds": 10.0},
+            {"num_overlap": 2, "sdr": 9.4, "seconds": 18.0},
+            {"num_overlap": 4, "sdr": 9.5, "seconds": 35.0},
+            {"num_overlap": 8, "sdr": None, "seconds": 5.0},
+        ]
+        self.assertEqual(select_cheapest_overlap(rows, 9.3)["num_overlap"], 2)
+        self.assertEqual(select_cheapest_overlap(rows, 8.0)["num_overlap"], 1)
+        self.assertIsNone(select_cheapest_overlap(rows, 10.0))
+
+
+if __name__ == "__main__":
+    unittest.main()